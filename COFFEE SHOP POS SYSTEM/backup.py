@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+import datetime
+import sqlite3
+import threading
+from partitions import default_archive_path
+
+
+def archive_backup_path(backup_path):
+    """The file holding the sales archive of the backup set whose main database is `backup_path`."""
+    return os.path.splitext(backup_path)[0] + '.archive'
+
+
+class BackupService:
+    """Online backups of the POS database using the SQLite backup API.
+
+    Backups run on a background thread with their own connection and copy a limited
+    number of pages per step, pausing between steps so checkouts on the main connection
+    are never held up. Every copy is checked with PRAGMA integrity_check before it
+    replaces the `.partial` file, and only the newest `keep` backups are retained.
+
+    When the sales archive exists it is copied into the same set, next to the main copy
+    (see archive_backup_path), so a backup always holds the shop's full sales history.
+    """
+
+    def __init__(self, db_path, backup_dir=None, keep=7, pages_per_step=64, step_pause=0.005, archive_path=None):
+        self.db_path = db_path
+        self.archive_path = archive_path
+        if backup_dir is None:
+            backup_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'backups')
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending_label = None
+        self.last_backup_path = None
+
+    def _backup_name(self, label):
+        base = os.path.splitext(os.path.basename(self.db_path))[0]
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        return os.path.join(self.backup_dir, f"{base}-{stamp}-{label}.db")
+
+    def request_backup(self, label='manual'):
+        """Start a backup in the background. If one is already running, another is queued behind it."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._pending_label = label
+                return False
+            self._thread = threading.Thread(target=self._worker, args=(label,), daemon=True)
+            self._thread.start()
+            return True
+
+    def _worker(self, label):
+        while label:
+            self.run_backup(label)
+            with self._lock:
+                label, self._pending_label = self._pending_label, None
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _copy(self, source, name, path):
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target, pages=self.pages_per_step, name=name,
+                          progress=lambda status, remaining, total: time.sleep(self.step_pause))
+        finally:
+            target.close()
+
+    def run_backup(self, label='manual'):
+        """Copy the database, and the archive if there is one, in page-limited steps.
+        Returns the backup path, or None on failure."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        final_path = self._backup_name(label)
+        partial_path = final_path + '.partial'
+        with_archive = self.archive_path is not None and os.path.exists(self.archive_path)
+        archive_final = archive_backup_path(final_path)
+        archive_partial = archive_final + '.partial'
+        partial_paths = (partial_path, archive_partial) if with_archive else (partial_path,)
+        started = time.perf_counter()
+        try:
+            source = sqlite3.connect(self.db_path)
+            try:
+                if with_archive:
+                    source.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+                # Both copies come from one read transaction, so a month moved into the
+                # archive while the backup runs is in exactly one of them
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM main.sqlite_master").fetchone()
+                self._copy(source, 'main', partial_path)
+                if with_archive:
+                    source.execute("SELECT COUNT(*) FROM archive.sqlite_master").fetchone()
+                    self._copy(source, 'archive', archive_partial)
+            finally:
+                source.close()
+
+            for path in partial_paths:
+                if not verify_backup(path):
+                    print(f"Backup failed integrity check: {path}")
+                    for partial in partial_paths:
+                        os.remove(partial)
+                    return None
+
+            # The archive goes in place first, so a listed backup always has its archive
+            if with_archive:
+                os.replace(archive_partial, archive_final)
+            os.replace(partial_path, final_path)
+            self.last_backup_path = final_path
+            self.rotate()
+            print(f"Backup saved to {final_path} in {time.perf_counter() - started:.2f}s")
+            return final_path
+        except (sqlite3.Error, OSError) as e:
+            print(f"Backup error: {e}")
+            for partial in partial_paths:
+                if os.path.exists(partial):
+                    os.remove(partial)
+            return None
+
+    def list_backups(self):
+        """Backup file paths, newest first."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        paths = [os.path.join(self.backup_dir, name) for name in os.listdir(self.backup_dir) if name.endswith('.db')]
+        # File names embed the backup timestamp, so name order is age order
+        return sorted(paths, reverse=True)
+
+    def rotate(self):
+        for path in self.list_backups()[self.keep:]:
+            for set_path in (path, archive_backup_path(path)):
+                try:
+                    if os.path.exists(set_path):
+                        os.remove(set_path)
+                except OSError as e:
+                    print(f"Could not remove old backup {set_path}: {e}")
+
+
+def verify_backup(path):
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def restore_backup(backup_path, target_conn, archive_path=None):
+    """Overwrite the database behind `target_conn` with a verified backup. Returns True on success.
+
+    With `archive_path` (which must not be attached to `target_conn`) the archive file is
+    replaced by the archive of the same set. A set taken before anything was archived leaves an
+    empty archive, so no archived month outlives the restore next to hot tables that disagree.
+    """
+    if not os.path.exists(backup_path) or not verify_backup(backup_path):
+        return False
+    archive_copy = archive_backup_path(backup_path)
+    has_archive = os.path.exists(archive_copy)
+    if has_archive and not verify_backup(archive_copy):
+        return False
+    source = sqlite3.connect(backup_path)
+    try:
+        target_conn.commit()
+        source.backup(target_conn)
+    finally:
+        source.close()
+    if archive_path and archive_path != ':memory:' and (has_archive or os.path.exists(archive_path)):
+        source = sqlite3.connect(archive_copy if has_archive else ':memory:')
+        target = sqlite3.connect(archive_path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+    return True
+
+
+if __name__ == '__main__':
+    # python backup.py list|backup|restore <backup file> [db path]
+    if len(sys.argv) < 2 or sys.argv[1] not in ('list', 'backup', 'restore'):
+        print("Usage: python backup.py list|backup|restore <backup file> [db path]")
+        sys.exit(1)
+    command = sys.argv[1]
+    if command == 'restore':
+        if len(sys.argv) < 3:
+            print("Usage: python backup.py restore <backup file> [db path]")
+            sys.exit(1)
+        db_path = sys.argv[3] if len(sys.argv) > 3 else 'coffee_pos.db'
+        conn = sqlite3.connect(db_path)
+        ok = restore_backup(sys.argv[2], conn, default_archive_path(db_path))
+        conn.close()
+        print("Restore complete." if ok else "Restore failed: backup missing or corrupt.")
+        sys.exit(0 if ok else 1)
+
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'coffee_pos.db'
+    service = BackupService(db_path, archive_path=default_archive_path(db_path))
+    if command == 'backup':
+        sys.exit(0 if service.run_backup('manual') else 1)
+    for path in service.list_backups():
+        print(path)
@@ -0,0 +1,164 @@
+"""Micro-benchmarks for hot paths of the POS.
+
+Run with: python benchmarks.py
+"""
+import json
+import random
+import datetime
+import time
+from database import DatabaseManager
+from forecast import DemandForecaster
+from promotions import Promotion, PromotionEngine, CompiledPromotion
+from records import MenuItem, OrderLine
+from search import MenuIndex
+
+
+def best_time(run, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def make_promotions(count, item_names, categories, seed=7):
+    """`count` active promotions spread over every scope, a third of them time-limited."""
+    rng = random.Random(seed)
+    promotions = []
+    for promotion_id in range(1, count + 1):
+        scope = rng.choice(('item', 'item', 'category', 'combo', 'order'))
+        if scope == 'item':
+            target = rng.choice(item_names)
+        elif scope == 'category':
+            target = rng.choice(categories)
+        elif scope == 'combo':
+            target = json.dumps(rng.sample(item_names, 2))
+        else:
+            target = None
+        window = ('14:00', '17:00') if promotion_id % 3 == 0 else (None, None)
+        discount_type = rng.choice(('percent', 'amount'))
+        # 5-15 percent, or 5-15 pesos off in centavos
+        value = rng.choice((5, 10, 15)) * (1 if discount_type == 'percent' else 100)
+        promotions.append(Promotion(promotion_id, f"Promo {promotion_id}", scope, target, discount_type, value,
+                                    rng.choice((1, 1, 2)), rng.choice((0, 50000)), *window, None, 1))
+    return promotions
+
+
+def full_rescan_discount(rules, order, moment):
+    """Reference evaluation: check every compiled rule against the whole order from scratch."""
+    active = [rule for rule in rules if rule.active_at(moment)]
+    discount = 0
+    for line in order.values():
+        amounts = [rule.discount_on(line.subtotal, line.qty) for rule in active
+                   if line.qty >= rule.min_qty and ((rule.scope == 'item' and rule.target == line.name)
+                                                    or (rule.scope == 'category' and rule.target == line.category))]
+        discount += max(amounts, default=0)
+    counts, prices = {}, {}
+    for line in order.values():
+        counts[line.name] = counts.get(line.name, 0) + line.qty
+        prices[line.name] = line.price
+    for rule in active:
+        if rule.scope == 'combo':
+            sets = min(counts.get(name, 0) // rule.items.count(name) for name in set(rule.items))
+            if sets >= rule.min_qty:
+                discount += rule.discount_on(sum(prices[name] for name in rule.items) * sets, sets)
+    subtotal = sum(line.subtotal for line in order.values())
+    discount += max((rule.discount_on(subtotal - discount, 1) for rule in active
+                     if rule.scope == 'order' and subtotal - discount >= rule.min_spend), default=0)
+    return min(discount, subtotal)
+
+
+def bench_promotions(rule_count=500, line_count=50, repeats=20):
+    item_names = [f"Item {n}" for n in range(200)]
+    categories = [f"Category {n}" for n in range(12)]
+    promotions = make_promotions(rule_count, item_names, categories)
+    engine = PromotionEngine(promotions)
+    rules = [CompiledPromotion(p) for p in promotions if p.active]
+    moment = datetime.datetime(2025, 3, 3, 15, 30)
+    rng = random.Random(11)
+    adds = [(rng.randrange(len(item_names)),) for _ in range(line_count)]
+
+    def incremental():
+        session = engine.start_order(moment)
+        order = {}
+        for (index,) in adds:
+            line = order.get(index)
+            line = line._replace(qty=line.qty + 1) if line else OrderLine(item_names[index], 12000, 1,
+                                                                           categories[index % len(categories)])
+            order[index] = line
+            session.update(index, line)
+            session.discount
+
+    def rescan():
+        order = {}
+        for (index,) in adds:
+            line = order.get(index)
+            line = line._replace(qty=line.qty + 1) if line else OrderLine(item_names[index], 12000, 1,
+                                                                           categories[index % len(categories)])
+            order[index] = line
+            full_rescan_discount(rules, order, moment)
+
+    return {'rules': rule_count, 'lines': line_count,
+            'incremental_ms': best_time(incremental, repeats) * 1000,
+            'full_rescan_ms': best_time(rescan, max(repeats // 4, 1)) * 1000}
+
+
+def bench_menu_search(item_count=5000, repeats=20):
+    """Average time of one search-bar keystroke against a menu of `item_count` items."""
+    rng = random.Random(5)
+    words = ['Iced', 'Hot', 'Oat', 'Ube', 'Caramel', 'Vanilla', 'Latte', 'Mocha', 'Tea', 'Tart', 'Cake', 'Bun']
+    items = [MenuItem(n, f"{' '.join(rng.sample(words, 3))} {n}", 10000, 10, 'Coffee', 5)
+             for n in range(1, item_count + 1)]
+    index = MenuIndex(items)
+    keystrokes = ['c', 'ca', 'car', 'cara', 'caramel', 'caramel l', 'caramel la', '1', '12', '123']
+
+    def type_queries():
+        for query in keystrokes:
+            index.search(query)
+
+    return {'items': item_count, 'keystroke_ms': best_time(type_queries, repeats) * 1000 / len(keystrokes)}
+
+
+def fill_daily_rollup(conn, item_count, days, last_day, seed=3):
+    """Daily sales_rollup rows for `item_count` items over the `days` days up to `last_day`, with a weekly pattern."""
+    rng = random.Random(seed)
+    weekday_pattern = (0.8, 0.8, 0.9, 1.0, 1.3, 1.6, 1.2)
+    base = [rng.uniform(0.5, 40) for _ in range(item_count)]
+    rows = []
+    for offset in range(days):
+        day = last_day - datetime.timedelta(days=offset)
+        for n in range(item_count):
+            qty = round(base[n] * weekday_pattern[day.weekday()] * rng.uniform(0.7, 1.3))
+            if qty:
+                rows.append(('day', day.strftime('%Y-%m-%d'), f"Item {n}", f"Category {n % 12}", qty, qty * 12000))
+    conn.executemany("INSERT INTO sales_rollup (bucket, bucket_start, item_name, category, quantity, revenue) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+
+
+def bench_forecast(item_count=500, days=365, repeats=5):
+    """Time to forecast every item's demand for a day from a year of daily sales (uncached)."""
+    db = DatabaseManager(':memory:')
+    day = datetime.date(2025, 3, 3)
+    fill_daily_rollup(db.conn, item_count, days, day - datetime.timedelta(days=1))
+    forecaster = DemandForecaster(db.conn, history_days=days)
+
+    def forecast():
+        forecaster.invalidate()
+        forecaster.forecast(day)
+
+    return {'items': item_count, 'days': days, 'forecast_ms': best_time(forecast, repeats) * 1000}
+
+
+if __name__ == '__main__':
+    for rules in (100, 500, 1000):
+        result = bench_promotions(rule_count=rules)
+        print(f"promotions: {result['rules']} rules, {result['lines']} adds -> "
+              f"incremental {result['incremental_ms']:.2f} ms, full rescan {result['full_rescan_ms']:.2f} ms")
+    for items in (1000, 5000, 20000):
+        result = bench_menu_search(item_count=items)
+        print(f"menu search: {result['items']} items -> {result['keystroke_ms']:.3f} ms per keystroke")
+    for items in (100, 500, 1000):
+        result = bench_forecast(item_count=items)
+        print(f"demand forecast: {result['items']} items x {result['days']} days -> {result['forecast_ms']:.1f} ms")
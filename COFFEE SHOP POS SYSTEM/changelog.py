@@ -0,0 +1,231 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Tracked table -> the columns recorded with each insert or update
+TRACKED_COLUMNS = {
+    'menu': ('id', 'name', 'price', 'stock', 'category', 'reorder_level'),
+    'sales': ('id', 'item_name', 'category', 'quantity', 'price', 'total', 'sale_date', 'receipt_id', 'menu_id'),
+    'receipts': ('id', 'receipt_uuid', 'sale_date', 'total', 'tax', 'service_charge', 'items_json', 'created_at',
+                 'refunded'),
+    # Never the password hash: the log is read by other machines
+    'users': ('id', 'username', 'role', 'created_at'),
+}
+
+# Changes returned per batch by ChangeLog.stream
+CHANGE_BATCH_SIZE = 500
+
+
+class Change(NamedTuple):
+    seq: int
+    table_name: str
+    op: str
+    row_id: int
+    # Column values after an insert or update; None for a delete
+    row: dict
+    changed_at: str
+
+
+def _change_row(cursor, row):
+    seq, table_name, op, row_id, row_json, changed_at = row
+    return Change(seq, table_name, op, row_id, json.loads(row_json) if row_json else None, changed_at)
+
+
+def _trigger_sql(table, op):
+    columns = TRACKED_COLUMNS[table]
+    if op == 'delete':
+        event, row_id, row_json = 'DELETE', 'OLD.id', 'NULL'
+    else:
+        event, row_id = op.upper(), 'NEW.id'
+        row_json = "json_object(" + ", ".join(f"'{c}', NEW.{c}" for c in columns) + ")"
+    return (f"CREATE TRIGGER IF NOT EXISTS change_log_{table}_{op} AFTER {event} ON {table} "
+            f"WHEN (SELECT paused FROM change_log_state) = 0 AND EXISTS (SELECT 1 FROM change_log_consumers) "
+            f"BEGIN INSERT INTO change_log (table_name, op, row_id, row_json, changed_at) "
+            f"VALUES ('{table}', '{op}', {row_id}, {row_json}, datetime('now')); END")
+
+
+class ChangeLog:
+    """Trigger-maintained log of every insert, update and delete on the tracked tables.
+
+    Each change gets the next `seq` (AUTOINCREMENT, so sequence numbers are never reused,
+    even after compaction). A consumer such as a back-office sync streams the changes after
+    the last seq it applied, acknowledges what it has stored, and `compact` drops entries
+    every registered consumer has acknowledged. Nothing is logged while no consumer is
+    registered, so a register that nobody syncs from does not grow the log. A new consumer
+    first `register`s, then copies the tables and streams from the seq `register` returned.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def install(self):
+        """Create the log tables and triggers (idempotent; part of DatabaseManager's schema set-up, no commit)."""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                op TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                row_json TEXT,
+                changed_at TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS change_log_consumers (
+                consumer TEXT PRIMARY KEY,
+                acked_seq INTEGER NOT NULL DEFAULT 0,
+                acked_at TEXT
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS change_log_state (id INTEGER PRIMARY KEY CHECK (id = 1), paused INTEGER NOT NULL)")
+        # A pause never outlives the process that set it
+        self.conn.execute("INSERT INTO change_log_state (id, paused) VALUES (1, 0) ON CONFLICT (id) DO UPDATE SET paused = 0")
+        for table in TRACKED_COLUMNS:
+            for op in ('insert', 'update', 'delete'):
+                # Recreated every time so the triggers pick up columns added since they were made
+                self.conn.execute(f"DROP TRIGGER IF EXISTS change_log_{table}_{op}")
+                self.conn.execute(_trigger_sql(table, op))
+        # Logs written before passwords were left out of the tracked columns
+        self.conn.execute("UPDATE change_log SET row_json = json_remove(row_json, '$.password') "
+                          "WHERE table_name = 'users' AND json_extract(row_json, '$.password') IS NOT NULL")
+
+    @contextmanager
+    def paused(self):
+        """Do not log changes made inside the block, e.g. rows moved to the archive rather than deleted."""
+        self.conn.execute("UPDATE change_log_state SET paused = 1")
+        self.conn.commit()
+        try:
+            yield
+        finally:
+            self.conn.execute("UPDATE change_log_state SET paused = 0")
+            self.conn.commit()
+
+    def latest_seq(self):
+        """The seq of the newest change, 0 if nothing was ever logged."""
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        return row[0] if row else 0
+
+    def oldest_seq(self):
+        """The seq of the oldest change still in the log, None if the log is empty."""
+        return self.conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+
+    def changes_since(self, seq, limit=CHANGE_BATCH_SIZE, table_name=None):
+        """Up to `limit` changes after `seq`, oldest first, optionally of one table only."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = _change_row
+        if table_name is not None:
+            return cursor.execute("SELECT seq, table_name, op, row_id, row_json, changed_at FROM change_log "
+                                  "WHERE seq > ? AND table_name = ? ORDER BY seq LIMIT ?",
+                                  (seq, table_name, limit)).fetchall()
+        return cursor.execute("SELECT seq, table_name, op, row_id, row_json, changed_at FROM change_log "
+                              "WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)).fetchall()
+
+    def stream(self, since_seq=0, batch_size=CHANGE_BATCH_SIZE, table_name=None):
+        """Yield every change after `since_seq` as lists of at most `batch_size` Changes."""
+        while True:
+            batch = self.changes_since(since_seq, batch_size, table_name)
+            if not batch:
+                return
+            yield batch
+            since_seq = batch[-1].seq
+
+    def register(self, consumer):
+        """Start logging changes for `consumer` if it is new. Returns the seq it has acknowledged:
+        for a new consumer the latest seq, after which its changes are kept."""
+        try:
+            self.conn.execute("INSERT INTO change_log_consumers (consumer, acked_seq, acked_at) "
+                              "VALUES (?, ?, datetime('now')) ON CONFLICT (consumer) DO NOTHING",
+                              (consumer, self.latest_seq()))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error registering change log consumer {consumer}: {e}")
+        return self.acknowledged(consumer)
+
+    def acknowledge(self, consumer, seq):
+        """Record that `consumer` has applied every change up to `seq`. An ack never moves backwards."""
+        try:
+            self.conn.execute("""
+                INSERT INTO change_log_consumers (consumer, acked_seq, acked_at) VALUES (?, ?, datetime('now'))
+                ON CONFLICT (consumer) DO UPDATE
+                SET acked_seq = MAX(acked_seq, excluded.acked_seq), acked_at = excluded.acked_at
+            """, (consumer, seq))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error acknowledging changes for {consumer}: {e}")
+            return False
+
+    def acknowledged(self, consumer):
+        row = self.conn.execute("SELECT acked_seq FROM change_log_consumers WHERE consumer = ?", (consumer,)).fetchone()
+        return row[0] if row else 0
+
+    def compact(self):
+        """Delete the changes every registered consumer has acknowledged. Returns the number deleted.
+        With no consumers registered nobody can read the log and all of it is deleted."""
+        try:
+            cursor = self.conn.execute("DELETE FROM change_log WHERE seq <= "
+                                       "COALESCE((SELECT MIN(acked_seq) FROM change_log_consumers), seq)")
+            self.conn.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error compacting the change log: {e}")
+            return 0
+
+
+class OrderOutbox:
+    """Orders a register has taken but the replication hub has not confirmed yet.
+
+    One row per receipt, written in the checkout's transaction on the register's own
+    database, so taking orders never waits on the network and no stored order is missed. The sync agent sends the oldest rows and
+    removes them once the hub has stored them (or reports them as already stored).
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def install(self):
+        """Create the outbox table (idempotent, no commit)."""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS replication_outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                receipt_uuid TEXT NOT NULL UNIQUE,
+                payload_json TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+
+    def insert(self, receipt_uuid, payload):
+        """Queue an order (no commit), e.g. inside the checkout's own transaction."""
+        self.conn.execute("INSERT OR IGNORE INTO replication_outbox (receipt_uuid, payload_json, created_at) "
+                          "VALUES (?, ?, datetime('now'))", (receipt_uuid, json.dumps(payload)))
+
+    def add(self, receipt_uuid, payload):
+        try:
+            self.insert(receipt_uuid, payload)
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error queueing order {receipt_uuid} for the hub: {e}")
+            return False
+
+    def pending(self, limit=CHANGE_BATCH_SIZE):
+        """The oldest `limit` unconfirmed orders as payload dicts."""
+        return [json.loads(row[0]) for row in self.conn.execute(
+            "SELECT payload_json FROM replication_outbox ORDER BY seq LIMIT ?", (limit,))]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM replication_outbox").fetchone()[0]
+
+    def pending_quantities(self):
+        """{item name: quantity} sold in the unconfirmed orders."""
+        quantities = {}
+        for (payload_json,) in self.conn.execute("SELECT payload_json FROM replication_outbox"):
+            for name, _, qty, _ in json.loads(payload_json)['items']:
+                quantities[name] = quantities.get(name, 0) + qty
+        return quantities
+
+    def remove(self, receipt_uuids):
+        """Drop confirmed orders (no commit)."""
+        self.conn.executemany("DELETE FROM replication_outbox WHERE receipt_uuid = ?",
+                              [(receipt_uuid,) for receipt_uuid in receipt_uuids])
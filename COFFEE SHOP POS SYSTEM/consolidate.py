@@ -0,0 +1,376 @@
+import os
+import sys
+import datetime
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from database import SCHEMA_VERSION
+from money import format_money
+from partitions import default_archive_path
+
+# Rows copied per transaction while syncing a store. Each batch commits together with the
+# store's new high-water mark, so an interrupted sync resumes where it stopped.
+SYNC_BATCH_ROWS = 50000
+
+# Central table -> the store columns copied into it. Every table is keyed by the store's own
+# AUTOINCREMENT id, which only grows, so "id > high-water mark" finds the rows not yet copied.
+CONSOLIDATED_COLUMNS = {
+    'sales': ('id', 'item_name', 'category', 'quantity', 'price', 'total', 'sale_date'),
+    'receipts': ('id', 'receipt_uuid', 'sale_date', 'total', 'items_json', 'created_at', 'tax', 'service_charge',
+                 'refunded'),
+    'eod_summary': ('id', 'report_date', 'total_revenue', 'top_items_json', 'low_stock_json'),
+}
+
+# Central key of each table (besides store_id); a row copied again replaces the earlier copy
+CONFLICT_KEYS = {'sales': 'id', 'receipts': 'receipt_uuid', 'eod_summary': 'report_date'}
+
+# Columns compared to tell whether the store row at a high-water mark is still the row that was copied
+MARK_KEY_COLUMNS = {
+    'sales': ('sale_date', 'item_name', 'quantity'),
+    'receipts': ('receipt_uuid',),
+    'eod_summary': ('report_date',),
+}
+
+CENTRAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS stores (
+        store_id TEXT PRIMARY KEY,
+        db_path TEXT NOT NULL,
+        last_synced_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS store_marks (
+        store_id TEXT NOT NULL,
+        source_table TEXT NOT NULL,
+        last_id INTEGER NOT NULL,
+        PRIMARY KEY (store_id, source_table)
+    );
+    CREATE TABLE IF NOT EXISTS sales (
+        store_id TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        item_name TEXT NOT NULL,
+        category TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        price INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        sale_date TEXT NOT NULL,
+        PRIMARY KEY (store_id, id)
+    );
+    CREATE TABLE IF NOT EXISTS receipts (
+        store_id TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        receipt_uuid TEXT NOT NULL,
+        sale_date TEXT NOT NULL,
+        total INTEGER NOT NULL,
+        items_json TEXT NOT NULL,
+        created_at TEXT,
+        tax INTEGER,
+        service_charge INTEGER,
+        refunded INTEGER,
+        PRIMARY KEY (store_id, receipt_uuid)
+    );
+    CREATE TABLE IF NOT EXISTS eod_summary (
+        store_id TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        report_date TEXT NOT NULL,
+        total_revenue INTEGER NOT NULL,
+        top_items_json TEXT,
+        low_stock_json TEXT,
+        PRIMARY KEY (store_id, report_date)
+    );
+    CREATE INDEX IF NOT EXISTS idx_sales_store_date ON sales (store_id, sale_date);
+    CREATE INDEX IF NOT EXISTS idx_receipts_store_date ON receipts (store_id, sale_date);
+"""
+
+
+class StoreConsolidator:
+    """Incrementally merges the sales, receipts and EOD summaries of many store databases
+    into one central reporting database.
+
+    Each store is attached on its own while it syncs and detached afterwards, so any number
+    of store files can be consolidated without reaching SQLite's attached database limit.
+    Rows are copied with INSERT ... SELECT inside SQLite, in id order and in batches, and the
+    per-store, per-table high-water mark moves forward in the same transaction as each batch.
+    A sync therefore only reads the rows added since the last one, even for very large
+    store files. Months a store has moved to its archive file are read from the partitions.
+
+    Rows that change after they were copied are caught separately: receipts refunded since
+    (only the store's hot receipts can be refunded) are copied again, and a store restored from
+    a backup, which hands out ids at or below its marks again, has its marks rewound to the
+    last row the store and the central copy still agree on.
+    """
+
+    def __init__(self, central_path, batch_rows=SYNC_BATCH_ROWS):
+        self.central_path = central_path
+        self.batch_rows = batch_rows
+        self.conn = sqlite3.connect(central_path)
+        if central_path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(CENTRAL_SCHEMA)
+        if 'refunded' not in self._columns('main', 'receipts'):
+            self.conn.execute("ALTER TABLE receipts ADD COLUMN refunded INTEGER")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def add_store(self, store_id, db_path):
+        """Register (or move) a store. Its high-water marks are kept if it was registered before."""
+        try:
+            self.conn.execute("INSERT INTO stores (store_id, db_path) VALUES (?, ?) "
+                              "ON CONFLICT (store_id) DO UPDATE SET db_path = excluded.db_path",
+                              (store_id, os.path.abspath(db_path)))
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error registering store {store_id}: {e}")
+            return False
+
+    def stores(self):
+        """[(store_id, db_path, last_synced_at)] for every registered store."""
+        return self.conn.execute("SELECT store_id, db_path, last_synced_at FROM stores ORDER BY store_id").fetchall()
+
+    def high_water_marks(self, store_id):
+        """{table: last copied id} for a store; tables never synced are missing."""
+        return dict(self.conn.execute("SELECT source_table, last_id FROM store_marks WHERE store_id = ?", (store_id,)))
+
+    def _columns(self, schema, table):
+        return [row[1] for row in self.conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+    def _sources(self, table, archive_attached):
+        """Store tables holding rows of `table`: archived monthly partitions first, then the hot table."""
+        sources = []
+        if archive_attached and table != 'eod_summary':
+            months = [row[0] for row in self.conn.execute("SELECT month FROM store_archive.partitions ORDER BY month")]
+            sources += [f"store_archive.{table}_{month.replace('-', '_')}" for month in months]
+        return sources + [f"store.{table}"]
+
+    def _copy(self, store_id, table, source, mark):
+        """Copy the rows of `source` above `mark` in batches. Returns (rows copied, new mark)."""
+        schema, name = source.split('.')
+        present = set(self._columns(schema, name))
+        if 'id' not in present:
+            return 0, mark
+        columns = CONSOLIDATED_COLUMNS[table]
+        select = ", ".join(c if c in present else f"NULL AS {c}" for c in columns)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != CONFLICT_KEYS[table])
+        copied = 0
+        while True:
+            last = self.conn.execute(f"SELECT MAX(id) FROM (SELECT id FROM {source} WHERE id > ? ORDER BY id LIMIT ?)",
+                                     (mark, self.batch_rows)).fetchone()[0]
+            if last is None:
+                return copied, mark
+            cursor = self.conn.execute(
+                f"INSERT INTO main.{table} (store_id, {', '.join(columns)}) "
+                f"SELECT ?, {select} FROM {source} WHERE id > ? AND id <= ? "
+                f"ON CONFLICT (store_id, {CONFLICT_KEYS[table]}) DO UPDATE SET {updates}", (store_id, mark, last))
+            self._set_mark(store_id, table, last)
+            self.conn.commit()
+            copied += cursor.rowcount
+            mark = last
+
+    def _set_mark(self, store_id, table, last_id):
+        self.conn.execute("INSERT INTO store_marks (store_id, source_table, last_id) VALUES (?, ?, ?) "
+                          "ON CONFLICT (store_id, source_table) DO UPDATE SET last_id = excluded.last_id",
+                          (store_id, table, last_id))
+
+    def _checked_mark(self, store_id, table, sources, mark):
+        """The mark to resume `table` from.
+
+        A store restored from a backup goes back to the backup's AUTOINCREMENT sequence and
+        issues ids at or below the mark again. That shows as a sequence below the mark, or as a
+        store row at the mark that differs from its copy; the mark is then rewound to the last
+        row both still agree on and the copies above it are dropped, to be copied again.
+        """
+        if not mark:
+            return mark
+        row = self.conn.execute("SELECT seq FROM store.sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        issued = row[0] if row else 0
+        keys = MARK_KEY_COLUMNS[table]
+        rows = " UNION ALL ".join(f"SELECT id, {', '.join(keys)} FROM {source}" for source in sources)
+        matching = (f"FROM ({rows}) s JOIN main.{table} c ON c.store_id = ? AND c.id = s.id AND "
+                    + " AND ".join(f"c.{key} IS s.{key}" for key in keys))
+        if issued >= mark:
+            at_mark = self.conn.execute(f"SELECT EXISTS (SELECT 1 FROM ({rows}) WHERE id = ?)", (mark,)).fetchone()[0]
+            # Rows deleted from the store (e.g. a cleared sales history) leave nothing to compare
+            if not at_mark or self.conn.execute(f"SELECT EXISTS (SELECT 1 {matching} WHERE s.id = ?)",
+                                                (store_id, mark)).fetchone()[0]:
+                return mark
+        agreed = self.conn.execute(f"SELECT MAX(s.id) {matching} WHERE s.id <= ?",
+                                   (store_id, min(mark, issued))).fetchone()[0] or 0
+        self.conn.execute(f"DELETE FROM main.{table} WHERE store_id = ? AND id > ?", (store_id, agreed))
+        self._set_mark(store_id, table, agreed)
+        self.conn.commit()
+        print(f"Store {store_id} reissued {table} ids after {agreed}; copying them again.")
+        return agreed
+
+    def _copy_refunds(self, store_id, mark):
+        """Copy again the receipts at or below `mark` whose refunded amount changed since they were
+        copied. Returns the number of receipts updated."""
+        if 'refunded' not in self._columns('store', 'receipts'):
+            return 0
+        columns = ', '.join(CONSOLIDATED_COLUMNS['receipts'])
+        cursor = self.conn.execute(
+            f"INSERT INTO main.receipts (store_id, {columns}) SELECT ?, {columns} FROM store.receipts "
+            "WHERE refunded > 0 AND id <= ? "
+            "ON CONFLICT (store_id, receipt_uuid) DO UPDATE SET refunded = excluded.refunded "
+            "WHERE receipts.refunded IS NOT excluded.refunded", (store_id, mark))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def sync_store(self, store_id):
+        """Copy everything a store added or refunded since its last sync.
+        Returns {table: rows copied} or None on error."""
+        row = self.conn.execute("SELECT db_path FROM stores WHERE store_id = ?", (store_id,)).fetchone()
+        if row is None or not os.path.exists(row[0]):
+            print(f"Store {store_id} is not registered or its database is missing.")
+            return None
+        db_path = row[0]
+        archive_path = default_archive_path(db_path)
+        self.conn.execute("ATTACH DATABASE ? AS store", (db_path,))
+        archive_attached = False
+        try:
+            if self.conn.execute("PRAGMA store.user_version").fetchone()[0] < SCHEMA_VERSION:
+                print(f"Store {store_id} has an out-of-date schema; open it in the POS once to upgrade it "
+                      f"before consolidating.")
+                return None
+            if os.path.exists(archive_path):
+                self.conn.execute("ATTACH DATABASE ? AS store_archive", (archive_path,))
+                archive_attached = True
+            marks = self.high_water_marks(store_id)
+            copied = {}
+            for table in CONSOLIDATED_COLUMNS:
+                sources = self._sources(table, archive_attached)
+                mark = self._checked_mark(store_id, table, sources, marks.get(table, 0))
+                copied[table] = 0
+                for source in sources:
+                    rows, mark = self._copy(store_id, table, source, mark)
+                    copied[table] += rows
+                if table == 'receipts':
+                    copied[table] += self._copy_refunds(store_id, mark)
+            self.conn.execute("UPDATE stores SET last_synced_at = datetime('now') WHERE store_id = ?", (store_id,))
+            self.conn.commit()
+            return copied
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Error consolidating store {store_id}: {e}")
+            return None
+        finally:
+            if archive_attached:
+                self.conn.execute("DETACH DATABASE store_archive")
+            self.conn.execute("DETACH DATABASE store")
+
+    def sync_all(self):
+        """Sync every registered store. Returns {store_id: {table: rows copied} or None}."""
+        return {store_id: self.sync_store(store_id) for store_id, _, _ in self.stores()}
+
+
+class ConsolidatedReport:
+    """Sales across stores for a date range. Amounts are int centavos."""
+
+    def __init__(self, by_store, top_items, category_revenue, daily_revenue):
+        # DataFrame indexed by store: orders, quantity, revenue
+        self.by_store = by_store
+        # Series: item name -> quantity sold, largest first
+        self.top_items = top_items
+        # Series: category -> revenue
+        self.category_revenue = category_revenue
+        # DataFrame: one row per day, one column per store, revenue
+        self.daily_revenue = daily_revenue
+
+    @property
+    def empty(self):
+        return self.by_store.empty or int(self.by_store['revenue'].sum()) == 0
+
+
+def _store_report(job):
+    """Aggregate one store's rows in the central database. Runs in a worker process."""
+    central_path, store_id, start, end = job
+    conn = sqlite3.connect(central_path)
+    try:
+        params = (store_id, start, end)
+        items = conn.execute("SELECT item_name, category, SUM(quantity), SUM(total) FROM sales "
+                             "WHERE store_id = ? AND sale_date >= ? AND sale_date < ? "
+                             "GROUP BY item_name, category", params).fetchall()
+        days = conn.execute("SELECT substr(sale_date, 1, 10), SUM(total) FROM sales "
+                            "WHERE store_id = ? AND sale_date >= ? AND sale_date < ? GROUP BY 1", params).fetchall()
+        orders = conn.execute("SELECT COUNT(*) FROM receipts WHERE store_id = ? AND sale_date >= ? AND sale_date < ?",
+                              params).fetchone()[0]
+        return store_id, items, days, orders
+    finally:
+        conn.close()
+
+
+def consolidated_report(central_path, start_date, end_date, workers=None, top_n=10):
+    """Build a ConsolidatedReport for sales from `start_date` through `end_date` (dates, inclusive).
+
+    Each store is aggregated by its own worker process reading the central database, and only
+    the small per-store aggregates come back to be merged. With one worker or one store the
+    work runs in this process.
+    """
+    start = start_date.strftime('%Y-%m-%d')
+    end = (end_date + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+    conn = sqlite3.connect(central_path)
+    try:
+        store_ids = [row[0] for row in conn.execute("SELECT store_id FROM stores ORDER BY store_id")]
+    finally:
+        conn.close()
+    jobs = [(central_path, store_id, start, end) for store_id in store_ids]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_store_report, jobs))
+    else:
+        results = [_store_report(job) for job in jobs]
+
+    store_rows, item_frames, day_frames = [], [], []
+    for store_id, items, days, orders in results:
+        items_frame = pd.DataFrame(items, columns=['item_name', 'category', 'quantity', 'revenue'])
+        store_rows.append((store_id, orders, int(items_frame['quantity'].sum()), int(items_frame['revenue'].sum())))
+        item_frames.append(items_frame)
+        day_frames.append(pd.DataFrame(days, columns=['day', 'revenue']).assign(store_id=store_id))
+
+    by_store = pd.DataFrame(store_rows, columns=['store_id', 'orders', 'quantity', 'revenue']).set_index('store_id')
+    items_frame = pd.concat(item_frames, ignore_index=True) if item_frames else pd.DataFrame(
+        columns=['item_name', 'category', 'quantity', 'revenue'])
+    days_frame = pd.concat(day_frames, ignore_index=True) if day_frames else pd.DataFrame(
+        columns=['day', 'revenue', 'store_id'])
+    top_items = items_frame.groupby('item_name')['quantity'].sum().sort_values(ascending=False).head(top_n)
+    category_revenue = items_frame.groupby('category')['revenue'].sum().sort_values(ascending=False)
+    daily_revenue = days_frame.pivot_table(index='day', columns='store_id', values='revenue',
+                                           aggfunc='sum', fill_value=0)
+    return ConsolidatedReport(by_store, top_items, category_revenue, daily_revenue)
+
+
+def _parse_date(text):
+    return datetime.datetime.strptime(text, '%Y-%m-%d').date()
+
+
+if __name__ == '__main__':
+    # python consolidate.py sync <central db> [store_id=path ...]
+    # python consolidate.py report <central db> <start YYYY-MM-DD> <end YYYY-MM-DD> [workers]
+    if len(sys.argv) < 3 or sys.argv[1] not in ('sync', 'report'):
+        print("Usage: python consolidate.py sync <central db> [store_id=path ...]\n"
+              "       python consolidate.py report <central db> <start YYYY-MM-DD> <end YYYY-MM-DD> [workers]")
+        sys.exit(1)
+    command, central = sys.argv[1], sys.argv[2]
+    if command == 'sync':
+        consolidator = StoreConsolidator(central)
+        for spec in sys.argv[3:]:
+            store_id, _, path = spec.partition('=')
+            consolidator.add_store(store_id, path or store_id)
+        results = consolidator.sync_all()
+        consolidator.close()
+        for store_id, copied in results.items():
+            print(f"{store_id}: " + ("failed" if copied is None else
+                                     ", ".join(f"{rows} {table}" for table, rows in copied.items())))
+        sys.exit(0 if all(copied is not None for copied in results.values()) else 1)
+
+    if len(sys.argv) < 5:
+        print("Usage: python consolidate.py report <central db> <start YYYY-MM-DD> <end YYYY-MM-DD> [workers]")
+        sys.exit(1)
+    report = consolidated_report(central, _parse_date(sys.argv[3]), _parse_date(sys.argv[4]),
+                                 int(sys.argv[5]) if len(sys.argv) > 5 else None)
+    for store_id, row in report.by_store.iterrows():
+        print(f"{store_id:<20} {row['orders']:>8} orders {format_money(row['revenue']):>16}")
+    print(f"{'All stores':<20} {report.by_store['orders'].sum():>8} orders "
+          f"{format_money(report.by_store['revenue'].sum()):>16}")
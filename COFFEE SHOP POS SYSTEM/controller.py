@@ -1,270 +1,401 @@
-import pandas as pd
-from PyQt5.QtWidgets import QDialog, QMessageBox
-from view import LoginDialog, CoffeeShopPOSView
-
-
-class AppController:
-
-    def __init__(self, model, app):
-        self.model = model
-        self.app = app
-        self.login_dialog = None
-        self.main_window = None
-        self.init_login_flow()
-
-    def init_login_flow(self):
-        if self.main_window:
-            self.main_window.close()
-            self.main_window = None
-
-        self.login_dialog = LoginDialog()
-        self.login_dialog.login_attempted.connect(self.handle_login_attempt)
-
-        if self.login_dialog.exec_() != QDialog.Accepted:
-            self.app.quit()
-
-    def handle_login_attempt(self, username, password):
-        if self.model.authenticate(username, password):
-            self.login_dialog.accept()
-            self.init_main_window()
-        else:
-            self.login_dialog.show_login_error("Invalid username or password.")
-
-    def init_main_window(self):
-        self.main_window = CoffeeShopPOSView(self.model.user_role)
-
-        self.main_window.logout_requested.connect(self.handle_logout)
-        self.main_window.order_item_clicked.connect(self.handle_add_to_order)
-        self.main_window.remove_order_item_requested.connect(self.handle_remove_order_item)
-        self.main_window.clear_order_requested.connect(self.handle_clear_order)
-        self.main_window.process_payment_requested.connect(self.handle_process_payment)
-        self.main_window.eod_action_requested.connect(self.handle_save_eod)
-        self.main_window.clear_sales_requested.connect(self.handle_clear_sales_data)
-        self.main_window.retrieve_archived_requested.connect(self.handle_restore_archived)
-       
-        try:
-            self.main_window.menu_filter_requested.connect(self.handle_menu_filter)
-        except Exception:
-            pass
-        self.main_window.password_change_requested.connect(self.handle_change_password)
-        self.main_window.tab_changed.connect(self.handle_tab_change)
-
-
-        self.main_window.menu_item_added.connect(self.handle_add_menu_item)
-        self.main_window.menu_item_updated.connect(self.handle_update_menu_item)
-        self.main_window.menu_item_deleted.connect(self.handle_delete_menu_item)
-        
-        try:
-            self.main_window.delete_receipt_requested.connect(self.handle_delete_receipt)
-        except Exception:
-            pass
-
-        self.refresh_all_data()
-        self.main_window.show()
-
-    def refresh_all_data(self):
-        menu_items = self.model.get_menu_items()
-        self.main_window.update_menu_display(menu_items)
-        self.main_window.update_order_summary(self.model.current_order, self.model.calculate_order_total())
-
-        if self.model.user_role == 'Manager':
-            self.main_window.update_admin_menu_table(menu_items)
-            self.main_window.update_category_combo(self.model.get_menu_categories())
-            try:
-                self.main_window.update_password_combo(sorted(self.model.get_usernames()))
-            except Exception:
-                
-                self.main_window.update_password_combo([])
-       
-        try:
-            self.main_window.update_pos_filters(self.model.get_menu_categories())
-        except Exception:
-            pass
-        
-        try:
-            receipts = self.model.get_all_receipts()
-            if hasattr(self.main_window, 'update_transaction_history'):
-                self.main_window.update_transaction_history(receipts)
-        except Exception:
-            pass
-
-    def handle_tab_change(self, tab_name):
-        if "End of Day" in tab_name:
-            self.handle_eod_refresh()
-        elif "Sales Reports" in tab_name:
-            self.handle_report_refresh()
-        elif "Transaction History" in tab_name or "Transaction" in tab_name:
-            
-            self.refresh_transaction_history()
-
-    def handle_logout(self):
-        self.model.user_role = None
-        self.model.clear_order()
-        self.main_window.show_info("Logged Out", "You have been successfully logged out.")
-        self.init_login_flow()
-
-    def handle_add_to_order(self, item_id):
-        success, message = self.model.add_item_to_order(item_id)
-        if success:
-            self.main_window.update_order_summary(self.model.current_order, self.model.calculate_order_total())
-        else:
-            self.main_window.show_warning("Order Error", message)
-
-    def handle_remove_order_item(self, item_id):
-        """Handle removal of a specific item from the order."""
-        if self.model.remove_item_from_order(item_id):
-            self.main_window.update_order_summary(self.model.current_order, self.model.calculate_order_total())
-        else:
-            self.main_window.show_warning("Error", "Item not found in order.")
-
-    def handle_clear_order(self):
-        self.model.clear_order()
-        self.main_window.update_order_summary(self.model.current_order, self.model.calculate_order_total())
-
-    def handle_process_payment(self):
-        if not self.model.current_order:
-            self.main_window.show_warning("Warning", "The order is empty.")
-            return
-
-        success, total, receipt_uuid = self.model.process_order()
-
-        if success:
-            msg = f"Payment processed successfully!\nTotal: ₱{total:.2f}"
-            if receipt_uuid:
-                msg += f"\nReceipt saved (ID): {receipt_uuid}"
-            self.main_window.show_info("Success", msg)
-            self.refresh_all_data()
-            try:
-                self.refresh_transaction_history()
-            except Exception:
-                pass
-        else:
-            self.main_window.show_error("Error", "Failed to record sale. Check stock levels or database connection.")
-
-    def handle_add_menu_item(self, name, price, stock, category):
-        if self.model.create_item(name, price, stock, category):
-            self.main_window.show_info("Success", f"Item '{name}' added to menu.")
-            self.main_window.clear_crud_form()
-            self.refresh_all_data()
-        else:
-            self.main_window.show_error("Error", "Item name already exists or database error.")
-
-    def handle_update_menu_item(self, item_id, name, price, stock, category):
-        if self.model.update_item(item_id, name, price, stock, category):
-            self.main_window.show_info("Success", f"Item ID {item_id} updated successfully.")
-            self.main_window.clear_crud_form()
-            self.refresh_all_data()
-        else:
-            self.main_window.show_error("Error", f"Failed to update item ID {item_id}. Item name may already exist.")
-
-    def handle_delete_menu_item(self, item_id):
-        if self.model.delete_item(item_id):
-            self.main_window.show_info("Success", "Item deleted.")
-            self.main_window.clear_crud_form()
-            self.refresh_all_data()
-        else:
-            self.main_window.show_error("Error", "Failed to delete item.")
-
-    def handle_report_refresh(self):
-        raw_data = self.model.get_all_sales_data(days_back=30)
-        sales_df = pd.DataFrame(raw_data, columns=['item_name', 'category', 'quantity', 'total', 'date'])
-
-        if not sales_df.empty:
-            sales_df['quantity'] = pd.to_numeric(sales_df['quantity'])
-            sales_df['total'] = pd.to_numeric(sales_df['total'])
-
-        self.main_window.update_report_views(sales_df)
-
-    def handle_eod_refresh(self):
-        summary = self.model.generate_eod_summary()
-        historical_records = self.model.get_historical_eod_records()
-        self.main_window.update_eod_summary_view(summary, self.model.current_pos_date)
-        self.main_window.update_past_eod_records(historical_records)
-
-    def handle_save_eod(self):
-        summary = self.model.generate_eod_summary()
-
-        if summary['total_revenue'] == 0:
-            reply = QMessageBox.question(self.main_window, 'Confirm End of Day',
-                                         f"No sales recorded for {self.model.current_pos_date.strftime('%Y-%m-%d')}. Do you still want to close the day and start the next day?",
-                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-            if reply == QMessageBox.No:
-                return
-
-        status, saved_summary = self.model.save_eod_and_advance_day()
-
-        if status == "Success":
-            self.main_window.show_info("End of Day Success",
-                                       f"EOD for {saved_summary['date']} saved. Revenue: ₱{saved_summary['total_revenue']:.2f}.\n\n"
-                                       f"Starting a New POS Day: **{self.model.current_pos_date.strftime('%Y-%m-%d')}**")
-        elif status == "Already Saved":
-            self.main_window.show_error("Error",
-                                        f"EOD Summary for {saved_summary['date']} is **already saved**. Cannot save twice for the same day.")
-
-        self.refresh_all_data()
-        self.handle_eod_refresh()
-        self.handle_report_refresh()
-
-    def handle_clear_sales_data(self):
-        if self.model.clear_historical_data():
-            self.main_window.show_info("Success", "All historical sales data and EOD summaries have been cleared.")
-            self.refresh_all_data()
-            self.handle_eod_refresh()
-            self.handle_report_refresh()
-        else:
-            self.main_window.show_error("Error", "Failed to clear data.")
-
-    def handle_change_password(self, username, old_pass, new_pass, confirm_pass):
-
-        status = self.model.update_password(username, old_pass, new_pass)
-
-        if status == "Success":
-            self.main_window.show_info("Success", f"Password for user '{username}' has been successfully changed.")
-            self.main_window.clear_password_fields()
-        elif status == "Incorrect old password":
-            self.main_window.show_error("Error", "The Old Password entered is incorrect.")
-        else:
-            self.main_window.show_error("Error", f"Failed to change password: {status}")
-
-    def handle_restore_archived(self):
-        restored_count = self.model.restore_archived_eod_summaries()
-        if restored_count is None:
-            self.main_window.show_error("Error", "Failed to restore archived records.")
-            return
-
-        self.main_window.show_info("Restore Complete", f"Restored EOD summaries. Current EOD records count: {restored_count}")
-
-        self.refresh_all_data()
-        self.handle_eod_refresh()
-        self.handle_report_refresh()
-
-    def handle_menu_filter(self, category):
-        """Filter POS menu cards by category (exact, case-insensitive). Empty category shows all."""
-        try:
-            all_items = self.model.get_menu_items()
-            if not category:
-                self.main_window.update_menu_display(all_items)
-                return
-            filtered = [item for item in all_items if item[4].lower().strip() == category.lower().strip()]
-            self.main_window.update_menu_display(filtered)
-        except Exception:
-            self.main_window.update_menu_display(self.model.get_menu_items())
-
-    def refresh_transaction_history(self, limit=None):
-        try:
-            receipts = self.model.get_all_receipts(limit=limit)
-            if self.main_window and hasattr(self.main_window, 'update_transaction_history'):
-                self.main_window.update_transaction_history(receipts)
-        except Exception:
-            pass
-
-    def handle_delete_receipt(self, receipt_uuid):
-        """Delete a receipt by UUID and refresh the transaction history."""
-        try:
-            if self.model.delete_receipt(receipt_uuid):
-                self.main_window.show_info("Success", "Receipt deleted successfully.")
-                self.refresh_transaction_history()
-            else:
-                self.main_window.show_error("Error", "Failed to delete receipt.")
-        except Exception as e:
-            self.main_window.show_error("Error", f"Failed to delete receipt: {str(e)}")
\ No newline at end of file
+import datetime
+import time
+from collections import deque
+from PyQt5.QtWidgets import QDialog, QMessageBox
+from view import LoginDialog, CoffeeShopPOSView
+from money import format_money
+from model import EOD_PAGE_SIZE
+
+
+class CheckoutTimer:
+    """Tap-to-ready time of recent checkouts: from the Pay tap until the POS tab is cleared for
+    the next order. Only the last `keep` checkouts are kept."""
+
+    def __init__(self, keep=500):
+        self.samples = deque(maxlen=keep)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    @property
+    def last(self):
+        return self.samples[-1] if self.samples else 0.0
+
+    @property
+    def average(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def snapshot(self):
+        """{'checkouts', 'last_ms', 'avg_ms', 'p95_ms', 'max_ms'} over the kept checkouts."""
+        ordered = sorted(self.samples)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0
+        return {'checkouts': len(ordered),
+                'last_ms': self.last * 1000,
+                'avg_ms': self.average * 1000,
+                'p95_ms': p95 * 1000,
+                'max_ms': ordered[-1] * 1000 if ordered else 0.0}
+
+
+class AppController:
+
+    def __init__(self, model, app):
+        self.model = model
+        self.app = app
+        self.login_dialog = None
+        self.main_window = None
+        self.report_range = ('month', None, None)
+        self.eod_page = 0
+        self.checkout_timer = CheckoutTimer()
+        self.init_login_flow()
+
+    def init_login_flow(self):
+        if self.main_window:
+            self.main_window.close()
+            self.main_window = None
+
+        self.login_dialog = LoginDialog()
+        self.login_dialog.login_attempted.connect(self.handle_login_attempt)
+
+        if self.login_dialog.exec_() != QDialog.Accepted:
+            self.app.quit()
+
+    def handle_login_attempt(self, username, password):
+        if self.model.authenticate(username, password):
+            self.login_dialog.accept()
+            self.init_main_window()
+        else:
+            self.login_dialog.show_login_error("Invalid username or password.")
+
+    def init_main_window(self):
+        self.main_window = CoffeeShopPOSView(self.model.user_role)
+
+        self.main_window.logout_requested.connect(self.handle_logout)
+        self.main_window.order_item_clicked.connect(self.handle_add_to_order)
+        self.main_window.remove_order_item_requested.connect(self.handle_remove_order_item)
+        self.main_window.clear_order_requested.connect(self.handle_clear_order)
+        self.main_window.process_payment_requested.connect(self.handle_process_payment)
+        self.main_window.eod_action_requested.connect(self.handle_save_eod)
+        self.main_window.clear_sales_requested.connect(self.handle_clear_sales_data)
+        self.main_window.retrieve_archived_requested.connect(self.handle_restore_archived)
+        self.main_window.archive_months_requested.connect(self.handle_archive_months)
+       
+        try:
+            self.main_window.menu_filter_requested.connect(self.handle_menu_filter)
+            self.main_window.menu_search_requested.connect(self.handle_menu_search)
+            self.main_window.menu_search_submitted.connect(self.handle_menu_search_submit)
+        except Exception:
+            pass
+        self.main_window.password_change_requested.connect(self.handle_change_password)
+        self.main_window.backup_requested.connect(self.handle_backup_now)
+        self.main_window.restore_backup_requested.connect(self.handle_restore_backup)
+        self.main_window.charge_settings_saved.connect(self.handle_save_charge_settings)
+        self.main_window.print_settings_saved.connect(self.handle_save_print_settings)
+        self.main_window.print_receipt_requested.connect(self.handle_print_receipt)
+        self.main_window.refund_receipt_requested.connect(self.handle_refund_receipt)
+        self.main_window.eod_page_requested.connect(self.handle_eod_page)
+        self.main_window.tab_changed.connect(self.handle_tab_change)
+        self.main_window.report_range_changed.connect(self.handle_report_range_change)
+
+
+        self.main_window.menu_item_added.connect(self.handle_add_menu_item)
+        self.main_window.menu_item_updated.connect(self.handle_update_menu_item)
+        self.main_window.menu_item_deleted.connect(self.handle_delete_menu_item)
+        self.model.add_low_stock_listener(self.handle_low_stock_alert)
+
+        self.refresh_all_data()
+        self.main_window.show()
+
+    def refresh_all_data(self):
+        self.main_window.update_charge_settings(self.model.get_charge_settings())
+        self.main_window.update_print_settings(self.model.get_print_settings())
+        menu_items = self.model.get_menu_items()
+        self.main_window.update_menu_display(menu_items, self.model.get_sellable_counts(menu_items))
+        self.refresh_order_summary()
+
+        if self.model.user_role == 'Manager':
+            self.main_window.update_admin_menu_table(menu_items)
+            self.main_window.update_category_combo(self.model.get_menu_categories())
+            try:
+                self.main_window.update_password_combo(sorted(self.model.get_usernames()))
+            except Exception:
+                
+                self.main_window.update_password_combo([])
+            self.main_window.update_backup_list(self.model.list_backups())
+       
+        try:
+            self.main_window.update_pos_filters(self.model.get_menu_categories())
+        except Exception:
+            pass
+        
+        try:
+            receipts = self.model.get_all_receipts()
+            if hasattr(self.main_window, 'update_transaction_history'):
+                self.main_window.update_transaction_history(receipts)
+        except Exception:
+            pass
+
+    def refresh_after_checkout(self):
+        """Refresh only what a sale changes. The POS goes back to the category page, which rebuilds
+        its item cards on the next pick, and the other tabs reload when they are opened."""
+        self.refresh_order_summary()
+        if self.model.user_role == 'Manager':
+            self.main_window.update_admin_menu_table(self.model.get_menu_items())
+
+    def refresh_order_summary(self):
+        self.main_window.update_order_summary(self.model.current_order, self.model.calculate_order_total(),
+                                              self.model.get_applied_promotions(), self.model.get_order_charges())
+
+    def handle_tab_change(self, tab_name):
+        if "End of Day" in tab_name:
+            self.handle_eod_refresh()
+        elif "Sales Reports" in tab_name:
+            self.handle_report_refresh()
+        elif "Transaction History" in tab_name or "Transaction" in tab_name:
+            
+            self.refresh_transaction_history()
+
+    def handle_logout(self):
+        self.model.remove_low_stock_listener(self.handle_low_stock_alert)
+        self.model.user_role = None
+        self.model.clear_order()
+        self.main_window.show_info("Logged Out", "You have been successfully logged out.")
+        self.init_login_flow()
+
+    def handle_add_to_order(self, item_id):
+        success, message = self.model.add_item_to_order(item_id)
+        if success:
+            self.refresh_order_summary()
+        else:
+            self.main_window.show_toast(message, 'warning')
+
+    def handle_remove_order_item(self, item_id):
+        """Handle removal of a specific item from the order."""
+        if self.model.remove_item_from_order(item_id):
+            self.refresh_order_summary()
+        else:
+            self.main_window.show_toast("Item not found in order.", 'warning')
+
+    def handle_clear_order(self):
+        self.model.clear_order()
+        self.refresh_order_summary()
+
+    def handle_process_payment(self):
+        started = time.perf_counter()
+        if not self.model.current_order:
+            self.main_window.show_toast("The order is empty.", 'warning')
+            return
+
+        success, total, receipt_uuid = self.model.process_order()
+
+        if success:
+            self.refresh_after_checkout()
+            self.checkout_timer.record(time.perf_counter() - started)
+            self.main_window.show_ready_for_next_order(total, receipt_uuid, self.checkout_timer.last,
+                                                       self.checkout_timer.average)
+        else:
+            self.main_window.show_error("Error", "Failed to record sale. Check stock levels or database connection.")
+
+    def handle_low_stock_alert(self, items):
+        """Called by the database as soon as a sale drops items below their reorder level."""
+        if self.main_window:
+            self.main_window.show_low_stock_banner(items)
+
+    def handle_add_menu_item(self, name, price, stock, category, reorder_level=10):
+        if self.model.create_item(name, price, stock, category, reorder_level):
+            self.main_window.show_toast(f"Item '{name}' added to menu.", 'success')
+            self.main_window.clear_crud_form()
+            self.refresh_all_data()
+        else:
+            self.main_window.show_error("Error", "Item name already exists or database error.")
+
+    def handle_update_menu_item(self, item_id, name, price, stock, category, reorder_level=10):
+        if self.model.update_item(item_id, name, price, stock, category, reorder_level):
+            self.main_window.show_toast(f"Item ID {item_id} updated.", 'success')
+            self.main_window.clear_crud_form()
+            self.refresh_all_data()
+        else:
+            self.main_window.show_error("Error", f"Failed to update item ID {item_id}. Item name may already exist.")
+
+    def handle_delete_menu_item(self, item_id):
+        if self.model.delete_item(item_id):
+            self.main_window.show_toast("Item deleted.", 'success')
+            self.main_window.clear_crud_form()
+            self.refresh_all_data()
+        else:
+            self.main_window.show_error("Error", "Failed to delete item.")
+
+    def handle_report_range_change(self, range_key, start_str, end_str):
+        try:
+            start_date = datetime.date.fromisoformat(start_str) if start_str else None
+            end_date = datetime.date.fromisoformat(end_str) if end_str else None
+        except ValueError:
+            self.main_window.show_warning("Report Range", "Invalid custom date range.")
+            return
+        self.report_range = (range_key, start_date, end_date)
+        self.handle_report_refresh()
+
+    def handle_report_refresh(self):
+        range_key, start_date, end_date = self.report_range
+        self.main_window.update_report_views(self.model.get_report(range_key, start_date, end_date))
+
+    def handle_eod_refresh(self):
+        self.refresh_eod_summary()
+        self.handle_eod_page(self.eod_page)
+
+    def refresh_eod_summary(self):
+        self.main_window.update_eod_summary_view(self.model.generate_eod_summary(), self.model.current_pos_date)
+        self.main_window.update_prep_list_view(self.model.get_prep_list(), self.model.current_pos_date)
+
+    def handle_eod_page(self, page):
+        records, self.eod_page, page_count = self.model.get_eod_history_page(page)
+        self.main_window.update_past_eod_records(records, self.eod_page, page_count)
+
+    def handle_save_eod(self):
+        summary = self.model.generate_eod_summary()
+
+        if summary.total_revenue == 0:
+            reply = QMessageBox.question(self.main_window, 'Confirm End of Day',
+                                         f"No sales recorded for {self.model.current_pos_date.strftime('%Y-%m-%d')}. Do you still want to close the day and start the next day?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.No:
+                return
+
+        status, saved_summary = self.model.save_eod_and_advance_day()
+
+        if status == "Success":
+            # Newest first, so the new summary goes on top of the first page without a reload
+            self.main_window.prepend_past_eod_record(saved_summary, self.model.count_eod_pages(), EOD_PAGE_SIZE)
+            self.main_window.show_info("End of Day Success",
+                                       f"EOD for {saved_summary.date} saved. Revenue: {format_money(saved_summary.total_revenue)}.\n\n"
+                                       f"Starting a New POS Day: **{self.model.current_pos_date.strftime('%Y-%m-%d')}**")
+        elif status == "Already Saved":
+            self.main_window.show_error("Error",
+                                        f"EOD Summary for {saved_summary.date} is **already saved**. Cannot save twice for the same day.")
+
+        self.refresh_all_data()
+        self.refresh_eod_summary()
+        self.handle_report_refresh()
+
+    def handle_clear_sales_data(self):
+        if self.model.clear_historical_data():
+            self.main_window.show_info("Success", "All historical sales data and EOD summaries have been cleared.")
+            self.refresh_all_data()
+            self.handle_eod_refresh()
+            self.handle_report_refresh()
+        else:
+            self.main_window.show_error("Error", "Failed to clear data.")
+
+    def handle_archive_months(self):
+        archived = self.model.archive_closed_months()
+        if archived:
+            self.main_window.show_toast(f"Moved sales and receipts for {', '.join(archived)} to the archive.", 'success')
+        else:
+            self.main_window.show_toast("There are no closed months to archive.")
+        self.refresh_transaction_history()
+
+    def handle_change_password(self, username, old_pass, new_pass, confirm_pass):
+
+        status = self.model.update_password(username, old_pass, new_pass)
+
+        if status == "Success":
+            self.main_window.show_toast(f"Password for user '{username}' has been changed.", 'success')
+            self.main_window.clear_password_fields()
+        elif status == "Incorrect old password":
+            self.main_window.show_error("Error", "The Old Password entered is incorrect.")
+        else:
+            self.main_window.show_error("Error", f"Failed to change password: {status}")
+
+    def handle_backup_now(self):
+        if self.model.start_backup():
+            self.main_window.show_toast("Backup started in the background. Sales can continue as normal.")
+        else:
+            self.main_window.show_error("Backup", "Backups are not available for this database.")
+
+    def handle_restore_backup(self, backup_path):
+        if self.model.restore_backup(backup_path):
+            self.main_window.show_info("Restore Complete", f"Database restored from {backup_path}.")
+            self.refresh_all_data()
+        else:
+            self.main_window.show_error("Restore Failed", "The backup is missing or failed its integrity check.")
+
+    def handle_save_charge_settings(self, settings):
+        if self.model.save_charge_settings(settings):
+            self.main_window.update_charge_settings(settings)
+            self.refresh_order_summary()
+            self.main_window.show_toast("Tax and service charge settings updated.", 'success')
+        else:
+            self.main_window.show_error("Error", "Failed to save tax and service charge settings.")
+
+    def handle_save_print_settings(self, settings):
+        if self.model.save_print_settings(settings):
+            self.main_window.update_print_settings(settings)
+            self.main_window.show_toast("Receipt printer settings updated.", 'success')
+        else:
+            self.main_window.show_error("Error", "Failed to save receipt printer settings.")
+
+    def handle_print_receipt(self, receipt_uuid):
+        if self.model.print_receipt(receipt_uuid):
+            self.main_window.show_toast("Receipt sent to the printer.", 'success')
+        else:
+            self.main_window.show_error("Error", "The receipt could not be printed. Check the printer output in Settings.")
+
+    def handle_refund_receipt(self, receipt_uuid, quantities):
+        """Refund part of a receipt, or void all of it when `quantities` is None."""
+        refund = self.model.refund_receipt(receipt_uuid, quantities)
+        if refund is None:
+            self.main_window.show_error("Error", "Nothing was refunded. The receipt may already be fully refunded "
+                                                 "or belong to an archived month.")
+            return
+        self.main_window.show_toast(f"Refunded {format_money(refund)}.", 'success')
+        self.refresh_transaction_history()
+        self.refresh_after_checkout()
+
+    def handle_restore_archived(self):
+        restored_count = self.model.restore_archived_eod_summaries()
+        if restored_count is None:
+            self.main_window.show_error("Error", "Failed to restore archived records.")
+            return
+
+        self.main_window.show_info("Restore Complete", f"Restored EOD summaries. Current EOD records count: {restored_count}")
+
+        self.refresh_all_data()
+        self.handle_eod_refresh()
+        self.handle_report_refresh()
+
+    def handle_menu_filter(self, category):
+        """Filter POS menu cards by category (exact, case-insensitive). Empty category shows all."""
+        try:
+            all_items = self.model.get_menu_items()
+            sellable_counts = self.model.get_sellable_counts(all_items)
+            if not category:
+                self.main_window.update_menu_display(all_items, sellable_counts)
+                return
+            filtered = [item for item in all_items if item.category.lower().strip() == category.lower().strip()]
+            self.main_window.update_menu_display(filtered, sellable_counts)
+        except Exception:
+            self.main_window.update_menu_display(self.model.get_menu_items())
+
+    def handle_menu_search(self, query):
+        """Show the items matching the search bar; an empty search goes back to the categories."""
+        if not query.strip():
+            self.main_window.update_pos_filters(self.model.get_menu_categories())
+            return
+        results = self.model.search_menu(query)
+        self.main_window.update_menu_display(results, self.model.get_sellable_counts(results))
+
+    def handle_menu_search_submit(self, query):
+        """Enter in the search bar adds the best match to the order."""
+        results = self.model.search_menu(query, limit=1)
+        if not results:
+            self.main_window.show_toast(f"No menu item matches '{query.strip()}'.", 'warning')
+            return
+        self.main_window.clear_menu_search()
+        self.handle_add_to_order(results[0].id)
+
+    def refresh_transaction_history(self, limit=None):
+        try:
+            receipts = self.model.get_all_receipts(limit=limit)
+            if self.main_window and hasattr(self.main_window, 'update_transaction_history'):
+                self.main_window.update_transaction_history(receipts)
+        except Exception:
+            pass
@@ -1,498 +1,1222 @@
-import sqlite3
-import datetime
-import json
-
-class DatabaseManager:
-    def __init__(self, db_path='coffee_pos.db'):
-        self.db_path = db_path
-        self.conn = None
-        self.cursor = None
-        self._connect()
-        self._init_db()
-
-    def _connect(self):
-        try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.cursor = self.conn.cursor()
-        except sqlite3.Error as e:
-            print(f"Database connection error: {e}")
-
-    def _init_db(self):
-        self.cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS menu
-                            (
-                                id
-                                INTEGER
-                                PRIMARY
-                                KEY
-                                AUTOINCREMENT,
-                                name
-                                TEXT
-                                NOT
-                                NULL
-                                UNIQUE,
-                                price
-                                REAL
-                                NOT
-                                NULL,
-                                stock
-                                INTEGER
-                                NOT
-                                NULL,
-                                category
-                                TEXT
-                                NOT
-                                NULL
-                            )
-                            """)
-        self.cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS sales
-                            (
-                                id
-                                INTEGER
-                                PRIMARY
-                                KEY
-                                AUTOINCREMENT,
-                                item_name
-                                TEXT
-                                NOT
-                                NULL,
-                                category
-                                TEXT
-                                NOT
-                                NULL,
-                                quantity
-                                INTEGER
-                                NOT
-                                NULL,
-                                price
-                                REAL
-                                NOT
-                                NULL,
-                                total
-                                REAL
-                                NOT
-                                NULL,
-                                sale_date
-                                TEXT
-                                NOT
-                                NULL
-                            )
-                            """)
-        self.cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS eod_summary
-                            (
-                                id
-                                INTEGER
-                                PRIMARY
-                                KEY
-                                AUTOINCREMENT,
-                                report_date
-                                TEXT
-                                NOT
-                                NULL
-                                UNIQUE,
-                                total_revenue
-                                REAL
-                                NOT
-                                NULL,
-                                top_items_json
-                                TEXT,
-                                low_stock_json
-                                TEXT
-                            )
-                            """)
-        
-        self.cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS eod_summary_archive
-                            (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                report_date TEXT NOT NULL UNIQUE,
-                                total_revenue REAL NOT NULL,
-                                top_items_json TEXT,
-                                low_stock_json TEXT,
-                                archived_at TEXT NOT NULL
-                            )
-                            """)
-        
-        self.cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS users
-                            (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                username TEXT NOT NULL UNIQUE,
-                                password TEXT NOT NULL,
-                                role TEXT NOT NULL,
-                                created_at TEXT NOT NULL
-                            )
-                            """)
-        
-        self.cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS receipts
-                            (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                receipt_uuid TEXT NOT NULL UNIQUE,
-                                sale_date TEXT NOT NULL,
-                                total REAL NOT NULL,
-                                items_json TEXT NOT NULL,
-                                created_at TEXT NOT NULL
-                            )
-                            """)
-        self.conn.commit()
-        self._seed_data()
-
-    def _seed_data(self):
-        try:
-            self.cursor.execute("SELECT COUNT(*) FROM menu")
-            if self.cursor.fetchone()[0] == 0:
-                initial_items = [
-                   
-                    ('Espresso', 90.00, 100, 'Coffee'),
-                    ('Latte', 80.00, 150, 'Coffee'),
-                    ('Cappuccino', 100.00, 120, 'Coffee'),
-                    ('Mocha', 110.00, 90, 'Coffee'),
-                    ('Americano', 75.00, 130, 'Coffee'),
-                    ('Flat White', 105.00, 80, 'Coffee'),
-                    ('Macchiato', 95.00, 110, 'Coffee'),
-                    ('Affogato', 120.00, 70, 'Coffee'),
-                    ('Pour Over', 130.00, 60, 'Coffee'),
-
-                   
-                    ('Croissant', 70.00, 50, 'Pastry'),
-                    ('Blueberry Muffin', 70.00, 60, 'Pastry'),
-                    ('Chocolate Chip Cookie', 50.00, 90, 'Pastry'),
-                    ('Cinnamon Roll', 85.00, 45, 'Pastry'),
-                    ('Cheese Danish', 95.00, 35, 'Pastry'),
-                    ('Lemon Bar', 65.00, 55, 'Pastry'),
-                    ('Red Velvet Cake Slice', 150.00, 30, 'Pastry'),
-                    ('Apple Turnover', 75.00, 40, 'Pastry'),
-                    ('Almond Biscotti', 40.00, 75, 'Pastry'),
-
-                    
-                    ('Iced Tea', 60.00, 80, 'Beverage'),
-                    ('Orange Juice', 70.00, 70, 'Beverage'),
-                    ('Lemonade', 75.00, 90, 'Beverage'),
-                    ('Sparkling Water', 50.00, 100, 'Beverage'),
-                    ('Hot Chocolate', 110.00, 60, 'Beverage'),
-                    ('Green Tea', 55.00, 85, 'Beverage'),
-                    ('Mango Smoothie', 140.00, 40, 'Beverage'),
-                    ('Strawberry Milkshake', 160.00, 30, 'Beverage'),
-                    ('Caramel Frappe', 155.00, 50, 'Beverage'),
-
-
-                    ('Tuna Sandwich', 50.00, 30, 'Food'),
-                    ('Chicken Pesto Sandwich', 180.00, 25, 'Food'),
-                    ('Caesar Salad', 190.00, 20, 'Food'),
-                    ('Beef Lasagna', 250.00, 15, 'Food'),
-                    ('Breakfast Burrito', 160.00, 35, 'Food'),
-                    ('Vegetarian Wrap', 150.00, 40, 'Food'),
-                    ('Pasta Carbonara', 220.00, 18, 'Food'),
-                    ('Waffles and Syrup', 130.00, 22, 'Food'),
-                    ('Fries', 90.00, 50, 'Food'),
-                ]
-                self.cursor.executemany("INSERT INTO menu (name, price, stock, category) VALUES (?, ?, ?, ?)",
-                                        initial_items)
-                self.conn.commit()
-        except sqlite3.Error as e:
-            print(f"Error seeding data: {e}")
-
-        try:
-            self.cursor.execute("SELECT COUNT(*) FROM users")
-            if self.cursor.fetchone()[0] == 0:
-                default_users = [
-                    ('manager', 'admin123', 'Manager'),
-                    ('cashier', 'password', 'Cashier')
-                ]
-                for u, p, r in default_users:
-                    try:
-                        self.cursor.execute("INSERT INTO users (username, password, role, created_at) VALUES (?, ?, ?, datetime('now'))", (u, p, r))
-                    except sqlite3.IntegrityError:
-                        pass
-                self.conn.commit()
-        except sqlite3.Error as e:
-            print(f"Error seeding users: {e}")
-        except sqlite3.Error as e:
-            print(f"Error seeding data: {e}")
-
-    def create_menu_item(self, name, price, stock, category):
-        try:
-            self.cursor.execute("INSERT INTO menu (name, price, stock, category) VALUES (?, ?, ?, ?)",
-                                (name, price, stock, category))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-        except sqlite3.Error:
-            return False
-
-    def read_menu_items(self):
-        self.cursor.execute("SELECT id, name, price, stock, category FROM menu ORDER BY name ASC")
-        return self.cursor.fetchall()
-
-    def read_categories(self):
-        self.cursor.execute("SELECT DISTINCT category FROM menu ORDER BY category")
-        return [row[0] for row in self.cursor.fetchall()]
-
-    def update_menu_item(self, item_id, name, price, stock, category):
-        try:
-            self.cursor.execute("UPDATE menu SET name=?, price=?, stock=?, category=? WHERE id=?",
-                                (name, price, stock, category, item_id))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
-        except sqlite3.Error:
-            return False
-
-    def delete_menu_item(self, item_id):
-        try:
-            self.cursor.execute("DELETE FROM menu WHERE id=?", (item_id,))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
-        except sqlite3.Error:
-            return False
-
-    def get_item_details(self, item_id):
-        self.cursor.execute("SELECT name, price, category FROM menu WHERE id = ?", (item_id,))
-        return self.cursor.fetchone()
-    
-    def create_user(self, username, password, role='Cashier'):
-        try:
-            self.cursor.execute("INSERT INTO users (username, password, role, created_at) VALUES (?, ?, ?, datetime('now'))", (username, password, role))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-        except sqlite3.Error:
-            return False
-
-    def get_user(self, username):
-        try:
-            self.cursor.execute("SELECT username, password, role FROM users WHERE username = ?", (username,))
-            row = self.cursor.fetchone()
-            if row:
-                return {'username': row[0], 'password': row[1], 'role': row[2]}
-            return None
-        except sqlite3.Error:
-            return None
-
-    def list_users(self):
-        try:
-            self.cursor.execute("SELECT username, role FROM users ORDER BY username")
-            return [{'username': r[0], 'role': r[1]} for r in self.cursor.fetchall()]
-        except sqlite3.Error:
-            return []
-
-    def update_user_password(self, username, new_password):
-        try:
-            self.cursor.execute("UPDATE users SET password = ? WHERE username = ?", (new_password, username))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
-        except sqlite3.Error:
-            return False
-
-    def delete_user(self, username):
-        try:
-            self.cursor.execute("DELETE FROM users WHERE username = ?", (username,))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
-        except sqlite3.Error:
-            return False
-
-    def record_sale(self, order_items, sale_date):
-        try:
-            for item in order_items:
-                name = item['name']
-                qty = item['qty']
-                price = item['price']
-                category = item['category']
-                total = price * qty
-
-                self.cursor.execute(
-                    "INSERT INTO sales (item_name, category, quantity, price, total, sale_date) VALUES (?, ?, ?, ?, ?, ?)",
-                    (name, category, qty, price, total, sale_date)
-                )
-                self.cursor.execute("UPDATE menu SET stock = stock - ? WHERE name = ?", (qty, name))
-            self.conn.commit()
-            return True
-        except sqlite3.Error:
-            self.conn.rollback()
-            return False
-
-    def save_receipt(self, receipt_uuid, sale_date, total, items):
-        """Save a receipt record. `items` should be JSON-serializable (list/dict). Returns inserted id or None."""
-        try:
-            items_json = json.dumps(items)
-            self.cursor.execute(
-                "INSERT INTO receipts (receipt_uuid, sale_date, total, items_json, created_at) VALUES (?, ?, ?, ?, datetime('now'))",
-                (receipt_uuid, sale_date, total, items_json)
-            )
-            self.conn.commit()
-            return self.cursor.lastrowid
-        except sqlite3.IntegrityError:
-            return None
-        except sqlite3.Error:
-            return None
-
-    def get_receipt(self, receipt_uuid):
-        try:
-            self.cursor.execute("SELECT receipt_uuid, sale_date, total, items_json, created_at FROM receipts WHERE receipt_uuid = ?", (receipt_uuid,))
-            row = self.cursor.fetchone()
-            if not row:
-                return None
-            return {
-                'receipt_uuid': row[0],
-                'sale_date': row[1],
-                'total': row[2],
-                'items': json.loads(row[3]),
-                'created_at': row[4]
-            }
-        except sqlite3.Error:
-            return None
-
-    def delete_receipt(self, receipt_uuid):
-        """Delete a receipt by UUID. Returns True if successful, False otherwise."""
-        try:
-            self.cursor.execute("DELETE FROM receipts WHERE receipt_uuid = ?", (receipt_uuid,))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
-        except sqlite3.Error:
-            return False
-
-    def get_sales_data_for_report(self, days_back=30):
-        date_limit = (datetime.datetime.now() - datetime.timedelta(days=days_back)).strftime('%Y-%m-%d %H:%M:%S')
-        self.cursor.execute(
-            f"SELECT item_name, category, quantity, total, strftime('%Y-%m-%d', sale_date) FROM sales WHERE sale_date >= ?",
-            (date_limit,))
-        return self.cursor.fetchall()
-
-    def end_of_day_summary(self, target_date_str):
-        self.cursor.execute(
-            "SELECT SUM(total) FROM sales WHERE strftime('%Y-%m-%d', sale_date) = ?", (target_date_str,))
-        total_revenue = self.cursor.fetchone()[0] or 0.0
-
-        self.cursor.execute("""
-                            SELECT item_name, SUM(quantity) as total_qty
-                            FROM sales
-                            WHERE strftime('%Y-%m-%d', sale_date) = ?
-                            GROUP BY item_name
-                            ORDER BY total_qty DESC LIMIT 3
-                            """, (target_date_str,))
-        top_items = self.cursor.fetchall()
-
-        self.cursor.execute("""
-                            SELECT name, stock
-                            FROM menu
-                            WHERE stock < 10
-                            ORDER BY stock ASC
-                            """)
-        low_stock = self.cursor.fetchall()
-
-        return {
-            'date': target_date_str,
-            'total_revenue': total_revenue,
-            'top_items': top_items,
-            'low_stock': low_stock
-        }
-
-    def save_eod_summary(self, summary_data):
-        try:
-            top_items_json = json.dumps(summary_data['top_items'])
-            low_stock_json = json.dumps(summary_data['low_stock'])
-            self.cursor.execute(
-                "INSERT INTO eod_summary (report_date, total_revenue, top_items_json, low_stock_json) VALUES (?, ?, ?, ?)",
-                (summary_data['date'], summary_data['total_revenue'], top_items_json, low_stock_json)
-            )
-            try:
-                self.cursor.execute(
-                    "INSERT OR IGNORE INTO eod_summary_archive (report_date, total_revenue, top_items_json, low_stock_json, archived_at) VALUES (?, ?, ?, ?, datetime('now'))",
-                    (summary_data['date'], summary_data['total_revenue'], top_items_json, low_stock_json)
-                )
-            except Exception:
-                pass
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-        except sqlite3.Error as e:
-            print(f"Error saving EOD summary: {e}")
-            return False
-
-    def get_past_eod_records(self):
-        self.cursor.execute(
-            "SELECT report_date, total_revenue, top_items_json, low_stock_json FROM eod_summary ORDER BY report_date DESC"
-        )
-        records = self.cursor.fetchall()
-        parsed_records = []
-        for date, revenue, top_json, low_json in records:
-            parsed_records.append({
-                'date': date,
-                'revenue': revenue,
-                'top_items': json.loads(top_json),
-                'low_stock': json.loads(low_json)
-            })
-        return parsed_records
-
-    def clear_all_sales_data(self):
-        try:
-            try:
-                self.cursor.execute(
-                    "INSERT OR IGNORE INTO eod_summary_archive (report_date, total_revenue, top_items_json, low_stock_json, archived_at) SELECT report_date, total_revenue, top_items_json, low_stock_json, datetime('now') FROM eod_summary"
-                )
-            except Exception:
-                pass
-
-            self.cursor.execute("DELETE FROM sales")
-            self.cursor.execute("DELETE FROM eod_summary")
-            self.conn.commit()
-            return True
-        except sqlite3.Error:
-            return False
-
-    def get_archived_eod_records(self):
-        self.cursor.execute(
-            "SELECT report_date, total_revenue, top_items_json, low_stock_json, archived_at FROM eod_summary_archive ORDER BY archived_at DESC"
-        )
-        records = self.cursor.fetchall()
-        parsed = []
-        for date, revenue, top_json, low_json, archived_at in records:
-            parsed.append({
-                'date': date,
-                'revenue': revenue,
-                'top_items': json.loads(top_json),
-                'low_stock': json.loads(low_json),
-                'archived_at': archived_at
-            })
-        return parsed
-
-    def restore_all_archived_eod_records(self):
-        try:
-            self.cursor.execute(
-                "INSERT OR IGNORE INTO eod_summary (report_date, total_revenue, top_items_json, low_stock_json) SELECT report_date, total_revenue, top_items_json, low_stock_json FROM eod_summary_archive"
-            )
-            self.conn.commit()
-            self.cursor.execute("SELECT COUNT(*) FROM eod_summary")
-            return self.cursor.fetchone()[0]
-        except sqlite3.Error:
-            return 0
-
-    def get_all_receipts(self, limit=None):
-        try:
-            query = "SELECT receipt_uuid, sale_date, total, items_json, created_at FROM receipts ORDER BY created_at DESC"
-            if limit and isinstance(limit, int):
-                query = query + f" LIMIT {limit}"
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            results = []
-            for receipt_uuid, sale_date, total, items_json, created_at in rows:
-                try:
-                    items = json.loads(items_json)
-                except Exception:
-                    items = []
-                results.append({
-                    'receipt_uuid': receipt_uuid,
-                    'sale_date': sale_date,
-                    'total': total,
-                    'items': items,
-                    'created_at': created_at
-                })
-            return results
-        except sqlite3.Error:
+import os
+import time
+import sqlite3
+import datetime
+import json
+from inventory import InventoryEngine
+from partitions import SalesArchive, default_archive_path
+from changelog import ChangeLog, OrderOutbox
+from backup import BackupService, restore_backup
+from maintenance import MaintenanceScheduler
+from queries import QUERIES, QueryStats, STATEMENT_CACHE_SIZE
+from money import allocate, centavos_sql, receipt_items_to_centavos
+from promotions import Promotion
+from records import (EodCache, EodSummary, OrderLine, record_factory, menu_item_row, order_lines_from_json,
+                     order_lines_to_json, receipt_row)
+
+# PRAGMA user_version of a database with the current schema. Version 1 stores money as INTEGER centavos;
+# version 2 links sales rows to their menu item and receipt; version 3 keys the sales rollup on menu_id;
+# version 4 records which menu ids a register received from the replication hub.
+SCHEMA_VERSION = 4
+
+# Money columns of databases before version 1 (REAL pesos) and how each converts to centavos
+CENTAVO_MIGRATION = {
+    'menu': {'price': centavos_sql('price')},
+    'sales': {'price': centavos_sql('price'), 'total': centavos_sql('total')},
+    'receipts': {'total': centavos_sql('total')},
+    'eod_summary': {'total_revenue': centavos_sql('total_revenue')},
+    'eod_summary_archive': {'total_revenue': centavos_sql('total_revenue')},
+    'promotions': {'value': "CASE WHEN discount_type = 'amount' THEN " + centavos_sql('value') + " ELSE value END",
+                   'min_spend': centavos_sql('min_spend')},
+}
+
+ROLLUP_BUCKETS = ('day', 'week', 'month')
+
+# SQL expressions giving the first day of the bucket a sale falls in (weeks start on Monday)
+ROLLUP_BUCKET_SQL = {
+    'day': "date(sale_date)",
+    'week': "date(sale_date, '-6 days', 'weekday 1')",
+    'month': "strftime('%Y-%m-01', sale_date)",
+}
+
+
+
+def bucket_start(bucket, day):
+    """Return the first date of the `bucket` ('day', 'week' or 'month') containing `day`."""
+    if bucket == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def sales_rollup_params(bucket, start_date, end_date):
+    """Parameters for the 'sales_rollup' query covering every bucket that overlaps start_date..end_date."""
+    return (bucket, bucket_start(bucket, start_date).strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+
+
+class DatabaseManager:
+    def __init__(self, db_path='coffee_pos.db', archive_path=None, backup_dir=None):
+        self.db_path = db_path
+        if archive_path is None:
+            archive_path = default_archive_path(db_path)
+        self.conn = None
+        self.cursor = None
+        self.low_stock_listeners = []
+        self.query_stats = QueryStats()
+        self.eod_cache = EodCache()
+        self.eod_archive_cache = EodCache()
+        self._connect()
+        self.inventory = InventoryEngine(self.conn)
+        self.change_log = ChangeLog(self.conn)
+        self.outbox = OrderOutbox(self.conn)
+        self._init_db()
+        self.archive = SalesArchive(self.conn, archive_path)
+        self.archive.attach()
+        self.archive.refresh_views()
+        self._ensure_rollups()
+        # In-memory databases (tests) have nothing on disk to back up
+        self.backup_service = None if db_path == ':memory:' else BackupService(db_path, backup_dir,
+                                                                              archive_path=archive_path)
+        # Started by the app; runs VACUUM / ANALYZE / checkpoints while no checkouts happen
+        self.maintenance = None if db_path == ':memory:' else MaintenanceScheduler(db_path)
+        # Default receipt spool, used until a printer output is configured; in-memory databases print nothing
+        self.receipt_spool_dir = '' if db_path == ':memory:' else os.path.join(
+            os.path.dirname(os.path.abspath(db_path)), 'receipt_spool')
+
+    def _connect(self):
+        try:
+            self.conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+            self.cursor = self.conn.cursor()
+            if self.db_path != ':memory:':
+                # Only takes effect on a new database; older ones are converted by the maintenance
+                # scheduler after a business day is closed
+                self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                # WAL lets the background backup read while checkouts keep writing
+                self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error as e:
+            print(f"Database connection error: {e}")
+
+    def _execute(self, name, params=(), cursor=None):
+        """Run the named statement from QUERIES and record its timing. Returns the cursor used."""
+        cursor = cursor or self.cursor
+        started = time.perf_counter()
+        try:
+            return cursor.execute(QUERIES[name], params)
+        finally:
+            self.query_stats.record(name, time.perf_counter() - started)
+
+    def _executemany(self, name, rows):
+        started = time.perf_counter()
+        try:
+            return self.cursor.executemany(QUERIES[name], rows)
+        finally:
+            self.query_stats.record(name, time.perf_counter() - started)
+
+    def _query(self, name, params=(), row_factory=None):
+        """Fetch all rows of a named query. `row_factory(cursor, row)` builds each row as it is read."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = row_factory
+        return self._execute(name, params, cursor).fetchall()
+
+    def get_query_stats(self):
+        """Per-statement call counts and timings since start-up (or the last reset)."""
+        return self.query_stats.snapshot()
+
+    def _init_db(self):
+        self._prepare_schema()
+        self._seed_data()
+
+    def _prepare_schema(self):
+        """Create missing tables and indexes and migrate a database from an earlier release."""
+        self.cursor.execute("SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'menu')")
+        existing = self.cursor.fetchone()[0]
+        self._create_tables()
+        if existing:
+            self._migrate_schema()
+        else:
+            self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_recipes_ingredient ON recipes (ingredient_id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales (sale_date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_receipts_sale_date ON receipts (sale_date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_receipt ON sales (receipt_id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_menu ON sales (menu_id)")
+        # One rollup row per menu item and bucket, whatever the item was called; sales that are
+        # not linked to a menu item are rolled up by name
+        self.cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_rollup_key "
+                            "ON sales_rollup (bucket, bucket_start, IFNULL(menu_id, item_name))")
+        # Partial index: only items currently below their reorder level are indexed,
+        # so low-stock lookups stay cheap no matter how large the menu grows.
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_menu_low_stock ON menu (stock) WHERE stock < reorder_level"
+        )
+        self.change_log.install()
+        self.outbox.install()
+        self.conn.commit()
+
+    def _create_tables(self):
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS menu
+                            (
+                                id
+                                INTEGER
+                                PRIMARY
+                                KEY
+                                AUTOINCREMENT,
+                                name
+                                TEXT
+                                NOT
+                                NULL
+                                UNIQUE,
+                                price
+                                INTEGER
+                                NOT
+                                NULL,
+                                stock
+                                INTEGER
+                                NOT
+                                NULL,
+                                category
+                                TEXT
+                                NOT
+                                NULL,
+                                reorder_level
+                                INTEGER
+                                NOT
+                                NULL
+                                DEFAULT
+                                10
+                            )
+                            """)
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS sales
+                            (
+                                id
+                                INTEGER
+                                PRIMARY
+                                KEY
+                                AUTOINCREMENT,
+                                item_name
+                                TEXT
+                                NOT
+                                NULL,
+                                category
+                                TEXT
+                                NOT
+                                NULL,
+                                quantity
+                                INTEGER
+                                NOT
+                                NULL,
+                                price
+                                INTEGER
+                                NOT
+                                NULL,
+                                total
+                                INTEGER
+                                NOT
+                                NULL,
+                                sale_date
+                                TEXT
+                                NOT
+                                NULL,
+                                receipt_id
+                                INTEGER
+                                REFERENCES
+                                receipts
+                                (
+                                    id
+                                ),
+                                menu_id
+                                INTEGER
+                                REFERENCES
+                                menu
+                                (
+                                    id
+                                )
+                            )
+                            """)
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS eod_summary
+                            (
+                                id
+                                INTEGER
+                                PRIMARY
+                                KEY
+                                AUTOINCREMENT,
+                                report_date
+                                TEXT
+                                NOT
+                                NULL
+                                UNIQUE,
+                                total_revenue
+                                INTEGER
+                                NOT
+                                NULL,
+                                top_items_json
+                                TEXT,
+                                low_stock_json
+                                TEXT
+                            )
+                            """)
+        
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS eod_summary_archive
+                            (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                report_date TEXT NOT NULL UNIQUE,
+                                total_revenue INTEGER NOT NULL,
+                                top_items_json TEXT,
+                                low_stock_json TEXT,
+                                archived_at TEXT NOT NULL
+                            )
+                            """)
+        
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS users
+                            (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                username TEXT NOT NULL UNIQUE,
+                                password TEXT NOT NULL,
+                                role TEXT NOT NULL,
+                                created_at TEXT NOT NULL
+                            )
+                            """)
+        
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS receipts
+                            (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                receipt_uuid TEXT NOT NULL UNIQUE,
+                                sale_date TEXT NOT NULL,
+                                total INTEGER NOT NULL,
+                                tax INTEGER NOT NULL DEFAULT 0,
+                                service_charge INTEGER NOT NULL DEFAULT 0,
+                                items_json TEXT NOT NULL,
+                                created_at TEXT NOT NULL,
+                                refunded INTEGER NOT NULL DEFAULT 0
+                            )
+                            """)
+
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS ingredients
+                            (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                name TEXT NOT NULL UNIQUE,
+                                unit TEXT NOT NULL,
+                                stock INTEGER NOT NULL
+                            )
+                            """)
+
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS recipes
+                            (
+                                menu_id INTEGER NOT NULL,
+                                ingredient_id INTEGER NOT NULL,
+                                quantity INTEGER NOT NULL CHECK (quantity > 0),
+                                PRIMARY KEY (menu_id, ingredient_id)
+                            )
+                            """)
+
+        # Pre-aggregated sales per day/week/month bucket and menu item, kept up to date by record_sale.
+        # item_name is the name the item was first sold under in the bucket; readers show the
+        # current menu name and fall back to it for items no longer on the menu
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS sales_rollup
+                            (
+                                bucket TEXT NOT NULL,
+                                bucket_start TEXT NOT NULL,
+                                menu_id INTEGER,
+                                item_name TEXT NOT NULL,
+                                category TEXT NOT NULL,
+                                quantity INTEGER NOT NULL,
+                                revenue INTEGER NOT NULL
+                            )
+                            """)
+
+        # Orders and revenue per sale day and hour, kept up to date by record_sale
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS sales_hourly
+                            (
+                                sale_day TEXT NOT NULL,
+                                hour INTEGER NOT NULL,
+                                weekday INTEGER NOT NULL,
+                                orders INTEGER NOT NULL,
+                                quantity INTEGER NOT NULL,
+                                revenue INTEGER NOT NULL,
+                                PRIMARY KEY (sale_day, hour)
+                            )
+                            """)
+
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS promotions
+                            (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                name TEXT NOT NULL,
+                                scope TEXT NOT NULL CHECK (scope IN ('item', 'category', 'combo', 'order')),
+                                target TEXT,
+                                discount_type TEXT NOT NULL CHECK (discount_type IN ('percent', 'amount')),
+                                value REAL NOT NULL CHECK (value >= 0),
+                                min_qty INTEGER NOT NULL DEFAULT 1,
+                                min_spend INTEGER NOT NULL DEFAULT 0,
+                                start_time TEXT,
+                                end_time TEXT,
+                                days TEXT,
+                                active INTEGER NOT NULL DEFAULT 1
+                            )
+                            """)
+
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS settings
+                            (
+                                key TEXT PRIMARY KEY,
+                                value TEXT NOT NULL
+                            )
+                            """)
+
+        # Menu ids a register received from the replication hub; other menu rows were created locally
+        self.cursor.execute("CREATE TABLE IF NOT EXISTS hub_menu_ids (menu_id INTEGER PRIMARY KEY)")
+
+        # The open business day, advanced by close_business_day in the same transaction as its summary
+        self.cursor.execute("""
+                            CREATE TABLE IF NOT EXISTS pos_state
+                            (
+                                id INTEGER PRIMARY KEY CHECK (id = 1),
+                                business_date TEXT NOT NULL,
+                                updated_at TEXT NOT NULL
+                            )
+                            """)
+
+    def _migrate_schema(self):
+        """Bring a database created by an earlier release up to the current schema."""
+        self.cursor.execute("PRAGMA table_info(menu)")
+        menu_columns = [row[1] for row in self.cursor.fetchall()]
+        if 'reorder_level' not in menu_columns:
+            self.cursor.execute("ALTER TABLE menu ADD COLUMN reorder_level INTEGER NOT NULL DEFAULT 10")
+
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_to_centavos()
+
+        # Sales recorded before receipts were linked keep a NULL receipt_id
+        self.cursor.execute("PRAGMA table_info(sales)")
+        if 'receipt_id' not in [row[1] for row in self.cursor.fetchall()]:
+            self.cursor.execute("ALTER TABLE sales ADD COLUMN receipt_id INTEGER REFERENCES receipts (id)")
+        self.cursor.execute("PRAGMA table_info(receipts)")
+        if 'refunded' not in [row[1] for row in self.cursor.fetchall()]:
+            self.cursor.execute("ALTER TABLE receipts ADD COLUMN refunded INTEGER NOT NULL DEFAULT 0")
+        self.cursor.execute("PRAGMA table_info(sales)")
+        if 'menu_id' not in [row[1] for row in self.cursor.fetchall()]:
+            self.cursor.execute("ALTER TABLE sales ADD COLUMN menu_id INTEGER REFERENCES menu (id)")
+        # The centavo rebuild creates the key columns empty, so the backfill is a step of its own
+        if version < 2:
+            self._backfill_sales_keys()
+            self.cursor.execute("PRAGMA user_version = 2")
+        if version < 3:
+            # The rollup was keyed by item name; it is rebuilt from sales once the archive views exist
+            self.cursor.execute("DROP TABLE sales_rollup")
+            self._create_tables()
+            self.cursor.execute("PRAGMA user_version = 3")
+        if version < 4:
+            # A register that synced before hub ids were recorded has the hub's menu
+            self.cursor.execute("INSERT OR IGNORE INTO hub_menu_ids (menu_id) SELECT id FROM menu "
+                                "WHERE EXISTS (SELECT 1 FROM settings WHERE key = 'hub_menu_version')")
+            self.cursor.execute("PRAGMA user_version = 4")
+
+    def _migrate_to_centavos(self):
+        """Rebuild every table holding money so amounts are INTEGER centavos instead of REAL pesos.
+
+        Each table is renamed, created again with the current schema and copied back with its
+        amounts converted, all in one transaction. The rollup tables are dropped and rebuilt
+        from the converted sales afterwards.
+        """
+        self.conn.commit()
+        try:
+            self.cursor.execute("BEGIN")
+            for table in CENTAVO_MIGRATION:
+                self.cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_pesos")
+            self.cursor.execute("DROP TABLE sales_rollup")
+            self.cursor.execute("DROP TABLE sales_hourly")
+            self._create_tables()
+            for table, conversions in CENTAVO_MIGRATION.items():
+                new_columns = {row[1] for row in self.cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+                columns = [row[1] for row in self.cursor.execute(f"PRAGMA table_info({table}_pesos)").fetchall()
+                           if row[1] in new_columns]
+                self.cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) "
+                                    f"SELECT {', '.join(conversions.get(c, c) for c in columns)} FROM {table}_pesos")
+                self.cursor.execute(f"DROP TABLE {table}_pesos")
+            receipts = self.cursor.execute("SELECT id, items_json FROM receipts").fetchall()
+            self.cursor.executemany("UPDATE receipts SET items_json = ? WHERE id = ?",
+                                    [(receipt_items_to_centavos(items_json), receipt_id) for receipt_id, items_json in receipts])
+            self.cursor.execute("PRAGMA user_version = 1")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Error converting money columns to centavos: {e}")
+            raise
+
+    def _backfill_sales_keys(self):
+        """Link existing sales rows to their menu item and receipt (no commit).
+
+        Menu ids are matched by item name; sales of items since deleted keep a NULL menu_id.
+        A checkout stamps its receipt and its sales rows with the same sale_date, so a sale is
+        linked to the receipt with that timestamp that lists the item, unless two receipts
+        share the timestamp and it is ambiguous.
+        """
+        self.cursor.execute("UPDATE sales SET menu_id = (SELECT id FROM menu WHERE menu.name = sales.item_name) "
+                            "WHERE menu_id IS NULL")
+        self.cursor.execute("""
+            UPDATE sales SET receipt_id = (
+                SELECT MIN(r.id) FROM receipts r
+                WHERE r.sale_date = sales.sale_date
+                  AND EXISTS (SELECT 1 FROM json_each(r.items_json) WHERE json_extract(value, '$.name') = sales.item_name)
+                HAVING COUNT(*) = 1)
+            WHERE receipt_id IS NULL AND quantity > 0
+        """)
+
+    def _sales_source(self):
+        """The table or view holding every sale: `sales_all` (hot and archived months) once the
+        archive views exist, else the hot `sales` table."""
+        self.cursor.execute("SELECT EXISTS (SELECT 1 FROM sqlite_temp_master WHERE type = 'view' AND name = 'sales_all')")
+        return 'sales_all' if self.cursor.fetchone()[0] else 'sales'
+
+    def _ensure_rollups(self):
+        """Rebuild the aggregates if there are sales but no rollups, e.g. after a migration dropped them."""
+        source = self._sales_source()
+        self.cursor.execute(f"SELECT EXISTS (SELECT 1 FROM sales_rollup), EXISTS (SELECT 1 FROM sales_hourly), "
+                            f"EXISTS (SELECT 1 FROM {source})")
+        has_rollup, has_hourly, has_sales = self.cursor.fetchone()
+        if has_sales and not has_rollup:
+            self._rebuild_sales_rollup()
+        if has_sales and not has_hourly:
+            self._rebuild_sales_hourly()
+        self.conn.commit()
+
+    def _rebuild_sales_hourly(self):
+        """Recompute the hourly aggregate from raw sales, archived months included (no commit).
+        Each distinct sale timestamp counts as one order, which is how process_order stamps the
+        lines of an order; refunds (negative quantities) are not orders."""
+        source = self._sales_source()
+        self.cursor.execute("DELETE FROM sales_hourly")
+        self.cursor.execute(f"""
+            INSERT INTO sales_hourly (sale_day, hour, weekday, orders, quantity, revenue)
+            SELECT date(sale_date), CAST(strftime('%H', sale_date) AS INTEGER),
+                   (CAST(strftime('%w', sale_date) AS INTEGER) + 6) % 7,
+                   COUNT(DISTINCT CASE WHEN quantity > 0 THEN sale_date END), SUM(quantity), SUM(total)
+            FROM {source}
+            GROUP BY date(sale_date), strftime('%H', sale_date)
+        """)
+
+    def _rebuild_sales_rollup(self):
+        """Recompute every rollup bucket from raw sales, archived months included (no commit)."""
+        source = self._sales_source()
+        self.cursor.execute("DELETE FROM sales_rollup")
+        for bucket in ROLLUP_BUCKETS:
+            start_sql = ROLLUP_BUCKET_SQL[bucket]
+            # MIN(id) makes item_name and category those of the bucket's first sale, as record_sale leaves them
+            self.cursor.execute(f"""
+                INSERT INTO sales_rollup (bucket, bucket_start, menu_id, item_name, category, quantity, revenue)
+                SELECT bucket, bucket_start, menu_id, item_name, category, quantity, revenue FROM (
+                    SELECT ? AS bucket, {start_sql} AS bucket_start, menu_id, item_name, category,
+                           SUM(quantity) AS quantity, SUM(total) AS revenue, MIN(id)
+                    FROM {source}
+                    GROUP BY {start_sql}, IFNULL(menu_id, item_name))
+            """, (bucket,))
+
+    def rebuild_sales_rollup(self):
+        try:
+            self._rebuild_sales_rollup()
+            self._rebuild_sales_hourly()
+            self.conn.commit()
+            return True
+        except sqlite3.Error:
+            self.conn.rollback()
+            return False
+
+    def _seed_data(self):
+        try:
+            self.cursor.execute("SELECT COUNT(*) FROM menu")
+            if self.cursor.fetchone()[0] == 0:
+                initial_items = [
+                   
+                    ('Espresso', 9000, 100, 'Coffee'),
+                    ('Latte', 8000, 150, 'Coffee'),
+                    ('Cappuccino', 10000, 120, 'Coffee'),
+                    ('Mocha', 11000, 90, 'Coffee'),
+                    ('Americano', 7500, 130, 'Coffee'),
+                    ('Flat White', 10500, 80, 'Coffee'),
+                    ('Macchiato', 9500, 110, 'Coffee'),
+                    ('Affogato', 12000, 70, 'Coffee'),
+                    ('Pour Over', 13000, 60, 'Coffee'),
+
+                   
+                    ('Croissant', 7000, 50, 'Pastry'),
+                    ('Blueberry Muffin', 7000, 60, 'Pastry'),
+                    ('Chocolate Chip Cookie', 5000, 90, 'Pastry'),
+                    ('Cinnamon Roll', 8500, 45, 'Pastry'),
+                    ('Cheese Danish', 9500, 35, 'Pastry'),
+                    ('Lemon Bar', 6500, 55, 'Pastry'),
+                    ('Red Velvet Cake Slice', 15000, 30, 'Pastry'),
+                    ('Apple Turnover', 7500, 40, 'Pastry'),
+                    ('Almond Biscotti', 4000, 75, 'Pastry'),
+
+                    
+                    ('Iced Tea', 6000, 80, 'Beverage'),
+                    ('Orange Juice', 7000, 70, 'Beverage'),
+                    ('Lemonade', 7500, 90, 'Beverage'),
+                    ('Sparkling Water', 5000, 100, 'Beverage'),
+                    ('Hot Chocolate', 11000, 60, 'Beverage'),
+                    ('Green Tea', 5500, 85, 'Beverage'),
+                    ('Mango Smoothie', 14000, 40, 'Beverage'),
+                    ('Strawberry Milkshake', 16000, 30, 'Beverage'),
+                    ('Caramel Frappe', 15500, 50, 'Beverage'),
+
+
+                    ('Tuna Sandwich', 5000, 30, 'Food'),
+                    ('Chicken Pesto Sandwich', 18000, 25, 'Food'),
+                    ('Caesar Salad', 19000, 20, 'Food'),
+                    ('Beef Lasagna', 25000, 15, 'Food'),
+                    ('Breakfast Burrito', 16000, 35, 'Food'),
+                    ('Vegetarian Wrap', 15000, 40, 'Food'),
+                    ('Pasta Carbonara', 22000, 18, 'Food'),
+                    ('Waffles and Syrup', 13000, 22, 'Food'),
+                    ('Fries', 9000, 50, 'Food'),
+                ]
+                self.cursor.executemany("INSERT INTO menu (name, price, stock, category) VALUES (?, ?, ?, ?)",
+                                        initial_items)
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error seeding data: {e}")
+
+        try:
+            self.cursor.execute("SELECT COUNT(*) FROM users")
+            if self.cursor.fetchone()[0] == 0:
+                default_users = [
+                    ('manager', 'admin123', 'Manager'),
+                    ('cashier', 'password', 'Cashier')
+                ]
+                for u, p, r in default_users:
+                    try:
+                        self.cursor.execute("INSERT INTO users (username, password, role, created_at) VALUES (?, ?, ?, datetime('now'))", (u, p, r))
+                    except sqlite3.IntegrityError:
+                        pass
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error seeding users: {e}")
+        except sqlite3.Error as e:
+            print(f"Error seeding data: {e}")
+
+        try:
+            self.cursor.execute("SELECT COUNT(*) FROM ingredients")
+            if self.cursor.fetchone()[0] == 0:
+                initial_ingredients = [
+                    ('Espresso Shot', 'shot', 600),
+                    ('Milk', 'ml', 20000),
+                    ('Chocolate Syrup', 'pump', 300),
+                    ('Caramel Syrup', 'pump', 300),
+                    ('Vanilla Ice Cream', 'scoop', 80),
+                ]
+                self.cursor.executemany("INSERT INTO ingredients (name, unit, stock) VALUES (?, ?, ?)",
+                                        initial_ingredients)
+                initial_recipes = [
+                    ('Espresso', 'Espresso Shot', 1),
+                    ('Latte', 'Espresso Shot', 1), ('Latte', 'Milk', 200),
+                    ('Cappuccino', 'Espresso Shot', 1), ('Cappuccino', 'Milk', 120),
+                    ('Mocha', 'Espresso Shot', 1), ('Mocha', 'Milk', 150), ('Mocha', 'Chocolate Syrup', 2),
+                    ('Americano', 'Espresso Shot', 2),
+                    ('Flat White', 'Espresso Shot', 2), ('Flat White', 'Milk', 120),
+                    ('Macchiato', 'Espresso Shot', 1), ('Macchiato', 'Milk', 30),
+                    ('Affogato', 'Espresso Shot', 1), ('Affogato', 'Vanilla Ice Cream', 1),
+                    ('Hot Chocolate', 'Milk', 250), ('Hot Chocolate', 'Chocolate Syrup', 3),
+                    ('Strawberry Milkshake', 'Milk', 250), ('Strawberry Milkshake', 'Vanilla Ice Cream', 2),
+                    ('Caramel Frappe', 'Espresso Shot', 1), ('Caramel Frappe', 'Milk', 150), ('Caramel Frappe', 'Caramel Syrup', 3),
+                ]
+                self.cursor.executemany("""
+                    INSERT OR IGNORE INTO recipes (menu_id, ingredient_id, quantity)
+                    SELECT m.id, i.id, ? FROM menu m, ingredients i WHERE m.name = ? AND i.name = ?
+                """, [(qty, item, ingredient) for item, ingredient, qty in initial_recipes])
+                self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error seeding ingredients: {e}")
+
+    def create_menu_item(self, name, price, stock, category, reorder_level=10):
+        try:
+            cursor = self._execute('menu_insert', (name, price, stock, category, reorder_level))
+            self.conn.commit()
+            return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            return False
+        except sqlite3.Error:
+            return False
+
+    def read_menu_items(self):
+        return self._query('menu_list', row_factory=menu_item_row)
+
+    def read_categories(self):
+        return [row[0] for row in self._query('menu_categories')]
+
+    def update_menu_item(self, item_id, name, price, stock, category, reorder_level=10):
+        try:
+            self._execute('menu_update', (name, price, stock, category, reorder_level, item_id))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def delete_menu_item(self, item_id):
+        try:
+            self._execute('recipe_delete', (item_id,))
+            self._execute('menu_delete', (item_id,))
+            deleted = self.cursor.rowcount > 0
+            self.conn.commit()
+            self.inventory.invalidate()
+            return deleted
+        except sqlite3.Error:
+            return False
+
+    def create_ingredient(self, name, unit, stock):
+        try:
+            self._execute('ingredient_insert', (name, unit, stock))
+            self.conn.commit()
+            return self.cursor.lastrowid
+        except sqlite3.Error:
+            return None
+
+    def read_ingredients(self):
+        return self._query('ingredient_list')
+
+    def update_ingredient_stock(self, ingredient_id, stock):
+        try:
+            self._execute('ingredient_update_stock', (stock, ingredient_id))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def set_recipe(self, menu_id, components):
+        """Replace the recipe of a menu item. `components` is a list of (ingredient_id, quantity)."""
+        try:
+            self._execute('recipe_delete', (menu_id,))
+            self._executemany('recipe_insert', [(menu_id, ingredient_id, qty) for ingredient_id, qty in components])
+            self.conn.commit()
+            self.inventory.invalidate()
+            return True
+        except sqlite3.Error:
+            self.conn.rollback()
+            return False
+
+    def get_sellable_counts(self, menu_items=None):
+        """Return {menu_id: how many can still be sold}, limited by ingredients for items with recipes."""
+        if menu_items is None:
+            menu_items = self.read_menu_items()
+        return self.inventory.sellable_counts(menu_items)
+
+    def read_settings(self):
+        """All settings as a {key: value} dict of strings."""
+        try:
+            return dict(self._query('settings_list'))
+        except sqlite3.Error:
+            return {}
+
+    def save_settings(self, settings):
+        try:
+            self._executemany('settings_upsert', [(key, str(value)) for key, value in settings.items()])
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving settings: {e}")
+            return False
+
+    def create_promotion(self, name, scope, target, discount_type, value, min_qty=1, min_spend=0,
+                         start_time=None, end_time=None, days=None):
+        """Add a promotion rule (see promotions.Promotion for the fields). Returns its id or None."""
+        try:
+            self._execute('promotion_insert', (name, scope, target, discount_type, value, min_qty, min_spend,
+                                               start_time, end_time, days))
+            self.conn.commit()
+            return self.cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"Error creating promotion: {e}")
+            return None
+
+    def read_promotions(self):
+        return self._query('promotion_list', row_factory=record_factory(Promotion))
+
+    def set_promotion_active(self, promotion_id, active):
+        try:
+            self._execute('promotion_set_active', (1 if active else 0, promotion_id))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def delete_promotion(self, promotion_id):
+        try:
+            self._execute('promotion_delete', (promotion_id,))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def get_item_details(self, item_id):
+        return self._execute('menu_item_details', (item_id,)).fetchone()
+    
+    def create_user(self, username, password, role='Cashier'):
+        try:
+            self._execute('user_insert', (username, password, role))
+            self.conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            return False
+        except sqlite3.Error:
+            return False
+
+    def get_user(self, username):
+        try:
+            row = self._execute('user_get', (username,)).fetchone()
+            if row:
+                return {'username': row[0], 'password': row[1], 'role': row[2]}
+            return None
+        except sqlite3.Error:
+            return None
+
+    def list_users(self):
+        try:
+            return [{'username': r[0], 'role': r[1]} for r in self._query('user_list')]
+        except sqlite3.Error:
+            return []
+
+    def update_user_password(self, username, new_password):
+        try:
+            self._execute('user_update_password', (new_password, username))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def delete_user(self, username):
+        try:
+            self._execute('user_delete', (username,))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def add_low_stock_listener(self, callback):
+        """Register `callback(items)` to be called when a sale pushes items below their reorder level.
+        `items` is a list of (name, stock, reorder_level) tuples."""
+        if callback not in self.low_stock_listeners:
+            self.low_stock_listeners.append(callback)
+
+    def remove_low_stock_listener(self, callback):
+        if callback in self.low_stock_listeners:
+            self.low_stock_listeners.remove(callback)
+
+    def _notify_low_stock(self, crossed_items):
+        for callback in list(self.low_stock_listeners):
+            try:
+                callback(crossed_items)
+            except Exception as e:
+                print(f"Low stock listener error: {e}")
+
+    def _menu_ids_by_name(self, order_items):
+        """Menu ids of `order_items`, in order; None for names no longer on the menu."""
+        ids = dict(self._query('menu_ids_by_name', (json.dumps([item.name for item in order_items]),)))
+        return [ids.get(item.name) for item in order_items]
+
+    def _find_reorder_crossings(self, sold_qty_by_id):
+        """Return items that were at or above their reorder level before this sale and are below it now."""
+        if not sold_qty_by_id:
+            return []
+        rows = self._query('menu_reorder_crossings', (json.dumps(list(sold_qty_by_id)),))
+        return [(name, stock, level) for menu_id, name, stock, level in rows
+                if stock + sold_qty_by_id[menu_id] >= level]
+
+    def _update_sales_rollup(self, order_items, line_totals, sale_date, menu_ids):
+        day = datetime.datetime.strptime(sale_date[:10], '%Y-%m-%d').date()
+        rows = []
+        for bucket in ROLLUP_BUCKETS:
+            start = bucket_start(bucket, day).strftime('%Y-%m-%d')
+            for item, total, menu_id in zip(order_items, line_totals, menu_ids):
+                rows.append((bucket, start, menu_id, item.name, item.category, item.qty, total))
+        self._executemany('sales_rollup_upsert', rows)
+
+    def _update_sales_hourly(self, order_items, line_totals, sale_date, orders=1):
+        sold_at = datetime.datetime.strptime(sale_date, '%Y-%m-%d %H:%M:%S')
+        self._execute('sales_hourly_upsert', (sold_at.strftime('%Y-%m-%d'), sold_at.hour, sold_at.weekday(), orders,
+              sum(item.qty for item in order_items),
+              sum(line_totals)))
+
+    def record_sale(self, order_items, sale_date, line_totals=None, receipt_id=None, menu_ids=None):
+        """Record the lines of one order. `line_totals` gives each line's total after promotions;
+        without it every line is charged at price * qty. `receipt_id` links the sales rows to
+        the order's receipt, which refund_receipt relies on. `menu_ids` are the lines' menu item
+        ids; callers that only have names (e.g. orders from another register) leave them out
+        and they are looked up in one query."""
+        try:
+            crossed_items = self._insert_sale(order_items, sale_date, line_totals, receipt_id, menu_ids)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            return False
+        if crossed_items:
+            self._notify_low_stock(crossed_items)
+        return True
+
+    def _insert_sale(self, order_items, sale_date, line_totals, receipt_id, menu_ids):
+        """The writes of record_sale (no commit). Returns the items that crossed their reorder level."""
+        if line_totals is None:
+            line_totals = [item.subtotal for item in order_items]
+        if menu_ids is None:
+            menu_ids = self._menu_ids_by_name(order_items)
+        sold_qty_by_id = {}
+        for (name, price, qty, category), total, menu_id in zip(order_items, line_totals, menu_ids):
+            self._execute('sale_insert', (name, category, qty, price, total, sale_date, receipt_id, menu_id))
+            if menu_id is not None:
+                self._execute('menu_deduct_stock', (qty, menu_id))
+                sold_qty_by_id[menu_id] = sold_qty_by_id.get(menu_id, 0) + qty
+        self.inventory.consume(self.cursor, sold_qty_by_id.items())
+        self._update_sales_rollup(order_items, line_totals, sale_date, menu_ids)
+        self._update_sales_hourly(order_items, line_totals, sale_date)
+        return self._find_reorder_crossings(sold_qty_by_id)
+
+    def record_checkout(self, receipt_uuid, sale_date, total, order_items, line_totals=None, menu_ids=None,
+                        tax=0, service_charge=0, outbox_payload=None):
+        """Store one order in a single transaction: its receipt, its sales rows with the stock and
+        ingredient deductions, and (with `outbox_payload`) its replication outbox entry, so a crash
+        never leaves a sale without its receipt or an order the hub will never hear about.
+        Returns the receipt id, or None if nothing was stored (e.g. the receipt UUID exists)."""
+        try:
+            self._execute('receipt_insert', (receipt_uuid, sale_date, total, order_lines_to_json(order_items),
+                                             tax, service_charge))
+            receipt_id = self.cursor.lastrowid
+            crossed_items = self._insert_sale(order_items, sale_date, line_totals, receipt_id, menu_ids)
+            if outbox_payload is not None:
+                self.outbox.insert(receipt_uuid, outbox_payload)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            return None
+        if crossed_items:
+            self._notify_low_stock(crossed_items)
+        return receipt_id
+
+    def save_receipt(self, receipt_uuid, sale_date, total, items, tax=0, service_charge=0):
+        """Save a receipt record for a list of OrderLines. Amounts are centavos. Returns inserted id or None."""
+        try:
+            items_json = order_lines_to_json(items)
+            self._execute('receipt_insert', (receipt_uuid, sale_date, total, items_json, tax, service_charge))
+            self.conn.commit()
+            return self.cursor.lastrowid
+        except sqlite3.IntegrityError:
+            return None
+        except sqlite3.Error:
+            return None
+
+    def refund_receipt(self, receipt_uuid, refund_date, quantities=None):
+        """Refund `quantities` ({item name: qty}) of a receipt, or everything not yet refunded (a void).
+
+        One transaction records reversing sales rows (negative quantity and total, dated
+        `refund_date` and linked to the receipt), puts the stock and ingredients back, takes
+        the amounts off the rollups and adds the refund to the receipt. Quantities are capped at
+        what is still unrefunded. The receipt total (tax, service charge and rounding included) is
+        split over its lines in proportion to their net amounts and each unit returns its share,
+        so partial refunds add up to what the customer paid. Returns the refunded amount in
+        centavos, or None if nothing was refunded. Receipts in the archive belong to closed months
+        and cannot be refunded.
+        """
+        try:
+            row = self._execute('receipt_refund_state', (receipt_uuid,)).fetchone()
+            if row is None:
+                return None
+            receipt_id, receipt_total, already_refunded, items_json = row
+            sold, returned = {}, {}
+            menu_ids = {}
+            for name, category, price, qty, total, menu_id in self._query('receipt_sales', (receipt_id,)):
+                if menu_id is not None:
+                    menu_ids[name] = menu_id
+                if qty > 0:
+                    sold_line, sold_total = sold.get(name, (OrderLine(name, price, 0, category), 0))
+                    sold[name] = (sold_line._replace(qty=sold_line.qty + qty), sold_total + total)
+                else:
+                    returned_qty, returned_total = returned.get(name, (0, 0))
+                    returned[name] = (returned_qty - qty, returned_total - total)
+            if not sold:
+                # Sold before sales rows were linked to receipts: refund at the receipt's prices
+                for line in order_lines_from_json(items_json):
+                    sold[line.name] = (line, line.subtotal)
+
+            # What the customer paid for each line
+            paid_by_name = dict(zip(sold, allocate(receipt_total, [total for _, total in sold.values()])))
+            refund_lines, refund_totals, left_after, paid_back = [], [], 0, 0
+            for name, (line, total) in sold.items():
+                returned_qty, returned_total = returned.get(name, (0, 0))
+                left = line.qty - returned_qty
+                qty = left if quantities is None else max(min(quantities.get(name, 0), left), 0)
+                left_after += left - qty
+                if qty == 0:
+                    continue
+
+                def share(amount, units):
+                    # The share of the first `units` units; the difference between two calls is what
+                    # the units in between return, so every refund of a line adds up to its amount
+                    return allocate(amount, [units, line.qty - units])[0]
+
+                done = returned_qty + qty
+                amount = total - returned_total if qty == left else share(total, done) - share(total, returned_qty)
+                paid_back += share(paid_by_name[name], done) - share(paid_by_name[name], returned_qty)
+                refund_lines.append(line._replace(qty=-qty))
+                refund_totals.append(-amount)
+            if not refund_lines:
+                return None
+
+            unlinked = [line for line in refund_lines if line.name not in menu_ids]
+            if unlinked:
+                menu_ids.update(zip((line.name for line in unlinked), self._menu_ids_by_name(unlinked)))
+            returned_qty_by_id = {}
+            for line, total in zip(refund_lines, refund_totals):
+                menu_id = menu_ids[line.name]
+                self._execute('sale_insert', (line.name, line.category, line.qty, line.price, total, refund_date,
+                                              receipt_id, menu_id))
+                if menu_id is not None:
+                    self._execute('menu_deduct_stock', (line.qty, menu_id))
+                    returned_qty_by_id[menu_id] = returned_qty_by_id.get(menu_id, 0) + line.qty
+            self.inventory.consume(self.cursor, returned_qty_by_id.items())
+            self._update_sales_rollup(refund_lines, refund_totals, refund_date,
+                                      [menu_ids[line.name] for line in refund_lines])
+            self._update_sales_hourly(refund_lines, refund_totals, refund_date, orders=0)
+            refund = receipt_total - already_refunded if left_after == 0 else paid_back
+            self._execute('receipt_add_refund', (refund, receipt_id))
+            self.conn.commit()
+            return refund
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Error refunding receipt {receipt_uuid}: {e}")
+            return None
+
+    def get_receipt(self, receipt_uuid):
+        try:
+            rows = self._query('receipt_get', (receipt_uuid,), receipt_row)
+            if not rows:
+                # Not in the hot table; look through the archived months
+                rows = self._query('receipt_get_archived', (receipt_uuid,), receipt_row)
+            return rows[0] if rows else None
+        except sqlite3.Error:
+            return None
+
+    def delete_receipt(self, receipt_uuid):
+        """Delete a receipt by UUID that has no sales rows linked to it. Returns True if it was deleted;
+        a receipt with sales is left alone and has to be voided (refund_receipt) instead."""
+        try:
+            self._execute('receipt_delete', (receipt_uuid,))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def get_sales_data_for_report(self, days_back=30):
+        date_limit = (datetime.datetime.now() - datetime.timedelta(days=days_back)).strftime('%Y-%m-%d %H:%M:%S')
+        return self._query('sales_report_rows', (date_limit,))
+
+    def get_sales_rollup(self, bucket, start_date, end_date):
+        """Aggregated sales between two dates (inclusive) in `bucket`-sized buckets.
+
+        Rows match get_sales_data_for_report: (item_name, category, quantity, total, bucket_start).
+        """
+        return self._query('sales_rollup', sales_rollup_params(bucket, start_date, end_date))
+
+    def get_sales_by_hour(self, start_date, end_date):
+        """(weekday, hour, orders, revenue) totals for sale days between two dates (inclusive)."""
+        return self._query('sales_hourly', (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+
+    def end_of_day_summary(self, target_date_str):
+        # Range predicates on sale_date use idx_sales_sale_date and only touch the hot sales table
+        next_date_str = (datetime.datetime.strptime(target_date_str, '%Y-%m-%d') + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        items = self._query('eod_item_totals', (target_date_str, next_date_str))
+        total_revenue = sum(revenue for _, _, revenue in items)
+        top_items = [(name, quantity) for name, quantity, _ in sorted(items, key=lambda item: -item[1])[:3]]
+        low_stock = self._query('menu_low_stock')
+
+        return EodSummary(target_date_str, total_revenue, top_items, low_stock)
+
+    def _insert_eod_summary(self, summary_data):
+        """Write a summary to eod_summary and eod_summary_archive (no commit)."""
+        top_items_json = json.dumps(summary_data.top_items)
+        low_stock_json = json.dumps(summary_data.low_stock)
+        self._execute('eod_insert', (summary_data.date, summary_data.total_revenue, top_items_json, low_stock_json))
+        self._execute('eod_archive_insert', (summary_data.date, summary_data.total_revenue, top_items_json, low_stock_json))
+
+    def save_eod_summary(self, summary_data):
+        try:
+            self._insert_eod_summary(summary_data)
+            self.conn.commit()
+            self.start_backup('eod')
+            return True
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            return False
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Error saving EOD summary: {e}")
+            return False
+
+    def load_business_date(self, default=None):
+        """The open business day as a date. A database without one starts on `default` (today) or,
+        if a later day was already closed, on the day after the last closed one."""
+        try:
+            row = self._execute('pos_state_get').fetchone()
+            if row is None:
+                business_date = default or datetime.date.today()
+                last_closed = self._execute('eod_last_date').fetchone()[0]
+                if last_closed:
+                    next_open = datetime.datetime.strptime(last_closed, '%Y-%m-%d').date() + datetime.timedelta(days=1)
+                    business_date = max(business_date, next_open)
+                self._execute('pos_state_init', (business_date.strftime('%Y-%m-%d'),))
+                self.conn.commit()
+                return business_date
+            return datetime.datetime.strptime(row[0], '%Y-%m-%d').date()
+        except sqlite3.Error as e:
+            print(f"Error reading the business date: {e}")
+            return default or datetime.date.today()
+
+    def close_business_day(self, business_date):
+        """Close `business_date` (a date) in one transaction: summarise its sales, write the summary
+        to both EOD tables and move the stored business date to the next day.
+
+        Returns the EodSummary, or None if the day was already closed (its summary exists or the
+        stored business date has moved on) or saving failed; nothing is written then.
+        """
+        date_str = business_date.strftime('%Y-%m-%d')
+        next_str = (business_date + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        self.conn.commit()
+        try:
+            # Taken before reading, so no sale can land between the summary and the day advance
+            self.cursor.execute("BEGIN IMMEDIATE")
+            summary = self.end_of_day_summary(date_str)
+            self._insert_eod_summary(summary)
+            self._execute('pos_state_init', (date_str,))
+            if self._execute('pos_state_advance', (next_str, date_str)).rowcount != 1:
+                self.conn.rollback()
+                return None
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            return None
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Error closing business day {date_str}: {e}")
+            return None
+        self.start_backup('eod')
+        if self.maintenance is not None:
+            # No checkouts are expected now, so a one-time full VACUUM may hold the write lock
+            self.maintenance.request_conversion()
+        return summary
+
+    def start_backup(self, label='manual'):
+        """Kick off an online backup on a background thread. Returns False if backups are unavailable."""
+        if self.backup_service is None:
+            return False
+        self.backup_service.request_backup(label)
+        return True
+
+    def list_backups(self):
+        return self.backup_service.list_backups() if self.backup_service else []
+
+    def restore_backup(self, backup_path):
+        """Replace the live database with a verified backup, keeping a copy of the current state first."""
+        if self.backup_service is None:
+            return False
+        try:
+            self.backup_service.wait()
+            self.backup_service.run_backup('pre-restore')
+            # The archive file is replaced through its own connection, so it is detached meanwhile
+            self.archive.detach()
+            try:
+                restored = restore_backup(backup_path, self.conn, self.archive.archive_path)
+            finally:
+                self.archive.attach()
+            if not restored:
+                self.archive.refresh_views()
+                return False
+            # The backup may predate the current schema
+            self._prepare_schema()
+            self.inventory.invalidate()
+            self.eod_cache.clear()
+            self.eod_archive_cache.clear()
+            self.archive.refresh_views()
+            self._ensure_rollups()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error restoring backup: {e}")
+            return False
+
+    def get_past_eod_records(self):
+        return [self.eod_cache.decode(row) for row in self._query('eod_list')]
+
+    def get_eod_page(self, offset, limit):
+        """One page of EOD summaries, newest first. Only the rows on the page are decoded."""
+        try:
+            return [self.eod_cache.decode(row) for row in self._query('eod_page', (limit, offset))]
+        except sqlite3.Error:
+            return []
+
+    def count_eod_records(self):
+        return self._execute('eod_count').fetchone()[0]
+
+    def clear_all_sales_data(self):
+        try:
+            try:
+                self._execute('eod_archive_all')
+            except Exception:
+                pass
+
+            self._execute('sales_clear')
+            self._execute('sales_rollup_clear')
+            self._execute('sales_hourly_clear')
+            self._execute('eod_clear')
+            self.archive.clear_sales()
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Error clearing sales data: {e}")
+            return False
+        finally:
+            # Decoded summaries of either table may no longer match what is stored
+            self.eod_cache.clear()
+            self.eod_archive_cache.clear()
+
+    def archive_closed_months(self, current_date):
+        """Move sales and receipts from months before `current_date`'s month into the archive.
+        Returns the archived months ('YYYY-MM')."""
+        try:
+            # Archived rows still exist, so moving them is not logged as deletes
+            with self.change_log.paused():
+                return self.archive.archive_before(current_date)
+        except sqlite3.Error as e:
+            print(f"Error archiving closed months: {e}")
+            return []
+
+    def list_archived_months(self):
+        try:
+            return self.archive.months()
+        except sqlite3.Error:
+            return []
+
+    def get_archived_eod_records(self):
+        return [self.eod_archive_cache.decode(row) for row in self._query('eod_archive_list')]
+
+    def restore_all_archived_eod_records(self):
+        try:
+            self._execute('eod_restore_archived')
+            self.conn.commit()
+            return self._execute('eod_count').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def get_all_receipts(self, limit=None):
+        try:
+            return self._query('receipt_list', (limit if limit and isinstance(limit, int) else -1,), receipt_row)
+        except sqlite3.Error:
             return []
\ No newline at end of file
@@ -0,0 +1,136 @@
+import datetime
+import numpy as np
+import pandas as pd
+from typing import NamedTuple
+from queries import QUERIES
+
+# Days of daily sales the forecast learns from
+HISTORY_DAYS = 365
+# Smoothing factor of the demand level: higher follows recent days more closely
+SMOOTHING_ALPHA = 0.1
+# Items forecast to sell fewer units than this are left off the prep list
+MIN_PREP_UNITS = 0.5
+
+# Item and day labels repeat heavily and are read as categoricals, like the report rollups
+DAILY_SALES_DTYPES = {'item_name': 'category', 'bucket_start': 'category', 'quantity': 'int64'}
+
+
+class ItemForecast(NamedTuple):
+    name: str
+    category: str
+    # Expected units sold on the forecast day
+    forecast: float
+    stock: int
+    # Units to prepare on top of the current stock (0 if stock covers the forecast)
+    to_prepare: int
+
+
+class DemandForecast:
+    """Forecast units per item for one day; `forecast[i]` belongs to `names[i]`."""
+
+    def __init__(self, day, names, forecast):
+        self.day = day
+        self.names = names
+        self.forecast = forecast
+
+    def __len__(self):
+        return len(self.names)
+
+    def get(self, name):
+        matches = np.flatnonzero(self.names == name)
+        return float(self.forecast[matches[0]]) if len(matches) else 0.0
+
+
+def weekday_smoothing(demand, first_weekday, target_weekday, alpha=SMOOTHING_ALPHA):
+    """Forecast for the day after an items x days demand matrix, for every item at once.
+
+    Weekday factors (each weekday's mean over the item's overall mean) take the weekly
+    pattern out of the history; an exponentially weighted average of what is left is the
+    item's current level, and the level times the target weekday's factor is the forecast.
+    Days on a weekday the item never sells on say nothing about its level and are left out
+    of the average.
+    """
+    items, days = demand.shape
+    if not items or not days:
+        return np.zeros(items)
+    weekdays = (first_weekday + np.arange(days)) % 7
+    onehot = np.zeros((days, 7))
+    onehot[np.arange(days), weekdays] = 1.0
+    overall_mean = demand.mean(axis=1, keepdims=True)
+    weekday_mean = demand @ onehot / np.maximum(onehot.sum(axis=0), 1)
+    factors = np.divide(weekday_mean, overall_mean, out=np.ones((items, 7)), where=overall_mean > 0)
+
+    day_factors = factors[:, weekdays]
+    informative = day_factors > 0
+    deseasonalized = np.divide(demand, day_factors, out=np.zeros_like(demand), where=informative)
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1)
+    weight_sums = informative @ weights
+    level = np.divide(deseasonalized @ weights, weight_sums, out=np.zeros(items), where=weight_sums > 0)
+    return level * factors[:, target_weekday]
+
+
+class DemandForecaster:
+    """Per-item daily demand forecasts from the daily sales rollup.
+
+    The history used for a day ends the day before, so a day's forecast never changes once
+    the day is open; it is computed on first use and cached until the business day moves on.
+    """
+
+    def __init__(self, conn, history_days=HISTORY_DAYS, alpha=SMOOTHING_ALPHA):
+        self.conn = conn
+        self.history_days = history_days
+        self.alpha = alpha
+        self._cache = {}
+
+    def invalidate(self):
+        """Drop the cached forecast, e.g. after the sales history was cleared or restored."""
+        self._cache.clear()
+
+    def read_demand(self, day):
+        """(item names, items x days matrix of units sold, first day) for the history before `day`."""
+        start = day - datetime.timedelta(days=self.history_days)
+        end = day - datetime.timedelta(days=1)
+        frame = pd.read_sql_query(QUERIES['daily_item_sales'], self.conn,
+                                  params=(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')),
+                                  dtype=DAILY_SALES_DTYPES)
+        if frame.empty:
+            return np.array([], dtype=object), np.zeros((0, self.history_days)), start
+        items = frame['item_name'].cat
+        # Only the distinct day labels are parsed, not every row's
+        day_labels = frame['bucket_start'].cat
+        offsets = (pd.to_datetime(day_labels.categories.astype(str)) - pd.Timestamp(start)).days.to_numpy()
+        # The history starts on the first day with sales; days before the shop sold anything are not zero demand
+        first = offsets.min()
+        demand = np.zeros((len(items.categories), self.history_days - first))
+        # A deleted item sold under a name now used by a menu item shares its row, so days add up
+        np.add.at(demand, (items.codes, offsets[day_labels.codes] - first), frame['quantity'].to_numpy())
+        # A day whose refunds outweigh its sales counts as no demand
+        return (items.categories.astype(str).to_numpy(dtype=object), np.clip(demand, 0, None),
+                start + datetime.timedelta(days=int(first)))
+
+    def forecast(self, day):
+        """The DemandForecast for `day` (a date)."""
+        cached = self._cache.get(day)
+        if cached is None:
+            names, demand, start = self.read_demand(day)
+            cached = DemandForecast(day, names, weekday_smoothing(demand, start.weekday(), day.weekday(), self.alpha))
+            # Only the open business day is ever asked for again
+            self._cache = {day: cached}
+        return cached
+
+    def prep_list(self, day, menu_items, limit=None):
+        """ItemForecasts for the menu items expected to sell at least MIN_PREP_UNITS on `day`,
+        largest forecast first."""
+        result = self.forecast(day)
+        menu_by_name = {item.name: item for item in menu_items}
+        prep = []
+        for index in np.argsort(-result.forecast, kind='stable'):
+            expected = float(result.forecast[index])
+            if expected < MIN_PREP_UNITS or (limit is not None and len(prep) >= limit):
+                break
+            item = menu_by_name.get(result.names[index])
+            if item is None:
+                continue
+            prep.append(ItemForecast(item.name, item.category, expected, item.stock,
+                                     max(int(np.ceil(expected)) - item.stock, 0)))
+        return prep
@@ -0,0 +1,63 @@
+import json
+import sqlite3
+from queries import QUERIES
+
+
+class InventoryEngine:
+    """Ingredient-level inventory for made-to-order items.
+
+    Recipes are kept in memory as a sparse matrix {menu_id: ((ingredient_id, quantity), ...)}
+    so the POS can derive how many of each item can still be made from a single
+    ingredient stock query. The matrix is loaded lazily and dropped whenever a recipe changes.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._recipe_matrix = None
+
+    def invalidate(self):
+        self._recipe_matrix = None
+
+    def recipe_matrix(self):
+        if self._recipe_matrix is None:
+            matrix = {}
+            cursor = self.conn.execute("SELECT menu_id, ingredient_id, quantity FROM recipes ORDER BY menu_id")
+            for menu_id, ingredient_id, quantity in cursor.fetchall():
+                matrix.setdefault(menu_id, []).append((ingredient_id, quantity))
+            self._recipe_matrix = {menu_id: tuple(parts) for menu_id, parts in matrix.items()}
+        return self._recipe_matrix
+
+    def consume(self, cursor, quantities):
+        """Deduct the ingredients used by `quantities`, (menu id, qty) pairs, with one set-based UPDATE.
+        A negative qty puts the ingredients back.
+
+        Runs on the caller's cursor and does not commit, so it is part of the sale transaction.
+        """
+        quantities = [(menu_id, qty) for menu_id, qty in quantities if menu_id is not None]
+        if not quantities:
+            return
+        cursor.execute(QUERIES['ingredients_consume'], (json.dumps(quantities),))
+
+    def sellable_counts(self, menu_items):
+        """Return {menu_id: sellable count} for the MenuItems from `read_menu_items`.
+
+        Items with a recipe are limited by their scarcest ingredient as well as their own stock;
+        items without one fall back to the finished-goods stock.
+        """
+        matrix = self.recipe_matrix()
+        try:
+            ingredient_stock = dict(self.conn.execute("SELECT id, stock FROM ingredients").fetchall())
+        except sqlite3.Error:
+            ingredient_stock = {}
+
+        counts = {}
+        for item in menu_items:
+            menu_id, stock = item.id, item.stock
+            recipe = matrix.get(menu_id)
+            if recipe:
+                makeable = min(max(ingredient_stock.get(ingredient_id, 0), 0) // quantity
+                               for ingredient_id, quantity in recipe)
+                counts[menu_id] = min(stock, makeable)
+            else:
+                counts[menu_id] = stock
+        return counts
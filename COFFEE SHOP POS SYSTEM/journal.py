@@ -0,0 +1,72 @@
+import os
+import json
+import time
+
+
+class OrderJournal:
+    """Append-only journal of edits to the open order, replayed after a crash.
+
+    Each add/remove is one short JSON line. Appends are flushed to the OS straight away,
+    which survives an application crash, while the more expensive fsync that survives a
+    power cut is batched: every `fsync_every` events or `fsync_interval` seconds, and always
+    when an order is finished. Once an order is paid or cleared the file is truncated,
+    so it never holds more than the current ticket.
+    """
+
+    def __init__(self, path='order_journal.log', fsync_every=8, fsync_interval=1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def append(self, event):
+        """Record one event, e.g. ['add', item_id, name, price, category] or ['remove', item_id]."""
+        journal_file = self._open()
+        journal_file.write(json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n')
+        journal_file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def replay(self):
+        """Return the events of the order that was open when the journal was last written.
+        A torn final line from a crash mid-write is ignored."""
+        if not os.path.exists(self.path):
+            return []
+        events = []
+        with open(self.path, 'rb') as journal_file:
+            for line in journal_file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    break
+        return events
+
+    def reset(self):
+        """Forget the journalled order once it has been paid or cleared."""
+        journal_file = self._open()
+        journal_file.truncate(0)
+        os.fsync(journal_file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
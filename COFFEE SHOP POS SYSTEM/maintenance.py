@@ -0,0 +1,191 @@
+import os
+import time
+import sqlite3
+import datetime
+import threading
+from collections import deque
+from typing import NamedTuple
+
+# No checkout for this many seconds counts as idle
+IDLE_SECONDS = 300
+# At most one maintenance pass per this many seconds
+MAINTENANCE_INTERVAL = 6 * 3600
+# A full ANALYZE at most this often; PRAGMA optimize runs on every pass
+ANALYZE_INTERVAL = 7 * 24 * 3600
+# How often the scheduler thread checks whether the register is idle
+CHECK_INTERVAL = 30.0
+
+# incremental_vacuum frees this many pages per step (4 KiB pages: 1 MiB), so a checkout that
+# arrives mid-pass waits for one short step at most; MAX_VACUUM_STEPS bounds a whole pass
+VACUUM_STEP_PAGES = 256
+MAX_VACUUM_STEPS = 200
+# Rows ANALYZE samples per index (PRAGMA analysis_limit), keeping it fast on large tables
+ANALYZE_LIMIT = 1000
+
+# PRAGMA auto_vacuum value for INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class MaintenanceRun(NamedTuple):
+    started_at: str
+    seconds: float
+    # The steps that ran, e.g. ['incremental_vacuum', 'optimize', 'wal_checkpoint']
+    steps: list
+    pages_freed: int
+    # Database plus WAL file size before minus after
+    bytes_reclaimed: int
+    # True if a checkout cut the vacuum steps short
+    interrupted: bool = False
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class MaintenanceScheduler:
+    """Keeps the POS database compact and its planner statistics current while the shop is idle.
+
+    A pass runs once no checkout has happened for `idle_seconds` (checkout calls
+    `note_activity`) and the previous pass is at least `interval` seconds old. It frees pages
+    with bounded incremental_vacuum steps, stopping early when a checkout comes in, refreshes
+    statistics with ANALYZE (when there are none, or weekly) or PRAGMA optimize, and
+    truncates the WAL. Each pass uses its own connection and is logged with the time spent
+    and the space reclaimed.
+
+    A database created before incremental auto-vacuum needs one full VACUUM to switch over,
+    which rewrites the whole file under the write lock. Idle passes never do that; it runs on
+    the scheduler thread only when asked for with `request_conversion` (after the business
+    day is closed).
+    """
+
+    def __init__(self, db_path, idle_seconds=IDLE_SECONDS, interval=MAINTENANCE_INTERVAL,
+                 step_pages=VACUUM_STEP_PAGES, max_steps=MAX_VACUUM_STEPS, check_interval=CHECK_INTERVAL,
+                 clock=time.monotonic):
+        self.db_path = db_path
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.step_pages = step_pages
+        self.max_steps = max_steps
+        self.check_interval = check_interval
+        self.clock = clock
+        self.history = deque(maxlen=20)
+        self._last_activity = clock()
+        self._last_run = None
+        self._last_analyze = None
+        self._conversion_requested = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def note_activity(self):
+        """Record a checkout; maintenance waits for the register to be idle again."""
+        self._last_activity = self.clock()
+
+    def request_conversion(self):
+        """Have the scheduler thread run a pass that may switch the database to incremental
+        auto-vacuum with a full VACUUM, at its next check and whether or not the register is idle."""
+        self._conversion_requested = True
+
+    def idle_for(self):
+        return self.clock() - self._last_activity
+
+    def due(self):
+        if self.idle_for() < self.idle_seconds:
+            return False
+        return self._last_run is None or self.clock() - self._last_run >= self.interval
+
+    @property
+    def last_run(self):
+        return self.history[-1] if self.history else None
+
+    def _sizes(self):
+        return _file_size(self.db_path) + _file_size(self.db_path + '-wal')
+
+    def _vacuum(self, conn, started, steps, convert):
+        """Free pages in bounded steps. Returns (pages freed, interrupted)."""
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            if not convert:
+                # incremental_vacuum does nothing here; the switch waits for request_conversion
+                return 0, False
+            # Switching an existing database to incremental auto-vacuum takes one full VACUUM
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            steps.append('vacuum')
+            return free_pages, False
+        freed = 0
+        for _ in range(self.max_steps):
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free_pages:
+                break
+            if self._last_activity > started:
+                return freed, True
+            # executescript steps the pragma to completion; execute would free a single page
+            conn.executescript(f"PRAGMA incremental_vacuum({min(free_pages, self.step_pages)})")
+            freed += free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if freed:
+            steps.append('incremental_vacuum')
+        return freed, False
+
+    def _refresh_statistics(self, conn, steps):
+        has_stats = conn.execute("SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1')").fetchone()[0]
+        if not has_stats or self._last_analyze is None or self.clock() - self._last_analyze >= ANALYZE_INTERVAL:
+            conn.execute(f"PRAGMA analysis_limit = {ANALYZE_LIMIT}")
+            conn.execute("ANALYZE")
+            self._last_analyze = self.clock()
+            steps.append('analyze')
+        conn.execute("PRAGMA optimize")
+        steps.append('optimize')
+
+    def run_once(self, convert=False):
+        """One maintenance pass, whether or not the register is idle. With `convert`, a database not
+        yet on incremental auto-vacuum is switched over with a full VACUUM. Returns a MaintenanceRun,
+        or None on error."""
+        started = self.clock()
+        started_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        size_before = self._sizes()
+        steps = []
+        try:
+            # isolation_level=None: VACUUM and the PRAGMAs must run outside a transaction
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            try:
+                pages_freed, interrupted = self._vacuum(conn, started, steps, convert)
+                self._refresh_statistics(conn, steps)
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+                steps.append('wal_checkpoint')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Database maintenance error: {e}")
+            return None
+        finally:
+            self._last_run = self.clock()
+
+        run = MaintenanceRun(started_at, self.clock() - started, steps, pages_freed,
+                             size_before - self._sizes(), interrupted)
+        self.history.append(run)
+        print(f"Database maintenance ({', '.join(steps)}) took {run.seconds:.2f}s and reclaimed "
+              f"{run.bytes_reclaimed} bytes ({run.pages_freed} pages)"
+              + (", stopped early for a checkout" if interrupted else ""))
+        return run
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            if self._conversion_requested:
+                self._conversion_requested = False
+                self.run_once(convert=True)
+            elif self.due():
+                self.run_once()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
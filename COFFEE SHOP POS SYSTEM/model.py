@@ -1,157 +1,402 @@
-import datetime
-from database import DatabaseManager
-
-
-class AppModel:
-    def __init__(self):
-        self.db = DatabaseManager()
-        self.credentials = {}
-        self.user_role = None
-        self.current_pos_date = datetime.date.today()
-        self.current_order = {}
-
-    def authenticate(self, username, password):
-        username = username.lower().strip()
-        password = password.strip()
-        user = self.db.get_user(username)
-        if user and user.get('password') == password:
-            self.user_role = user.get('role')
-            return True
-        self.user_role = None
-        return False
-
-    def update_password(self, username, old_password, new_password):
-        username = username.lower().strip()
-        user = self.db.get_user(username)
-        if not user:
-            return "User not found"
-
-        if user.get('password') != old_password:
-            return "Incorrect old password"
-
-        if old_password == new_password:
-            return "New password cannot be the same as old password"
-
-        ok = self.db.update_user_password(username, new_password)
-        return "Success" if ok else "Failed to update password"
-
-    def get_usernames(self):
-        users = self.db.list_users()
-        return [u['username'] for u in users]
-
-    def create_user(self, username, password, role='Cashier'):
-        return self.db.create_user(username, password, role)
-
-    def delete_user(self, username):
-        return self.db.delete_user(username)
-
-    def add_item_to_order(self, item_id):
-        item_details = self.db.get_item_details(item_id)
-        if not item_details:
-            return False, "Item not found in menu."
-
-        name, price, category = item_details
-
-        if item_id in self.current_order:
-            self.current_order[item_id]['qty'] += 1
-        else:
-            self.current_order[item_id] = {'name': name, 'price': price, 'qty': 1, 'category': category}
-
-        return True, "Item added"
-
-    def calculate_order_total(self):
-        total = sum(item['price'] * item['qty'] for item in self.current_order.values())
-        return total
-
-    def process_order(self):
-        if not self.current_order:
-            return False, 0, None
-
-        order_list = list(self.current_order.values())
-        sale_date = self.current_pos_date.strftime('%Y-%m-%d') + datetime.datetime.now().strftime(' %H:%M:%S')
-
-        success = self.db.record_sale(order_list, sale_date)
-
-        if success:
-            total = self.calculate_order_total()
-            # create a receipt UUID and persist receipt details in DB
-            try:
-                import uuid
-                receipt_uuid = uuid.uuid4().hex
-                saved_id = self.db.save_receipt(receipt_uuid, sale_date, total, order_list)
-                receipt_ref = receipt_uuid if saved_id else None
-            except Exception:
-                receipt_ref = None
-
-            self.current_order = {}
-            return True, total, receipt_ref
-
-        return False, 0, None
-
-    def remove_item_from_order(self, item_id):
-        if item_id in self.current_order:
-            del self.current_order[item_id]
-            return True
-        return False
-
-    def clear_order(self):
-        self.current_order = {}
-
-    def get_menu_items(self):
-        return self.db.read_menu_items()
-
-    def get_menu_categories(self):
-        return self.db.read_categories()
-
-    def get_all_sales_data(self, days_back=30):
-        return self.db.get_sales_data_for_report(days_back)
-
-    def generate_eod_summary(self):
-        current_date_str = self.current_pos_date.strftime('%Y-%m-%d')
-        return self.db.end_of_day_summary(current_date_str)
-
-    def save_eod_and_advance_day(self):
-        summary = self.generate_eod_summary()
-
-        if not self.db.save_eod_summary(summary):
-            return "Already Saved", summary
-
-        self.current_pos_date += datetime.timedelta(days=1)
-        return "Success", summary
-
-    def get_historical_eod_records(self):
-        return self.db.get_past_eod_records()
-
-    def get_all_receipts(self, limit=None):
-        try:
-            return self.db.get_all_receipts(limit=limit)
-        except Exception:
-            return []
-
-    def delete_receipt(self, receipt_uuid):
-        """Delete a receipt from the database by its UUID."""
-        try:
-            return self.db.delete_receipt(receipt_uuid)
-        except Exception:
-            return False
-
-    def get_archived_eod_records(self):
-        return self.db.get_archived_eod_records()
-
-    def restore_archived_eod_summaries(self):
-        try:
-            return self.db.restore_all_archived_eod_records()
-        except Exception:
-            return None
-
-    def create_item(self, name, price, stock, category):
-        return self.db.create_menu_item(name, price, stock, category)
-
-    def update_item(self, item_id, name, price, stock, category):
-        return self.db.update_menu_item(item_id, name, price, stock, category)
-
-    def delete_item(self, item_id):
-        return self.db.delete_menu_item(item_id)
-
-    def clear_historical_data(self):
+import datetime
+from database import DatabaseManager
+from reports import ReportEngine
+from forecast import DemandForecaster
+from journal import OrderJournal
+from records import MenuItem, OrderLine, Receipt
+from promotions import PromotionEngine
+from money import ChargeEngine, ChargeSettings
+from search import MenuIndex
+from printing import PrintQueue, PrintSettings
+from replication import RegisterSync, order_payload
+
+# range key -> (label, days covered, bucket size used for the report)
+REPORT_RANGES = {
+    'week': ('Last 7 Days', 7, 'day'),
+    'month': ('Last 30 Days', 30, 'day'),
+    'quarter': ('Last Quarter', 91, 'week'),
+    'year': ('Last Year', 365, 'month'),
+}
+
+
+# Rows per page of the Past End of Day Records table
+EOD_PAGE_SIZE = 20
+# Items shown in the End of Day tab's prep list
+PREP_LIST_SIZE = 8
+
+
+def choose_report_bucket(start_date, end_date):
+    """Pick a bucket size that keeps a custom range to a readable number of points."""
+    span = (end_date - start_date).days
+    if span <= 31:
+        return 'day'
+    if span <= 186:
+        return 'week'
+    return 'month'
+
+
+class AppModel:
+    def __init__(self, journal_path='order_journal.log'):
+        self.db = DatabaseManager()
+        self.credentials = {}
+        self.user_role = None
+        # The business day survives restarts; it only moves on when the day is closed
+        self.current_pos_date = self.db.load_business_date(datetime.date.today())
+        self.current_order = {}
+        self.reports = ReportEngine(self.db.conn)
+        self.forecaster = DemandForecaster(self.db.conn)
+        self.journal = OrderJournal(journal_path)
+        self.promotions = PromotionEngine(self.db.read_promotions())
+        self.order_promotions = self.promotions.start_order(datetime.datetime.now())
+        self.charges = ChargeEngine(ChargeSettings.from_settings(self.db.read_settings()))
+        self.menu_index = MenuIndex(self.db.read_menu_items())
+        self.printer = PrintQueue(self._read_print_settings())
+        self.replication = self._start_replication()
+        self.maintenance = self.db.maintenance
+        if self.maintenance is not None:
+            self.maintenance.start()
+        self._restore_open_order()
+
+    def _start_replication(self):
+        """With a `hub_url` setting this register replicates through a hub (see replication.py)."""
+        settings = self.db.read_settings()
+        if not settings.get('hub_url') or self.db.db_path == ':memory:':
+            return None
+        replication = RegisterSync(self.db.db_path, settings['hub_url'], settings.get('register_id'))
+        replication.start()
+        return replication
+
+    def close(self):
+        """Finish queued receipts and stop syncing with the hub and maintenance before the app exits."""
+        self.printer.close()
+        if self.replication is not None:
+            self.replication.stop()
+        if self.maintenance is not None:
+            self.maintenance.stop()
+
+    def _read_print_settings(self):
+        return PrintSettings.from_settings(self.db.read_settings(), default_output=self.db.receipt_spool_dir)
+
+    def _restore_open_order(self):
+        """Rebuild the order that was open when the app last stopped from the order journal."""
+        for event in self.journal.replay():
+            if event[0] == 'add':
+                _, item_id, name, price, category = event
+                self._add_line(item_id, name, price, category)
+            elif event[0] == 'remove':
+                self._remove_line(event[1])
+
+    def authenticate(self, username, password):
+        username = username.lower().strip()
+        password = password.strip()
+        user = self.db.get_user(username)
+        if user and user.get('password') == password:
+            self.user_role = user.get('role')
+            return True
+        self.user_role = None
+        return False
+
+    def update_password(self, username, old_password, new_password):
+        username = username.lower().strip()
+        user = self.db.get_user(username)
+        if not user:
+            return "User not found"
+
+        if user.get('password') != old_password:
+            return "Incorrect old password"
+
+        if old_password == new_password:
+            return "New password cannot be the same as old password"
+
+        ok = self.db.update_user_password(username, new_password)
+        return "Success" if ok else "Failed to update password"
+
+    def get_usernames(self):
+        users = self.db.list_users()
+        return [u['username'] for u in users]
+
+    def create_user(self, username, password, role='Cashier'):
+        return self.db.create_user(username, password, role)
+
+    def delete_user(self, username):
+        return self.db.delete_user(username)
+
+    def add_item_to_order(self, item_id):
+        item_details = self.db.get_item_details(item_id)
+        if not item_details:
+            return False, "Item not found in menu."
+
+        name, price, category = item_details
+
+        self._add_line(item_id, name, price, category)
+        self.journal.append(['add', item_id, name, price, category])
+
+        return True, "Item added"
+
+    def _add_line(self, item_id, name, price, category):
+        line = self.current_order.get(item_id)
+        if line is None:
+            self.current_order[item_id] = OrderLine(name, price, 1, category)
+        else:
+            self.current_order[item_id] = line._replace(qty=line.qty + 1)
+        self.order_promotions.update(item_id, self.current_order[item_id])
+
+    def _remove_line(self, item_id):
+        if self.current_order.pop(item_id, None) is None:
+            return False
+        self.order_promotions.update(item_id, None)
+        return True
+
+    def _reset_order(self):
+        self.current_order = {}
+        self.order_promotions = self.promotions.start_order(datetime.datetime.now())
+        self.journal.reset()
+
+    def get_order_charges(self):
+        """Subtotal, discount, service charge, tax, rounding and total of the open order, in centavos."""
+        subtotal = sum(line.subtotal for line in self.current_order.values())
+        return self.charges.compute(subtotal, self.order_promotions.net_line_totals(self.current_order))
+
+    def calculate_order_total(self):
+        """Amount due for the open order in centavos."""
+        return self.get_order_charges().total
+
+    def get_charge_settings(self):
+        return self.charges.settings
+
+    def save_charge_settings(self, settings):
+        """Store new tax / service charge settings (a ChargeSettings) and apply them to the open order."""
+        if not self.db.save_settings(settings.to_settings()):
+            return False
+        self.charges = ChargeEngine(settings)
+        return True
+
+    def get_print_settings(self):
+        return self.printer.settings
+
+    def save_print_settings(self, settings):
+        """Store new receipt printer settings (a PrintSettings); later receipts use them."""
+        if not self.db.save_settings(settings.to_settings()):
+            return False
+        self.printer.configure(settings)
+        return True
+
+    def print_receipt(self, receipt_uuid):
+        """Queue a stored receipt for printing again. False if it is missing or printing is off."""
+        receipt = self.db.get_receipt(receipt_uuid)
+        return receipt is not None and self.printer.submit(receipt, tax_inclusive=self.charges.settings.tax_inclusive)
+
+    def get_order_discount(self):
+        """Total promotion discount on the open order."""
+        return self.order_promotions.discount
+
+    def get_applied_promotions(self):
+        """(amount, promotion name) pairs for the promotions reducing the open order."""
+        return self.order_promotions.applied()
+
+    def reload_promotions(self):
+        """Recompile the promotion rules after they change; the open order is re-evaluated."""
+        self.promotions.load(self.db.read_promotions())
+        self.order_promotions = self.promotions.start_order(self.order_promotions.moment)
+        for item_id, line in self.current_order.items():
+            self.order_promotions.update(item_id, line)
+
+    def create_promotion(self, name, scope, target, discount_type, value, **options):
+        promotion_id = self.db.create_promotion(name, scope, target, discount_type, value, **options)
+        if promotion_id:
+            self.reload_promotions()
+        return promotion_id
+
+    def process_order(self):
+        if not self.current_order:
+            return False, 0, None
+
+        order_list = list(self.current_order.values())
+        sale_date = self.current_pos_date.strftime('%Y-%m-%d') + datetime.datetime.now().strftime(' %H:%M:%S')
+
+        charges = self.get_order_charges()
+        total = charges.total
+        line_totals = self.order_promotions.net_line_totals(self.current_order)
+
+        import uuid
+        receipt_ref = uuid.uuid4().hex
+        # Sent to the hub by the sync agent; checkout only writes the local outbox
+        payload = (order_payload(receipt_ref, sale_date, charges, order_list, line_totals)
+                   if self.replication is not None else None)
+        # Receipt, sales, stock and outbox entry are stored in one transaction
+        success = self.db.record_checkout(receipt_ref, sale_date, total, order_list, line_totals,
+                                          list(self.current_order), charges.tax, charges.service_charge,
+                                          payload) is not None
+        if self.maintenance is not None:
+            self.maintenance.note_activity()
+
+        if success:
+
+            # Keep the stock shown in search results current without re-reading the menu
+            for item_id, line in self.current_order.items():
+                item = self.menu_index.items.get(item_id)
+                if item is not None:
+                    self.menu_index.update(item._replace(stock=item.stock - line.qty))
+
+            # Rendering and writing happen on the print queue's thread; checkout does not wait
+            self.printer.submit(Receipt(receipt_ref, sale_date, total, order_list, sale_date,
+                                        charges.tax, charges.service_charge), charges,
+                                self.charges.settings.tax_inclusive)
+
+            self._reset_order()
+            return True, total, receipt_ref
+
+        return False, 0, None
+
+    def remove_item_from_order(self, item_id):
+        if self._remove_line(item_id):
+            self.journal.append(['remove', item_id])
+            return True
+        return False
+
+    def clear_order(self):
+        self._reset_order()
+
+    def add_low_stock_listener(self, callback):
+        self.db.add_low_stock_listener(callback)
+
+    def remove_low_stock_listener(self, callback):
+        self.db.remove_low_stock_listener(callback)
+
+    def get_menu_items(self):
+        menu_items = self.db.read_menu_items()
+        self.menu_index.sync(menu_items)
+        return menu_items
+
+    def search_menu(self, query, limit=20):
+        """Menu items whose name starts with `query`, or whose quick code (menu id) starts with its digits."""
+        return self.menu_index.search(query, limit)
+
+    def get_sellable_counts(self, menu_items=None):
+        return self.db.get_sellable_counts(menu_items)
+
+    def get_menu_categories(self):
+        return self.db.read_categories()
+
+    def get_all_sales_data(self, days_back=30):
+        return self.db.get_sales_data_for_report(days_back)
+
+    def resolve_report_range(self, range_key='month', start_date=None, end_date=None):
+        """Return (bucket, start_date, end_date) for a report range ending on the POS date.
+        For range_key 'custom' the given start and end dates are used instead."""
+        if range_key == 'custom' and start_date and end_date:
+            if start_date > end_date:
+                start_date, end_date = end_date, start_date
+            return choose_report_bucket(start_date, end_date), start_date, end_date
+        _, days, bucket = REPORT_RANGES.get(range_key, REPORT_RANGES['month'])
+        end_date = self.current_pos_date
+        return bucket, end_date - datetime.timedelta(days=days - 1), end_date
+
+    def get_report_data(self, range_key='month', start_date=None, end_date=None):
+        """Return (bucket, rows) of pre-aggregated sales for a report range."""
+        bucket, start_date, end_date = self.resolve_report_range(range_key, start_date, end_date)
+        return bucket, self.db.get_sales_rollup(bucket, start_date, end_date)
+
+    def get_report(self, range_key='month', start_date=None, end_date=None):
+        """Return a ReportData with the chart aggregates for a report range."""
+        return self.reports.build(*self.resolve_report_range(range_key, start_date, end_date))
+
+    def generate_eod_summary(self):
+        current_date_str = self.current_pos_date.strftime('%Y-%m-%d')
+        return self.db.end_of_day_summary(current_date_str)
+
+    def get_prep_list(self, limit=PREP_LIST_SIZE):
+        """ItemForecasts of what the open business day is expected to sell, with what to prepare beyond current stock."""
+        return self.forecaster.prep_list(self.current_pos_date, self.menu_index.items.values(), limit)
+
+    def save_eod_and_advance_day(self):
+        summary = self.db.close_business_day(self.current_pos_date)
+
+        if summary is None:
+            return "Already Saved", self.generate_eod_summary()
+
+        closed_month = self.current_pos_date.month
+        self.current_pos_date += datetime.timedelta(days=1)
+        if self.current_pos_date.month != closed_month:
+            self.archive_closed_months()
+        return "Success", summary
+
+    def archive_closed_months(self):
+        return self.db.archive_closed_months(self.current_pos_date)
+
+    def get_historical_eod_records(self):
+        return self.db.get_past_eod_records()
+
+    def get_eod_history_page(self, page, page_size=EOD_PAGE_SIZE):
+        """Return (records, page, page_count) for one page of past EOD summaries, newest first.
+        `page` is clamped to the pages that exist."""
+        page_count = self.count_eod_pages(page_size)
+        page = min(max(page, 0), page_count - 1)
+        return self.db.get_eod_page(page * page_size, page_size), page, page_count
+
+    def count_eod_pages(self, page_size=EOD_PAGE_SIZE):
+        return max((self.db.count_eod_records() + page_size - 1) // page_size, 1)
+
+    def get_all_receipts(self, limit=None):
+        try:
+            return self.db.get_all_receipts(limit=limit)
+        except Exception:
+            return []
+
+    def refund_receipt(self, receipt_uuid, quantities=None):
+        """Refund {item name: qty} of a receipt, or void what is left of it when `quantities` is None.
+        The refund counts towards the current POS date. Returns the refunded centavos or None."""
+        refund_date = self.current_pos_date.strftime('%Y-%m-%d') + datetime.datetime.now().strftime(' %H:%M:%S')
+        refund = self.db.refund_receipt(receipt_uuid, refund_date, quantities)
+        if refund is not None:
+            # Stock came back; a refund is rare enough to re-read the menu for the search index
+            self.menu_index.sync(self.db.read_menu_items())
+        return refund
+
+    def get_archived_eod_records(self):
+        return self.db.get_archived_eod_records()
+
+    def restore_archived_eod_summaries(self):
+        try:
+            return self.db.restore_all_archived_eod_records()
+        except Exception:
+            return None
+
+    def start_backup(self):
+        return self.db.start_backup('manual')
+
+    def list_backups(self):
+        return self.db.list_backups()
+
+    def restore_backup(self, backup_path):
+        if not self.db.restore_backup(backup_path):
+            return False
+        self.charges = ChargeEngine(ChargeSettings.from_settings(self.db.read_settings()))
+        self.printer.configure(self._read_print_settings())
+        self.current_pos_date = self.db.load_business_date(datetime.date.today())
+        self.forecaster.invalidate()
+        self.menu_index.build(self.db.read_menu_items())
+        self.reload_promotions()
+        return True
+
+    def create_item(self, name, price, stock, category, reorder_level=10):
+        item_id = self.db.create_menu_item(name, price, stock, category, reorder_level)
+        if item_id:
+            self.menu_index.add(MenuItem(item_id, name, price, stock, category, reorder_level))
+        return item_id
+
+    def update_item(self, item_id, name, price, stock, category, reorder_level=10):
+        updated = self.db.update_menu_item(item_id, name, price, stock, category, reorder_level)
+        if updated:
+            self.menu_index.update(MenuItem(item_id, name, price, stock, category, reorder_level))
+        return updated
+
+    def delete_item(self, item_id):
+        deleted = self.db.delete_menu_item(item_id)
+        if deleted:
+            self.menu_index.remove(item_id)
+        return deleted
+
+    def clear_historical_data(self):
+        self.forecaster.invalidate()
         return self.db.clear_all_sales_data()
\ No newline at end of file
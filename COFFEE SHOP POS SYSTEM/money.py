@@ -0,0 +1,184 @@
+import json
+from decimal import Decimal, DecimalException, ROUND_HALF_UP, InvalidOperation
+from functools import lru_cache
+from typing import NamedTuple
+
+# Every amount of money in the POS is an int number of centavos (1/100 peso).
+CENTAVOS_PER_PESO = 100
+
+ROUNDING_MODES = ('order', 'line')
+
+
+def to_centavos(amount):
+    """Convert a peso amount (str, int, float or Decimal) to centavos, rounding half up.
+    Raises ValueError for text that is not a finite number."""
+    try:
+        pesos = Decimal(str(amount).strip().replace('₱', '').replace(',', ''))
+        if not pesos.is_finite():
+            raise InvalidOperation
+        return int((pesos * CENTAVOS_PER_PESO).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except DecimalException:
+        # Also covers amounts too large to convert (decimal.Overflow)
+        raise ValueError(f"Not an amount of money: {amount!r}")
+
+
+def to_pesos(centavos):
+    return centavos / CENTAVOS_PER_PESO
+
+
+def format_amount(centavos):
+    """'1234.50' for 123450 centavos."""
+    sign = '-' if centavos < 0 else ''
+    pesos, cents = divmod(abs(int(centavos)), CENTAVOS_PER_PESO)
+    return f"{sign}{pesos}.{cents:02d}"
+
+
+def format_money(centavos):
+    """'₱1234.50' for 123450 centavos."""
+    text = format_amount(centavos)
+    return f"-₱{text[1:]}" if text.startswith('-') else f"₱{text}"
+
+
+def _divide(numerator, denominator):
+    """numerator / denominator rounded half away from zero, in integer arithmetic."""
+    if numerator < 0:
+        return -_divide(-numerator, denominator)
+    quotient, remainder = divmod(numerator, denominator)
+    return quotient + (2 * remainder >= denominator)
+
+
+@lru_cache(maxsize=64)
+def _rate_ratio(rate):
+    """A percentage such as 12 or 0.5 as an exact (numerator, denominator) pair."""
+    return Decimal(str(rate)).as_integer_ratio()
+
+
+def percent_of(centavos, rate):
+    """`rate` percent of an amount, rounded half up to the centavo."""
+    numerator, denominator = _rate_ratio(rate)
+    return _divide(centavos * numerator, denominator * 100)
+
+
+def included_tax(centavos, rate):
+    """The tax already contained in a tax-inclusive amount."""
+    numerator, denominator = _rate_ratio(rate)
+    return _divide(centavos * numerator, denominator * 100 + numerator)
+
+
+def round_to_increment(centavos, increment):
+    """Cash rounding, e.g. to the nearest 25 centavos or whole peso (half up)."""
+    if increment <= 1:
+        return centavos
+    return _divide(centavos, increment) * increment
+
+
+def allocate(total, weights):
+    """Split `total` centavos over `weights` in proportion, as ints that add up to `total` exactly.
+
+    Uses the largest-remainder method, so no line is ever off by more than one centavo.
+    """
+    weight_sum = sum(weights)
+    if not weights:
+        return []
+    if weight_sum <= 0:
+        shares = [0] * len(weights)
+        shares[-1] = total
+        return shares
+    shares, remainders = [], []
+    for index, weight in enumerate(weights):
+        share, remainder = divmod(total * weight, weight_sum)
+        shares.append(share)
+        remainders.append((remainder, index))
+    for _, index in sorted(remainders, reverse=True)[:total - sum(shares)]:
+        shares[index] += 1
+    return shares
+
+
+def centavos_sql(column):
+    """SQL converting a REAL peso column of an old database to INTEGER centavos."""
+    return f"CAST(ROUND({column} * {CENTAVOS_PER_PESO}) AS INTEGER)"
+
+
+def receipt_items_to_centavos(items_json):
+    """Rewrite the peso prices in a stored receipt's items JSON as centavos."""
+    try:
+        items = json.loads(items_json)
+        for item in items:
+            if 'price' in item:
+                item['price'] = to_centavos(item['price'])
+        return json.dumps(items)
+    except (TypeError, ValueError, AttributeError):
+        return items_json
+
+
+class ChargeSettings(NamedTuple):
+    """How tax, service charge and rounding apply to an order.
+
+    Rates are percentages. With `tax_inclusive` menu prices already contain the tax and it is
+    only reported; otherwise it is added on top. `rounding` is 'order' (compute charges once on
+    the order totals) or 'line' (compute and round them per line, then add up). `cash_increment`
+    rounds the amount due, e.g. 25 or 100 centavos; 1 disables it.
+    """
+    tax_rate: float = 0.0
+    tax_inclusive: bool = True
+    service_rate: float = 0.0
+    rounding: str = 'order'
+    cash_increment: int = 1
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build from the string values of the settings table, falling back to the defaults."""
+        defaults = cls()
+        try:
+            return cls(tax_rate=float(settings.get('tax_rate', defaults.tax_rate)),
+                       tax_inclusive=str(settings.get('tax_inclusive', '1')) == '1',
+                       service_rate=float(settings.get('service_rate', defaults.service_rate)),
+                       rounding=settings.get('rounding', defaults.rounding)
+                       if settings.get('rounding') in ROUNDING_MODES else defaults.rounding,
+                       cash_increment=max(int(settings.get('cash_increment', defaults.cash_increment)), 1))
+        except (TypeError, ValueError):
+            return defaults
+
+    def to_settings(self):
+        return {'tax_rate': str(self.tax_rate), 'tax_inclusive': '1' if self.tax_inclusive else '0',
+                'service_rate': str(self.service_rate), 'rounding': self.rounding,
+                'cash_increment': str(self.cash_increment)}
+
+
+class OrderCharges(NamedTuple):
+    subtotal: int
+    discount: int
+    service_charge: int
+    tax: int
+    rounding_adjustment: int
+    total: int
+
+
+class ChargeEngine:
+    def __init__(self, settings=None):
+        self.settings = settings or ChargeSettings()
+
+    def _charges_on(self, net):
+        """(service charge, tax) on a net amount."""
+        settings = self.settings
+        service = percent_of(net, settings.service_rate) if settings.service_rate else 0
+        if not settings.tax_rate:
+            return service, 0
+        base = net + service
+        tax = included_tax(base, settings.tax_rate) if settings.tax_inclusive else percent_of(base, settings.tax_rate)
+        return service, tax
+
+    def compute(self, subtotal, line_nets):
+        """Charges for an order with gross `subtotal` whose lines come to `line_nets` after discounts."""
+        net = sum(line_nets)
+        if self.settings.rounding == 'line':
+            service, tax = 0, 0
+            for line_net in line_nets:
+                line_service, line_tax = self._charges_on(line_net)
+                service += line_service
+                tax += line_tax
+        else:
+            service, tax = self._charges_on(net)
+        due = net + service + (0 if self.settings.tax_inclusive else tax)
+        total = round_to_increment(due, self.settings.cash_increment)
+        return OrderCharges(subtotal, subtotal - net, service, tax, total - due, total)
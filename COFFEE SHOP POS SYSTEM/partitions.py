@@ -0,0 +1,175 @@
+import os
+import datetime
+import sqlite3
+from money import centavos_sql, receipt_items_to_centavos
+
+PARTITIONED_TABLES = ('sales', 'receipts')
+
+# PRAGMA archive.user_version; 1 = amounts stored as INTEGER centavos
+ARCHIVE_VERSION = 1
+PARTITION_MONEY_COLUMNS = {'sales': ('price', 'total'), 'receipts': ('total',)}
+
+
+def default_archive_path(db_path):
+    """The archive file kept next to the database at `db_path`."""
+    return ':memory:' if db_path == ':memory:' else os.path.splitext(db_path)[0] + '_archive.db'
+
+
+def month_range(month):
+    """Return the first day of `month` ('YYYY-MM') and of the following month as 'YYYY-MM-DD' strings."""
+    start = datetime.datetime.strptime(month, '%Y-%m').date()
+    following = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return start.strftime('%Y-%m-%d'), following.strftime('%Y-%m-%d')
+
+
+class SalesArchive:
+    """Monthly partitions of closed sales and receipts in an attached archive database.
+
+    The hot database only keeps the current month, so checkouts and EOD work on a small
+    working set. Each archived month gets its own `sales_YYYY_MM` / `receipts_YYYY_MM`
+    tables in the archive file, and the temp views `sales_all` and `receipts_all` glue the
+    hot tables and every partition together with UNION ALL for historical queries.
+    """
+
+    def __init__(self, conn, archive_path):
+        self.conn = conn
+        self.archive_path = archive_path
+        self.attached = False
+
+    def attach(self, create=False):
+        """Attach the archive database. Unless `create` is set, a missing archive file is left alone."""
+        if self.attached:
+            return True
+        if not create and self.archive_path != ':memory:' and not os.path.exists(self.archive_path):
+            return False
+        self.conn.commit()
+        self.conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        self.conn.execute("""
+                          CREATE TABLE IF NOT EXISTS archive.partitions
+                          (
+                              month TEXT PRIMARY KEY,
+                              sales_rows INTEGER NOT NULL,
+                              receipt_rows INTEGER NOT NULL,
+                              archived_at TEXT NOT NULL
+                          )
+                          """)
+        self.conn.commit()
+        self.attached = True
+        if self.conn.execute("PRAGMA archive.user_version").fetchone()[0] < ARCHIVE_VERSION:
+            self._migrate_to_centavos()
+        return True
+
+    def _migrate_to_centavos(self):
+        """Rebuild the partitions of an archive written with REAL peso amounts as INTEGER centavos."""
+        try:
+            self.conn.execute("BEGIN")
+            for month in self.months():
+                suffix = month.replace('-', '_')
+                for table, money_columns in PARTITION_MONEY_COLUMNS.items():
+                    partition = f"{table}_{suffix}"
+                    columns = self._columns('archive', partition)
+                    self.conn.execute(f"ALTER TABLE archive.{partition} RENAME TO {partition}_pesos")
+                    self.conn.execute(f"CREATE TABLE archive.{partition} AS SELECT {', '.join(columns)} "
+                                      f"FROM main.{table} WHERE 0")
+                    expressions = [centavos_sql(c) if c in money_columns else c for c in columns]
+                    self.conn.execute(f"INSERT INTO archive.{partition} ({', '.join(columns)}) "
+                                      f"SELECT {', '.join(expressions)} FROM archive.{partition}_pesos")
+                    self.conn.execute(f"DROP TABLE archive.{partition}_pesos")
+                receipts = self.conn.execute(f"SELECT rowid, items_json FROM archive.receipts_{suffix}").fetchall()
+                self.conn.executemany(f"UPDATE archive.receipts_{suffix} SET items_json = ? WHERE rowid = ?",
+                                      [(receipt_items_to_centavos(items), rowid) for rowid, items in receipts])
+            self.conn.execute(f"PRAGMA archive.user_version = {ARCHIVE_VERSION}")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Error converting archived amounts to centavos: {e}")
+
+    def detach(self):
+        """Detach the archive database, e.g. while its file is replaced; the views then cover the hot tables only."""
+        if not self.attached:
+            return
+        self.conn.commit()
+        self.conn.execute("DETACH DATABASE archive")
+        self.attached = False
+        self.refresh_views()
+
+    def months(self):
+        if not self.attached:
+            return []
+        return [row[0] for row in self.conn.execute("SELECT month FROM archive.partitions ORDER BY month")]
+
+    def _columns(self, schema, table):
+        return [row[1] for row in self.conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+    def refresh_views(self):
+        """(Re)create the UNION ALL views over the hot tables and every archived partition.
+
+        Partitions created before a column was added to the hot table select NULL for it.
+        """
+        months = self.months()
+        for table in PARTITIONED_TABLES:
+            columns = self._columns('main', table)
+            column_sql = ", ".join(columns)
+            selects = [f"SELECT {column_sql} FROM main.{table}"]
+            for month in months:
+                partition = f"{table}_{month.replace('-', '_')}"
+                present = set(self._columns('archive', partition))
+                selects.append("SELECT " + ", ".join(c if c in present else f"NULL AS {c}" for c in columns)
+                               + f" FROM archive.{partition}")
+            self.conn.execute(f"DROP VIEW IF EXISTS temp.{table}_all")
+            self.conn.execute(f"CREATE TEMP VIEW {table}_all AS " + " UNION ALL ".join(selects))
+
+    def archive_before(self, cutoff_date):
+        """Move every month that ends on or before `cutoff_date` out of the hot tables.
+
+        Each month is copied into its partitions and deleted from the hot tables in one
+        transaction. Returns the list of archived months ('YYYY-MM').
+        """
+        cutoff = cutoff_date.replace(day=1).strftime('%Y-%m-%d')
+        closed_months = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT strftime('%Y-%m', sale_date) FROM sales WHERE sale_date < ? "
+            "UNION SELECT DISTINCT strftime('%Y-%m', sale_date) FROM receipts WHERE sale_date < ? ORDER BY 1",
+            (cutoff, cutoff))]
+        if not closed_months:
+            return []
+
+        self.attach(create=True)
+        archived = []
+        for month in closed_months:
+            start, end = month_range(month)
+            try:
+                moved = {}
+                for table in PARTITIONED_TABLES:
+                    partition = f"archive.{table}_{month.replace('-', '_')}"
+                    columns = ", ".join(self._columns('main', table))
+                    self.conn.execute(f"CREATE TABLE IF NOT EXISTS {partition} AS SELECT {columns} FROM main.{table} WHERE 0")
+                    present = ", ".join(self._columns('archive', f"{table}_{month.replace('-', '_')}"))
+                    cursor = self.conn.execute(
+                        f"INSERT INTO {partition} ({present}) SELECT {present} FROM main.{table} "
+                        f"WHERE sale_date >= ? AND sale_date < ?", (start, end))
+                    moved[table] = cursor.rowcount
+                    self.conn.execute(f"DELETE FROM main.{table} WHERE sale_date >= ? AND sale_date < ?", (start, end))
+                self.conn.execute("""
+                    INSERT INTO archive.partitions (month, sales_rows, receipt_rows, archived_at)
+                    VALUES (?, ?, ?, datetime('now'))
+                    ON CONFLICT (month) DO UPDATE
+                    SET sales_rows = sales_rows + excluded.sales_rows,
+                        receipt_rows = receipt_rows + excluded.receipt_rows,
+                        archived_at = excluded.archived_at
+                """, (month, moved['sales'], moved['receipts']))
+                self.conn.commit()
+                archived.append(month)
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                print(f"Error archiving {month}: {e}")
+                break
+        self.refresh_views()
+        return archived
+
+    def clear_sales(self):
+        """Empty every archived sales partition, mirroring a clear of the hot sales table (no commit).
+        Archived receipts are kept, as they are in the hot table."""
+        for month in self.months():
+            self.conn.execute(f"DELETE FROM archive.sales_{month.replace('-', '_')}")
+        if self.attached:
+            self.conn.execute("UPDATE archive.partitions SET sales_rows = 0")
@@ -0,0 +1,240 @@
+import os
+import queue
+import threading
+from typing import NamedTuple
+from money import format_amount
+
+PRINT_FORMATS = ('escpos', 'text', 'pdf')
+FILE_EXTENSIONS = {'escpos': '.bin', 'text': '.txt', 'pdf': '.pdf'}
+
+# ESC/POS control sequences
+ESC_INIT = b'\x1b@'
+ESC_ALIGN_LEFT = b'\x1ba\x00'
+ESC_ALIGN_CENTER = b'\x1ba\x01'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+ESC_DOUBLE_SIZE = b'\x1d!\x11'
+ESC_NORMAL_SIZE = b'\x1d!\x00'
+ESC_FEED_AND_CUT = b'\n\n\n\x1dV\x00'
+
+# Receipt paper: 80 mm wide, about 226 points; Courier 9 pt fits 42 columns
+PDF_PAGE_WIDTH = 226
+PDF_FONT_SIZE = 9
+PDF_LINE_HEIGHT = 11
+PDF_MARGIN = 12
+
+
+class PrintSettings(NamedTuple):
+    """Where and how receipts are printed.
+
+    `output` is a spool directory (one file per receipt) or a device file such as
+    /dev/usb/lp0 that every receipt is appended to. An empty output disables printing.
+    """
+    output: str = ''
+    format: str = 'escpos'
+    shop_name: str = 'Coffee Shop'
+    footer: str = 'Thank you! Please come again.'
+    width: int = 42
+
+    @classmethod
+    def from_settings(cls, settings, default_output=''):
+        defaults = cls(output=default_output)
+        print_format = settings.get('printer_format', defaults.format)
+        try:
+            width = int(settings.get('printer_width', defaults.width))
+        except (TypeError, ValueError):
+            width = defaults.width
+        return cls(output=settings.get('printer_output', defaults.output),
+                   format=print_format if print_format in PRINT_FORMATS else defaults.format,
+                   shop_name=settings.get('shop_name', defaults.shop_name),
+                   footer=settings.get('receipt_footer', defaults.footer),
+                   width=max(width, 24))
+
+    def to_settings(self):
+        return {'printer_output': self.output, 'printer_format': self.format, 'shop_name': self.shop_name,
+                'receipt_footer': self.footer, 'printer_width': str(self.width)}
+
+
+def _pdf_string(text):
+    text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return f"({text})"
+
+
+class ReceiptRenderer:
+    """Turns a Receipt into plain text, an ESC/POS byte stream or a one-page PDF.
+
+    The shop header and the footer are the same on every receipt, so they are rendered
+    once per format when the renderer is built and only the body is formatted per order.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or PrintSettings()
+        width = self.settings.width
+        self.rule = '-' * width
+        self._header = [self.settings.shop_name.center(width).rstrip(), self.rule]
+        self._footer = [self.rule, self.settings.footer.center(width).rstrip()]
+        self._header_text = "\n".join(self._header) + "\n"
+        self._footer_text = "\n".join(self._footer) + "\n"
+        self._header_escpos = (ESC_INIT + ESC_ALIGN_CENTER + ESC_DOUBLE_SIZE + ESC_BOLD_ON
+                               + self._encode(self.settings.shop_name) + b'\n'
+                               + ESC_NORMAL_SIZE + ESC_BOLD_OFF + ESC_ALIGN_LEFT + self._encode(self.rule) + b'\n')
+        self._footer_escpos = (self._encode(self.rule) + b'\n' + ESC_ALIGN_CENTER
+                               + self._encode(self.settings.footer) + b'\n' + ESC_ALIGN_LEFT + ESC_FEED_AND_CUT)
+        self._header_pdf = [_pdf_string(line) for line in self._header]
+        self._footer_pdf = [_pdf_string(line) for line in self._footer]
+
+    @staticmethod
+    def _encode(text):
+        # Receipt printers use single-byte code pages; anything outside ASCII prints as '?'
+        return text.encode('ascii', errors='replace')
+
+    def _columns(self, left, right):
+        space = max(self.settings.width - len(left) - len(right), 1)
+        return f"{left}{' ' * space}{right}"
+
+    def body_lines(self, receipt, charges=None, tax_inclusive=True):
+        """Lines between the header and the footer. Amounts are pesos without a currency sign.
+
+        `charges` (an OrderCharges) adds the subtotal, discount and rounding lines; without it
+        only the stored service charge and tax are shown. `tax_inclusive` is the ChargeSettings
+        flag the order was charged with and labels the tax line.
+        """
+        lines = [f"Receipt: {receipt.receipt_uuid[:12]}", f"Date: {receipt.sale_date}", self.rule]
+        for line in receipt.items:
+            lines.append(self._columns(f"{line.name} x{line.qty}", format_amount(line.subtotal)))
+            if line.qty > 1:
+                lines.append(f"  @ {format_amount(line.price)}")
+        lines.append(self.rule)
+        if charges is not None:
+            lines.append(self._columns("Subtotal", format_amount(charges.subtotal)))
+            if charges.discount:
+                lines.append(self._columns("Discounts", format_amount(-charges.discount)))
+        if receipt.service_charge:
+            lines.append(self._columns("Service charge", format_amount(receipt.service_charge)))
+        if receipt.tax:
+            lines.append(self._columns("Tax (included)" if tax_inclusive else "Tax", format_amount(receipt.tax)))
+        if charges is not None and charges.rounding_adjustment:
+            lines.append(self._columns("Rounding", format_amount(charges.rounding_adjustment)))
+        lines.append(self._columns("TOTAL (PHP)", format_amount(receipt.total)))
+        return lines
+
+    def render_text(self, receipt, charges=None, tax_inclusive=True):
+        return self._header_text + "\n".join(self.body_lines(receipt, charges, tax_inclusive)) + "\n" + self._footer_text
+
+    def render_escpos(self, receipt, charges=None, tax_inclusive=True):
+        body = self.body_lines(receipt, charges, tax_inclusive)
+        total_line = self._encode(body.pop())
+        return (self._header_escpos + self._encode("\n".join(body)) + b'\n'
+                + ESC_BOLD_ON + total_line + ESC_BOLD_OFF + b'\n' + self._footer_escpos)
+
+    def render_pdf(self, receipt, charges=None, tax_inclusive=True):
+        """A single-page PDF sized to the receipt, using the built-in Courier font."""
+        lines = (self._header_pdf + [_pdf_string(line) for line in self.body_lines(receipt, charges, tax_inclusive)]
+                 + self._footer_pdf)
+        height = 2 * PDF_MARGIN + len(lines) * PDF_LINE_HEIGHT
+        content = (f"BT /F1 {PDF_FONT_SIZE} Tf {PDF_LINE_HEIGHT} TL {PDF_MARGIN} {height - PDF_MARGIN - PDF_FONT_SIZE} Td "
+                   + " T* ".join(f"{line} Tj" for line in lines) + " ET")
+        stream = content.encode('latin-1', errors='replace')
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE_WIDTH} {height}] "
+             f"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>").encode(),
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+            b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        ]
+        pdf = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(pdf))
+            pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+        xref = len(pdf)
+        pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+        pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        return bytes(pdf)
+
+    def render(self, receipt, charges=None, print_format=None, tax_inclusive=True):
+        """Render in `print_format` (default: the configured one). Always returns bytes."""
+        print_format = print_format or self.settings.format
+        if print_format == 'pdf':
+            return self.render_pdf(receipt, charges, tax_inclusive)
+        if print_format == 'text':
+            return self.render_text(receipt, charges, tax_inclusive).encode('utf-8')
+        return self.render_escpos(receipt, charges, tax_inclusive)
+
+
+class PrintQueue:
+    """Renders and writes receipts on a background thread so checkout never waits on the printer.
+
+    Receipts go to a spool directory as one file each (written to a temporary name and
+    renamed, so a spooler never picks up half a file) or are appended to a device file.
+    The worker thread starts with the first receipt.
+    """
+
+    def __init__(self, settings=None):
+        self.configure(settings or PrintSettings())
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.printed = 0
+        self.failed = 0
+
+    def configure(self, settings):
+        """Apply new print settings; the templates are rendered again once here."""
+        self.settings = settings
+        self.renderer = ReceiptRenderer(settings)
+
+    @property
+    def enabled(self):
+        return bool(self.settings.output)
+
+    def submit(self, receipt, charges=None, tax_inclusive=True):
+        """Queue a receipt for printing and return immediately. Returns False if printing is off."""
+        if not self.enabled:
+            return False
+        self._jobs.put((receipt, charges, tax_inclusive, self.renderer, self.settings))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+        return True
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    return
+                receipt, charges, tax_inclusive, renderer, settings = job
+                self._write(receipt.receipt_uuid, renderer.render(receipt, charges, tax_inclusive=tax_inclusive), settings)
+                self.printed += 1
+            except OSError as e:
+                self.failed += 1
+                print(f"Error printing receipt: {e}")
+            finally:
+                self._jobs.task_done()
+
+    @staticmethod
+    def _write(name, data, settings):
+        output = settings.output
+        if os.path.isdir(output) or not os.path.exists(output) and not os.path.splitext(output)[1]:
+            os.makedirs(output, exist_ok=True)
+            path = os.path.join(output, name + FILE_EXTENSIONS[settings.format])
+            with open(path + '.tmp', 'wb') as spool_file:
+                spool_file.write(data)
+            os.replace(path + '.tmp', path)
+        else:
+            with open(output, 'ab') as device:
+                device.write(data)
+
+    def wait(self):
+        """Block until every queued receipt has been written."""
+        self._jobs.join()
+
+    def close(self):
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._jobs.put(None)
+            thread.join()
@@ -0,0 +1,204 @@
+import json
+from typing import NamedTuple
+from money import allocate, percent_of
+
+PROMOTION_SCOPES = ('item', 'category', 'combo', 'order')
+DISCOUNT_TYPES = ('percent', 'amount')
+
+
+class Promotion(NamedTuple):
+    """One row of the promotions table.
+
+    `target` is an item name, a category, a JSON list of item names (combo) or None (order).
+    `days` is a string of weekday digits (0 = Monday), e.g. '01234' for weekdays; None means every day.
+    `value` is a percentage or, for 'amount' discounts, centavos; `min_spend` is in centavos.
+    """
+    id: int
+    name: str
+    scope: str
+    target: str
+    discount_type: str
+    value: float
+    min_qty: int
+    min_spend: int
+    start_time: str
+    end_time: str
+    days: str
+    active: int
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class CompiledPromotion:
+    """A promotion with its time window and combo items parsed once at load time."""
+    __slots__ = ('id', 'name', 'scope', 'target', 'discount_type', 'value', 'min_qty', 'min_spend',
+                 'window', 'days', 'items')
+
+    def __init__(self, promotion):
+        self.id = promotion.id
+        self.name = promotion.name
+        self.scope = promotion.scope
+        self.target = promotion.target
+        self.discount_type = promotion.discount_type
+        self.value = promotion.value if promotion.discount_type == 'percent' else int(promotion.value)
+        self.min_qty = max(promotion.min_qty or 1, 1)
+        self.min_spend = int(promotion.min_spend or 0)
+        self.window = None
+        if promotion.start_time and promotion.end_time:
+            self.window = (_minutes(promotion.start_time), _minutes(promotion.end_time))
+        self.days = frozenset(int(d) for d in promotion.days) if promotion.days else None
+        self.items = tuple(json.loads(promotion.target)) if promotion.scope == 'combo' else ()
+
+    def active_at(self, moment):
+        if self.days is not None and moment.weekday() not in self.days:
+            return False
+        if self.window is None:
+            return True
+        start, end = self.window
+        now = moment.hour * 60 + moment.minute
+        # A window like 22:00-02:00 wraps past midnight
+        return start <= now < end if start <= end else now >= start or now < end
+
+    def discount_on(self, amount, units):
+        """Discount in centavos for `units` qualifying units worth `amount` centavos in total."""
+        if self.discount_type == 'percent':
+            return percent_of(amount, self.value)
+        return min(self.value * units, amount)
+
+
+class PromotionEngine:
+    """Active promotions compiled into lookup tables by item, category and combo member.
+
+    Adding or removing a line only evaluates the rules indexed under that line's item and
+    category (plus combos containing the item), so the cost of an update does not grow with
+    the total number of promotions. Order-level rules are re-checked against the running subtotal.
+    """
+
+    def __init__(self, promotions=()):
+        self.load(promotions)
+
+    def load(self, promotions):
+        self.by_item = {}
+        self.by_category = {}
+        self.combos_by_item = {}
+        self.order_rules = []
+        for promotion in promotions:
+            if not promotion.active:
+                continue
+            rule = CompiledPromotion(promotion)
+            if rule.scope == 'item':
+                self.by_item.setdefault(rule.target, []).append(rule)
+            elif rule.scope == 'category':
+                self.by_category.setdefault(rule.target, []).append(rule)
+            elif rule.scope == 'combo':
+                for name in set(rule.items):
+                    self.combos_by_item.setdefault(name, []).append(rule)
+            elif rule.scope == 'order':
+                self.order_rules.append(rule)
+
+    def start_order(self, moment):
+        """Begin tracking the discounts of a new order placed at `moment` (a datetime)."""
+        return OrderPromotions(self, moment)
+
+
+class OrderPromotions:
+    """Running promotion state of one open order, updated line by line."""
+
+    def __init__(self, engine, moment):
+        self.engine = engine
+        self.moment = moment
+        self._active = {}
+        self.lines = {}
+        self.counts = {}
+        self.prices = {}
+        self.subtotal = 0
+        self.line_discounts = {}
+        self.combo_discounts = {}
+
+    def _is_active(self, rule):
+        active = self._active.get(rule.id)
+        if active is None:
+            active = self._active[rule.id] = rule.active_at(self.moment)
+        return active
+
+    def update(self, item_id, line):
+        """Apply the new state of one order line; `line` is an OrderLine, or None once removed."""
+        previous = self.lines.pop(item_id, None)
+        if previous is None and line is None:
+            return
+        if previous is not None:
+            self.subtotal -= previous.subtotal
+            self.counts[previous.name] -= previous.qty
+        if line is not None:
+            self.lines[item_id] = line
+            self.subtotal += line.subtotal
+            self.counts[line.name] = self.counts.get(line.name, 0) + line.qty
+            self.prices[line.name] = line.price
+        name = (line or previous).name
+
+        self.line_discounts.pop(item_id, None)
+        if line is not None:
+            candidates = self.engine.by_item.get(line.name, []) + self.engine.by_category.get(line.category, [])
+            best = None
+            for rule in candidates:
+                if line.qty >= rule.min_qty and self._is_active(rule):
+                    amount = rule.discount_on(line.subtotal, line.qty)
+                    if best is None or amount > best[0]:
+                        best = (amount, rule)
+            if best and best[0] > 0:
+                self.line_discounts[item_id] = best
+
+        for rule in self.engine.combos_by_item.get(name, ()):
+            self._evaluate_combo(rule)
+
+    def _evaluate_combo(self, rule):
+        self.combo_discounts.pop(rule.id, None)
+        if not self._is_active(rule):
+            return
+        sets = min(self.counts.get(name, 0) // rule.items.count(name) for name in set(rule.items))
+        if sets >= rule.min_qty:
+            set_price = sum(self.prices[name] for name in rule.items)
+            amount = rule.discount_on(set_price * sets, sets)
+            if amount > 0:
+                self.combo_discounts[rule.id] = (amount, rule)
+
+    def _order_discount(self, net):
+        best = None
+        for rule in self.engine.order_rules:
+            if net >= rule.min_spend and self._is_active(rule):
+                amount = rule.discount_on(net, 1)
+                if best is None or amount > best[0]:
+                    best = (amount, rule)
+        return best
+
+    @property
+    def discount(self):
+        return sum(amount for amount, _ in self.applied())
+
+    def applied(self):
+        """(amount, promotion name) for every promotion currently reducing the order, capped at the subtotal."""
+        applied = [(amount, rule.name) for amount, rule in self.line_discounts.values()]
+        applied += [(amount, rule.name) for amount, rule in self.combo_discounts.values()]
+        net = self.subtotal - sum(amount for amount, _ in applied)
+        order_discount = self._order_discount(net)
+        if order_discount:
+            applied.append((order_discount[0], order_discount[1].name))
+        total = sum(amount for amount, _ in applied)
+        if total > self.subtotal:
+            # Never discount below zero; scale every promotion down evenly
+            scaled = allocate(max(self.subtotal, 0), [amount for amount, _ in applied])
+            applied = [(amount, name) for amount, (_, name) in zip(scaled, applied)]
+        return applied
+
+    def net_line_totals(self, order):
+        """Net total per line of `order` ({item_id: OrderLine}, in its own order) after every discount.
+
+        Line promotions come off their own line; combo and order discounts are spread over
+        the lines in proportion to what is left of each, so the totals add up to the net order total.
+        """
+        nets = [max(line.subtotal - self.line_discounts.get(item_id, (0, None))[0], 0) for item_id, line in order.items()]
+        target = sum(line.subtotal for line in order.values()) - self.discount
+        return allocate(max(target, 0), nets)
@@ -0,0 +1,221 @@
+# Size of the per-connection prepared statement cache (sqlite3.connect(cached_statements=...)).
+# It has to hold every statement in QUERIES plus the few built at runtime, otherwise
+# hot statements get evicted and re-parsed.
+STATEMENT_CACHE_SIZE = 256
+
+# Units refunded per item of a hot receipt as a JSON object, NULL while nothing was refunded
+RECEIPT_REFUNDED_ITEMS_SQL = (
+    "CASE WHEN refunded > 0 THEN (SELECT json_group_object(item_name, qty) FROM "
+    "(SELECT item_name, -SUM(quantity) AS qty FROM sales WHERE receipt_id = receipts.id AND quantity < 0 "
+    "GROUP BY item_name)) END"
+)
+
+# Every statement DatabaseManager runs after start-up, by name. Keeping the SQL text
+# constant means sqlite3 reuses the compiled statement from its cache on every call
+# instead of parsing it again.
+QUERIES = {
+    # Menu
+    'menu_insert': "INSERT INTO menu (name, price, stock, category, reorder_level) VALUES (?, ?, ?, ?, ?)",
+    'menu_list': "SELECT id, name, price, stock, category, reorder_level FROM menu ORDER BY name ASC",
+    'menu_categories': "SELECT DISTINCT category FROM menu ORDER BY category",
+    'menu_update': "UPDATE menu SET name=?, price=?, stock=?, category=?, reorder_level=? WHERE id=?",
+    'menu_delete': "DELETE FROM menu WHERE id=?",
+    'menu_item_details': "SELECT name, price, category FROM menu WHERE id = ?",
+    'menu_low_stock': "SELECT name, stock FROM menu WHERE stock < reorder_level ORDER BY stock ASC",
+    # The sold item ids or names arrive as one JSON array so the statement text never changes
+    'menu_reorder_crossings': (
+        "SELECT id, name, stock, reorder_level FROM menu "
+        "WHERE stock < reorder_level AND id IN (SELECT value FROM json_each(?))"
+    ),
+    'menu_ids_by_name': "SELECT name, id FROM menu WHERE name IN (SELECT value FROM json_each(?))",
+
+    # Ingredients and recipes
+    'ingredient_insert': "INSERT INTO ingredients (name, unit, stock) VALUES (?, ?, ?)",
+    'ingredient_list': "SELECT id, name, unit, stock FROM ingredients ORDER BY name ASC",
+    'ingredient_update_stock': "UPDATE ingredients SET stock = ? WHERE id = ?",
+    'recipe_delete': "DELETE FROM recipes WHERE menu_id = ?",
+    'recipe_insert': "INSERT INTO recipes (menu_id, ingredient_id, quantity) VALUES (?, ?, ?)",
+    # The order's (menu id, qty) pairs arrive as one JSON array of pairs, so every order size runs the same statement
+    'ingredients_consume': """
+        WITH order_lines(menu_id, qty) AS (
+                 SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)),
+             usage AS (SELECT r.ingredient_id, SUM(r.quantity * o.qty) AS used
+                       FROM order_lines o
+                       JOIN recipes r ON r.menu_id = o.menu_id
+                       GROUP BY r.ingredient_id)
+        UPDATE ingredients
+        SET stock = stock - (SELECT used FROM usage WHERE usage.ingredient_id = ingredients.id)
+        WHERE id IN (SELECT ingredient_id FROM usage)
+    """,
+
+    # Promotions
+    'promotion_insert': (
+        "INSERT INTO promotions (name, scope, target, discount_type, value, min_qty, min_spend, start_time, end_time, days) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    ),
+    'promotion_list': (
+        "SELECT id, name, scope, target, discount_type, value, min_qty, min_spend, start_time, end_time, days, active "
+        "FROM promotions ORDER BY name"
+    ),
+    'promotion_set_active': "UPDATE promotions SET active = ? WHERE id = ?",
+    'promotion_delete': "DELETE FROM promotions WHERE id = ?",
+
+    # Settings
+    'settings_list': "SELECT key, value FROM settings",
+    'settings_upsert': "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+
+    # Users
+    'user_insert': "INSERT INTO users (username, password, role, created_at) VALUES (?, ?, ?, datetime('now'))",
+    'user_get': "SELECT username, password, role FROM users WHERE username = ?",
+    'user_list': "SELECT username, role FROM users ORDER BY username",
+    'user_update_password': "UPDATE users SET password = ? WHERE username = ?",
+    'user_delete': "DELETE FROM users WHERE username = ?",
+
+    # Checkout
+    'sale_insert': (
+        "INSERT INTO sales (item_name, category, quantity, price, total, sale_date, receipt_id, menu_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    ),
+    'menu_deduct_stock': "UPDATE menu SET stock = stock - ? WHERE id = ?",
+    'sales_rollup_upsert': """
+        INSERT INTO sales_rollup (bucket, bucket_start, menu_id, item_name, category, quantity, revenue)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (bucket, bucket_start, IFNULL(menu_id, item_name)) DO UPDATE
+        SET quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+    """,
+    'sales_hourly_upsert': """
+        INSERT INTO sales_hourly (sale_day, hour, weekday, orders, quantity, revenue)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (sale_day, hour) DO UPDATE
+        SET orders = orders + excluded.orders, quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+    """,
+
+    # Receipts
+    'receipt_insert': (
+        "INSERT INTO receipts (receipt_uuid, sale_date, total, items_json, created_at, tax, service_charge) "
+        "VALUES (?, ?, ?, ?, datetime('now'), ?, ?)"
+    ),
+    'receipt_get': (
+        "SELECT receipt_uuid, sale_date, total, items_json, created_at, tax, service_charge, refunded, "
+        f"{RECEIPT_REFUNDED_ITEMS_SQL} FROM receipts WHERE receipt_uuid = ?"
+    ),
+    'receipt_get_archived': (
+        "SELECT receipt_uuid, sale_date, total, items_json, created_at, tax, service_charge, refunded, NULL "
+        "FROM receipts_all WHERE receipt_uuid = ?"
+    ),
+    # A receipt with sales rows is voided instead, so stock and reports stay consistent
+    'receipt_delete': (
+        "DELETE FROM receipts WHERE receipt_uuid = ? "
+        "AND NOT EXISTS (SELECT 1 FROM sales WHERE sales.receipt_id = receipts.id)"
+    ),
+    'receipt_refund_state': "SELECT id, total, refunded, items_json FROM receipts WHERE receipt_uuid = ?",
+    'receipt_sales': "SELECT item_name, category, price, quantity, total, menu_id FROM sales WHERE receipt_id = ?",
+    'receipt_add_refund': "UPDATE receipts SET refunded = refunded + ? WHERE id = ?",
+    # LIMIT -1 means no limit in SQLite, so one statement serves both cases
+    'receipt_list': (
+        "SELECT receipt_uuid, sale_date, total, items_json, created_at, tax, service_charge, refunded, "
+        f"{RECEIPT_REFUNDED_ITEMS_SQL} FROM receipts ORDER BY created_at DESC LIMIT ?"
+    ),
+
+    # Reports
+    'sales_report_rows': (
+        "SELECT item_name, category, quantity, total, strftime('%Y-%m-%d', sale_date) FROM sales_all WHERE sale_date >= ?"
+    ),
+    # Rollup rows are per menu item: a renamed item reads under its current name, items no
+    # longer on the menu under the name they were sold under
+    'sales_rollup': (
+        "SELECT COALESCE(m.name, r.item_name) AS item_name, r.category, r.quantity, r.revenue, r.bucket_start "
+        "FROM sales_rollup r LEFT JOIN menu m ON m.id = r.menu_id "
+        "WHERE r.bucket = ? AND r.bucket_start >= ? AND r.bucket_start <= ?"
+    ),
+    # Orders per weekday (0 = Monday) and hour of day, summed over an index range of sale days
+    'sales_hourly': (
+        "SELECT weekday, hour, SUM(orders) AS orders, SUM(revenue) AS revenue FROM sales_hourly "
+        "WHERE sale_day >= ? AND sale_day <= ? GROUP BY weekday, hour"
+    ),
+    # Units sold per item and day over a date range, the demand forecast's history
+    'daily_item_sales': (
+        "SELECT COALESCE(m.name, r.item_name) AS item_name, r.bucket_start, r.quantity "
+        "FROM sales_rollup r LEFT JOIN menu m ON m.id = r.menu_id "
+        "WHERE r.bucket = 'day' AND r.bucket_start >= ? AND r.bucket_start <= ?"
+    ),
+
+    # End of day
+    # Quantity and revenue per item for one business day: the day's revenue and top sellers
+    # both come from this one pass over its sales. Grouped by menu id so a renamed item counts
+    # once, under its current name; items no longer on the menu keep the name they were sold under
+    'eod_item_totals': """
+        SELECT COALESCE(m.name, MAX(s.item_name)), SUM(s.quantity), SUM(s.total)
+        FROM sales s LEFT JOIN menu m ON m.id = s.menu_id
+        WHERE s.sale_date >= ? AND s.sale_date < ?
+        GROUP BY s.menu_id, CASE WHEN s.menu_id IS NULL THEN s.item_name END
+    """,
+    'eod_last_date': "SELECT MAX(report_date) FROM eod_summary",
+    'eod_insert': "INSERT INTO eod_summary (report_date, total_revenue, top_items_json, low_stock_json) VALUES (?, ?, ?, ?)",
+    'eod_archive_insert': (
+        "INSERT OR IGNORE INTO eod_summary_archive (report_date, total_revenue, top_items_json, low_stock_json, archived_at) "
+        "VALUES (?, ?, ?, ?, datetime('now'))"
+    ),
+    'eod_list': "SELECT report_date, total_revenue, top_items_json, low_stock_json FROM eod_summary ORDER BY report_date DESC",
+    'eod_page': (
+        "SELECT report_date, total_revenue, top_items_json, low_stock_json FROM eod_summary "
+        "ORDER BY report_date DESC LIMIT ? OFFSET ?"
+    ),
+    'eod_archive_all': (
+        "INSERT OR IGNORE INTO eod_summary_archive (report_date, total_revenue, top_items_json, low_stock_json, archived_at) "
+        "SELECT report_date, total_revenue, top_items_json, low_stock_json, datetime('now') FROM eod_summary"
+    ),
+    'eod_archive_list': (
+        "SELECT report_date, total_revenue, top_items_json, low_stock_json, archived_at "
+        "FROM eod_summary_archive ORDER BY archived_at DESC"
+    ),
+    'eod_restore_archived': (
+        "INSERT OR IGNORE INTO eod_summary (report_date, total_revenue, top_items_json, low_stock_json) "
+        "SELECT report_date, total_revenue, top_items_json, low_stock_json FROM eod_summary_archive"
+    ),
+    'eod_count': "SELECT COUNT(*) FROM eod_summary",
+
+    # Business date
+    'pos_state_get': "SELECT business_date FROM pos_state WHERE id = 1",
+    'pos_state_init': "INSERT OR IGNORE INTO pos_state (id, business_date, updated_at) VALUES (1, ?, datetime('now'))",
+    'pos_state_advance': (
+        "UPDATE pos_state SET business_date = ?, updated_at = datetime('now') WHERE id = 1 AND business_date = ?"
+    ),
+
+    # Clearing sales data
+    'sales_clear': "DELETE FROM sales",
+    'sales_rollup_clear': "DELETE FROM sales_rollup",
+    'sales_hourly_clear': "DELETE FROM sales_hourly",
+    'eod_clear': "DELETE FROM eod_summary",
+}
+
+
+class QueryStats:
+    """Call count and timing per named statement, for finding the queries worth tuning."""
+
+    def __init__(self):
+        # name -> [calls, total seconds, slowest call in seconds]
+        self._stats = {}
+
+    def record(self, name, elapsed):
+        entry = self._stats.get(name)
+        if entry is None:
+            self._stats[name] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    def snapshot(self):
+        """Return {name: {'calls', 'total_ms', 'avg_ms', 'max_ms'}}, slowest total first."""
+        rows = sorted(self._stats.items(), key=lambda item: item[1][1], reverse=True)
+        return {name: {'calls': calls,
+                       'total_ms': total * 1000,
+                       'avg_ms': total * 1000 / calls,
+                       'max_ms': slowest * 1000}
+                for name, (calls, total, slowest) in rows}
+
+    def reset(self):
+        self._stats.clear()
+
@@ -0,0 +1,114 @@
+import json
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+# Money fields are int centavos (see money.py)
+class MenuItem(NamedTuple):
+    id: int
+    name: str
+    price: int
+    stock: int
+    category: str
+    reorder_level: int
+
+
+class OrderLine(NamedTuple):
+    name: str
+    price: int
+    qty: int
+    category: str
+
+    @property
+    def subtotal(self):
+        return self.price * self.qty
+
+
+class Receipt(NamedTuple):
+    receipt_uuid: str
+    sale_date: str
+    total: int
+    items: list
+    created_at: str
+    tax: int = 0
+    service_charge: int = 0
+    # Amount paid back through refunds and voids
+    refunded: int = 0
+    # {item name: units refunded}; None while nothing was refunded
+    refunded_items: dict = None
+
+    def refundable_qty(self, line):
+        """Units of an order line that can still be refunded."""
+        return max(line.qty - (self.refunded_items or {}).get(line.name, 0), 0)
+
+
+class EodSummary(NamedTuple):
+    date: str
+    total_revenue: int
+    top_items: list
+    low_stock: list
+    archived_at: str = None
+
+
+def record_factory(record_type):
+    """sqlite3 row factory that builds `record_type` straight from each row tuple."""
+    make = record_type._make
+    return lambda cursor, row: make(row)
+
+
+def order_lines_from_json(items_json):
+    """Decode the items of a stored receipt. Receipts store each line as a JSON object."""
+    try:
+        return [OrderLine(item.get('name', '-'), item.get('price', 0), item.get('qty', 0), item.get('category', ''))
+                for item in json.loads(items_json)]
+    except (TypeError, ValueError, AttributeError):
+        return []
+
+
+def order_lines_to_json(order_lines):
+    return json.dumps([line._asdict() for line in order_lines])
+
+
+def receipt_row(cursor, row):
+    """Row factory for (receipt_uuid, sale_date, total, items_json, created_at, tax, service_charge, refunded,
+    refunded_items_json) rows. Receipts archived before tax or refunds were recorded read back as 0."""
+    receipt_uuid, sale_date, total, items_json, created_at, tax, service_charge, refunded, refunded_json = row
+    return Receipt(receipt_uuid, sale_date, total, order_lines_from_json(items_json), created_at,
+                   tax or 0, service_charge or 0, refunded or 0, json.loads(refunded_json) if refunded_json else None)
+
+
+def eod_summary_row(cursor, row):
+    """Row factory for (report_date, total_revenue, top_items_json, low_stock_json[, archived_at]) rows."""
+    return EodSummary(row[0], row[1], json.loads(row[2]), json.loads(row[3]), *row[4:])
+
+
+menu_item_row = record_factory(MenuItem)
+
+
+class EodCache:
+    """Decoded EodSummary records by report date, evicting the least recently used.
+
+    A saved EOD summary never changes, so once its JSON columns are decoded the record can
+    be reused on every later visit to the EOD tab. Call `clear` when summaries are deleted.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._records = OrderedDict()
+
+    def __len__(self):
+        return len(self._records)
+
+    def decode(self, row):
+        """The EodSummary for a raw eod_summary row, decoding its JSON only on a cache miss."""
+        record = self._records.get(row[0])
+        if record is not None:
+            self._records.move_to_end(row[0])
+            return record
+        record = self._records[row[0]] = eod_summary_row(None, row)
+        if len(self._records) > self.maxsize:
+            self._records.popitem(last=False)
+        return record
+
+    def clear(self):
+        self._records.clear()
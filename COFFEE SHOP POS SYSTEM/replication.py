@@ -0,0 +1,341 @@
+import sys
+import json
+import socket
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+from changelog import CHANGE_BATCH_SIZE, OrderOutbox
+from database import DatabaseManager
+from records import OrderLine
+
+HUB_PORT = 8765
+
+# Seconds between sync rounds on a register, and how long one request to the hub may take
+SYNC_INTERVAL = 5.0
+HUB_TIMEOUT = 3.0
+
+# Conflict rules between registers and the hub:
+# - Receipts are immutable and keyed by receipt_uuid. The first copy the hub stores wins and
+#   a resent order is reported back as a duplicate, so retries are always safe.
+# - Stock moves as sales, not as values. The hub subtracts every order it stores, whichever
+#   register sold it, and never rejects an order for lack of stock (the sale already
+#   happened; stock may go negative and then shows as low stock).
+# - Menu names, prices, categories and reorder levels are managed on the hub; the hub's
+#   version replaces the register's. A register shows the hub's stock minus what it has sold
+#   in orders the hub has not confirmed yet.
+# - Menu ids are the hub's. A register item sitting on an id the hub hands out moves to a free
+#   id, one with the name of a hub item becomes that item, and on a full sync one the hub does
+#   not have is dropped; its sales, recipe and rollup rows follow it (a dropped item's sales
+#   keep only its name), so no local sale ever counts under another item.
+
+
+class ReplicationHub:
+    """The hub's side of replication, working on the hub's own POS database."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def receive_orders(self, register_id, orders):
+        """Store a batch of register orders. Returns {'accepted', 'duplicates', 'failed'} receipt UUID lists."""
+        result = {'accepted': [], 'duplicates': [], 'failed': []}
+        for order in orders:
+            receipt_uuid = order['receipt_uuid']
+            lines = [OrderLine(*item) for item in order['items']]
+            # Receipt and sales are stored together; the receipts table's UNIQUE constraint makes a resend a no-op
+            receipt_id = self.db.record_checkout(receipt_uuid, order['sale_date'], order['total'], lines,
+                                                 order.get('line_totals'), None, order.get('tax', 0),
+                                                 order.get('service_charge', 0))
+            if receipt_id:
+                result['accepted'].append(receipt_uuid)
+            else:
+                key = 'duplicates' if self.db.get_receipt(receipt_uuid) is not None else 'failed'
+                result[key].append(receipt_uuid)
+        if result['failed']:
+            print(f"Hub could not store {len(result['failed'])} order(s) from {register_id}")
+        return result
+
+    def menu_updates(self, register_id, since):
+        """Menu items changed after change log seq `since`, for a register that has applied up to it.
+
+        Returns {'version', 'full', 'items', 'deleted'}. A register that has never synced, or whose
+        `since` points at changes already compacted away, gets the whole menu with 'full' set.
+        """
+        change_log = self.db.change_log
+        if since <= 0:
+            # Menu changes are only logged once a consumer is registered
+            change_log.register(register_id)
+        version = change_log.latest_seq()
+        oldest = change_log.oldest_seq()
+        menu = {item.id: item for item in self.db.read_menu_items()}
+        full = since <= 0 or (oldest is not None and oldest > since + 1)
+        if full:
+            changed = set(menu)
+        else:
+            changed = {change.row_id for batch in change_log.stream(since, CHANGE_BATCH_SIZE, 'menu') for change in batch}
+        if since > 0:
+            change_log.acknowledge(register_id, since)
+            change_log.compact()
+        return {'version': version, 'full': full,
+                'items': [menu[item_id]._asdict() for item_id in sorted(changed) if item_id in menu],
+                'deleted': sorted(item_id for item_id in changed if item_id not in menu)}
+
+
+class _HubRequestHandler(BaseHTTPRequestHandler):
+    # POST /orders  {"register_id": ..., "orders": [...]}
+    # GET  /menu?register_id=...&since=N
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/orders':
+            self._reply(404, {'error': 'not found'})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            self._reply(200, self.server.hub.receive_orders(body['register_id'], body['orders']))
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/menu':
+            self._reply(404, {'error': 'not found'})
+            return
+        query = parse_qs(url.query)
+        try:
+            since = int(query.get('since', ['0'])[0])
+        except ValueError:
+            self._reply(400, {'error': 'since must be a number'})
+            return
+        self._reply(200, self.server.hub.menu_updates(query.get('register_id', ['?'])[0], since))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HubServer:
+    """HTTP front of a ReplicationHub, for the hub process on the shop's network.
+
+    Requests are handled one at a time on the serving thread, which also owns the hub's
+    database connection.
+    """
+
+    def __init__(self, db_path='hub_pos.db', host='0.0.0.0', port=HUB_PORT):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def url(self):
+        host = '127.0.0.1' if self.host in ('0.0.0.0', '') else self.host
+        return f"http://{host}:{self.httpd.server_address[1]}"
+
+    def serve_forever(self):
+        db = DatabaseManager(self.db_path)
+        self.httpd = HTTPServer((self.host, self.port), _HubRequestHandler)
+        self.httpd.hub = ReplicationHub(db)
+        self._ready.set()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            db.conn.close()
+
+    def start(self):
+        """Serve on a background thread; returns once the hub accepts requests."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def _move_menu_references(conn, old_id, new_id):
+    """Point a register's sales, recipes and sales rollup at menu id `new_id` instead of `old_id`
+    (no commit). With `new_id` None the sales keep only their item name and the recipe is dropped.
+    Orders in the outbox name their items rather than ids and need no change."""
+    conn.execute("UPDATE sales SET menu_id = ? WHERE menu_id = ?", (new_id, old_id))
+    if new_id is not None:
+        # A recipe the target already has wins
+        conn.execute("UPDATE OR IGNORE recipes SET menu_id = ? WHERE menu_id = ?", (new_id, old_id))
+    conn.execute("DELETE FROM recipes WHERE menu_id = ?", (old_id,))
+    conn.execute("""
+        INSERT INTO sales_rollup (bucket, bucket_start, menu_id, item_name, category, quantity, revenue)
+        SELECT bucket, bucket_start, ?, item_name, category, quantity, revenue FROM sales_rollup WHERE menu_id = ?
+        ON CONFLICT (bucket, bucket_start, IFNULL(menu_id, item_name)) DO UPDATE
+        SET quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+    """, (new_id, old_id))
+    conn.execute("DELETE FROM sales_rollup WHERE menu_id = ?", (old_id,))
+
+
+def _free_menu_id(conn, hub_ids):
+    """A menu id no register row, sale, hub item seen so far or hub item in `hub_ids` uses."""
+    used = conn.execute("""
+        SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM menu UNION ALL SELECT MAX(menu_id) FROM sales
+                             UNION ALL SELECT MAX(menu_id) FROM hub_menu_ids
+                             UNION ALL SELECT seq FROM sqlite_sequence WHERE name = 'menu')
+    """).fetchone()[0]
+    return max([used or 0, *hub_ids]) + 1
+
+
+def apply_menu_update(conn, update):
+    """Apply a hub menu update to a register database in one write transaction (see the conflict rules)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        pending = OrderOutbox(conn).pending_quantities()
+        hub_ids = {item['id'] for item in update['items']}
+        hub_id_by_name = {item['name']: item['id'] for item in update['items']}
+        known = {row[0] for row in conn.execute("SELECT menu_id FROM hub_menu_ids")}
+        deleted = set(update['deleted']) & known
+        local = dict(conn.execute("SELECT id, name FROM menu").fetchall())
+        for item in update['items']:
+            name = local.get(item['id'])
+            if name is not None and name != item['name'] and item['id'] not in known:
+                new_id = _free_menu_id(conn, hub_ids)
+                conn.execute("UPDATE menu SET id = ? WHERE id = ?", (new_id, item['id']))
+                _move_menu_references(conn, item['id'], new_id)
+                local[new_id] = local.pop(item['id'])
+        for local_id, name in local.items():
+            if local_id in hub_ids:
+                continue
+            if local_id in known:
+                # The hub deleted it; the hub never hands its id out again, so its references stay
+                if not (update['full'] or local_id in deleted or name in hub_id_by_name):
+                    continue
+            else:
+                target = hub_id_by_name.get(name)
+                if target is None and not update['full']:
+                    continue
+                _move_menu_references(conn, local_id, target)
+            conn.execute("DELETE FROM menu WHERE id = ?", (local_id,))
+        # Rows on the hub's ids are written afresh; their references stay with the id
+        conn.execute("DELETE FROM menu WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(sorted(hub_ids)),))
+        conn.executemany(
+            "INSERT INTO menu (id, name, price, stock, category, reorder_level) VALUES (?, ?, ?, ?, ?, ?)",
+            [(item['id'], item['name'], item['price'], item['stock'] - pending.get(item['name'], 0),
+              item['category'], item['reorder_level']) for item in update['items']])
+        conn.executemany("INSERT OR IGNORE INTO hub_menu_ids (menu_id) VALUES (?)", [(item_id,) for item_id in hub_ids])
+        conn.execute("INSERT INTO settings (key, value) VALUES ('hub_menu_version', ?) "
+                     "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (str(update['version']),))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+class RegisterSync:
+    """Background agent that keeps a register's database in step with the hub.
+
+    Every round it sends the oldest unconfirmed orders from the outbox, drops the ones the
+    hub confirmed, then pulls menu changes. It uses its own short-lived connection, so the
+    POS connection is never blocked on the network; when the hub is unreachable the round
+    is skipped and checkouts carry on against the local database.
+    """
+
+    def __init__(self, db_path, hub_url, register_id=None, interval=SYNC_INTERVAL, timeout=HUB_TIMEOUT,
+                 batch_size=CHANGE_BATCH_SIZE):
+        self.db_path = db_path
+        self.hub_url = hub_url.rstrip('/')
+        self.register_id = register_id or socket.gethostname()
+        self.interval = interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.online = False
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _request(self, path, body=None):
+        data = None if body is None else json.dumps(body).encode('utf-8')
+        request = urllib.request.Request(self.hub_url + path, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def push_orders(self, conn):
+        """Send unconfirmed orders until the outbox is empty. Returns the number the hub confirmed."""
+        outbox = OrderOutbox(conn)
+        confirmed = 0
+        while True:
+            orders = outbox.pending(self.batch_size)
+            if not orders:
+                return confirmed
+            result = self._request('/orders', {'register_id': self.register_id, 'orders': orders})
+            done = result['accepted'] + result['duplicates']
+            outbox.remove(done)
+            conn.commit()
+            confirmed += len(done)
+            if len(done) < len(orders):
+                # Leave the failed ones for the next round rather than resending them in a loop
+                return confirmed
+
+    def pull_menu(self, conn):
+        row = conn.execute("SELECT value FROM settings WHERE key = 'hub_menu_version'").fetchone()
+        since = int(row[0]) if row else 0
+        update = self._request(f'/menu?register_id={self.register_id}&since={since}')
+        apply_menu_update(conn, update)
+        return update
+
+    def sync_once(self):
+        """One round against the hub. Returns False (and keeps every order queued) if it fails."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.push_orders(conn)
+            self.pull_menu(conn)
+            self.online, self.last_error = True, None
+            return True
+        except (urllib.error.URLError, OSError, ValueError, KeyError, sqlite3.Error) as e:
+            self.online, self.last_error = False, str(e)
+            return False
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def order_payload(receipt_uuid, sale_date, charges, order_lines, line_totals):
+    """The outbox entry for one checkout."""
+    return {'receipt_uuid': receipt_uuid, 'sale_date': sale_date, 'total': charges.total, 'tax': charges.tax,
+            'service_charge': charges.service_charge, 'items': [list(line) for line in order_lines],
+            'line_totals': list(line_totals)}
+
+
+if __name__ == '__main__':
+    # python replication.py hub [db path] [port]
+    if len(sys.argv) < 2 or sys.argv[1] != 'hub':
+        print("Usage: python replication.py hub [db path] [port]")
+        sys.exit(1)
+    server = HubServer(sys.argv[2] if len(sys.argv) > 2 else 'hub_pos.db',
+                       port=int(sys.argv[3]) if len(sys.argv) > 3 else HUB_PORT)
+    print(f"Replication hub listening on port {server.port}")
+    server.serve_forever()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from database import sales_rollup_params
+from money import CENTAVOS_PER_PESO
+from queries import QUERIES
+
+# Column dtypes applied while reading, so rows never exist as Python tuples.
+# Item, category and bucket labels repeat heavily and are stored as categoricals.
+ROLLUP_DTYPES = {
+    'item_name': 'category',
+    'category': 'category',
+    'quantity': 'int64',
+    'revenue': 'int64',
+    'bucket_start': 'category',
+}
+
+HOURLY_DTYPES = {'weekday': 'int8', 'hour': 'int8', 'orders': 'int64', 'revenue': 'int64'}
+
+
+class ReportData:
+    """Precomputed aggregates for the Sales Reports charts."""
+
+    def __init__(self, bucket, top_items, category_revenue, revenue_trend, hourly_orders=None):
+        self.bucket = bucket
+        self.top_items = top_items
+        self.category_revenue = category_revenue
+        self.revenue_trend = revenue_trend
+        # 7 x 24 array of order counts, rows Monday..Sunday, columns hour of day
+        self.hourly_orders = hourly_orders if hourly_orders is not None else np.zeros((7, 24), dtype='int64')
+
+    @property
+    def empty(self):
+        return self.revenue_trend.empty
+
+
+class ReportEngine:
+    def __init__(self, conn, top_n=5):
+        self.conn = conn
+        self.top_n = top_n
+
+    def read_rollup(self, bucket, start_date, end_date):
+        return pd.read_sql_query(QUERIES['sales_rollup'], self.conn,
+                                 params=sales_rollup_params(bucket, start_date, end_date),
+                                 dtype=ROLLUP_DTYPES)
+
+    def read_hourly_orders(self, start_date, end_date):
+        """Return a 7 x 24 (weekday x hour) array of order counts between two dates."""
+        frame = pd.read_sql_query(QUERIES['sales_hourly'], self.conn,
+                                  params=(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')),
+                                  dtype=HOURLY_DTYPES)
+        matrix = np.zeros((7, 24), dtype='int64')
+        matrix[frame['weekday'].to_numpy(), frame['hour'].to_numpy()] = frame['orders'].to_numpy()
+        return matrix
+
+    def build(self, bucket, start_date, end_date):
+        report = self.aggregate(self.read_rollup(bucket, start_date, end_date), bucket)
+        report.hourly_orders = self.read_hourly_orders(start_date, end_date)
+        return report
+
+    def aggregate(self, frame, bucket):
+        """Compute top items, category revenue and the revenue trend in one pass over the columns.
+        Revenue is summed in centavos and charted in pesos."""
+        if frame.empty:
+            empty = pd.Series(dtype='float64')
+            return ReportData(bucket, empty, empty, empty)
+
+        quantity = frame['quantity'].to_numpy()
+        revenue = frame['revenue'].to_numpy() / CENTAVOS_PER_PESO
+        items, categories, buckets = frame['item_name'].cat, frame['category'].cat, frame['bucket_start'].cat
+
+        item_qty = np.bincount(items.codes, weights=quantity, minlength=len(items.categories))
+        category_rev = np.bincount(categories.codes, weights=revenue, minlength=len(categories.categories))
+        bucket_rev = np.bincount(buckets.codes, weights=revenue, minlength=len(buckets.categories))
+
+        top_items = pd.Series(item_qty, index=items.categories.astype(str)).nlargest(self.top_n)
+        category_revenue = pd.Series(category_rev, index=categories.categories.astype(str))
+        category_revenue = category_revenue[category_revenue > 0]
+        revenue_trend = pd.Series(bucket_rev, index=pd.to_datetime(buckets.categories.astype(str))).sort_index()
+        return ReportData(bucket, top_items, category_revenue, revenue_trend)
@@ -0,0 +1,119 @@
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+def _words(name):
+    """Lowercase keys a name can be found under: the full name and every word in it."""
+    name = name.lower().strip()
+    words = name.split()
+    return {name, *words}
+
+
+class MenuIndex:
+    """Type-ahead lookup over menu item names and numeric quick codes.
+
+    Keys are kept in one sorted list of (key, item_id) pairs, so a prefix lookup is a binary
+    search to the first key >= the prefix followed by a short scan while keys still match.
+    Each item is indexed under its full name and under every word of it, so "lat" finds both
+    "Latte" and "Iced Latte". The quick code of an item is its menu id, typed as digits.
+    Adding, updating or removing an item touches only that item's keys.
+    """
+
+    def __init__(self, items=()):
+        self.build(items)
+
+    def build(self, items):
+        self.items = {item.id: item for item in items}
+        self.keys = sorted((key, item.id) for item in self.items.values() for key in _words(item.name))
+        self.codes = sorted(str(item_id) for item_id in self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        if item.id in self.items:
+            self.remove(item.id)
+        self.items[item.id] = item
+        for key in _words(item.name):
+            insort(self.keys, (key, item.id))
+        insort(self.codes, str(item.id))
+
+    def update(self, item):
+        """Re-index an edited item. Only its keys move if the name changed."""
+        previous = self.items.get(item.id)
+        if previous is not None and previous.name == item.name:
+            self.items[item.id] = item
+        else:
+            self.add(item)
+
+    def sync(self, items):
+        """Bring the index in line with a fresh `read_menu_items` result (stock changes, edits, deletes)."""
+        current = set()
+        for item in items:
+            current.add(item.id)
+            self.update(item)
+        for item_id in [item_id for item_id in self.items if item_id not in current]:
+            self.remove(item_id)
+
+    def remove(self, item_id):
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return
+        for key in _words(item.name):
+            index = bisect_left(self.keys, (key, item_id))
+            if index < len(self.keys) and self.keys[index] == (key, item_id):
+                del self.keys[index]
+        code = str(item_id)
+        index = bisect_left(self.codes, code)
+        if index < len(self.codes) and self.codes[index] == code:
+            del self.codes[index]
+
+    def _prefix_ids(self, prefix):
+        """Yield item ids with a key starting with `prefix`, in key order, without repeats.
+
+        A generator, so a search stops scanning as soon as it has enough results.
+        """
+        seen = set()
+        keys = self.keys
+        index = bisect_left(keys, (prefix,))
+        while index < len(keys) and keys[index][0].startswith(prefix):
+            item_id = keys[index][1]
+            if item_id not in seen:
+                seen.add(item_id)
+                yield item_id
+            index += 1
+
+    def search(self, query, limit=20):
+        """MenuItems matching `query`, best matches first.
+
+        Digits look up quick codes: the exact code first, then codes starting with them.
+        Text matches items whose name, or any word of it, starts with the query; with several
+        words every word has to match the start of some word in the name.
+        """
+        query = query.lower().strip()
+        if not query:
+            return []
+        # isdigit alone accepts '²' and other non-ASCII digits, which int() rejects or codes never use
+        if query.isascii() and query.isdigit():
+            results = []
+            if int(query) in self.items:
+                results.append(self.items[int(query)])
+            index = bisect_left(self.codes, query)
+            while index < len(self.codes) and self.codes[index].startswith(query) and len(results) < limit:
+                if self.codes[index] != query:
+                    results.append(self.items[int(self.codes[index])])
+                index += 1
+            return results[:limit]
+
+        first, *rest = query.split()
+        matches = list(islice(self._prefix_ids(query), limit)) if rest else []
+        full_name = set(matches)
+        for item_id in self._prefix_ids(first):
+            if len(matches) >= limit:
+                break
+            if item_id in full_name:
+                continue
+            words = _words(self.items[item_id].name)
+            if all(any(word.startswith(part) for word in words) for part in rest):
+                matches.append(item_id)
+        return [self.items[item_id] for item_id in matches[:limit]]
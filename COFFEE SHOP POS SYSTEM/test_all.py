@@ -1,382 +1,2073 @@
-import unittest
-from unittest.mock import Mock, patch, MagicMock, call
-import sys
-import os
-import datetime
-
-class TestAppModel(unittest.TestCase):
-    def setUp(self):
-        with patch('model.DatabaseManager'):
-            from model import AppModel
-            self.model = AppModel()
-            self.model.db = Mock()
-    
-    def test_model_init(self):
-        """Test model initialization"""
-        self.assertIsNotNone(self.model.db)
-        self.assertIsNone(self.model.user_role)
-        self.assertEqual(self.model.current_order, {})
-        self.assertIsInstance(self.model.current_pos_date, datetime.date)
-    
-    def test_authenticate_success(self):
-        """Test successful authentication"""
-        self.model.db.get_user.return_value = {
-            'username': 'testuser',
-            'password': 'testpass',
-            'role': 'Cashier'
-        }
-        
-        result = self.model.authenticate('testuser', 'testpass')
-        
-        self.assertTrue(result)
-        self.assertEqual(self.model.user_role, 'Cashier')
-    
-    def test_authenticate_failure_invalid_password(self):
-        """Test authentication with invalid password"""
-        self.model.db.get_user.return_value = {
-            'username': 'testuser',
-            'password': 'testpass',
-            'role': 'Cashier'
-        }
-        
-        result = self.model.authenticate('testuser', 'wrongpass')
-        
-        self.assertFalse(result)
-        self.assertIsNone(self.model.user_role)
-    
-    def test_authenticate_failure_user_not_found(self):
-        """Test authentication with non-existent user"""
-        self.model.db.get_user.return_value = None
-        
-        result = self.model.authenticate('nonexistent', 'password')
-        
-        self.assertFalse(result)
-        self.assertIsNone(self.model.user_role)
-    
-    def test_authenticate_username_normalization(self):
-        """Test that username is normalized (lowercased and stripped)"""
-        self.model.db.get_user.return_value = {
-            'username': 'testuser',
-            'password': 'testpass',
-            'role': 'Manager'
-        }
-        
-        self.model.authenticate('  TestUser  ', 'testpass')
-        
-        self.model.db.get_user.assert_called_with('testuser')
-    
-    def test_add_item_to_order_success(self):
-        self.model.db.get_item_details.return_value = ('Coffee', 5.99, 'Beverages')
-        
-        success, message = self.model.add_item_to_order(1)
-        
-        self.assertTrue(success)
-        self.assertEqual(message, "Item added")
-        self.assertIn(1, self.model.current_order)
-        self.assertEqual(self.model.current_order[1]['name'], 'Coffee')
-        self.assertEqual(self.model.current_order[1]['qty'], 1)
-    
-    def test_add_item_to_order_increase_quantity(self):
-        self.model.db.get_item_details.return_value = ('Coffee', 5.99, 'Beverages')
-        
-        self.model.add_item_to_order(1)
-        self.model.add_item_to_order(1)
-        
-        self.assertEqual(self.model.current_order[1]['qty'], 2)
-    
-    def test_add_item_to_order_item_not_found(self):
-        self.model.db.get_item_details.return_value = None
-        
-        success, message = self.model.add_item_to_order(999)
-        
-        self.assertFalse(success)
-        self.assertIn("not found", message)
-    
-    def test_calculate_order_total(self):
-        self.model.current_order = {
-            1: {'name': 'Coffee', 'price': 5.99, 'qty': 2, 'category': 'Beverages'},
-            2: {'name': 'Pastry', 'price': 3.50, 'qty': 1, 'category': 'Food'}
-        }
-        
-        total = self.model.calculate_order_total()
-        
-        expected_total = (5.99 * 2) + (3.50 * 1)
-        self.assertAlmostEqual(total, expected_total, places=2)
-    
-    def test_calculate_order_total_empty_order(self):
-        self.model.current_order = {}
-        
-        total = self.model.calculate_order_total()
-        
-        self.assertEqual(total, 0)
-    
-    def test_remove_item_from_order_success(self):
-        self.model.current_order = {1: {'name': 'Coffee', 'qty': 1}}
-        
-        result = self.model.remove_item_from_order(1)
-        
-        self.assertTrue(result)
-        self.assertNotIn(1, self.model.current_order)
-    
-    def test_remove_item_from_order_not_found(self):
-        self.model.current_order = {}
-        
-        result = self.model.remove_item_from_order(1)
-        
-        self.assertFalse(result)
-    
-    def test_clear_order(self):
-        self.model.current_order = {1: {'name': 'Coffee', 'qty': 1}}
-        
-        self.model.clear_order()
-        
-        self.assertEqual(self.model.current_order, {})
-    
-    def test_update_password_success(self):
-        self.model.db.get_user.return_value = {
-            'username': 'testuser',
-            'password': 'oldpass'
-        }
-        self.model.db.update_user_password.return_value = True
-        
-        result = self.model.update_password('testuser', 'oldpass', 'newpass')
-        
-        self.assertEqual(result, "Success")
-        self.model.db.update_user_password.assert_called_with('testuser', 'newpass')
-    
-    def test_update_password_wrong_old_password(self):
-        self.model.db.get_user.return_value = {
-            'username': 'testuser',
-            'password': 'oldpass'
-        }
-        
-        result = self.model.update_password('testuser', 'wrongpass', 'newpass')
-        
-        self.assertEqual(result, "Incorrect old password")
-    
-    def test_get_usernames(self):
-        self.model.db.list_users.return_value = [
-            {'username': 'user1'},
-            {'username': 'user2'},
-            {'username': 'user3'}
-        ]
-        
-        usernames = self.model.get_usernames()
-        
-        self.assertEqual(usernames, ['user1', 'user2', 'user3'])
-
-# DATABASE TESTS
-class TestDatabaseManager(unittest.TestCase):
-    def setUp(self):
-        from database import DatabaseManager
-        self.db_manager = DatabaseManager(':memory:')
-    
-    def tearDown(self):
-        if self.db_manager.conn:
-            self.db_manager.conn.close()
-    
-    def test_database_init(self):
-        self.assertIsNotNone(self.db_manager.conn)
-        self.assertIsNotNone(self.db_manager.cursor)
-        self.assertEqual(self.db_manager.db_path, ':memory:')
-    
-    def test_init_creates_tables(self):
-        cursor = self.db_manager.cursor
-        
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='menu'")
-        self.assertIsNotNone(cursor.fetchone())
-        
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sales'")
-        self.assertIsNotNone(cursor.fetchone())
-    
-    def test_create_user(self):
-        result = self.db_manager.create_user('testuser', 'password123', 'Cashier')
-        
-        self.assertTrue(result)
-    
-    def test_get_user(self):
-        self.db_manager.create_user('testuser', 'password123', 'Cashier')
-        
-        user = self.db_manager.get_user('testuser')
-        
-        self.assertIsNotNone(user)
-        self.assertEqual(user['username'], 'testuser')
-        self.assertEqual(user['password'], 'password123')
-        self.assertEqual(user['role'], 'Cashier')
-    
-    def test_list_users(self):
-        self.db_manager.create_user('user1', 'pass1', 'Cashier')
-        self.db_manager.create_user('user2', 'pass2', 'Manager')
-        
-        users = self.db_manager.list_users()
-        
-        self.assertGreaterEqual(len(users), 2)
-    
-    def test_update_user_password(self):
-        self.db_manager.create_user('testuser', 'oldpass', 'Cashier')
-        
-        result = self.db_manager.update_user_password('testuser', 'newpass')
-        
-        self.assertTrue(result)
-        
-        user = self.db_manager.get_user('testuser')
-        self.assertEqual(user['password'], 'newpass')
-    
-    def test_delete_user(self):
-        self.db_manager.create_user('testuser', 'password', 'Cashier')
-        
-        result = self.db_manager.delete_user('testuser')
-        
-        self.assertTrue(result)
-        
-        user = self.db_manager.get_user('testuser')
-        self.assertIsNone(user)
-    
-    def test_save_receipt(self):
-        order_list = [{'name': 'Espresso', 'price': 3.50, 'qty': 1}]
-        
-        receipt_id = self.db_manager.save_receipt(
-            'receipt123',
-            '2025-01-01 10:00:00',
-            3.50,
-            order_list
-        )
-        
-        self.assertIsNotNone(receipt_id)
-
-# CONTROLLER TESTS
-class TestAppController(unittest.TestCase):
-    
-    def setUp(self):
-        self.mock_model = Mock()
-        self.mock_app = Mock()
-        
-        with patch('controller.LoginDialog'):
-            with patch('controller.CoffeeShopPOSView'):
-                from controller import AppController
-                self.controller = AppController(self.mock_model, self.mock_app)
-    
-    def test_controller_init(self):
-        self.assertEqual(self.controller.model, self.mock_model)
-        self.assertEqual(self.controller.app, self.mock_app)
-        self.assertIsNotNone(self.controller.model)
-    
-    @patch('controller.LoginDialog')
-    def test_init_login_flow_first_time(self, mock_login_dialog_class):
-        mock_dialog_instance = Mock()
-        mock_login_dialog_class.return_value = mock_dialog_instance
-        mock_dialog_instance.exec_.return_value = 1
-        
-        with patch('controller.CoffeeShopPOSView'):
-            from controller import AppController
-            controller = AppController(self.mock_model, self.mock_app)
-        
-        mock_login_dialog_class.assert_called()
-        mock_dialog_instance.exec_.assert_called()
-    
-    def test_handle_logout(self):
-        self.controller.main_window = Mock()
-        self.controller.main_window.show_info = Mock()
-        
-        with patch.object(self.controller, 'init_login_flow'):
-            self.controller.handle_logout()
-            self.controller.init_login_flow.assert_called()
-    
-    def test_refresh_all_data_cashier(self):
-        self.mock_model.user_role = 'Cashier'
-        self.mock_model.get_menu_items.return_value = []
-        self.mock_model.current_order = {}
-        self.mock_model.calculate_order_total.return_value = 0
-        
-        self.controller.main_window = Mock()
-        
-        self.controller.refresh_all_data()
-        
-        self.mock_model.get_menu_items.assert_called()
-        self.controller.main_window.update_menu_display.assert_called()
-    
-    def test_refresh_all_data_manager(self):
-        self.mock_model.user_role = 'Manager'
-        self.mock_model.get_menu_items.return_value = []
-        self.mock_model.current_order = {}
-        self.mock_model.calculate_order_total.return_value = 0
-        self.mock_model.get_menu_categories.return_value = ['Coffee', 'Pastry']
-        self.mock_model.get_usernames.return_value = ['user1', 'user2']
-        
-        self.controller.main_window = Mock()
-        
-        self.controller.refresh_all_data()
-        
-        self.mock_model.get_menu_items.assert_called()
-        self.controller.main_window.update_admin_menu_table.assert_called()
-
-
-
-# VIEW TESTS
-class TestViewComponents(unittest.TestCase):
-    
-    def test_view_imports(self):
-        try:
-            import view
-            self.assertTrue(True)
-        except ImportError as e:
-            self.fail(f"Failed to import view module: {e}")
-    
-    def test_create_label(self):
-        from view import create_label
-        
-        with patch('view.QLabel') as mock_label:
-            label = create_label("Test Label", font_size=12, bold=False)
-            self.assertIsNotNone(label)
-    
-    def test_create_button_primary(self):
-        from view import create_button
-        
-        with patch('view.QPushButton'):
-            button = create_button("Test Button", style_class="primary")
-            self.assertIsNotNone(button)
-    
-    def test_create_button_secondary(self):
-        from view import create_button
-        
-        with patch('view.QPushButton'):
-            button = create_button("Test Button", style_class="secondary")
-            self.assertIsNotNone(button)
-
-# MAIN TESTS
-class TestMainModule(unittest.TestCase):
-    
-    @patch('main.QApplication')
-    @patch('main.AppController')
-    @patch('main.AppModel')
-    @patch('main.sys.exit')
-    def test_main_imports(self, mock_exit, mock_model, mock_controller, mock_app):
-        try:
-            import main
-            self.assertIsNotNone(main.QApplication)
-            self.assertIsNotNone(main.AppModel)
-            self.assertIsNotNone(main.AppController)
-        except ImportError as e:
-            self.fail(f"Failed to import required modules in main: {e}")
-    
-    def test_main_is_executable(self):
-        main_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
-        with open(main_file, 'r') as f:
-            content = f.read()
-            self.assertIn("if __name__ == '__main__'", content)
-
-
-if __name__ == '__main__':
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
-    
-    suite.addTests(loader.loadTestsFromTestCase(TestAppModel))
-    suite.addTests(loader.loadTestsFromTestCase(TestDatabaseManager))
-    suite.addTests(loader.loadTestsFromTestCase(TestAppController))
-    suite.addTests(loader.loadTestsFromTestCase(TestViewComponents))
-    suite.addTests(loader.loadTestsFromTestCase(TestMainModule))
-    
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    sys.exit(0 if result.wasSuccessful() else 1)
+import unittest
+from unittest.mock import Mock, patch, MagicMock, call
+import sys
+import os
+import datetime
+from records import EodSummary, OrderLine
+
+class TestAppModel(unittest.TestCase):
+    def setUp(self):
+        with patch('model.DatabaseManager') as database_manager, patch('model.OrderJournal'):
+            database_manager.return_value.read_promotions.return_value = []
+            database_manager.return_value.read_settings.return_value = {}
+            database_manager.return_value.receipt_spool_dir = ''
+            database_manager.return_value.load_business_date.return_value = datetime.date.today()
+            from model import AppModel
+            self.model = AppModel()
+            self.model.db = Mock()
+    
+    def test_model_init(self):
+        """Test model initialization"""
+        self.assertIsNotNone(self.model.db)
+        self.assertIsNone(self.model.user_role)
+        self.assertEqual(self.model.current_order, {})
+        self.assertIsInstance(self.model.current_pos_date, datetime.date)
+    
+    def test_authenticate_success(self):
+        """Test successful authentication"""
+        self.model.db.get_user.return_value = {
+            'username': 'testuser',
+            'password': 'testpass',
+            'role': 'Cashier'
+        }
+        
+        result = self.model.authenticate('testuser', 'testpass')
+        
+        self.assertTrue(result)
+        self.assertEqual(self.model.user_role, 'Cashier')
+    
+    def test_authenticate_failure_invalid_password(self):
+        """Test authentication with invalid password"""
+        self.model.db.get_user.return_value = {
+            'username': 'testuser',
+            'password': 'testpass',
+            'role': 'Cashier'
+        }
+        
+        result = self.model.authenticate('testuser', 'wrongpass')
+        
+        self.assertFalse(result)
+        self.assertIsNone(self.model.user_role)
+    
+    def test_authenticate_failure_user_not_found(self):
+        """Test authentication with non-existent user"""
+        self.model.db.get_user.return_value = None
+        
+        result = self.model.authenticate('nonexistent', 'password')
+        
+        self.assertFalse(result)
+        self.assertIsNone(self.model.user_role)
+    
+    def test_authenticate_username_normalization(self):
+        """Test that username is normalized (lowercased and stripped)"""
+        self.model.db.get_user.return_value = {
+            'username': 'testuser',
+            'password': 'testpass',
+            'role': 'Manager'
+        }
+        
+        self.model.authenticate('  TestUser  ', 'testpass')
+        
+        self.model.db.get_user.assert_called_with('testuser')
+    
+    def test_add_item_to_order_success(self):
+        self.model.db.get_item_details.return_value = ('Coffee', 599, 'Beverages')
+        
+        success, message = self.model.add_item_to_order(1)
+        
+        self.assertTrue(success)
+        self.assertEqual(message, "Item added")
+        self.assertIn(1, self.model.current_order)
+        self.assertEqual(self.model.current_order[1].name, 'Coffee')
+        self.assertEqual(self.model.current_order[1].qty, 1)
+    
+    def test_add_item_to_order_increase_quantity(self):
+        self.model.db.get_item_details.return_value = ('Coffee', 599, 'Beverages')
+        
+        self.model.add_item_to_order(1)
+        self.model.add_item_to_order(1)
+        
+        self.assertEqual(self.model.current_order[1].qty, 2)
+    
+    def test_add_item_to_order_item_not_found(self):
+        self.model.db.get_item_details.return_value = None
+        
+        success, message = self.model.add_item_to_order(999)
+        
+        self.assertFalse(success)
+        self.assertIn("not found", message)
+    
+    def test_calculate_order_total(self):
+        self.model.current_order = {
+            1: OrderLine('Coffee', 599, 2, 'Beverages'),
+            2: OrderLine('Pastry', 350, 1, 'Food')
+        }
+        
+        total = self.model.calculate_order_total()
+        
+        self.assertEqual(total, 599 * 2 + 350 * 1)
+    
+    def test_calculate_order_total_empty_order(self):
+        self.model.current_order = {}
+        
+        total = self.model.calculate_order_total()
+        
+        self.assertEqual(total, 0)
+    
+    def test_remove_item_from_order_success(self):
+        self.model.current_order = {1: OrderLine('Coffee', 599, 1, 'Beverages')}
+        
+        result = self.model.remove_item_from_order(1)
+        
+        self.assertTrue(result)
+        self.assertNotIn(1, self.model.current_order)
+    
+    def test_remove_item_from_order_not_found(self):
+        self.model.current_order = {}
+        
+        result = self.model.remove_item_from_order(1)
+        
+        self.assertFalse(result)
+    
+    def test_clear_order(self):
+        self.model.current_order = {1: OrderLine('Coffee', 599, 1, 'Beverages')}
+        
+        self.model.clear_order()
+        
+        self.assertEqual(self.model.current_order, {})
+    
+    def test_update_password_success(self):
+        self.model.db.get_user.return_value = {
+            'username': 'testuser',
+            'password': 'oldpass'
+        }
+        self.model.db.update_user_password.return_value = True
+        
+        result = self.model.update_password('testuser', 'oldpass', 'newpass')
+        
+        self.assertEqual(result, "Success")
+        self.model.db.update_user_password.assert_called_with('testuser', 'newpass')
+    
+    def test_update_password_wrong_old_password(self):
+        self.model.db.get_user.return_value = {
+            'username': 'testuser',
+            'password': 'oldpass'
+        }
+        
+        result = self.model.update_password('testuser', 'wrongpass', 'newpass')
+        
+        self.assertEqual(result, "Incorrect old password")
+    
+    def test_get_usernames(self):
+        self.model.db.list_users.return_value = [
+            {'username': 'user1'},
+            {'username': 'user2'},
+            {'username': 'user3'}
+        ]
+        
+        usernames = self.model.get_usernames()
+        
+        self.assertEqual(usernames, ['user1', 'user2', 'user3'])
+
+    def test_get_report_data_year_uses_month_buckets(self):
+        self.model.current_pos_date = datetime.date(2025, 6, 30)
+        self.model.db.get_sales_rollup.return_value = []
+
+        bucket, rows = self.model.get_report_data('year')
+
+        self.assertEqual(bucket, 'month')
+        self.model.db.get_sales_rollup.assert_called_with('month', datetime.date(2024, 7, 1), datetime.date(2025, 6, 30))
+
+    def test_save_eod_archives_when_month_closes(self):
+        self.model.current_pos_date = datetime.date(2025, 1, 31)
+        self.model.db.close_business_day.return_value = EodSummary('2025-01-31', 0, [], [])
+
+        status, _ = self.model.save_eod_and_advance_day()
+
+        self.assertEqual(status, "Success")
+        self.model.db.archive_closed_months.assert_called_with(datetime.date(2025, 2, 1))
+
+    def test_save_eod_mid_month_does_not_archive(self):
+        self.model.current_pos_date = datetime.date(2025, 1, 15)
+        self.model.db.close_business_day.return_value = EodSummary('2025-01-15', 0, [], [])
+
+        self.model.save_eod_and_advance_day()
+
+        self.model.db.archive_closed_months.assert_not_called()
+
+    def test_get_report_data_custom_range_picks_bucket_by_span(self):
+        self.model.db.get_sales_rollup.return_value = []
+
+        bucket, _ = self.model.get_report_data('custom', datetime.date(2025, 1, 1), datetime.date(2025, 3, 31))
+
+        self.assertEqual(bucket, 'week')
+
+# DATABASE TESTS
+class TestDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        from database import DatabaseManager
+        self.db_manager = DatabaseManager(':memory:')
+    
+    def tearDown(self):
+        if self.db_manager.conn:
+            self.db_manager.conn.close()
+    
+    def test_database_init(self):
+        self.assertIsNotNone(self.db_manager.conn)
+        self.assertIsNotNone(self.db_manager.cursor)
+        self.assertEqual(self.db_manager.db_path, ':memory:')
+    
+    def test_init_creates_tables(self):
+        cursor = self.db_manager.cursor
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='menu'")
+        self.assertIsNotNone(cursor.fetchone())
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sales'")
+        self.assertIsNotNone(cursor.fetchone())
+    
+    def test_create_user(self):
+        result = self.db_manager.create_user('testuser', 'password123', 'Cashier')
+        
+        self.assertTrue(result)
+    
+    def test_get_user(self):
+        self.db_manager.create_user('testuser', 'password123', 'Cashier')
+        
+        user = self.db_manager.get_user('testuser')
+        
+        self.assertIsNotNone(user)
+        self.assertEqual(user['username'], 'testuser')
+        self.assertEqual(user['password'], 'password123')
+        self.assertEqual(user['role'], 'Cashier')
+    
+    def test_list_users(self):
+        self.db_manager.create_user('user1', 'pass1', 'Cashier')
+        self.db_manager.create_user('user2', 'pass2', 'Manager')
+        
+        users = self.db_manager.list_users()
+        
+        self.assertGreaterEqual(len(users), 2)
+    
+    def test_update_user_password(self):
+        self.db_manager.create_user('testuser', 'oldpass', 'Cashier')
+        
+        result = self.db_manager.update_user_password('testuser', 'newpass')
+        
+        self.assertTrue(result)
+        
+        user = self.db_manager.get_user('testuser')
+        self.assertEqual(user['password'], 'newpass')
+    
+    def test_delete_user(self):
+        self.db_manager.create_user('testuser', 'password', 'Cashier')
+        
+        result = self.db_manager.delete_user('testuser')
+        
+        self.assertTrue(result)
+        
+        user = self.db_manager.get_user('testuser')
+        self.assertIsNone(user)
+    
+    def test_save_receipt(self):
+        order_list = [OrderLine('Espresso', 350, 1, 'Coffee')]
+        
+        receipt_id = self.db_manager.save_receipt(
+            'receipt123',
+            '2025-01-01 10:00:00',
+            350,
+            order_list
+        )
+        
+        self.assertIsNotNone(receipt_id)
+
+    def test_receipt_round_trips_order_lines(self):
+        lines = [OrderLine('Latte', 8000, 2, 'Coffee'), OrderLine('Croissant', 7000, 1, 'Pastry')]
+        self.db_manager.save_receipt('receipt123', '2025-01-01 10:00:00', 23000, lines)
+
+        receipt = self.db_manager.get_receipt('receipt123')
+
+        self.assertEqual(receipt.items, lines)
+        self.assertEqual(receipt.total, 23000)
+
+    def test_read_menu_items_returns_menu_item_records(self):
+        self.db_manager.create_menu_item('Bagel', 6000, 15, 'Pastry', reorder_level=20)
+
+        bagel = [item for item in self.db_manager.read_menu_items() if item.name == 'Bagel'][0]
+
+        self.assertEqual((bagel.price, bagel.stock, bagel.category, bagel.reorder_level), (6000, 15, 'Pastry', 20))
+
+    def test_end_of_day_low_stock_uses_reorder_level(self):
+        self.db_manager.create_menu_item('Bagel', 6000, 15, 'Pastry', reorder_level=20)
+        self.db_manager.create_menu_item('Scone', 6000, 15, 'Pastry', reorder_level=5)
+
+        summary = self.db_manager.end_of_day_summary('2025-01-01')
+        low_names = [name for name, stock in summary.low_stock]
+
+        self.assertIn('Bagel', low_names)
+        self.assertNotIn('Scone', low_names)
+
+    def test_record_sale_notifies_when_item_crosses_reorder_level(self):
+        self.db_manager.create_menu_item('Bagel', 6000, 12, 'Pastry', reorder_level=10)
+        listener = Mock()
+        self.db_manager.add_low_stock_listener(listener)
+
+        self.db_manager.record_sale([OrderLine('Bagel', 6000, 1, 'Pastry')], '2025-01-01 09:00:00')
+        listener.assert_not_called()
+
+        self.db_manager.record_sale([OrderLine('Bagel', 6000, 2, 'Pastry')], '2025-01-01 09:05:00')
+        listener.assert_called_once_with([('Bagel', 9, 10)])
+
+    def test_record_sale_does_not_repeat_alert_below_reorder_level(self):
+        self.db_manager.create_menu_item('Bagel', 6000, 5, 'Pastry', reorder_level=10)
+        listener = Mock()
+        self.db_manager.add_low_stock_listener(listener)
+
+        self.db_manager.record_sale([OrderLine('Bagel', 6000, 1, 'Pastry')], '2025-01-01 09:00:00')
+
+        listener.assert_not_called()
+
+    def test_record_sale_consumes_recipe_ingredients(self):
+        milk_id = self.db_manager.create_ingredient('Oat Milk', 'ml', 1000)
+        self.db_manager.create_menu_item('Oat Latte', 12000, 50, 'Coffee')
+        item_id = [row[0] for row in self.db_manager.read_menu_items() if row[1] == 'Oat Latte'][0]
+        self.db_manager.set_recipe(item_id, [(milk_id, 200)])
+
+        self.db_manager.record_sale([OrderLine('Oat Latte', 12000, 2, 'Coffee')], '2025-01-01 09:00:00')
+
+        stock = {name: stock for _, name, _, stock in self.db_manager.read_ingredients()}
+        self.assertEqual(stock['Oat Milk'], 600)
+
+    def test_ingredient_usage_is_one_statement_for_every_order_size(self):
+        from queries import QUERIES
+        milk_id = self.db_manager.create_ingredient('Oat Milk', 'ml', 1000)
+        for name in ('Oat Latte', 'Oat Mocha'):
+            self.db_manager.create_menu_item(name, 12000, 50, 'Coffee')
+            item_id = [row[0] for row in self.db_manager.read_menu_items() if row[1] == name][0]
+            self.db_manager.set_recipe(item_id, [(milk_id, 100)])
+        statements = []
+        self.db_manager.conn.set_trace_callback(statements.append)
+
+        self.db_manager.record_sale([OrderLine('Oat Latte', 12000, 1, 'Coffee')], '2025-01-01 09:00:00')
+        self.db_manager.record_sale([OrderLine('Oat Latte', 12000, 2, 'Coffee'),
+                                     OrderLine('Oat Mocha', 12000, 3, 'Coffee')], '2025-01-01 10:00:00')
+
+        self.db_manager.conn.set_trace_callback(None)
+        consumed = [sql for sql in statements if 'UPDATE ingredients' in sql]
+        self.assertEqual(len(consumed), 2)
+        self.assertEqual({sql.count('json_each') for sql in consumed}, {1})
+        stock = {name: stock for _, name, _, stock in self.db_manager.read_ingredients()}
+        self.assertEqual(stock['Oat Milk'], 400)
+
+    def test_sellable_counts_limited_by_scarcest_ingredient(self):
+        milk_id = self.db_manager.create_ingredient('Oat Milk', 'ml', 450)
+        self.db_manager.create_menu_item('Oat Latte', 12000, 50, 'Coffee')
+        item_id = [row[0] for row in self.db_manager.read_menu_items() if row[1] == 'Oat Latte'][0]
+        self.db_manager.set_recipe(item_id, [(milk_id, 200)])
+
+        counts = self.db_manager.get_sellable_counts()
+
+        self.assertEqual(counts[item_id], 2)
+        croissant_id = [row[0] for row in self.db_manager.read_menu_items() if row[1] == 'Croissant'][0]
+        self.assertEqual(counts[croissant_id], 50)
+
+    def test_sales_rollup_aggregates_by_bucket(self):
+        latte = OrderLine('Latte', 8000, 2, 'Coffee')
+        self.db_manager.record_sale([latte], '2025-03-03 09:00:00')
+        self.db_manager.record_sale([latte], '2025-03-04 09:00:00')
+        self.db_manager.record_sale([latte], '2025-04-01 09:00:00')
+
+        daily = self.db_manager.get_sales_rollup('day', datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+        monthly = self.db_manager.get_sales_rollup('month', datetime.date(2025, 3, 15), datetime.date(2025, 4, 30))
+        weekly = self.db_manager.get_sales_rollup('week', datetime.date(2025, 3, 3), datetime.date(2025, 3, 9))
+
+        self.assertEqual(len(daily), 2)
+        self.assertEqual(sorted(row[4] for row in monthly), ['2025-03-01', '2025-04-01'])
+        self.assertEqual(weekly, [('Latte', 'Coffee', 4, 32000, '2025-03-03')])
+
+    def test_rebuild_sales_rollup_matches_incremental_rollup(self):
+        latte = OrderLine('Latte', 8000, 2, 'Coffee')
+        self.db_manager.record_sale([latte], '2025-03-03 09:00:00')
+        self.db_manager.record_sale([latte], '2025-03-09 18:00:00')
+        self.db_manager.cursor.execute("SELECT * FROM sales_rollup ORDER BY 1, 2, 3")
+        incremental = self.db_manager.cursor.fetchall()
+
+        self.assertTrue(self.db_manager.rebuild_sales_rollup())
+
+        self.db_manager.cursor.execute("SELECT * FROM sales_rollup ORDER BY 1, 2, 3")
+        self.assertEqual(self.db_manager.cursor.fetchall(), incremental)
+
+    def test_every_registered_query_prepares(self):
+        from queries import QUERIES
+
+        for name, sql in QUERIES.items():
+            with self.subTest(query=name):
+                self.db_manager.conn.execute("EXPLAIN " + sql, (None,) * sql.count('?'))
+
+    def test_query_stats_count_each_statement(self):
+        latte = OrderLine('Latte', 8000, 1, 'Coffee')
+        self.db_manager.query_stats.reset()
+
+        self.db_manager.record_sale([latte, latte._replace(name='Mocha')], '2025-03-03 09:00:00')
+
+        stats = self.db_manager.get_query_stats()
+        self.assertEqual(stats['sale_insert']['calls'], 2)
+        self.assertEqual(stats['sales_hourly_upsert']['calls'], 1)
+
+    def test_get_all_receipts_limit_is_bound(self):
+        for n in range(3):
+            self.db_manager.save_receipt(f'r{n}', '2025-03-03 09:00:00', 8000, [])
+
+        self.assertEqual(len(self.db_manager.get_all_receipts(limit=2)), 2)
+        self.assertEqual(len(self.db_manager.get_all_receipts()), 3)
+
+    def _sell_with_receipt(self, receipt_uuid, lines, line_totals, total):
+        receipt_id = self.db_manager.save_receipt(receipt_uuid, '2025-03-03 09:00:00', total, lines)
+        self.assertTrue(self.db_manager.record_sale(lines, '2025-03-03 09:00:00', line_totals, receipt_id))
+        return receipt_id
+
+    def _stock(self, name):
+        return [item.stock for item in self.db_manager.read_menu_items() if item.name == name][0]
+
+    def test_void_receipt_reverses_sales_stock_and_aggregates(self):
+        lines = [OrderLine('Latte', 8000, 2, 'Coffee'), OrderLine('Croissant', 7000, 1, 'Pastry')]
+        stock_before = self._stock('Latte')
+        receipt_id = self._sell_with_receipt('r1', lines, [15000, 7000], 22500)
+
+        refund = self.db_manager.refund_receipt('r1', '2025-03-04 10:00:00')
+
+        self.assertEqual(refund, 22500)
+        self.assertEqual(self._stock('Latte'), stock_before)
+        self.assertEqual(self.db_manager.get_receipt('r1').refunded, 22500)
+        self.assertEqual(self.db_manager.cursor.execute(
+            "SELECT SUM(quantity), SUM(total) FROM sales WHERE receipt_id = ?", (receipt_id,)).fetchone(), (0, 0))
+        weekly = self.db_manager.get_sales_rollup('week', datetime.date(2025, 3, 3), datetime.date(2025, 3, 9))
+        self.assertEqual(sorted((row[0], row[2], row[3]) for row in weekly), [('Croissant', 0, 0), ('Latte', 0, 0)])
+        self.assertEqual(self.db_manager.cursor.execute(
+            "SELECT orders, quantity, revenue FROM sales_hourly WHERE sale_day = '2025-03-04'").fetchone(), (0, -3, -22000))
+        self.assertIsNone(self.db_manager.refund_receipt('r1', '2025-03-04 10:05:00'))
+        self.db_manager.rebuild_sales_rollup()
+        self.assertEqual(self.db_manager.cursor.execute(
+            "SELECT orders FROM sales_hourly WHERE sale_day = '2025-03-04'").fetchone(), (0,))
+
+    def test_partial_refunds_add_up_to_the_line_total(self):
+        lines = [OrderLine('Latte', 8000, 3, 'Coffee')]
+        self._sell_with_receipt('r1', lines, [20000], 20000)
+
+        refunds = [self.db_manager.refund_receipt('r1', '2025-03-03 10:00:00', {'Latte': 1}) for _ in range(3)]
+
+        self.assertEqual(refunds, [6667, 6666, 6667])
+        self.assertIsNone(self.db_manager.refund_receipt('r1', '2025-03-03 10:00:00', {'Latte': 1}))
+        self.assertEqual(self.db_manager.get_receipt('r1').refunded, 20000)
+
+    def test_receipt_reports_units_left_to_refund(self):
+        lines = [OrderLine('Latte', 8000, 3, 'Coffee'), OrderLine('Croissant', 7000, 1, 'Pastry')]
+        self._sell_with_receipt('r1', lines, [24000, 7000], 31000)
+        self.assertIsNone(self.db_manager.get_receipt('r1').refunded_items)
+
+        self.db_manager.refund_receipt('r1', '2025-03-03 10:00:00', {'Latte': 1})
+
+        receipt = self.db_manager.get_receipt('r1')
+        self.assertEqual(receipt.refunded_items, {'Latte': 1})
+        self.assertEqual([receipt.refundable_qty(line) for line in receipt.items], [2, 1])
+        self.assertEqual(self.db_manager.get_all_receipts()[0].refunded_items, {'Latte': 1})
+
+    def test_receipt_with_sales_cannot_be_deleted(self):
+        self._sell_with_receipt('r1', [OrderLine('Latte', 8000, 1, 'Coffee')], [8000], 8000)
+        self.db_manager.save_receipt('r2', '2025-03-03 09:00:00', 8000, [])
+
+        self.assertFalse(self.db_manager.delete_receipt('r1'))
+        self.assertIsNotNone(self.db_manager.get_receipt('r1'))
+        self.assertTrue(self.db_manager.delete_receipt('r2'))
+        self.assertIsNone(self.db_manager.get_receipt('r2'))
+
+    def test_partial_refund_returns_its_share_of_tax_and_service(self):
+        from money import ChargeEngine, ChargeSettings
+        lines = [OrderLine('Latte', 8000, 1, 'Coffee'), OrderLine('Croissant', 9000, 1, 'Pastry')]
+        charges = ChargeEngine(ChargeSettings(tax_rate=12, tax_inclusive=False, service_rate=10)).compute(17000, [8000, 9000])
+        self.assertEqual(charges.total, 20944)
+        self._sell_with_receipt('r1', lines, [8000, 9000], charges.total)
+
+        latte = self.db_manager.refund_receipt('r1', '2025-03-03 10:00:00', {'Latte': 1})
+        rest = self.db_manager.refund_receipt('r1', '2025-03-03 10:05:00')
+
+        self.assertEqual(latte, 9856)
+        self.assertEqual(rest, 20944 - 9856)
+        # The sales rows reverse revenue, which excludes tax and service charge
+        self.assertEqual(self.db_manager.cursor.execute(
+            "SELECT total FROM sales WHERE quantity < 0 ORDER BY id").fetchall(), [(-8000,), (-9000,)])
+
+    def test_refund_is_capped_and_restores_ingredients(self):
+        milk_id = self.db_manager.create_ingredient('Oat Milk', 'ml', 1000)
+        self.db_manager.create_menu_item('Oat Latte', 12000, 50, 'Coffee')
+        item_id = [item.id for item in self.db_manager.read_menu_items() if item.name == 'Oat Latte'][0]
+        self.db_manager.set_recipe(item_id, [(milk_id, 200)])
+        self._sell_with_receipt('r1', [OrderLine('Oat Latte', 12000, 2, 'Coffee')], [24000], 24000)
+
+        refund = self.db_manager.refund_receipt('r1', '2025-03-03 10:00:00', {'Oat Latte': 5, 'Mocha': 1})
+
+        self.assertEqual(refund, 24000)
+        self.assertEqual(self._stock('Oat Latte'), 50)
+        stock = {name: stock for _, name, _, stock in self.db_manager.read_ingredients()}
+        self.assertEqual(stock['Oat Milk'], 1000)
+
+    def test_refund_of_unlinked_receipt_uses_receipt_prices(self):
+        lines = [OrderLine('Latte', 8000, 2, 'Coffee')]
+        self.db_manager.record_sale(lines, '2025-03-03 09:00:00')
+        self.db_manager.save_receipt('old', '2025-03-03 09:00:00', 16000, lines)
+
+        self.assertEqual(self.db_manager.refund_receipt('old', '2025-03-03 10:00:00', {'Latte': 1}), 8000)
+        self.assertEqual(self.db_manager.cursor.execute("SELECT SUM(total) FROM sales").fetchone()[0], 8000)
+
+    def test_renamed_item_keeps_its_sales_history(self):
+        latte = [item for item in self.db_manager.read_menu_items() if item.name == 'Latte'][0]
+        self.db_manager.record_sale([OrderLine('Latte', 8000, 3, 'Coffee')], '2025-01-01 09:00:00')
+        self.db_manager.update_menu_item(latte.id, 'Cafe Latte', 8000, latte.stock - 3, 'Coffee')
+        self.db_manager.record_sale([OrderLine('Cafe Latte', 8000, 2, 'Coffee')], '2025-01-01 10:00:00',
+                                    menu_ids=[latte.id])
+
+        summary = self.db_manager.end_of_day_summary('2025-01-01')
+
+        self.assertEqual(summary.top_items[0], ('Cafe Latte', 5))
+        self.assertEqual(self._stock('Cafe Latte'), latte.stock - 5)
+        day = datetime.date(2025, 1, 1)
+        self.assertEqual([row[:3] for row in self.db_manager.get_sales_rollup('day', day, day)],
+                         [('Cafe Latte', 'Coffee', 5)])
+
+    def test_rollup_of_deleted_item_keeps_its_sold_name(self):
+        self.db_manager.create_menu_item('Yuzu Tea', 9000, 10, 'Tea')
+        yuzu = [item for item in self.db_manager.read_menu_items() if item.name == 'Yuzu Tea'][0]
+        self.db_manager.record_sale([OrderLine('Yuzu Tea', 9000, 2, 'Tea')], '2025-01-01 09:00:00')
+        self.db_manager.delete_menu_item(yuzu.id)
+        self.db_manager.create_menu_item('Yuzu Tea', 9500, 10, 'Tea')
+        self.db_manager.record_sale([OrderLine('Yuzu Tea', 9500, 1, 'Tea')], '2025-01-01 10:00:00')
+        day = datetime.date(2025, 1, 1)
+        incremental = sorted(self.db_manager.get_sales_rollup('day', day, day))
+
+        self.assertTrue(self.db_manager.rebuild_sales_rollup())
+
+        self.assertEqual([row[:3] for row in incremental], [('Yuzu Tea', 'Tea', 1), ('Yuzu Tea', 'Tea', 2)])
+        self.assertEqual(sorted(self.db_manager.get_sales_rollup('day', day, day)), incremental)
+
+    def test_existing_sales_are_linked_to_menu_and_receipts(self):
+        import sqlite3
+        import tempfile
+        from database import DatabaseManager
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'old.db')
+            db = DatabaseManager(path)
+            lines = [OrderLine('Latte', 8000, 1, 'Coffee'), OrderLine('Yuzu Tea', 9000, 1, 'Tea')]
+            db.save_receipt('r1', '2025-03-03 09:00:00', 17000, lines)
+            db.save_receipt('r2', '2025-03-03 09:05:00', 8000, lines[:1])
+            db.save_receipt('r3', '2025-03-03 09:05:00', 8000, lines[:1])
+            db.record_sale(lines, '2025-03-03 09:00:00')
+            db.record_sale(lines[:1], '2025-03-03 09:05:00')
+            db.conn.close()
+            # Take the database back to before sales had menu and receipt links
+            conn = sqlite3.connect(path)
+            conn.executescript("DROP TRIGGER change_log_sales_insert; DROP TRIGGER change_log_sales_update; "
+                               "DROP INDEX idx_sales_menu; DROP INDEX idx_sales_receipt; "
+                               "ALTER TABLE sales DROP COLUMN menu_id; UPDATE sales SET receipt_id = NULL; "
+                               "DROP TABLE sales_rollup; "
+                               "CREATE TABLE sales_rollup (bucket TEXT NOT NULL, bucket_start TEXT NOT NULL, "
+                               "item_name TEXT NOT NULL, category TEXT NOT NULL, quantity INTEGER NOT NULL, "
+                               "revenue INTEGER NOT NULL, PRIMARY KEY (bucket, bucket_start, item_name)); "
+                               "PRAGMA user_version = 1;")
+            conn.close()
+
+            db = DatabaseManager(path)
+            try:
+                rows = db.cursor.execute("SELECT s.item_name, m.name, r.receipt_uuid FROM sales s "
+                                         "LEFT JOIN menu m ON m.id = s.menu_id "
+                                         "LEFT JOIN receipts r ON r.id = s.receipt_id ORDER BY s.id").fetchall()
+                self.assertEqual(rows, [('Latte', 'Latte', 'r1'), ('Yuzu Tea', None, 'r1'), ('Latte', 'Latte', None)])
+                plan = db.cursor.execute("EXPLAIN QUERY PLAN SELECT * FROM sales WHERE menu_id = 1").fetchall()
+                self.assertIn('idx_sales_menu', str(plan))
+                # The name-keyed rollup is rebuilt keyed on menu items
+                rollup = db.cursor.execute("SELECT m.name, r.item_name, r.quantity FROM sales_rollup r "
+                                           "LEFT JOIN menu m ON m.id = r.menu_id WHERE bucket = 'day' "
+                                           "ORDER BY r.item_name").fetchall()
+                self.assertEqual(rollup, [('Latte', 'Latte', 2), (None, 'Yuzu Tea', 1)])
+            finally:
+                db.conn.close()
+
+# PARTITION / ARCHIVE TESTS
+class TestSalesArchive(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from database import DatabaseManager
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'pos.db')
+        self.db_manager = DatabaseManager(self.db_path)
+        latte = OrderLine('Latte', 8000, 1, 'Coffee')
+        for sale_date in ('2025-01-10 09:00:00', '2025-02-10 09:00:00', '2025-03-05 09:00:00'):
+            self.db_manager.record_sale([latte], sale_date)
+            self.db_manager.save_receipt('r-' + sale_date[:7], sale_date, 8000, [latte])
+
+    def tearDown(self):
+        self.db_manager.conn.close()
+        self.tmp_dir.cleanup()
+
+    def count(self, table):
+        self.db_manager.cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return self.db_manager.cursor.fetchone()[0]
+
+    def test_archive_closed_months_moves_rows_out_of_hot_tables(self):
+        archived = self.db_manager.archive_closed_months(datetime.date(2025, 3, 20))
+
+        self.assertEqual(archived, ['2025-01', '2025-02'])
+        self.assertEqual(self.count('sales'), 1)
+        self.assertEqual(self.count('receipts'), 1)
+        self.assertEqual(self.count('sales_all'), 3)
+        self.assertEqual(self.count('receipts_all'), 3)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, 'pos_archive.db')))
+
+    def test_backup_and_restore_include_the_archive(self):
+        from backup import archive_backup_path
+        self.db_manager.archive_closed_months(datetime.date(2025, 3, 20))
+        path = self.db_manager.backup_service.run_backup('test')
+        self.assertTrue(os.path.exists(archive_backup_path(path)))
+        # March is archived and a sale is made after the backup
+        self.db_manager.archive_closed_months(datetime.date(2025, 4, 20))
+        self.db_manager.record_sale([OrderLine('Latte', 8000, 1, 'Coffee')], '2025-04-02 09:00:00')
+
+        self.assertTrue(self.db_manager.restore_backup(path))
+
+        self.assertEqual(self.db_manager.list_archived_months(), ['2025-01', '2025-02'])
+        self.assertEqual(self.count('sales'), 1)
+        self.assertEqual(sorted(row[0] for row in self.db_manager.cursor.execute(
+            "SELECT sale_date FROM sales_all")), ['2025-01-10 09:00:00', '2025-02-10 09:00:00', '2025-03-05 09:00:00'])
+
+    def test_restoring_a_backup_from_before_archiving_empties_the_archive(self):
+        path = self.db_manager.backup_service.run_backup('test')
+        self.db_manager.archive_closed_months(datetime.date(2025, 3, 20))
+
+        self.assertTrue(self.db_manager.restore_backup(path))
+
+        self.assertEqual(self.db_manager.list_archived_months(), [])
+        self.assertEqual(self.count('sales'), 3)
+        self.assertEqual(self.count('sales_all'), 3)
+        # The pre-restore backup kept the archived months
+        pre_restore = [p for p in self.db_manager.list_backups() if p.endswith('-pre-restore.db')][0]
+        self.assertTrue(self.db_manager.restore_backup(pre_restore))
+        self.assertEqual(self.db_manager.list_archived_months(), ['2025-01', '2025-02'])
+        self.assertEqual(self.count('sales_all'), 3)
+
+    def test_archived_receipt_is_still_retrievable(self):
+        self.db_manager.archive_closed_months(datetime.date(2025, 3, 20))
+
+        receipt = self.db_manager.get_receipt('r-2025-01')
+
+        self.assertIsNotNone(receipt)
+        self.assertEqual(receipt.sale_date, '2025-01-10 09:00:00')
+
+    def test_partitions_are_reattached_on_restart(self):
+        from database import DatabaseManager
+        self.db_manager.archive_closed_months(datetime.date(2025, 3, 20))
+        self.db_manager.conn.close()
+
+        self.db_manager = DatabaseManager(self.db_path)
+
+        self.assertEqual(self.db_manager.list_archived_months(), ['2025-01', '2025-02'])
+        self.assertEqual(self.count('sales_all'), 3)
+
+    def test_clear_all_sales_data_clears_archived_sales(self):
+        self.db_manager.archive_closed_months(datetime.date(2025, 3, 20))
+
+        self.assertTrue(self.db_manager.clear_all_sales_data())
+
+        self.assertEqual(self.count('sales_all'), 0)
+        self.assertEqual(self.count('receipts_all'), 3)
+
+    def test_failed_clear_of_sales_data_is_rolled_back(self):
+        import sqlite3
+        from unittest.mock import patch
+        self.db_manager.eod_archive_cache.decode(('2025-01-10', 8000, '[]', '[]'))
+
+        with patch.object(self.db_manager.archive, 'clear_sales', side_effect=sqlite3.Error('disk I/O error')):
+            self.assertFalse(self.db_manager.clear_all_sales_data())
+        # A later unrelated commit must not persist the half-done clear
+        self.db_manager.save_receipt('r-later', '2025-03-06 09:00:00', 8000, [])
+
+        self.assertEqual(self.count('sales'), 3)
+        self.assertEqual(len(self.db_manager.eod_archive_cache), 0)
+
+    def test_rebuilt_rollups_keep_archived_months(self):
+        self.db_manager.archive_closed_months(datetime.date(2025, 3, 20))
+
+        self.assertTrue(self.db_manager.rebuild_sales_rollup())
+
+        rollup = self.db_manager.get_sales_rollup('month', datetime.date(2025, 1, 1), datetime.date(2025, 3, 31))
+        self.assertEqual(sorted(row[4] for row in rollup), ['2025-01-01', '2025-02-01', '2025-03-01'])
+        by_hour = self.db_manager.get_sales_by_hour(datetime.date(2025, 1, 1), datetime.date(2025, 3, 31))
+        self.assertEqual(sum(row[2] for row in by_hour), 3)
+
+# PROMOTION TESTS
+class TestPromotionEngine(unittest.TestCase):
+    def make_engine(self, *promotions):
+        from promotions import Promotion, PromotionEngine
+        rows = [Promotion(n, name, scope, target, kind, value, 1, min_spend, start, end, None, 1)
+                for n, (name, scope, target, kind, value, min_spend, start, end) in enumerate(promotions, 1)]
+        return PromotionEngine(rows)
+
+    def test_happy_hour_applies_only_inside_its_window(self):
+        engine = self.make_engine(('Happy Hour', 'category', 'Coffee', 'percent', 20.0, 0, '14:00', '17:00'))
+        latte = OrderLine('Latte', 10000, 2, 'Coffee')
+
+        inside = engine.start_order(datetime.datetime(2025, 3, 3, 15, 0))
+        outside = engine.start_order(datetime.datetime(2025, 3, 3, 18, 0))
+        inside.update(1, latte)
+        outside.update(1, latte)
+
+        self.assertEqual(inside.discount, 4000)
+        self.assertEqual(outside.discount, 0)
+
+    def test_combo_discount_follows_adds_and_removes(self):
+        engine = self.make_engine(('Breakfast Combo', 'combo', '["Latte", "Croissant"]', 'amount', 2500, 0, None, None))
+        order = engine.start_order(datetime.datetime(2025, 3, 3, 9, 0))
+
+        order.update(1, OrderLine('Latte', 10000, 1, 'Coffee'))
+        self.assertEqual(order.discount, 0)
+        order.update(2, OrderLine('Croissant', 7000, 1, 'Pastry'))
+        self.assertEqual(order.applied(), [(2500, 'Breakfast Combo')])
+        order.update(2, None)
+        self.assertEqual(order.discount, 0)
+
+    def test_incremental_matches_full_rescan(self):
+        import random
+        from benchmarks import make_promotions, full_rescan_discount
+        from promotions import CompiledPromotion, PromotionEngine
+        names = [f"Item {n}" for n in range(40)]
+        categories = ['Coffee', 'Tea', 'Pastry']
+        promotions = make_promotions(300, names, categories)
+        rules = [CompiledPromotion(p) for p in promotions]
+        moment = datetime.datetime(2025, 3, 3, 15, 30)
+        session = PromotionEngine(promotions).start_order(moment)
+        rng = random.Random(3)
+        order = {}
+
+        for _ in range(50):
+            index = rng.randrange(len(names))
+            if index in order and rng.random() < 0.2:
+                del order[index]
+                session.update(index, None)
+            else:
+                line = order.get(index) or OrderLine(names[index], 9000, 0, categories[index % 3])
+                order[index] = line._replace(qty=line.qty + 1)
+                session.update(index, order[index])
+            self.assertEqual(session.discount, full_rescan_discount(rules, order, moment))
+
+    def test_model_records_discounted_line_totals(self):
+        from database import DatabaseManager
+        db = DatabaseManager(':memory:')
+        db.create_promotion('Latte Promo', 'item', 'Latte', 'amount', 1000)
+        with patch('model.DatabaseManager', return_value=db), patch('model.OrderJournal'):
+            from model import AppModel
+            model = AppModel()
+        latte_id = [item.id for item in db.read_menu_items() if item.name == 'Latte'][0]
+        model.add_item_to_order(latte_id)
+        model.add_item_to_order(latte_id)
+        expected = 2 * db.get_item_details(latte_id)[1] - 2000
+
+        success, total, _ = model.process_order()
+
+        self.assertTrue(success)
+        self.assertAlmostEqual(total, expected)
+        self.assertAlmostEqual(db.cursor.execute("SELECT SUM(total) FROM sales").fetchone()[0], expected)
+        db.conn.close()
+
+# EOD HISTORY TESTS
+class TestEodHistory(unittest.TestCase):
+    def setUp(self):
+        from database import DatabaseManager
+        self.db = DatabaseManager(':memory:')
+        for day in range(1, 26):
+            self.db.save_eod_summary(EodSummary(f'2025-03-{day:02d}', day * 100, [['Latte', day]], []))
+
+    def tearDown(self):
+        self.db.conn.close()
+
+    def test_pages_are_newest_first_and_decode_only_shown_rows(self):
+        page = self.db.get_eod_page(0, 10)
+
+        self.assertEqual([record.date for record in page[:2]], ['2025-03-25', '2025-03-24'])
+        self.assertEqual(page[0].top_items, [['Latte', 25]])
+        self.assertEqual(len(self.db.eod_cache), 10)
+        self.assertEqual([record.date for record in self.db.get_eod_page(20, 10)],
+                         [f'2025-03-{day:02d}' for day in range(5, 0, -1)])
+
+    def test_cache_reuses_decoded_records_and_evicts_oldest(self):
+        from records import EodCache
+        first = self.db.get_eod_page(0, 5)
+        self.assertIs(self.db.get_eod_page(0, 5)[0], first[0])
+
+        cache = EodCache(maxsize=2)
+        for row in (('a', 1, '[]', '[]'), ('b', 2, '[]', '[]'), ('a', 1, '[]', '[]'), ('c', 3, '[]', '[]')):
+            cache.decode(row)
+        self.assertEqual(list(cache._records), ['a', 'c'])
+
+    def test_clearing_sales_drops_cached_summaries(self):
+        self.db.get_eod_page(0, 5)
+        self.db.clear_all_sales_data()
+        self.assertEqual((len(self.db.eod_cache), self.db.get_eod_page(0, 5)), (0, []))
+
+    def test_model_clamps_requested_page(self):
+        with patch('model.DatabaseManager', return_value=self.db), patch('model.OrderJournal'):
+            from model import AppModel
+            model = AppModel()
+        records, page, page_count = model.get_eod_history_page(9, page_size=10)
+        self.assertEqual((len(records), page, page_count), (5, 2, 3))
+
+    def test_business_date_starts_after_last_closed_day(self):
+        self.assertEqual(self.db.load_business_date(datetime.date(2025, 3, 10)), datetime.date(2025, 3, 26))
+        # Stored from now on, whatever today is
+        self.assertEqual(self.db.load_business_date(datetime.date(2025, 5, 1)), datetime.date(2025, 3, 26))
+
+    def test_close_business_day_writes_both_tables_and_advances_date(self):
+        latte, croissant = OrderLine('Latte', 8000, 3, 'Coffee'), OrderLine('Croissant', 7000, 1, 'Pastry')
+        self.db.record_sale([latte, croissant], '2025-03-26 09:00:00')
+        self.db.record_sale([croissant], '2025-03-27 09:00:00')
+        day = self.db.load_business_date(datetime.date(2025, 3, 10))
+
+        summary = self.db.close_business_day(day)
+
+        self.assertEqual((summary.date, summary.total_revenue), ('2025-03-26', 31000))
+        self.assertEqual(summary.top_items, [('Latte', 3), ('Croissant', 1)])
+        self.assertEqual(self.db.cursor.execute(
+            "SELECT total_revenue FROM eod_summary_archive WHERE report_date = '2025-03-26'").fetchone(), (31000,))
+        self.assertEqual(self.db.load_business_date(), datetime.date(2025, 3, 27))
+        self.assertIsNone(self.db.close_business_day(day))
+        self.assertEqual(self.db.count_eod_records(), 26)
+
+    def test_business_date_survives_model_restart(self):
+        self.db.load_business_date(datetime.date(2025, 3, 10))
+        with patch('model.DatabaseManager', return_value=self.db), patch('model.OrderJournal'):
+            from model import AppModel
+            model = AppModel()
+            self.assertEqual(model.save_eod_and_advance_day()[0], "Success")
+            restarted = AppModel()
+
+        self.assertEqual(restarted.current_pos_date, datetime.date(2025, 3, 27))
+
+# MENU SEARCH TESTS
+class TestMenuIndex(unittest.TestCase):
+    def setUp(self):
+        from records import MenuItem
+        from search import MenuIndex
+        self.items = [MenuItem(1, 'Latte', 8000, 10, 'Coffee', 5), MenuItem(2, 'Iced Latte', 9000, 10, 'Coffee', 5),
+                      MenuItem(12, 'Lemon Tart', 7000, 10, 'Pastry', 5), MenuItem(120, 'Mocha', 9500, 10, 'Coffee', 5)]
+        self.index = MenuIndex(self.items)
+
+    def names(self, query, limit=20):
+        return [item.name for item in self.index.search(query, limit)]
+
+    def test_prefix_matches_name_and_words(self):
+        self.assertEqual(sorted(self.names('lat')), ['Iced Latte', 'Latte'])
+        self.assertEqual(self.names('le'), ['Lemon Tart'])
+        self.assertEqual(self.names('iced l'), ['Iced Latte'])
+        self.assertEqual(self.names('tart lem'), ['Lemon Tart'])
+        self.assertEqual(self.names('x'), [])
+
+    def test_quick_code_exact_match_comes_first(self):
+        self.assertEqual(self.names('12'), ['Lemon Tart', 'Mocha'])
+        self.assertEqual(self.names('1', limit=1), ['Latte'])
+
+    def test_non_ascii_digits_are_not_quick_codes(self):
+        self.assertEqual(self.names('²'), [])
+        self.assertEqual(self.names('١٢'), [])
+
+    def test_incremental_updates_match_a_rebuild(self):
+        from records import MenuItem
+        from search import MenuIndex
+        self.index.add(MenuItem(7, 'Oat Latte', 9000, 10, 'Coffee', 5))
+        self.index.update(MenuItem(2, 'Iced Mocha', 9000, 10, 'Coffee', 5))
+        self.index.remove(12)
+        rebuilt = MenuIndex(self.index.items.values())
+        self.assertEqual(self.index.keys, rebuilt.keys)
+        self.assertEqual(self.index.codes, rebuilt.codes)
+        self.assertEqual(sorted(self.names('mo')), ['Iced Mocha', 'Mocha'])
+
+    def test_model_keeps_index_in_step_with_menu_crud(self):
+        from database import DatabaseManager
+        db = DatabaseManager(':memory:')
+        with patch('model.DatabaseManager', return_value=db), patch('model.OrderJournal'):
+            from model import AppModel
+            model = AppModel()
+        item_id = model.create_item('Ube Latte', 12000, 20, 'Coffee')
+        self.assertEqual([item.id for item in model.search_menu('ube')], [item_id])
+        model.update_item(item_id, 'Ube Cheese Latte', 12000, 20, 'Coffee')
+        self.assertEqual([item.name for item in model.search_menu('ube ch')], ['Ube Cheese Latte'])
+        model.delete_item(item_id)
+        self.assertEqual(model.search_menu('ube'), [])
+
+    def test_checkout_updates_indexed_stock(self):
+        from database import DatabaseManager
+        db = DatabaseManager(':memory:')
+        with patch('model.DatabaseManager', return_value=db), patch('model.OrderJournal'):
+            from model import AppModel
+            model = AppModel()
+        latte = model.search_menu('latte')[0]
+        model.add_item_to_order(latte.id)
+        model.add_item_to_order(latte.id)
+
+        self.assertTrue(model.process_order()[0])
+
+        self.assertEqual(model.menu_index.items[latte.id].stock, latte.stock - 2)
+        db.conn.close()
+
+# MONEY / CHARGES TESTS
+class TestMoney(unittest.TestCase):
+    def test_to_centavos_parses_peso_text(self):
+        from money import to_centavos, format_money
+        self.assertEqual(to_centavos('₱1,234.505'), 123451)
+        self.assertEqual(to_centavos(0.1 + 0.2), 30)
+        self.assertEqual(format_money(-5), '-₱0.05')
+        for text in ('abc', 'inf', 'Infinity', '-inf', 'NaN', 'sNaN', '1e999999999', float('inf')):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                to_centavos(text)
+
+    def test_allocate_adds_up_exactly(self):
+        from money import allocate
+        shares = allocate(1000, [1, 1, 1])
+        self.assertEqual(sum(shares), 1000)
+        self.assertEqual(sorted(shares), [333, 333, 334])
+
+    def test_inclusive_and_exclusive_tax(self):
+        from money import ChargeEngine, ChargeSettings
+        inclusive = ChargeEngine(ChargeSettings(tax_rate=12)).compute(11200, [11200])
+        exclusive = ChargeEngine(ChargeSettings(tax_rate=12, tax_inclusive=False, service_rate=10)).compute(10000, [10000])
+        self.assertEqual((inclusive.tax, inclusive.total), (1200, 11200))
+        self.assertEqual((exclusive.service_charge, exclusive.tax, exclusive.total), (1000, 1320, 12320))
+
+    def test_line_rounding_differs_from_order_rounding(self):
+        from money import ChargeEngine, ChargeSettings
+        lines = [105, 105, 105]
+        per_order = ChargeEngine(ChargeSettings(tax_rate=10, tax_inclusive=False)).compute(315, lines)
+        per_line = ChargeEngine(ChargeSettings(tax_rate=10, tax_inclusive=False, rounding='line')).compute(315, lines)
+        self.assertEqual(per_order.tax, 32)
+        self.assertEqual(per_line.tax, 33)
+
+    def test_cash_rounding_reports_adjustment(self):
+        from money import ChargeEngine, ChargeSettings
+        charges = ChargeEngine(ChargeSettings(cash_increment=25)).compute(1013, [1013])
+        self.assertEqual((charges.total, charges.rounding_adjustment), (1025, 12))
+
+    def test_settings_round_trip_through_database(self):
+        from database import DatabaseManager
+        from money import ChargeSettings
+        db = DatabaseManager(':memory:')
+        settings = ChargeSettings(tax_rate=12.0, tax_inclusive=False, service_rate=5.0, rounding='line', cash_increment=25)
+        self.assertTrue(db.save_settings(settings.to_settings()))
+        self.assertEqual(ChargeSettings.from_settings(db.read_settings()), settings)
+
+    def test_peso_database_is_migrated_to_centavos(self):
+        import sqlite3
+        import tempfile
+        from database import DatabaseManager, SCHEMA_VERSION
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'old.db')
+            conn = sqlite3.connect(path)
+            conn.executescript("""
+                CREATE TABLE menu (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE,
+                                   price REAL NOT NULL, stock INTEGER NOT NULL, category TEXT NOT NULL);
+                CREATE TABLE sales (id INTEGER PRIMARY KEY AUTOINCREMENT, item_name TEXT NOT NULL, category TEXT NOT NULL,
+                                    quantity INTEGER NOT NULL, price REAL NOT NULL, total REAL NOT NULL, sale_date TEXT NOT NULL);
+                CREATE TABLE receipts (id INTEGER PRIMARY KEY AUTOINCREMENT, receipt_uuid TEXT NOT NULL UNIQUE,
+                                       sale_date TEXT NOT NULL, total REAL NOT NULL, items_json TEXT NOT NULL, created_at TEXT NOT NULL);
+                INSERT INTO menu (name, price, stock, category) VALUES ('Latte', 80.5, 10, 'Coffee');
+                INSERT INTO sales (item_name, category, quantity, price, total, sale_date)
+                VALUES ('Latte', 'Coffee', 2, 80.5, 161.0, '2025-03-03 09:00:00');
+                INSERT INTO receipts (receipt_uuid, sale_date, total, items_json, created_at)
+                VALUES ('r1', '2025-03-03 09:00:00', 161.0,
+                        '[{"name": "Latte", "price": 80.5, "qty": 2, "category": "Coffee"}]', '2025-03-03 09:00:00');
+            """)
+            conn.commit()
+            conn.close()
+
+            db = DatabaseManager(path)
+            try:
+                latte = [item for item in db.read_menu_items() if item.name == 'Latte'][0]
+                self.assertEqual(latte.price, 8050)
+                self.assertEqual(db.cursor.execute("SELECT price, total, typeof(total) FROM sales").fetchone(),
+                                 (8050, 16100, 'integer'))
+                receipt = db.get_receipt('r1')
+                self.assertEqual((receipt.total, receipt.items[0].price, receipt.tax), (16100, 8050, 0))
+                self.assertEqual(db.cursor.execute("SELECT revenue FROM sales_rollup WHERE bucket = 'day'").fetchone()[0], 16100)
+                self.assertEqual(db.cursor.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+                # The rebuilt sales table gets its menu and receipt links filled in too
+                self.assertEqual(db.cursor.execute("SELECT menu_id, receipt_id FROM sales").fetchone(),
+                                 (latte.id, db.cursor.execute("SELECT id FROM receipts").fetchone()[0]))
+            finally:
+                db.conn.close()
+
+# RECEIPT PRINTING TESTS
+class TestReceiptPrinting(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from records import Receipt
+        from money import OrderCharges
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.receipt = Receipt('abc123', '2025-03-03 09:00:00', 17000,
+                               [OrderLine('Latte', 8000, 2, 'Coffee'), OrderLine('Croissant', 2000, 1, 'Pastry')],
+                               '2025-03-03 09:00:00', tax=1821, service_charge=0)
+        self.charges = OrderCharges(18000, 1000, 0, 1821, 0, 17000)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_text_receipt_lists_lines_and_totals(self):
+        from printing import PrintSettings, ReceiptRenderer
+        renderer = ReceiptRenderer(PrintSettings(shop_name='Bean There', width=32))
+        text = renderer.render_text(self.receipt, self.charges)
+        lines = text.splitlines()
+        self.assertEqual(lines[0].strip(), 'Bean There')
+        self.assertIn('Latte x2'.ljust(26) + '160.00', lines)
+        self.assertIn('  @ 80.00', lines)
+        self.assertIn('Discounts'.ljust(26) + '-10.00', lines)
+        self.assertIn('Tax (included)'.ljust(27) + '18.21', lines)
+        self.assertIn('TOTAL (PHP)'.ljust(26) + '170.00', lines)
+        self.assertTrue(all(len(line) <= 32 for line in lines))
+        self.assertEqual(lines[-1].strip(), 'Thank you! Please come again.')
+
+    def test_tax_label_follows_charge_settings(self):
+        from money import ChargeEngine, ChargeSettings
+        from printing import ReceiptRenderer
+        renderer = ReceiptRenderer()
+        # Exclusive tax that disappears in cash rounding
+        settings = ChargeSettings(tax_rate=0.5, tax_inclusive=False, cash_increment=100)
+        charges = ChargeEngine(settings).compute(8000, [8000])
+        receipt = self.receipt._replace(total=charges.total, tax=charges.tax)
+
+        exclusive = renderer.body_lines(receipt, charges, settings.tax_inclusive)
+        inclusive = renderer.body_lines(receipt, charges, tax_inclusive=True)
+
+        self.assertEqual(charges.total, 8000)
+        self.assertTrue(any(line.startswith('Tax ') and 'included' not in line for line in exclusive))
+        self.assertTrue(any(line.startswith('Tax (included)') for line in inclusive))
+        # A reprint has no OrderCharges, only the stored receipt
+        reprint = renderer.body_lines(self.receipt, None, tax_inclusive=True)
+        self.assertTrue(any(line.startswith('Tax (included)') and line.endswith('18.21') for line in reprint))
+        self.assertFalse(any(line.startswith('Tax') for line in renderer.body_lines(receipt._replace(tax=0), charges)))
+
+    def test_escpos_stream_initialises_and_cuts(self):
+        from printing import ESC_FEED_AND_CUT, ESC_INIT, ReceiptRenderer
+        data = ReceiptRenderer().render_escpos(self.receipt._replace(items=[OrderLine('Café Latte', 8000, 1, 'Coffee')]))
+        self.assertTrue(data.startswith(ESC_INIT))
+        self.assertTrue(data.endswith(ESC_FEED_AND_CUT))
+        self.assertIn(b'Caf? Latte x1', data)
+
+    def test_pdf_is_a_single_courier_page(self):
+        from printing import ReceiptRenderer
+        data = ReceiptRenderer().render_pdf(self.receipt._replace(items=[OrderLine('Latte (Iced)', 8000, 1, 'Coffee')]))
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertTrue(data.rstrip().endswith(b'%%EOF'))
+        self.assertIn(b'/BaseFont /Courier', data)
+        self.assertIn(b'(Latte \\(Iced\\) x1', data)
+        xref = int(data.rsplit(b'startxref\n', 1)[1].split()[0])
+        self.assertTrue(data[xref:].startswith(b'xref'))
+
+    def test_queue_spools_one_file_per_receipt(self):
+        from printing import PrintQueue, PrintSettings
+        spool_dir = os.path.join(self.tmp_dir.name, 'spool')
+        printer = PrintQueue(PrintSettings(output=spool_dir, format='text'))
+        self.assertTrue(printer.submit(self.receipt))
+        self.assertTrue(printer.submit(self.receipt._replace(receipt_uuid='def456')))
+        printer.wait()
+        printer.close()
+        self.assertEqual(sorted(os.listdir(spool_dir)), ['abc123.txt', 'def456.txt'])
+        self.assertEqual((printer.printed, printer.failed), (2, 0))
+
+    def test_queue_appends_to_device_file_and_can_be_disabled(self):
+        from printing import PrintQueue, PrintSettings
+        device = os.path.join(self.tmp_dir.name, 'lp0.bin')
+        open(device, 'wb').close()
+        printer = PrintQueue(PrintSettings(output=device))
+        printer.submit(self.receipt)
+        printer.submit(self.receipt)
+        printer.wait()
+        with open(device, 'rb') as device_file:
+            self.assertEqual(device_file.read().count(b'abc123'), 2)
+        printer.configure(PrintSettings(output=''))
+        self.assertFalse(printer.submit(self.receipt))
+        printer.close()
+
+    def test_checkout_queues_the_receipt(self):
+        from database import DatabaseManager
+        from printing import PrintSettings
+        db = DatabaseManager(':memory:')
+        with patch('model.DatabaseManager', return_value=db), patch('model.OrderJournal'):
+            from model import AppModel
+            model = AppModel()
+        spool_dir = os.path.join(self.tmp_dir.name, 'spool')
+        self.assertTrue(model.save_print_settings(PrintSettings(output=spool_dir, format='pdf')))
+        model.add_item_to_order(db.read_menu_items()[0].id)
+
+        success, _, receipt_uuid = model.process_order()
+        model.printer.wait()
+
+        self.assertTrue(success)
+        self.assertEqual(os.listdir(spool_dir), [receipt_uuid + '.pdf'])
+        self.assertTrue(model.print_receipt(receipt_uuid))
+        self.assertFalse(model.print_receipt('missing'))
+        model.printer.close()
+        db.conn.close()
+
+# CHANGE LOG TESTS
+class TestChangeLog(unittest.TestCase):
+    def setUp(self):
+        from database import DatabaseManager
+        self.db = DatabaseManager(':memory:')
+        self.log = self.db.change_log
+        self.start = self.log.register('office')
+
+    def tearDown(self):
+        self.db.conn.close()
+
+    def new_changes(self):
+        return [(change.table_name, change.op) for batch in self.log.stream(self.start) for change in batch]
+
+    def test_menu_changes_are_logged_in_order(self):
+        item_id = self.db.create_menu_item('Ube Latte', 12000, 20, 'Coffee', 5)
+        self.db.update_menu_item(item_id, 'Ube Latte', 13000, 20, 'Coffee', 5)
+        self.db.delete_menu_item(item_id)
+
+        changes = self.log.changes_since(self.start)
+
+        self.assertEqual([(c.table_name, c.op, c.row_id) for c in changes],
+                         [('menu', 'insert', item_id), ('menu', 'update', item_id), ('menu', 'delete', item_id)])
+        self.assertEqual(changes[1].row['price'], 13000)
+        self.assertIsNone(changes[2].row)
+        self.assertEqual([c.seq for c in changes], sorted(c.seq for c in changes))
+
+    def test_checkout_logs_sales_receipts_and_stock(self):
+        line = OrderLine('Latte', 8000, 2, 'Coffee')
+        self.db.record_sale([line], '2025-03-03 09:00:00')
+        self.db.save_receipt('r1', '2025-03-03 09:00:00', 16000, [line])
+
+        self.assertEqual(sorted(self.new_changes()), [('menu', 'update'), ('receipts', 'insert'), ('sales', 'insert')])
+
+    def test_stream_batches_and_compaction(self):
+        for number in range(5):
+            self.db.create_user(f'user{number}', 'secret', 'Cashier')
+
+        batches = list(self.log.stream(self.start, batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+
+        self.log.acknowledge('office', batches[1][-1].seq)
+        self.log.acknowledge('terminal-2', batches[0][-1].seq)
+        self.log.acknowledge('office', batches[0][0].seq)
+        self.assertEqual(self.log.acknowledged('office'), batches[1][-1].seq)
+
+        self.log.compact()
+
+        self.assertEqual(self.log.changes_since(0)[0].seq, batches[1][0].seq)
+        self.assertEqual(self.log.latest_seq(), batches[-1][-1].seq)
+
+    def test_nothing_is_logged_without_consumers(self):
+        from database import DatabaseManager
+        db = DatabaseManager(':memory:')
+        try:
+            db.record_sale([OrderLine('Latte', 8000, 1, 'Coffee')], '2025-03-03 09:00:00')
+            self.assertEqual(db.change_log.changes_since(0), [])
+
+            start = db.change_log.register('office')
+            self.assertEqual(db.change_log.register('office'), start)
+            db.record_sale([OrderLine('Latte', 8000, 1, 'Coffee')], '2025-03-03 10:00:00')
+            self.assertEqual(len(db.change_log.changes_since(start)), 2)
+        finally:
+            db.conn.close()
+
+    def test_user_passwords_are_not_logged(self):
+        self.db.create_user('barista', 'secret', 'Cashier')
+
+        change = self.log.changes_since(self.start)[0]
+
+        self.assertEqual(change.row['username'], 'barista')
+        self.assertNotIn('password', change.row)
+
+    def test_compact_without_consumers_empties_the_log(self):
+        self.db.create_user('barista', 'secret', 'Cashier')
+        self.db.conn.execute("DELETE FROM change_log_consumers")
+
+        self.assertEqual(self.log.compact(), 1)
+        self.assertIsNone(self.log.oldest_seq())
+
+    def test_archiving_is_not_logged_as_deletes(self):
+        self.db.record_sale([OrderLine('Latte', 8000, 1, 'Coffee')], '2025-01-15 09:00:00')
+        self.start = self.log.latest_seq()
+
+        self.assertEqual(self.db.archive_closed_months(datetime.date(2025, 3, 1)), ['2025-01'])
+        self.db.delete_menu_item(self.db.read_menu_items()[0].id)
+
+        self.assertEqual(self.new_changes(), [('menu', 'delete')])
+
+# REPLICATION TESTS
+class TestReplication(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from database import DatabaseManager
+        from replication import HubServer, RegisterSync
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.hub_path = os.path.join(self.tmp_dir.name, 'hub.db')
+        self.hub = HubServer(self.hub_path, host='127.0.0.1', port=0)
+        self.hub.start()
+        self.register_path = os.path.join(self.tmp_dir.name, 'register.db')
+        self.register = DatabaseManager(self.register_path)
+        self.sync = RegisterSync(self.register_path, self.hub.url, 'till-1')
+
+    def tearDown(self):
+        self.hub.stop()
+        self.register.conn.close()
+        self.tmp_dir.cleanup()
+
+    def hub_query(self, sql, params=()):
+        import sqlite3
+        conn = sqlite3.connect(self.hub_path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def checkout(self):
+        with patch('model.DatabaseManager', return_value=self.register), patch('model.OrderJournal'):
+            from model import AppModel
+            model = AppModel()
+        model.replication = self.sync
+        latte_id = [item.id for item in self.register.read_menu_items() if item.name == 'Latte'][0]
+        model.add_item_to_order(latte_id)
+        model.add_item_to_order(latte_id)
+        return model.process_order()
+
+    def test_orders_reach_the_hub_once(self):
+        success, total, receipt_uuid = self.checkout()
+        payload = self.register.outbox.pending()[0]
+        hub_stock = self.hub_query("SELECT stock FROM menu WHERE name = 'Latte'")[0][0]
+
+        self.assertTrue(self.sync.sync_once())
+        self.assertEqual(self.register.outbox.count(), 0)
+        # The hub's reply was lost and the register sends the order again
+        self.register.outbox.add(receipt_uuid, payload)
+        self.assertTrue(self.sync.sync_once())
+
+        self.assertEqual(self.register.outbox.count(), 0)
+        self.assertEqual(self.hub_query("SELECT receipt_uuid, total FROM receipts"), [(receipt_uuid, total)])
+        self.assertEqual(self.hub_query("SELECT SUM(quantity) FROM sales")[0][0], 2)
+        self.assertEqual(self.hub_query("SELECT stock FROM menu WHERE name = 'Latte'")[0][0], hub_stock - 2)
+
+    def test_checkout_and_outbox_entry_commit_together(self):
+        import sqlite3
+        latte = [item for item in self.register.read_menu_items() if item.name == 'Latte'][0]
+        line = OrderLine('Latte', latte.price, 1, 'Coffee')
+
+        with patch.object(self.register.outbox, 'insert', side_effect=sqlite3.OperationalError('disk I/O error')):
+            self.assertIsNone(self.register.record_checkout('r1', '2025-03-03 09:00:00', latte.price, [line],
+                                                            menu_ids=[latte.id], outbox_payload={'receipt_uuid': 'r1'}))
+        self.assertIsNone(self.register.get_receipt('r1'))
+        self.assertEqual(self.register.cursor.execute("SELECT COUNT(*) FROM sales").fetchone()[0], 0)
+        self.assertEqual([item.stock for item in self.register.read_menu_items() if item.id == latte.id], [latte.stock])
+
+        receipt_id = self.register.record_checkout('r1', '2025-03-03 09:00:00', latte.price, [line],
+                                                   menu_ids=[latte.id], outbox_payload={'receipt_uuid': 'r1'})
+        self.assertIsNotNone(receipt_id)
+        self.assertEqual(self.register.outbox.pending(), [{'receipt_uuid': 'r1'}])
+        self.assertEqual(self.register.cursor.execute("SELECT receipt_id FROM sales").fetchall(), [(receipt_id,)])
+
+    def test_unreachable_hub_keeps_orders_queued(self):
+        from replication import RegisterSync
+        offline = RegisterSync(self.register_path, 'http://127.0.0.1:9', 'till-1', timeout=0.5)
+        success, _, _ = self.checkout()
+
+        self.assertTrue(success)
+        self.assertFalse(offline.sync_once())
+        self.assertFalse(offline.online)
+        self.assertEqual(self.register.outbox.count(), 1)
+
+    def test_hub_menu_changes_reach_the_register(self):
+        self.assertTrue(self.sync.sync_once())
+        import sqlite3
+        conn = sqlite3.connect(self.hub_path)
+        conn.execute("UPDATE menu SET price = 9900, stock = 50 WHERE name = 'Latte'")
+        conn.execute("INSERT INTO menu (name, price, stock, category) VALUES ('Ube Latte', 12000, 30, 'Coffee')")
+        conn.commit()
+        conn.close()
+
+        self.assertTrue(self.sync.sync_once())
+
+        menu = {item.name: item for item in self.register.read_menu_items()}
+        self.assertEqual((menu['Latte'].price, menu['Latte'].stock), (9900, 50))
+        self.assertEqual(menu['Ube Latte'].id, self.hub_query("SELECT id FROM menu WHERE name = 'Ube Latte'")[0][0])
+
+    def test_register_items_with_sales_survive_the_first_full_sync(self):
+        import sqlite3
+        register = self.register
+        register.create_menu_item('Yuzu Tea', 9000, 20, 'Tea')
+        register.create_menu_item('House Blend', 7000, 20, 'Coffee')
+        local = {item.name: item.id for item in register.read_menu_items()}
+        milk_id = register.create_ingredient('Oat Milk', 'ml', 1000)
+        register.set_recipe(local['Yuzu Tea'], [(milk_id, 100)])
+        register.record_sale([OrderLine('Yuzu Tea', 9000, 2, 'Tea'), OrderLine('House Blend', 7000, 1, 'Coffee')],
+                             '2025-03-03 09:00:00', menu_ids=[local['Yuzu Tea'], local['House Blend']])
+        # The hub hands out the register's Yuzu Tea id to another item and has its own Yuzu Tea
+        conn = sqlite3.connect(self.hub_path)
+        conn.execute("INSERT INTO menu (name, price, stock, category) VALUES ('Matcha', 11000, 30, 'Tea')")
+        conn.execute("INSERT INTO menu (name, price, stock, category) VALUES ('Yuzu Tea', 9500, 30, 'Tea')")
+        conn.commit()
+        conn.close()
+        hub_ids = dict(self.hub_query("SELECT name, id FROM menu"))
+        self.assertEqual(hub_ids['Matcha'], local['Yuzu Tea'])
+
+        self.assertTrue(self.sync.sync_once())
+
+        menu = {item.name: item.id for item in register.read_menu_items()}
+        self.assertEqual((menu['Matcha'], menu['Yuzu Tea']), (hub_ids['Matcha'], hub_ids['Yuzu Tea']))
+        self.assertNotIn('House Blend', menu)
+        self.assertEqual(register.cursor.execute("SELECT item_name, menu_id FROM sales ORDER BY id").fetchall(),
+                         [('Yuzu Tea', hub_ids['Yuzu Tea']), ('House Blend', None)])
+        self.assertEqual(register.cursor.execute("SELECT menu_id FROM recipes WHERE ingredient_id = ?",
+                                                 (milk_id,)).fetchall(), [(hub_ids['Yuzu Tea'],)])
+        day = datetime.date(2025, 3, 3)
+        self.assertEqual(sorted(row[:3] for row in register.get_sales_rollup('day', day, day)),
+                         [('House Blend', 'Coffee', 1), ('Yuzu Tea', 'Tea', 2)])
+        self.assertEqual(register.cursor.execute(
+            "SELECT COUNT(*) FROM sales_rollup WHERE menu_id = ?", (hub_ids['Matcha'],)).fetchone()[0], 0)
+
+        # A later item the register creates never takes over an id the hub uses
+        register.create_menu_item('Local Special', 6000, 5, 'Pastry')
+        self.assertTrue(self.sync.sync_once())
+        self.assertEqual(dict(self.hub_query("SELECT name, id FROM menu")), {
+            item.name: item.id for item in register.read_menu_items() if item.name != 'Local Special'})
+
+    def test_register_stock_subtracts_unconfirmed_orders(self):
+        from replication import apply_menu_update
+        latte = [item for item in self.register.read_menu_items() if item.name == 'Latte'][0]
+        self.register.outbox.add('r1', {'receipt_uuid': 'r1', 'items': [['Latte', latte.price, 3, 'Coffee']]})
+
+        apply_menu_update(self.register.conn, {'version': 7, 'full': False, 'deleted': [],
+                                               'items': [latte._replace(stock=40)._asdict()]})
+
+        self.assertEqual(self.register.get_item_details(latte.id)[0], 'Latte')
+        self.assertEqual([item.stock for item in self.register.read_menu_items() if item.name == 'Latte'], [37])
+        self.assertEqual(self.register.read_settings()['hub_menu_version'], '7')
+
+# MULTI-STORE CONSOLIDATION TESTS
+class TestStoreConsolidation(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from consolidate import StoreConsolidator
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.central_path = os.path.join(self.tmp_dir.name, 'central.db')
+        self.consolidator = StoreConsolidator(self.central_path, batch_rows=2)
+        self.stores = {}
+        for store_id in ('north', 'south'):
+            path = os.path.join(self.tmp_dir.name, f'{store_id}.db')
+            self.stores[store_id] = self.open_store(path)
+            self.consolidator.add_store(store_id, path)
+
+    def tearDown(self):
+        self.consolidator.close()
+        for db in self.stores.values():
+            db.conn.close()
+        self.tmp_dir.cleanup()
+
+    def open_store(self, path):
+        from database import DatabaseManager
+        return DatabaseManager(path)
+
+    def sell(self, store_id, sale_date, qty=1, receipt_uuid=None):
+        line = OrderLine('Latte', 8000, qty, 'Coffee')
+        db = self.stores[store_id]
+        db.record_sale([line], sale_date)
+        db.save_receipt(receipt_uuid or f"{store_id}-{sale_date}", sale_date, line.subtotal, [line])
+
+    def count(self, table, store_id):
+        return self.consolidator.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE store_id = ?", (store_id,)).fetchone()[0]
+
+    def test_sync_copies_only_new_rows(self):
+        for day in range(1, 6):
+            self.sell('north', f'2025-03-0{day} 09:00:00')
+
+        self.assertEqual(self.consolidator.sync_store('north'), {'sales': 5, 'receipts': 5, 'eod_summary': 0})
+        self.assertEqual(self.consolidator.sync_store('north'), {'sales': 0, 'receipts': 0, 'eod_summary': 0})
+
+        self.sell('north', '2025-03-06 09:00:00')
+        self.stores['north'].save_eod_summary(EodSummary('2025-03-06', 8000, [['Latte', 1]], []))
+        self.assertEqual(self.consolidator.sync_store('north'), {'sales': 1, 'receipts': 1, 'eod_summary': 1})
+        self.assertEqual(self.count('sales', 'north'), 6)
+        self.assertEqual(self.consolidator.high_water_marks('north')['sales'],
+                         self.stores['north'].cursor.execute("SELECT MAX(id) FROM sales").fetchone()[0])
+
+    def test_sync_reads_archived_partitions(self):
+        self.sell('south', '2025-01-15 09:00:00')
+        self.sell('south', '2025-02-15 09:00:00')
+        self.assertEqual(self.stores['south'].archive_closed_months(datetime.date(2025, 3, 1)), ['2025-01', '2025-02'])
+        self.sell('south', '2025-03-15 09:00:00')
+
+        copied = self.consolidator.sync_all()
+
+        self.assertEqual(copied['south']['sales'], 3)
+        self.assertEqual(copied['north']['sales'], 0)
+        self.assertEqual(self.count('receipts', 'south'), 3)
+
+    def test_refund_after_sync_reaches_the_central_receipt(self):
+        self.sell('north', '2025-03-03 09:00:00', receipt_uuid='r1')
+        self.consolidator.sync_store('north')
+        db = self.stores['north']
+        # Link the sale to its receipt, as checkouts do, so it can be voided
+        db.conn.execute("UPDATE sales SET receipt_id = (SELECT id FROM receipts WHERE receipt_uuid = 'r1')")
+        db.conn.commit()
+        self.assertEqual(db.refund_receipt('r1', '2025-03-03 10:00:00'), 8000)
+
+        copied = self.consolidator.sync_store('north')
+
+        self.assertEqual(copied, {'sales': 1, 'receipts': 1, 'eod_summary': 0})
+        self.assertEqual(self.consolidator.conn.execute(
+            "SELECT refunded FROM receipts WHERE store_id = 'north' AND receipt_uuid = 'r1'").fetchone()[0], 8000)
+        self.assertEqual(self.consolidator.sync_store('north')['receipts'], 0)
+
+    def test_store_restored_from_backup_is_copied_again_from_where_it_agrees(self):
+        db = self.stores['north']
+        self.sell('north', '2025-03-01 09:00:00')
+        self.sell('north', '2025-03-02 09:00:00')
+        backup = db.backup_service.run_backup('test')
+        self.sell('north', '2025-03-03 09:00:00')
+        self.consolidator.sync_store('north')
+
+        # Restored without new sales: the sequence is below the mark
+        self.assertTrue(db.restore_backup(backup))
+        self.consolidator.sync_store('north')
+        self.assertEqual(self.count('sales', 'north'), 2)
+        self.assertEqual(self.consolidator.high_water_marks('north')['sales'], 2)
+
+        # New sales reuse id 3 for a different row
+        self.sell('north', '2025-03-01 09:00:00')
+        self.consolidator.sync_store('north')
+        self.assertTrue(db.restore_backup(backup))
+        self.sell('north', '2025-03-04 09:00:00')
+        self.sell('north', '2025-03-05 09:00:00')
+        self.consolidator.sync_store('north')
+
+        central = self.consolidator.conn.execute(
+            "SELECT id, sale_date FROM sales WHERE store_id = 'north' ORDER BY id").fetchall()
+        self.assertEqual(central, db.cursor.execute("SELECT id, sale_date FROM sales ORDER BY id").fetchall())
+        self.assertEqual([row[1][:10] for row in central], ['2025-03-01', '2025-03-02', '2025-03-04', '2025-03-05'])
+        self.assertEqual(self.count('receipts', 'north'), 4)
+
+    def test_consolidated_report_across_worker_processes(self):
+        from consolidate import consolidated_report
+        self.sell('north', '2025-03-03 09:00:00', qty=2)
+        self.sell('south', '2025-03-03 10:00:00')
+        self.sell('south', '2025-03-04 10:00:00')
+        self.sell('south', '2025-04-01 10:00:00')
+        self.consolidator.sync_all()
+
+        report = consolidated_report(self.central_path, datetime.date(2025, 3, 1), datetime.date(2025, 3, 31), workers=2)
+        in_process = consolidated_report(self.central_path, datetime.date(2025, 3, 1), datetime.date(2025, 3, 31), workers=1)
+
+        self.assertEqual(report.by_store.loc['north', 'revenue'], 16000)
+        self.assertEqual(report.by_store.loc['south', 'orders'], 2)
+        self.assertEqual(report.top_items['Latte'], 4)
+        self.assertEqual(report.daily_revenue.loc['2025-03-03'].to_dict(), {'north': 16000, 'south': 8000})
+        self.assertTrue(report.by_store.equals(in_process.by_store))
+
+# ORDER JOURNAL TESTS
+class TestOrderJournal(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from journal import OrderJournal
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'order_journal.log')
+        self.journal = OrderJournal(self.path)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp_dir.cleanup()
+
+    def test_replay_returns_appended_events(self):
+        self.journal.append(['add', 1, 'Latte', 8000, 'Coffee'])
+        self.journal.append(['remove', 1])
+
+        self.assertEqual(self.journal.replay(), [['add', 1, 'Latte', 8000, 'Coffee'], ['remove', 1]])
+
+    def test_replay_ignores_torn_last_line(self):
+        self.journal.append(['add', 1, 'Latte', 8000, 'Coffee'])
+        self.journal.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'["add",2,"Moc')
+
+        self.assertEqual(self.journal.replay(), [['add', 1, 'Latte', 8000, 'Coffee']])
+
+    def test_reset_empties_journal(self):
+        self.journal.append(['add', 1, 'Latte', 8000, 'Coffee'])
+
+        self.journal.reset()
+
+        self.assertEqual(self.journal.replay(), [])
+
+    def test_model_restores_open_order_after_restart(self):
+        with patch('model.DatabaseManager') as database_manager:
+            database_manager.return_value.read_settings.return_value = {}
+            database_manager.return_value.receipt_spool_dir = ''
+            database_manager.return_value.load_business_date.return_value = datetime.date.today()
+            from model import AppModel
+            model = AppModel(journal_path=self.path)
+            model.db.get_item_details.side_effect = lambda item_id: {1: ('Latte', 8000, 'Coffee'), 2: ('Mocha', 11000, 'Coffee')}[item_id]
+            model.add_item_to_order(1)
+            model.add_item_to_order(1)
+            model.add_item_to_order(2)
+            model.remove_item_from_order(2)
+            model.journal.close()
+
+            restarted = AppModel(journal_path=self.path)
+
+        self.assertEqual(restarted.current_order, {1: OrderLine('Latte', 8000, 2, 'Coffee')})
+
+# BACKUP TESTS
+class TestBackupService(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from database import DatabaseManager
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(os.path.join(self.tmp_dir.name, 'pos.db'),
+                                          backup_dir=os.path.join(self.tmp_dir.name, 'backups'))
+        self.service = self.db_manager.backup_service
+
+    def tearDown(self):
+        self.service.wait()
+        self.db_manager.conn.close()
+        self.tmp_dir.cleanup()
+
+    def test_run_backup_creates_verified_copy(self):
+        from backup import verify_backup
+
+        path = self.service.run_backup('test')
+
+        self.assertIsNotNone(path)
+        self.assertTrue(verify_backup(path))
+        self.assertEqual(self.db_manager.list_backups(), [path])
+
+    def test_rotation_keeps_newest_backups(self):
+        self.service.keep = 2
+        paths = [self.service.run_backup('test') for _ in range(3)]
+
+        self.assertEqual(self.db_manager.list_backups(), [paths[2], paths[1]])
+
+    def test_save_eod_summary_triggers_background_backup(self):
+        summary = EodSummary('2025-01-01', 0, [], [])
+
+        self.assertTrue(self.db_manager.save_eod_summary(summary))
+        self.service.wait(timeout=10)
+
+        self.assertEqual(len(self.db_manager.list_backups()), 1)
+        self.assertTrue(self.db_manager.list_backups()[0].endswith('-eod.db'))
+
+    def test_restore_backup_brings_back_deleted_item(self):
+        path = self.service.run_backup('test')
+        item_id = [row[0] for row in self.db_manager.read_menu_items() if row[1] == 'Latte'][0]
+        self.db_manager.delete_menu_item(item_id)
+
+        self.assertTrue(self.db_manager.restore_backup(path))
+
+        self.assertIn('Latte', [row[1] for row in self.db_manager.read_menu_items()])
+
+# DATABASE MAINTENANCE TESTS
+class TestDatabaseMaintenance(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from database import DatabaseManager
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'pos.db')
+        self.db_manager = DatabaseManager(self.path)
+        self.scheduler = self.db_manager.maintenance
+
+    def tearDown(self):
+        self.db_manager.conn.close()
+        self.tmp_dir.cleanup()
+
+    def _fill_and_delete_sales(self, count=3000):
+        latte = OrderLine('Latte', 8000, 1, 'Coffee')
+        self.db_manager.conn.executemany(
+            "INSERT INTO sales (item_name, category, quantity, price, total, sale_date) VALUES (?, ?, ?, ?, ?, ?)",
+            [(latte.name + ' ' * 200, latte.category, 1, latte.price, latte.price, '2025-03-03 09:00:00')] * count)
+        self.db_manager.conn.commit()
+        self.db_manager.conn.execute("DELETE FROM sales")
+        self.db_manager.conn.commit()
+
+    def test_new_database_uses_incremental_auto_vacuum(self):
+        self.assertEqual(self.db_manager.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_run_reclaims_free_pages_and_gathers_statistics(self):
+        self._fill_and_delete_sales()
+
+        run = self.scheduler.run_once()
+
+        self.assertGreater(run.pages_freed, 0)
+        self.assertGreater(run.bytes_reclaimed, 0)
+        self.assertEqual(self.db_manager.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        self.assertIn('analyze', run.steps)
+        self.assertIn('wal_checkpoint', run.steps)
+        self.assertIsNotNone(self.db_manager.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone())
+
+    def test_vacuum_steps_are_bounded(self):
+        self._fill_and_delete_sales()
+        self.scheduler.step_pages, self.scheduler.max_steps = 10, 2
+
+        run = self.scheduler.run_once()
+
+        self.assertEqual(run.pages_freed, 20)
+        self.assertGreater(self.db_manager.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+    def test_older_database_is_converted_to_incremental(self):
+        import sqlite3
+        from maintenance import MaintenanceScheduler
+        path = os.path.join(self.tmp_dir.name, 'old.db')
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, item_name TEXT)")
+        conn.commit()
+        conn.close()
+
+        scheduler = MaintenanceScheduler(path)
+
+        # An idle pass never rewrites the whole file
+        self.assertNotIn('vacuum', scheduler.run_once().steps)
+        run = scheduler.run_once(convert=True)
+
+        self.assertIn('vacuum', run.steps)
+        conn = sqlite3.connect(path)
+        self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        conn.close()
+
+    def test_closing_the_business_day_requests_the_conversion(self):
+        self.assertFalse(self.scheduler._conversion_requested)
+
+        self.assertIsNotNone(self.db_manager.close_business_day(datetime.date(2025, 3, 3)))
+
+        self.assertTrue(self.scheduler._conversion_requested)
+
+    def test_due_only_after_checkouts_stop(self):
+        from maintenance import MaintenanceScheduler
+        now = [1000.0]
+        scheduler = MaintenanceScheduler(self.path, idle_seconds=300, interval=3600, clock=lambda: now[0])
+
+        self.assertFalse(scheduler.due())
+        now[0] += 301
+        self.assertTrue(scheduler.due())
+        scheduler.note_activity()
+        self.assertFalse(scheduler.due())
+        now[0] += 301
+        scheduler.run_once()
+        now[0] += 301
+        self.assertFalse(scheduler.due())
+
+# REPORT ENGINE TESTS
+class TestReportEngine(unittest.TestCase):
+    def setUp(self):
+        from database import DatabaseManager
+        from reports import ReportEngine
+        self.db_manager = DatabaseManager(':memory:')
+        self.engine = ReportEngine(self.db_manager.conn)
+
+    def tearDown(self):
+        self.db_manager.conn.close()
+
+    def test_build_computes_all_aggregates(self):
+        latte = OrderLine('Latte', 8000, 3, 'Coffee')
+        croissant = OrderLine('Croissant', 7000, 1, 'Pastry')
+        self.db_manager.record_sale([latte, croissant], '2025-03-03 09:00:00')
+        self.db_manager.record_sale([croissant], '2025-03-04 09:00:00')
+
+        report = self.engine.build('day', datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+
+        self.assertFalse(report.empty)
+        self.assertEqual(report.top_items.index[0], 'Latte')
+        self.assertEqual(report.top_items['Croissant'], 2)
+        self.assertAlmostEqual(report.category_revenue['Coffee'], 240.0)
+        self.assertEqual(list(report.revenue_trend.values), [310.0, 70.0])
+
+    def test_build_reads_typed_columns(self):
+        self.db_manager.record_sale([OrderLine('Latte', 8000, 1, 'Coffee')], '2025-03-03 09:00:00')
+
+        frame = self.engine.read_rollup('day', datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+
+        self.assertEqual(str(frame['item_name'].dtype), 'category')
+        self.assertEqual(str(frame['quantity'].dtype), 'int64')
+
+    def test_build_includes_weekday_hour_heatmap(self):
+        latte = OrderLine('Latte', 8000, 1, 'Coffee')
+        self.db_manager.record_sale([latte], '2025-03-03 09:15:00')
+        self.db_manager.record_sale([latte], '2025-03-03 09:45:00')
+        self.db_manager.record_sale([latte], '2025-03-08 14:00:00')
+
+        report = self.engine.build('day', datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+
+        self.assertEqual(report.hourly_orders.shape, (7, 24))
+        self.assertEqual(report.hourly_orders[0, 9], 2)
+        self.assertEqual(report.hourly_orders[5, 14], 1)
+        self.assertEqual(report.hourly_orders.sum(), 3)
+
+    def test_rebuilt_hourly_aggregate_matches_incremental(self):
+        latte = OrderLine('Latte', 8000, 2, 'Coffee')
+        self.db_manager.record_sale([latte], '2025-03-03 09:15:00')
+        self.db_manager.record_sale([latte], '2025-03-09 18:00:00')
+        incremental = self.db_manager.get_sales_by_hour(datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+
+        self.db_manager.rebuild_sales_rollup()
+
+        rebuilt = self.db_manager.get_sales_by_hour(datetime.date(2025, 3, 1), datetime.date(2025, 3, 31))
+        self.assertEqual(sorted(rebuilt), sorted(incremental))
+
+    def test_build_empty_range(self):
+        report = self.engine.build('month', datetime.date(2020, 1, 1), datetime.date(2020, 12, 31))
+
+        self.assertTrue(report.empty)
+
+# DEMAND FORECAST TESTS
+class TestDemandForecast(unittest.TestCase):
+    def setUp(self):
+        from database import DatabaseManager
+        from forecast import DemandForecaster
+        self.db_manager = DatabaseManager(':memory:')
+        self.forecaster = DemandForecaster(self.db_manager.conn)
+        # Monday
+        self.first_day = datetime.date(2025, 1, 6)
+
+    def tearDown(self):
+        self.db_manager.conn.close()
+
+    def record_days(self, name, quantities, first_day=None):
+        first_day = first_day or self.first_day
+        for offset, qty in enumerate(quantities):
+            if qty:
+                sale_date = (first_day + datetime.timedelta(days=offset)).strftime('%Y-%m-%d 09:00:00')
+                self.db_manager.record_sale([OrderLine(name, 8000, qty, 'Coffee')], sale_date)
+
+    def test_forecast_follows_weekday_pattern(self):
+        # Six weeks of 10 a day on weekdays, 30 on Saturdays, nothing on Sundays
+        self.record_days('Latte', [10, 10, 10, 10, 10, 30, 0] * 6 + [10] * 5)
+        sunday = self.first_day + datetime.timedelta(days=41)
+        monday = self.first_day + datetime.timedelta(days=42)
+        saturday = self.first_day + datetime.timedelta(days=47)
+
+        self.assertEqual(self.forecaster.forecast(sunday).get('Latte'), 0.0)
+        self.assertAlmostEqual(self.forecaster.forecast(monday).get('Latte'), 10.0, places=6)
+        self.assertAlmostEqual(self.forecaster.forecast(saturday).get('Latte'), 30.0, places=6)
+
+    def test_forecast_weights_recent_days_more(self):
+        self.record_days('Mocha', [5] * 28 + [20] * 14)
+
+        forecast = self.forecaster.forecast(self.first_day + datetime.timedelta(days=42)).get('Mocha')
+
+        self.assertGreater(forecast, 15)
+        self.assertLess(forecast, 20)
+
+    def test_forecast_is_vectorized_over_items(self):
+        from benchmarks import fill_daily_rollup
+        monday = datetime.date(2025, 3, 3)
+        fill_daily_rollup(self.db_manager.conn, 40, 365, monday - datetime.timedelta(days=1))
+
+        result = self.forecaster.forecast(monday)
+        saturday = self.forecaster.forecast(monday - datetime.timedelta(days=2))
+
+        self.assertEqual(len(result), 40)
+        self.assertTrue((result.forecast > 0).all())
+        # The synthetic history sells twice as much on Saturdays as on Mondays
+        ratio = sorted(saturday.forecast / result.forecast)[20]
+        self.assertGreater(ratio, 1.8)
+        self.assertLess(ratio, 2.2)
+
+    def test_renamed_item_keeps_its_demand_history(self):
+        self.record_days('Latte', [10] * 14)
+        latte = [item for item in self.db_manager.read_menu_items() if item.name == 'Latte'][0]
+        self.db_manager.update_menu_item(latte.id, 'Cafe Latte', latte.price, latte.stock, latte.category)
+
+        result = self.forecaster.forecast(self.first_day + datetime.timedelta(days=14))
+
+        self.assertAlmostEqual(result.get('Cafe Latte'), 10.0, places=6)
+        self.assertEqual(result.get('Latte'), 0.0)
+
+    def test_forecast_is_cached_for_the_day(self):
+        self.record_days('Latte', [10] * 14)
+        day = self.first_day + datetime.timedelta(days=14)
+
+        first = self.forecaster.forecast(day)
+        # Sales of the forecast day itself are not part of its history
+        self.record_days('Latte', [50], first_day=day)
+
+        self.assertIs(self.forecaster.forecast(day), first)
+        self.forecaster.invalidate()
+        self.assertIsNot(self.forecaster.forecast(day), first)
+        self.assertAlmostEqual(self.forecaster.forecast(day).get('Latte'), 10.0, places=6)
+
+    def test_prep_list_uses_menu_stock(self):
+        from records import MenuItem
+        self.record_days('Latte', [12] * 14)
+        self.record_days('Croissant', [4] * 14)
+        self.record_days('Retired Tart', [30] * 14)
+        menu = [MenuItem(1, 'Latte', 8000, 5, 'Coffee', 10), MenuItem(2, 'Croissant', 7000, 9, 'Pastry', 5)]
+
+        prep = self.forecaster.prep_list(self.first_day + datetime.timedelta(days=14), menu)
+
+        self.assertEqual([item.name for item in prep], ['Latte', 'Croissant'])
+        self.assertEqual(prep[0].to_prepare, 7)
+        self.assertEqual(prep[1].to_prepare, 0)
+        self.assertEqual(prep[1].category, 'Pastry')
+
+    def test_empty_history(self):
+        self.assertEqual(self.forecaster.prep_list(self.first_day, []), [])
+
+# CONTROLLER TESTS
+class TestAppController(unittest.TestCase):
+    
+    def setUp(self):
+        self.mock_model = Mock()
+        self.mock_app = Mock()
+        
+        with patch('controller.LoginDialog'):
+            with patch('controller.CoffeeShopPOSView'):
+                from controller import AppController
+                self.controller = AppController(self.mock_model, self.mock_app)
+    
+    def test_controller_init(self):
+        self.assertEqual(self.controller.model, self.mock_model)
+        self.assertEqual(self.controller.app, self.mock_app)
+        self.assertIsNotNone(self.controller.model)
+    
+    @patch('controller.LoginDialog')
+    def test_init_login_flow_first_time(self, mock_login_dialog_class):
+        mock_dialog_instance = Mock()
+        mock_login_dialog_class.return_value = mock_dialog_instance
+        mock_dialog_instance.exec_.return_value = 1
+        
+        with patch('controller.CoffeeShopPOSView'):
+            from controller import AppController
+            controller = AppController(self.mock_model, self.mock_app)
+        
+        mock_login_dialog_class.assert_called()
+        mock_dialog_instance.exec_.assert_called()
+    
+    def test_handle_logout(self):
+        self.controller.main_window = Mock()
+        self.controller.main_window.show_info = Mock()
+        
+        with patch.object(self.controller, 'init_login_flow'):
+            self.controller.handle_logout()
+            self.controller.init_login_flow.assert_called()
+    
+    def test_refresh_all_data_cashier(self):
+        self.mock_model.user_role = 'Cashier'
+        self.mock_model.get_menu_items.return_value = []
+        self.mock_model.current_order = {}
+        self.mock_model.calculate_order_total.return_value = 0
+        
+        self.controller.main_window = Mock()
+        
+        self.controller.refresh_all_data()
+        
+        self.mock_model.get_menu_items.assert_called()
+        self.controller.main_window.update_menu_display.assert_called()
+    
+    def test_refresh_all_data_manager(self):
+        self.mock_model.user_role = 'Manager'
+        self.mock_model.get_menu_items.return_value = []
+        self.mock_model.current_order = {}
+        self.mock_model.calculate_order_total.return_value = 0
+        self.mock_model.get_menu_categories.return_value = ['Coffee', 'Pastry']
+        self.mock_model.get_usernames.return_value = ['user1', 'user2']
+        
+        self.controller.main_window = Mock()
+        
+        self.controller.refresh_all_data()
+        
+        self.mock_model.get_menu_items.assert_called()
+        self.controller.main_window.update_admin_menu_table.assert_called()
+
+    def test_handle_low_stock_alert_shows_banner(self):
+        self.controller.main_window = Mock()
+
+        self.controller.handle_low_stock_alert([('Latte', 9, 10)])
+
+        self.controller.main_window.show_low_stock_banner.assert_called_with([('Latte', 9, 10)])
+
+    def test_handle_report_range_change_refreshes_report(self):
+        self.controller.main_window = Mock()
+
+        self.controller.handle_report_range_change('year', '', '')
+
+        self.mock_model.get_report.assert_called_with('year', None, None)
+        self.controller.main_window.update_report_views.assert_called_with(self.mock_model.get_report.return_value)
+
+    def test_payment_goes_straight_to_ready_state(self):
+        self.mock_model.user_role = 'Cashier'
+        self.mock_model.current_order = {1: OrderLine('Latte', 8000, 1, 'Coffee')}
+        self.mock_model.process_order.return_value = (True, 8000, 'abc123')
+        self.controller.main_window = Mock()
+
+        self.controller.handle_process_payment()
+
+        window = self.controller.main_window
+        window.show_info.assert_not_called()
+        window.update_menu_display.assert_not_called()
+        window.show_ready_for_next_order.assert_called_once()
+        self.assertEqual(window.show_ready_for_next_order.call_args[0][:2], (8000, 'abc123'))
+        self.assertEqual(len(self.controller.checkout_timer.samples), 1)
+
+    def test_empty_order_payment_shows_toast(self):
+        self.mock_model.current_order = {}
+        self.controller.main_window = Mock()
+
+        self.controller.handle_process_payment()
+
+        self.controller.main_window.show_toast.assert_called_with("The order is empty.", 'warning')
+        self.mock_model.process_order.assert_not_called()
+
+    def test_checkout_timer_snapshot(self):
+        from controller import CheckoutTimer
+        timer = CheckoutTimer(keep=20)
+        for milliseconds in range(1, 26):
+            timer.record(milliseconds / 1000)
+
+        snapshot = timer.snapshot()
+
+        self.assertEqual(snapshot['checkouts'], 20)
+        self.assertAlmostEqual(snapshot['last_ms'], 25)
+        self.assertAlmostEqual(snapshot['avg_ms'], 15.5)
+        self.assertAlmostEqual(snapshot['p95_ms'], 25)
+        self.assertEqual(CheckoutTimer().snapshot()['checkouts'], 0)
+
+    def test_refund_shows_amount_and_refreshes_history(self):
+        self.mock_model.refund_receipt.return_value = 6667
+        self.mock_model.user_role = 'Cashier'
+        self.controller.main_window = Mock()
+
+        self.controller.handle_refund_receipt('abc123', {'Latte': 1})
+
+        self.mock_model.refund_receipt.assert_called_with('abc123', {'Latte': 1})
+        self.controller.main_window.show_toast.assert_called_with("Refunded ₱66.67.", 'success')
+        self.controller.main_window.update_transaction_history.assert_called()
+
+    def test_eod_refresh_shows_prep_list_for_open_day(self):
+        self.mock_model.current_pos_date = datetime.date(2025, 3, 8)
+        self.controller.main_window = Mock()
+
+        self.controller.refresh_eod_summary()
+
+        self.controller.main_window.update_prep_list_view.assert_called_with(
+            self.mock_model.get_prep_list.return_value, datetime.date(2025, 3, 8))
+
+
+
+# VIEW TESTS
+class TestViewComponents(unittest.TestCase):
+    
+    def test_view_imports(self):
+        try:
+            import view
+            self.assertTrue(True)
+        except ImportError as e:
+            self.fail(f"Failed to import view module: {e}")
+    
+    def test_create_label(self):
+        from view import create_label
+        
+        with patch('view.QLabel') as mock_label:
+            label = create_label("Test Label", font_size=12, bold=False)
+            self.assertIsNotNone(label)
+    
+    def test_create_button_primary(self):
+        from view import create_button
+        
+        with patch('view.QPushButton'):
+            button = create_button("Test Button", style_class="primary")
+            self.assertIsNotNone(button)
+    
+    def test_create_button_secondary(self):
+        from view import create_button
+        
+        with patch('view.QPushButton'):
+            button = create_button("Test Button", style_class="secondary")
+            self.assertIsNotNone(button)
+
+    def make_menu_model(self):
+        from records import MenuItem
+        from view import MenuTableModel
+        items = [MenuItem(1, 'Latte', 8000, 10, 'Coffee', 5), MenuItem(2, 'Croissant', 7000, 4, 'Pastry', 5),
+                 MenuItem(10, 'Mocha', 9500, 12, 'Coffee', 5)]
+        model = MenuTableModel()
+        model.set_items(items)
+        return model, items
+
+    def test_menu_table_refresh_signals_only_changed_rows(self):
+        model, items = self.make_menu_model()
+        changed, resets = [], []
+        model.dataChanged.connect(lambda top_left, bottom_right: changed.append((top_left.row(), bottom_right.row())))
+        model.modelReset.connect(lambda: resets.append(True))
+
+        model.set_items([items[0], items[1]._replace(stock=3), items[2]])
+
+        self.assertEqual((changed, resets), ([(1, 1)], []))
+        self.assertEqual(model.data(model.index(1, 4)), '3')
+        self.assertEqual(model.data(model.index(2, 3)), '95.00')
+
+    def test_menu_proxy_filters_and_sorts_numerically(self):
+        from PyQt5.QtCore import Qt
+        from view import MenuFilterProxyModel
+        model, _ = self.make_menu_model()
+        proxy = MenuFilterProxyModel()
+        proxy.setSourceModel(model)
+
+        proxy.sort(0, Qt.DescendingOrder)
+        self.assertEqual([proxy.index(row, 0).data() for row in range(proxy.rowCount())], ['10', '2', '1'])
+        proxy.set_query('COF')
+        self.assertEqual(sorted(proxy.index(row, 1).data() for row in range(proxy.rowCount())), ['Latte', 'Mocha'])
+
+# MAIN TESTS
+class TestMainModule(unittest.TestCase):
+    
+    @patch('main.QApplication')
+    @patch('main.AppController')
+    @patch('main.AppModel')
+    @patch('main.sys.exit')
+    def test_main_imports(self, mock_exit, mock_model, mock_controller, mock_app):
+        try:
+            import main
+            self.assertIsNotNone(main.QApplication)
+            self.assertIsNotNone(main.AppModel)
+            self.assertIsNotNone(main.AppController)
+        except ImportError as e:
+            self.fail(f"Failed to import required modules in main: {e}")
+    
+    def test_main_is_executable(self):
+        main_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+        with open(main_file, 'r') as f:
+            content = f.read()
+            self.assertIn("if __name__ == '__main__'", content)
+
+
+if __name__ == '__main__':
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    
+    suite.addTests(loader.loadTestsFromTestCase(TestAppModel))
+    suite.addTests(loader.loadTestsFromTestCase(TestDatabaseManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportEngine))
+    suite.addTests(loader.loadTestsFromTestCase(TestDemandForecast))
+    suite.addTests(loader.loadTestsFromTestCase(TestSalesArchive))
+    suite.addTests(loader.loadTestsFromTestCase(TestPromotionEngine))
+    suite.addTests(loader.loadTestsFromTestCase(TestEodHistory))
+    suite.addTests(loader.loadTestsFromTestCase(TestMenuIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestMoney))
+    suite.addTests(loader.loadTestsFromTestCase(TestReceiptPrinting))
+    suite.addTests(loader.loadTestsFromTestCase(TestChangeLog))
+    suite.addTests(loader.loadTestsFromTestCase(TestReplication))
+    suite.addTests(loader.loadTestsFromTestCase(TestStoreConsolidation))
+    suite.addTests(loader.loadTestsFromTestCase(TestOrderJournal))
+    suite.addTests(loader.loadTestsFromTestCase(TestBackupService))
+    suite.addTests(loader.loadTestsFromTestCase(TestDatabaseMaintenance))
+    suite.addTests(loader.loadTestsFromTestCase(TestAppController))
+    suite.addTests(loader.loadTestsFromTestCase(TestViewComponents))
+    suite.addTests(loader.loadTestsFromTestCase(TestMainModule))
+    
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    sys.exit(0 if result.wasSuccessful() else 1)
@@ -1,963 +1,1433 @@
-import pandas as pd
-import json
-import matplotlib.pyplot as plt
-from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTabWidget, QLabel, QLineEdit, QPushButton, QTableWidget,
-    QTableWidgetItem, QMessageBox, QGridLayout, QHeaderView,
-    QComboBox, QSizePolicy, QGroupBox, QDialog, QStackedWidget) # Added QStackedWidget
-from PyQt5.QtGui import QFont, QColor, QPalette
-from PyQt5.QtCore import Qt, pyqtSignal
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-
-if 'qt5' not in plt.get_backend().lower():
-    try:
-        plt.switch_backend('Qt5Agg')
-    except ImportError:
-        pass
-
-class GraphCanvas(FigureCanvas):
-    def __init__(self, title, parent=None, width=5, height=4, dpi=100):
-        self.fig, self.ax = plt.subplots(figsize=(width, height), dpi=dpi)
-        super().__init__(self.fig)
-        self.setParent(parent)
-        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.ax.set_title(title, fontsize=12, color='#6F4E37')
-        self.fig.tight_layout()
-        self.updateGeometry()
-
-    def clear_plot(self, title):
-        self.ax.clear()
-        self.ax.set_title(title, fontsize=12, color='#6F4E37')
-        self.ax.text(0.5, 0.5, "No Data Available", ha='center', va='center', fontsize=12)
-        self.ax.set_xticks([])
-        self.ax.set_yticks([])
-        self.draw()
-
-    def plot_top_selling_items(self, df):
-        title = "Top 5 Selling Items (Quantity)"
-        if df.empty: return self.clear_plot(title)
-        self.ax.clear()
-        self.ax.set_title(title, fontsize=14, color='#6F4E37')
-        item_qty = df.groupby('item_name')['quantity'].sum().nlargest(5)
-        self.ax.bar(item_qty.index, item_qty.values, color='#A0522D')
-        self.ax.set_ylabel('Total Quantity Sold', fontsize=10)
-        self.ax.tick_params(axis='x', rotation=45, labelsize=8)
-        self.fig.tight_layout()
-        self.draw()
-
-    def plot_sales_by_category(self, df):
-        title = "Revenue Share by Category"
-        if df.empty: return self.clear_plot(title)
-        self.ax.clear()
-        self.ax.set_title(title, fontsize=14, color='#6F4E37')
-        category_revenue = df.groupby('category')['total'].sum()
-        labels = category_revenue.index
-        values = category_revenue.values
-        colors = ['#6F4E37', '#8B4513', '#A0522D', '#CD853F', '#DEB887', '#D2B48C']
-        self.ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors[:len(labels)])
-        self.ax.axis('equal')
-        self.fig.tight_layout()
-        self.draw()
-
-    def plot_daily_sales(self, df):
-        title = "Daily Revenue Trend"
-        if df.empty: return self.clear_plot(title)
-        self.ax.clear()
-        self.ax.set_title(title, fontsize=14, color='#6F4E37')
-        daily_revenue = df.groupby('date')['total'].sum().reset_index()
-        daily_revenue['date'] = pd.to_datetime(daily_revenue['date'])
-        daily_revenue = daily_revenue.sort_values(by='date')
-        labels = daily_revenue['date'].dt.strftime('%m-%d').tolist()
-        values = daily_revenue['total'].tolist()
-        self.ax.plot(labels, values, marker='o', color='#8B4513', linewidth=2)
-        self.ax.set_ylabel('Revenue (₱)', fontsize=10)
-        self.ax.set_xlabel('Date', fontsize=10)
-        self.ax.tick_params(axis='x', rotation=45, labelsize=8)
-        self.ax.grid(axis='y', linestyle='--', alpha=0.7)
-        self.fig.tight_layout()
-        self.draw()
-
-
-def create_label(text, font_size=12, bold=False):
-    label = QLabel(text)
-    font = QFont("Inter", font_size)
-    font.setBold(bold)
-    label.setFont(font)
-    label.setStyleSheet("color: #6F4E37;")
-    return label
-
-def create_button(text, style_class="primary"):
-    button = QPushButton(text)
-    button.setFont(QFont("Inter", 11, QFont.Bold))
-    if style_class == "primary":
-        style = """
-            QPushButton {background-color: #A0522D; color: white; border: 1px solid #8B4513; border-radius: 8px; padding: 10px 20px;}
-            QPushButton:hover {background-color: #CD853F;}
-        """
-    elif style_class == "secondary":
-        style = """
-            QPushButton {background-color: #D2B48C; color: #6F4E37; border: 1px solid #6F4E37; border-radius: 8px; padding: 10px 15px;}
-            QPushButton:hover {background-color: #DEB887;}
-        """
-    elif style_class == "danger":
-        style = """
-            QPushButton {background-color: #CC0000; color: white; padding: 10px 15px; border-radius: 8px;}
-            QPushButton:hover {background-color: #FF3333;}
-        """
-    button.setStyleSheet(style)
-    return button
-
-
-def create_input(placeholder, is_password=False):
-    line_edit = QLineEdit()
-    line_edit.setPlaceholderText(placeholder)
-    line_edit.setFont(QFont("Inter", 10))
-    if is_password:
-        line_edit.setEchoMode(QLineEdit.Password)
-    line_edit.setStyleSheet("""
-        QLineEdit {padding: 8px; border: 1px solid #D2B48C; border-radius: 5px; background-color: white; color: #4A2C2A;}
-    """)
-    return line_edit
-
-class LoginDialog(QDialog):
-    login_attempted = pyqtSignal(str, str)
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("POS System Login")
-        self.setFixedSize(600, 450)
-        self._setup_style()
-        self._setup_ui()
-
-    def _setup_style(self):
-        self.setStyleSheet("""
-            QDialog {background: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1, stop: 0 #6F4E37, stop: 1 #4A2C2A); border: 2px solid #D2B48C;}
-            QLabel#titleLabel {color: #4A2C2A; font-size: 24pt; font-weight: bold;}
-            QWidget#loginFormContainer {background-color: rgba(255, 255, 255, 0.95); border-radius: 15px; padding: 30px; min-width: 300px; box-shadow: 0 4px 12px rgba(0, 0, 0, 0.4);}
-        """)
-
-    def _setup_ui(self):
-        outer_layout = QVBoxLayout(self)
-        form_container = QWidget()
-        form_container.setObjectName("loginFormContainer")
-        form_layout = QVBoxLayout(form_container)
-        form_layout.setSpacing(15)
-        form_layout.setAlignment(Qt.AlignCenter)
-
-        title_label = create_label("Welcome to CoffeePOS", 18, True)
-        title_label.setAlignment(Qt.AlignCenter)
-        title_label.setObjectName("titleLabel")
-        form_layout.addWidget(title_label)
-
-        subtitle_label = create_label("Sign in to continue", 12, False)
-        subtitle_label.setAlignment(Qt.AlignCenter)
-        form_layout.addWidget(subtitle_label)
-
-        self.username_input = create_input("Username (manager/cashier)")
-        form_layout.addWidget(self.username_input)
-
-        self.password_input = create_input("Password", is_password=True)
-        form_layout.addWidget(self.password_input)
-
-        self.login_button = create_button("Login", "primary")
-        self.login_button.clicked.connect(self._emit_login_signal)
-        form_layout.addWidget(self.login_button)
-
-
-        self.password_input.returnPressed.connect(self._emit_login_signal)
-
-        outer_layout.addStretch(1)
-        outer_layout.addWidget(form_container, alignment=Qt.AlignCenter)
-        outer_layout.addStretch(1)
-
-    def _emit_login_signal(self):
-        username = self.username_input.text()
-        password = self.password_input.text()
-        self.login_attempted.emit(username, password)
-
-    def show_login_error(self, message):
-        QMessageBox.critical(self, "Login Failed", message)
-
-
-
-class ReceiptDetailsDialog(QDialog):
-    """Modal dialog to display receipt details and optionally delete the receipt."""
-    delete_requested = pyqtSignal(str)
-
-    def __init__(self, receipt, parent=None):
-        super().__init__(parent)
-        self.receipt = receipt or {}
-        self.setWindowTitle("Receipt Details")
-        self.setFixedSize(600, 420)
-        layout = QVBoxLayout(self)
-
-        rid = self.receipt.get('receipt_uuid') or self.receipt.get('id', '')
-        id_label = create_label(f"Receipt ID: {rid}", 12, True)
-        date_label = create_label(f"Sale Date: {self.receipt.get('sale_date', '')}", 11, False)
-        created_at_label = create_label(f"Saved At: {self.receipt.get('created_at', '')}", 10, False)
-        total_val = self.receipt.get('total', 0.0)
-        total_label = create_label(f"Total: ₱{total_val:.2f}", 12, True)
-
-        # Prepare items text
-        items = self.receipt.get('items', [])
-        if isinstance(items, str):
-            try:
-                items = json.loads(items)
-            except Exception:
-                items = []
-
-        items_text = ""
-        if items:
-            for it in items:
-                name = it.get('name', '-')
-                qty = it.get('qty', 0)
-                price = it.get('price', 0.0)
-                items_text += f"{name} x{qty} @ ₱{price:.2f}\n"
-        else:
-            items_text = "-"
-
-        items_label = QLabel(items_text)
-        items_label.setFont(QFont("Inter", 10))
-        items_label.setWordWrap(True)
-
-        btn_row = QHBoxLayout()
-        delete_btn = create_button("Delete Receipt", "danger")
-        close_btn = create_button("Close", "secondary")
-        delete_btn.clicked.connect(self._confirm_and_delete)
-        close_btn.clicked.connect(self.accept)
-        btn_row.addWidget(delete_btn)
-        btn_row.addWidget(close_btn)
-
-        layout.addWidget(id_label)
-        layout.addWidget(date_label)
-        layout.addWidget(created_at_label)
-        layout.addWidget(items_label)
-        layout.addWidget(total_label)
-        layout.addLayout(btn_row)
-
-    def _confirm_and_delete(self):
-        reply = QMessageBox.question(self, 'Delete Receipt',
-                                     "Permanently delete this receipt? This cannot be undone.",
-                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            rid = self.receipt.get('receipt_uuid') or self.receipt.get('id')
-            if rid is not None:
-                self.delete_requested.emit(str(rid))
-            self.accept()
-
-
-class CoffeeShopPOSView(QMainWindow):
-    logout_requested = pyqtSignal()
-    menu_item_added = pyqtSignal(str, float, int, str)
-    menu_item_updated = pyqtSignal(int, str, float, int, str)
-    menu_item_deleted = pyqtSignal(int)
-    order_item_clicked = pyqtSignal(int)
-    remove_order_item_requested = pyqtSignal(int) 
-    clear_order_requested = pyqtSignal()
-    process_payment_requested = pyqtSignal()
-    eod_action_requested = pyqtSignal()
-    clear_sales_requested = pyqtSignal()
-    retrieve_archived_requested = pyqtSignal()
-    password_change_requested = pyqtSignal(str, str, str, str)
-    tab_changed = pyqtSignal(str)
-    menu_filter_requested = pyqtSignal(str)
-    delete_receipt_requested = pyqtSignal(str)
-
-    def __init__(self, initial_role):
-        super().__init__()
-        self.user_role = initial_role
-        self.setWindowTitle("Coffee Shop POS System")
-        self.setGeometry(100, 100, 1200, 800)
-        self._setup_style()
-        self._setup_ui()
-        self.stored_categories = []
-
-    def _setup_style(self):
-        self.setFont(QFont("Inter", 10))
-        palette = QPalette()
-        palette.setColor(QPalette.Window, QColor('#F5F5DC'))
-        palette.setColor(QPalette.WindowText, QColor('#4A2C2A'))
-        self.setPalette(palette)
-        self.setStyleSheet("""
-            QMainWindow { background-color: #F5F5DC;}
-            QTabWidget::pane { border: 1px solid #D2B48C; background-color: #FAF0E6;}
-            QTabBar::tab { background: #D2B48C; color: #6F4E37; padding: 10px; border: 1px solid #6F4E37; border-bottom: none; border-top-left-radius: 8px; border-top-right-radius: 8px;}
-            QTabBar::tab:selected { background: #FAF0E6; color: #4A2C2A; font-weight: bold;}
-            QGroupBox { border: 1px solid #D2B48C; border-radius: 8px; margin-top: 10px; padding: 10px; }
-            QGroupBox::title { subcontrol-origin: margin; subcontrol-position: top left; padding: 0 5px; color: #6F4E37; font-weight: bold;}
-            QTableWidget { background-color: white; border-radius: 8px; border: 1px solid #D2B48C;}
-        """)
-
-    def _setup_ui(self):
-        header_widget = QWidget()
-        header_layout = QHBoxLayout(header_widget)
-        header_layout.setContentsMargins(10, 10, 10, 10)
-        self.role_label = create_label(f"User Role: {self.user_role}", 12, True)
-        header_layout.addWidget(self.role_label)
-        header_layout.addStretch(1)
-        self.logout_btn = create_button("    🔒     Logout", "secondary")
-        self.logout_btn.clicked.connect(self.logout_requested.emit)
-        header_layout.addWidget(self.logout_btn)
-
-        self.tabs = QTabWidget()
-        self.tabs.setFont(QFont("Inter", 12, QFont.Bold))
-        self._create_tabs()
-
-        self.tabs.currentChanged.connect(lambda index: self.tab_changed.emit(self.tabs.tabText(index).strip()))
-
-        central_widget = QWidget()
-        main_vbox = QVBoxLayout(central_widget)
-        main_vbox.addWidget(header_widget)
-        main_vbox.addWidget(self.tabs)
-        self.setCentralWidget(central_widget)
-
-    def _create_tabs(self):
-        self.pos_widget = QWidget()
-        self._setup_pos_tab()
-        self.tabs.addTab(self.pos_widget, "      ☕       Point of Sale")
-
-        self.history_widget = QWidget()
-        self._setup_transaction_history_tab()
-        self.tabs.addTab(self.history_widget, "      🧾       Transaction History")
-
-        if self.user_role == 'Manager':
-            self.admin_widget = QWidget()
-            self._setup_admin_tab()
-            self.tabs.addTab(self.admin_widget, "      ⚙️       Menu Management")
-
-            self.report_widget = QWidget()
-            self._setup_report_tab()
-            self.tabs.addTab(self.report_widget, "      📈       Sales Reports")
-
-            self.eod_widget = QWidget()
-            self._setup_eod_tab()
-            self.tabs.addTab(self.eod_widget, "      💰       End of Day")
-
-            self.settings_widget = QWidget()
-            self._setup_settings_tab()
-            self.tabs.addTab(self.settings_widget, "      🛠️       Settings")
-
-    def _setup_pos_tab(self):
-        main_layout = QHBoxLayout(self.pos_widget)
-        main_layout.setSpacing(20)
-
-        menu_box = QVBoxLayout()
-        
-        header_h = QHBoxLayout()
-        title_label = create_label("      ☕       Today's Menu", 16, True)
-        title_label.setAlignment(Qt.AlignCenter)
-        header_h.addStretch(1)
-        header_h.addWidget(title_label)
-        header_h.addStretch(1)
-        menu_box.addLayout(header_h)
-
-        self.menu_stack = QStackedWidget()
-        self.category_page = QWidget() 
-        self.item_page = QWidget()     
-
-        
-        self._setup_item_page()
-    
-
-        self.menu_stack.addWidget(self.category_page)
-        self.menu_stack.addWidget(self.item_page)
-        self.menu_stack.setCurrentIndex(0) 
-
-        menu_box.addWidget(self.menu_stack)
-        menu_box.setStretch(1, 1)
-
-        self.order_table = QTableWidget()
-        self.order_table.setColumnCount(4)
-        self.order_table.setHorizontalHeaderLabels(["Item", "Price (₱)", "Qty", "Subtotal (₱)"])
-        self.order_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        
-        self.order_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.order_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.total_label = create_label("TOTAL: ₱0.00", 18, True)
-
-        btn_layout = QHBoxLayout()
-        clear_btn = create_button("❌ Remove Selected Item", "secondary")
-        clear_btn.clicked.connect(self._handle_remove_order_item)
-        clear_all_btn = create_button("Clear All", "secondary")
-        clear_all_btn.clicked.connect(self.clear_order_requested.emit)
-        checkout_btn = create_button("Process Payment", "primary")
-        checkout_btn.clicked.connect(self.process_payment_requested.emit)
-        btn_layout.addWidget(clear_btn)
-        btn_layout.addWidget(clear_all_btn)
-        btn_layout.addWidget(checkout_btn)
-
-        order_box = QVBoxLayout()
-        order_box.addWidget(create_label("      🛒       Current Order", 16, True))
-        order_box.addWidget(self.order_table)
-        order_box.addWidget(self.total_label)
-        order_box.addLayout(btn_layout)
-
-        main_layout.addLayout(menu_box, 2)
-        main_layout.addLayout(order_box, 1)
-
-    def _setup_item_page(self):
-        """Sets up the layout for displaying item cards and the back button."""
-        layout = QVBoxLayout(self.item_page)
-        
-        
-        self.back_to_categories_btn = create_button("← Back to Categories", "secondary")
-        self.back_to_categories_btn.setFont(QFont("Inter", 12))
-        self.back_to_categories_btn.clicked.connect(self._go_back_to_categories)
-        
-        back_btn_layout = QHBoxLayout()
-        back_btn_layout.addWidget(self.back_to_categories_btn)
-        back_btn_layout.addStretch(1)
-        
-        layout.addLayout(back_btn_layout)
-        
-        
-        self.menu_grid_widget = QWidget()
-        self.menu_grid_layout = QGridLayout(self.menu_grid_widget)
-        self.menu_grid_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-        
-        layout.addWidget(self.menu_grid_widget)
-        layout.setStretch(1, 1) 
-        
-        self.item_page.setLayout(layout)
-
-    
-    def _setup_category_page(self, categories):
-        """Builds the category selection grid with large buttons."""
-        
-        if self.category_page.layout() is not None:
-             
-            QWidget().setLayout(self.category_page.layout())
-        
-        layout = QGridLayout(self.category_page)
-        
-        row, col = 0, 0
-        max_cols = 2
-        
-        for category_name in categories:
-            
-            btn = create_button(category_name, "primary")
-            btn.setFont(QFont("Inter", 20, QFont.Bold)) 
-            btn.setMinimumSize(250, 150) 
-            btn.clicked.connect(lambda _, c=category_name: self.menu_filter_requested.emit(c))
-            
-            layout.addWidget(btn, row, col)
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
-        
-        layout.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
-        self.category_page.setLayout(layout)
-
-    
-    def _go_back_to_categories(self):
-        """Switches the view back to category selection (index 0)."""
-        if self.stored_categories:
-            self._setup_category_page(self.stored_categories)
-        self.menu_stack.setCurrentIndex(0)
-
-
-    def _handle_remove_order_item(self):
-        """Handle removal of selected item from order table."""
-        selected_rows = self.order_table.selectedIndexes()
-        if not selected_rows:
-            QMessageBox.warning(self, "Selection Error", "Please select an item to remove.")
-            return
-        
-        row = selected_rows[0].row()
-        item_name = self.order_table.item(row, 0).text()
-        
-        if hasattr(self, 'current_order_item_ids') and row < len(self.current_order_item_ids):
-            item_id = self.current_order_item_ids[row]
-            self.remove_order_item_requested.emit(item_id)
-
-    def _create_menu_card(self, item_id, name, price, stock, category):
-        widget = QWidget()
-        layout = QVBoxLayout(widget)
-        widget.setStyleSheet(f"""
-            QWidget {{ background-color: #FFFFFF; border: 2px solid #D2B48C; border-radius: 12px; padding: 10px; margin: 5px;}}
-            QWidget:hover {{ border-color: #A0522D;}}
-        """)
-        widget.setProperty('item_id', item_id)
-        widget.mousePressEvent = lambda event: self.order_item_clicked.emit(item_id)
-
-        name_label = create_label(name, 14, True)
-        name_label.setAlignment(Qt.AlignCenter)
-        price_label = create_label(f"₱{price:.2f}", 12, False)
-        price_label.setAlignment(Qt.AlignCenter)
-        stock_label = create_label(f"Stock: {stock}", 10, False)
-        stock_label.setAlignment(Qt.AlignCenter)
-
-        layout.addWidget(name_label)
-        layout.addWidget(price_label)
-        layout.addWidget(stock_label)
-        layout.setSpacing(5)
-        return widget
-
-    def update_menu_display(self, menu_items):
-        for i in reversed(range(self.menu_grid_layout.count())):
-            widget = self.menu_grid_layout.itemAt(i).widget()
-            if widget is not None: widget.deleteLater()
-
-        if menu_items:
-            self.menu_stack.setCurrentIndex(1)
-        
-        row, col = 0, 0
-        max_cols = 3
-        for item_id, name, price, stock, category in menu_items:
-            if stock <= 0: continue
-            card = self._create_menu_card(item_id, name, price, stock, category)
-            self.menu_grid_layout.addWidget(card, row, col)
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
-
-    def update_pos_filters(self, categories):
-        """
-        Populate the POS category buttons. 
-        This is called initially by the controller on startup and switches to category view.
-        """
-        
-        self.stored_categories = categories
-        
-    
-        self._setup_category_page(categories)
-        
-        
-        self.menu_stack.setCurrentIndex(0)
-
-    def update_order_summary(self, order_data, total):
-        self.order_table.setRowCount(0)
-        
-        self.current_order_item_ids = []
-
-        sorted_keys = sorted(order_data.keys())
-        for i, item_id in enumerate(sorted_keys):
-            item = order_data[item_id]
-            subtotal = item['price'] * item['qty']
-            self.current_order_item_ids.append(item_id)  
-            self.order_table.insertRow(i)
-            self.order_table.setItem(i, 0, QTableWidgetItem(item['name']))
-            self.order_table.setItem(i, 1, QTableWidgetItem(f"₱{item['price']:.2f}"))
-            self.order_table.setItem(i, 2, QTableWidgetItem(str(item['qty'])))
-            self.order_table.setItem(i, 3, QTableWidgetItem(f"₱{subtotal:.2f}"))
-
-        self.total_label.setText(f"TOTAL: ₱{total:.2f}")
-
-    def _setup_admin_tab(self):
-        main_layout = QHBoxLayout(self.admin_widget)
-
-        form_widget = QGroupBox("Item Details")
-        form_layout = QVBoxLayout(form_widget)
-        self.id_input = QLineEdit();
-        self.id_input.setVisible(False)
-        self.name_input = create_input("Item Name")
-        self.price_input = create_input("Price (e.g., 250.00)")
-        self.stock_input = create_input("Initial Stock (e.g., 100)")
-        self.category_combo = QComboBox()
-        self.category_combo.setEditable(True)
-        self.category_combo.setFont(QFont("Inter", 10))
-        self.category_combo.setStyleSheet("padding: 5px;")
-
-        form_layout.addWidget(create_label("Category:", 11, True))
-        form_layout.addWidget(self.category_combo)
-        form_layout.addWidget(create_label("Name:", 11, True));
-        form_layout.addWidget(self.name_input)
-        form_layout.addWidget(create_label("Price:", 11, True));
-        form_layout.addWidget(self.price_input)
-        form_layout.addWidget(create_label("Stock:", 11, True));
-        form_layout.addWidget(self.stock_input)
-
-        self.add_btn = create_button("      ➕       Add Item", "primary")
-        self.update_btn = create_button("      ✏️       Update Selected Item", "secondary")
-        self.delete_btn = create_button("      ❌       Delete Selected Item", "secondary")
-        self.clear_form_btn = create_button("Clear Form", "secondary")
-
-        self.add_btn.clicked.connect(self._emit_add_item_signal)
-        self.update_btn.clicked.connect(self._emit_update_item_signal)
-        self.delete_btn.clicked.connect(self._emit_delete_item_signal)
-        self.clear_form_btn.clicked.connect(self.clear_crud_form)
-
-        form_layout.addWidget(self.add_btn)
-        form_layout.addWidget(self.update_btn)
-        form_layout.addWidget(self.delete_btn)
-        form_layout.addWidget(self.clear_form_btn)
-        form_layout.addStretch(1)
-
-        self.menu_table = QTableWidget()
-        self.menu_table.setColumnCount(5)
-        self.menu_table.setHorizontalHeaderLabels(["ID", "Name", "Category", "Price (₱)", "Stock"])
-        self.menu_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.menu_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.menu_table.clicked.connect(self.load_selected_item_to_form)
-
-        # Right side: search + table
-        right_widget = QWidget()
-        right_layout = QVBoxLayout(right_widget)
-        # search input to filter admin menu table
-        self.menu_search_input = create_input("Search menu by name or category")
-        # use textChanged signal to filter rows as the user types
-        try:
-            self.menu_search_input.textChanged.connect(self._filter_admin_menu)
-        except Exception:
-            # fallback for different Qt versions
-            self.menu_search_input.textEdited.connect(self._filter_admin_menu)
-
-        right_layout.addWidget(self.menu_search_input)
-        right_layout.addWidget(self.menu_table)
-
-        main_layout.addWidget(form_widget, 1)
-        main_layout.addWidget(right_widget, 2)
-
-    def _get_form_data(self):
-        name = self.name_input.text().strip()
-        category = self.category_combo.currentText().strip()
-        price_str = self.price_input.text().strip()
-        stock_str = self.stock_input.text().strip()
-        item_id_str = self.id_input.text().strip()
-
-        try:
-            price = float(price_str)
-            stock = int(stock_str)
-            item_id = int(item_id_str) if item_id_str else None
-        except ValueError:
-            return None, "Price must be a number and Stock must be an integer."
-
-        if not name or not category or price <= 0 or stock < 0:
-            return None, "Please fill all fields correctly."
-
-        return (item_id, name, price, stock, category), None
-
-    def _emit_add_item_signal(self):
-        data, error = self._get_form_data()
-        if error:
-            QMessageBox.warning(self, "Input Error", error)
-            return
-        _, name, price, stock, category = data
-        self.menu_item_added.emit(name, price, stock, category)
-
-    def _emit_update_item_signal(self):
-        data, error = self._get_form_data()
-        if error:
-            QMessageBox.warning(self, "Input Error", error)
-            return
-        item_id, name, price, stock, category = data
-        if not item_id:
-            QMessageBox.warning(self, "Selection Error", "Please select an item to update.")
-            return
-        self.menu_item_updated.emit(item_id, name, price, stock, category)
-
-    def _emit_delete_item_signal(self):
-        item_id_str = self.id_input.text()
-        if not item_id_str:
-            QMessageBox.warning(self, "Selection Error", "Please select an item to delete.")
-            return
-
-        reply = QMessageBox.question(self, 'Confirm Deletion',
-                                     f"Are you sure you want to delete Item ID {item_id_str}?",
-                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            self.menu_item_deleted.emit(int(item_id_str))
-
-    def _filter_admin_menu(self, text):
-        """Filter the admin menu table rows by name or category, case-insensitive."""
-        if text is None:
-            text = ""
-        query = text.lower().strip()
-        row_count = self.menu_table.rowCount()
-        for row in range(row_count):
-            try:
-                name_item = self.menu_table.item(row, 1)
-                cat_item = self.menu_table.item(row, 2)
-                name = name_item.text().lower() if name_item and name_item.text() else ""
-                cat = cat_item.text().lower() if cat_item and cat_item.text() else ""
-                match = (query in name) or (query in cat) if query else True
-                self.menu_table.setRowHidden(row, not match)
-            except Exception:
-                # If anything goes wrong, do not hide the row
-                try:
-                    self.menu_table.setRowHidden(row, False)
-                except Exception:
-                    pass
-
-    def update_admin_menu_table(self, items):
-        self.menu_table.setRowCount(len(items))
-        for row, item in enumerate(items):
-            item_id, name, price, stock, category = item
-            self.menu_table.setItem(row, 0, QTableWidgetItem(str(item_id)))
-            self.menu_table.setItem(row, 1, QTableWidgetItem(name))
-            self.menu_table.setItem(row, 2, QTableWidgetItem(category))
-            self.menu_table.setItem(row, 3, QTableWidgetItem(f"{price:.2f}"))
-            self.menu_table.setItem(row, 4, QTableWidgetItem(str(stock)))
-
-    def update_category_combo(self, categories):
-        self.category_combo.clear()
-        self.category_combo.addItems(categories + ['New Category...'])
-        self.category_combo.setCurrentIndex(0)
-
-    def clear_crud_form(self):
-        self.id_input.clear()
-        self.name_input.clear()
-        self.price_input.clear()
-        self.stock_input.clear()
-        self.category_combo.setCurrentIndex(0)
-
-    def load_selected_item_to_form(self):
-        selected_items = self.menu_table.selectedItems()
-        if not selected_items: return
-        row = selected_items[0].row()
-        self.id_input.setText(self.menu_table.item(row, 0).text())
-        self.name_input.setText(self.menu_table.item(row, 1).text())
-        self.category_combo.setCurrentText(self.menu_table.item(row, 2).text())
-        # Remove peso sign if present
-        price_text = self.menu_table.item(row, 3).text().replace('₱', '')
-        self.price_input.setText(price_text)
-        self.stock_input.setText(self.menu_table.item(row, 4).text())
-
-    def _setup_report_tab(self):
-        main_layout = QVBoxLayout(self.report_widget)
-        main_layout.addWidget(create_label("      📈       Sales Reports (Last 30 Days)", 16, True))
-
-        top_row_layout = QHBoxLayout()
-        self.top_items_canvas = GraphCanvas("Top 5 Selling Items (Quantity)")
-        top_row_layout.addWidget(self.top_items_canvas)
-        self.category_sales_canvas = GraphCanvas("Revenue Share by Category")
-        top_row_layout.addWidget(self.category_sales_canvas)
-
-        self.daily_sales_canvas = GraphCanvas("Daily Revenue Trend")
-
-        main_layout.addLayout(top_row_layout)
-        main_layout.addWidget(self.daily_sales_canvas)
-        main_layout.addStretch(1)
-
-    def update_report_views(self, sales_df):
-        if sales_df.empty:
-            self.top_items_canvas.clear_plot("Top 5 Selling Items (Quantity)")
-            self.category_sales_canvas.clear_plot("Revenue Share by Category")
-            self.daily_sales_canvas.clear_plot("Daily Revenue Trend")
-        else:
-            self.top_items_canvas.plot_top_selling_items(sales_df)
-            self.category_sales_canvas.plot_sales_by_category(sales_df)
-            self.daily_sales_canvas.plot_daily_sales(sales_df)
-
-    def _setup_transaction_history_tab(self):
-        main_layout = QVBoxLayout(self.history_widget)
-        main_layout.addWidget(create_label("      🧾       Transaction History", 16, True))
-
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(5)
-        self.history_table.setHorizontalHeaderLabels(["Receipt ID", "Date & Time", "Items", "Total (₱)", "Saved At"]) 
-        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        
-        self.history_table.cellDoubleClicked.connect(lambda r, c: self._show_receipt_dialog(r))
-        main_layout.addWidget(self.history_table)
-
-        btn_row = QHBoxLayout()
-        refresh_btn = create_button("Refresh History", "secondary")
-        refresh_btn.clicked.connect(lambda: self.tab_changed.emit("Transaction History"))
-        btn_row.addWidget(refresh_btn)
-        main_layout.addLayout(btn_row)
-        main_layout.addStretch(1)
-
-    def update_transaction_history(self, receipts):
-        """Receipts should be an iterable of dicts with keys: receipt_uuid, sale_date, items (list), total, created_at"""
-        try:
-            self.history_receipts = list(receipts)
-            self.history_table.setRowCount(len(self.history_receipts))
-            for row, r in enumerate(receipts):
-                receipt_id = r.get('receipt_uuid') or str(r.get('id', ''))
-                sale_date = r.get('sale_date', '')
-                items = r.get('items', [])
-                if isinstance(items, str):
-                    try:
-                        items = json.loads(items)
-                    except Exception:
-                        items = []
-                items_str = ", ".join([f"{it.get('name')} x{it.get('qty')}" for it in items]) if items else "-"
-                total = r.get('total', 0.0)
-                created_at = r.get('created_at', '')
-
-                self.history_table.setItem(row, 0, QTableWidgetItem(receipt_id))
-                self.history_table.setItem(row, 1, QTableWidgetItem(sale_date))
-                self.history_table.setItem(row, 2, QTableWidgetItem(items_str))
-                self.history_table.setItem(row, 3, QTableWidgetItem(f"₱{total:.2f}"))
-                self.history_table.setItem(row, 4, QTableWidgetItem(created_at))
-        except Exception:
-            pass
-
-    def _show_receipt_dialog(self, row=None):
-        """Open a modal dialog showing receipt details for the selected row."""
-        try:
-            if row is None:
-                row = self.history_table.currentRow()
-            if row < 0:
-                return
-            receipt = None
-            if hasattr(self, 'history_receipts') and row < len(self.history_receipts):
-                receipt = self.history_receipts[row]
-            if receipt is None:
-                QMessageBox.warning(self, "No Data", "Receipt details are not available.")
-                return
-
-            dlg = ReceiptDetailsDialog(receipt, parent=self)
-            dlg.delete_requested.connect(lambda rid: self.delete_receipt_requested.emit(rid))
-            dlg.exec_()
-        except Exception:
-            pass
-
-    def _setup_eod_tab(self):
-        main_layout = QVBoxLayout(self.eod_widget)
-        main_layout.setSpacing(15)
-
-        self.simulated_date_display = create_label("", 18, True);
-        self.simulated_date_display.setStyleSheet("color: #8B4513;")
-        main_layout.addWidget(self.simulated_date_display)
-        main_layout.addWidget(create_label("      💰       End of Day Operations & Summary", 18, True))
-
-        summary_group = QGroupBox("Current Day Summary");
-        summary_group.setStyleSheet("QGroupBox {background-color: #EDEAE4; border-radius: 10px; padding: 20px;}")
-        summary_layout = QGridLayout(summary_group)
-        self.eod_date_label = create_label("Report Date: --", 14, True)
-        self.eod_rev_label = create_label("Total Revenue: ₱0.00", 16, True)
-        self.eod_top_items_label = create_label("Top 3 Sellers:\n-", 12, False)
-        self.eod_low_stock_label = create_label("Low Stock Items:\n-", 12, False)
-        summary_layout.addWidget(self.eod_date_label, 0, 0, 1, 2)
-        summary_layout.addWidget(self.eod_rev_label, 1, 0, 1, 2)
-        summary_layout.addWidget(self.eod_top_items_label, 2, 0)
-        summary_layout.addWidget(self.eod_low_stock_label, 2, 1)
-        main_layout.addWidget(summary_group)
-
-        eod_btn = create_button("      💾       Save EOD & Start Next Day", "primary")
-        eod_btn.clicked.connect(self.eod_action_requested.emit)
-        main_layout.addWidget(eod_btn)
-
-        retrieve_btn = create_button("      🔁       Retrieve Cleared EOD Records", "secondary")
-        retrieve_btn.clicked.connect(self._confirm_retrieve_archived)
-        main_layout.addWidget(retrieve_btn)
-
-        main_layout.addWidget(create_label("      📄       Past End of Day Records", 14, True))
-        self.past_eod_table = QTableWidget()
-        self.past_eod_table.setColumnCount(4)
-        self.past_eod_table.setHorizontalHeaderLabels(["Date", "Revenue (₱)", "Top Items", "Low Stock"])
-        self.past_eod_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        main_layout.addWidget(self.past_eod_table)
-
-        main_layout.addWidget(create_label("      ⚠️       Admin Action: Delete ALL Sales Records", 12, True))
-        clear_sales_btn = create_button("      ❌       CLEAR ALL HISTORICAL SALES DATA", "danger")
-        clear_sales_btn.clicked.connect(self._prompt_clear_sales_data)
-        main_layout.addWidget(clear_sales_btn)
-        main_layout.addStretch(1)
-
-    def update_eod_summary_view(self, summary, current_date):
-        current_date_str = current_date.strftime('%Y-%m-%d')
-        self.simulated_date_display.setText(f"Simulated POS Date: {current_date_str}")
-        self.eod_date_label.setText(f"Report Date: {current_date_str}")
-        self.eod_rev_label.setText(f"Total Revenue Today: ₱{summary['total_revenue']:.2f}")
-
-        top_items_text = "Top 3 Sellers Today:\n"
-        if summary['top_items']:
-            for name, qty in summary['top_items']:
-                top_items_text += f"- {name} ({qty} units)\n"
-        else:
-            top_items_text += "No sales recorded today."
-        self.eod_top_items_label.setText(top_items_text)
-
-        low_stock_text = "Low Stock Items (<10):\n"
-        if summary['low_stock']:
-            for name, stock in summary['low_stock']:
-                low_stock_text += f"- {name} ({stock} left)\n"
-        else:
-            low_stock_text += "All items are well stocked (>=10)."
-        self.eod_low_stock_label.setText(low_stock_text)
-
-    def update_past_eod_records(self, records):
-        self.past_eod_table.setRowCount(len(records))
-        for row, record in enumerate(records):
-            top_items_str = ", ".join([f"{name} ({qty})" for name, qty in record['top_items']]) or "None"
-            low_stock_str = ", ".join([f"{name} ({stock})" for name, stock in record['low_stock']]) or "None"
-
-            self.past_eod_table.setItem(row, 0, QTableWidgetItem(record['date']))
-            self.past_eod_table.setItem(row, 1, QTableWidgetItem(f"₱{record['revenue']:.2f}"))
-            self.past_eod_table.setItem(row, 2, QTableWidgetItem(top_items_str))
-            self.past_eod_table.setItem(row, 3, QTableWidgetItem(low_stock_str))
-
-    def _prompt_clear_sales_data(self):
-        reply = QMessageBox.critical(self, 'DANGER! Clear All Data',
-                                     "This action will permanently delete **ALL historical sales records AND ALL saved EOD summaries**. Are you absolutely sure you want to proceed?",
-                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            self.clear_sales_requested.emit()
-
-    def _confirm_retrieve_archived(self):
-        reply = QMessageBox.question(self, 'Retrieve Archived Records',
-                                     "Restore archived End-Of-Day summaries that were previously archived before clearing?",
-                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            self.retrieve_archived_requested.emit()
-
-    def _setup_settings_tab(self):
-        main_layout = QVBoxLayout(self.settings_widget)
-        main_layout.setSpacing(20)
-
-        main_layout.addWidget(create_label("      🛠️       User & System Settings", 16, True))
-
-        password_group = QGroupBox("Change User Password (Manager Only)")
-        password_layout = QVBoxLayout(password_group)
-
-        self.pass_username_combo = QComboBox()
-        self.pass_username_combo.setFont(QFont("Inter", 10))
-
-        self.old_password_input = create_input("Old Password", is_password=True)
-        self.new_password_input = create_input("New Password", is_password=True)
-        self.confirm_password_input = create_input("Confirm New Password", is_password=True)
-
-        change_pass_btn = create_button("Update Password", "primary")
-        change_pass_btn.clicked.connect(self._emit_change_password_signal)
-
-        password_layout.addWidget(create_label("User to change:", 11, True))
-        password_layout.addWidget(self.pass_username_combo)
-        password_layout.addWidget(create_label("Old Password:", 11, True))
-        password_layout.addWidget(self.old_password_input)
-        password_layout.addWidget(create_label("New Password:", 11, True))
-        password_layout.addWidget(self.new_password_input)
-        password_layout.addWidget(create_label("Confirm New Password:", 11, True))
-        password_layout.addWidget(self.confirm_password_input)
-        password_layout.addWidget(change_pass_btn)
-
-        main_layout.addWidget(password_group)
-        main_layout.addStretch(1)
-
-    def update_password_combo(self, usernames):
-        self.pass_username_combo.clear()
-        self.pass_username_combo.addItems(usernames)
-
-    def _emit_change_password_signal(self):
-        username = self.pass_username_combo.currentText().strip()
-        old_pass = self.old_password_input.text().strip()
-        new_pass = self.new_password_input.text().strip()
-        confirm_pass = self.confirm_password_input.text().strip()
-
-        if not all([username, old_pass, new_pass, confirm_pass]):
-            QMessageBox.warning(self, "Input Error", "All password fields must be filled.")
-            return
-
-        if new_pass != confirm_pass:
-            QMessageBox.warning(self, "Input Error", "New password and confirmation do not match.")
-            return
-
-        self.password_change_requested.emit(username, old_pass, new_pass, confirm_pass)
-
-    def clear_password_fields(self):
-        self.old_password_input.clear()
-        self.new_password_input.clear()
-        self.confirm_password_input.clear()
-
-    def show_info(self, title, message):
-        QMessageBox.information(self, title, message)
-
-    def show_warning(self, title, message):
-        QMessageBox.warning(self, title, message)
-
-    def show_error(self, title, message):
+import os
+import matplotlib.pyplot as plt
+from PyQt5.QtWidgets import (
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QTabWidget, QLabel, QLineEdit, QPushButton, QTableWidget,
+    QTableWidgetItem, QMessageBox, QGridLayout, QHeaderView,
+    QComboBox, QSizePolicy, QGroupBox, QDialog, QStackedWidget, QDateEdit, QTableView, QSpinBox) # Added QStackedWidget
+from PyQt5.QtGui import QFont, QColor, QPalette
+from PyQt5.QtCore import Qt, pyqtSignal, QDate, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QTimer
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from money import ChargeSettings, format_amount, format_money, to_centavos
+from printing import PRINT_FORMATS, PrintSettings
+
+if 'qt5' not in plt.get_backend().lower():
+    try:
+        plt.switch_backend('Qt5Agg')
+    except ImportError:
+        pass
+
+# bucket -> (trend chart title, x tick date format, x axis label)
+TREND_BUCKET_LABELS = {
+    'day': ("Daily Revenue Trend", '%m-%d', 'Date'),
+    'week': ("Weekly Revenue Trend", '%m-%d', 'Week Starting'),
+    'month': ("Monthly Revenue Trend", '%Y-%m', 'Month'),
+}
+
+# (header, MenuItem field) for each column of the admin menu table
+MENU_TABLE_COLUMNS = [
+    ("ID", 'id'),
+    ("Name", 'name'),
+    ("Category", 'category'),
+    ("Price (₱)", 'price'),
+    ("Stock", 'stock'),
+    ("Reorder At", 'reorder_level'),
+]
+
+# Delay between the last keystroke in the admin menu search and re-filtering the table
+ADMIN_SEARCH_DEBOUNCE_MS = 150
+
+# How long a toast notification stays up before it fades out on its own
+TOAST_TIMEOUT_MS = 2500
+
+# Toast level -> style
+TOAST_STYLES = {
+    'success': "QLabel { background-color: #2E7D32; color: white; border-radius: 10px; padding: 12px 20px; }",
+    'info': "QLabel { background-color: #5D4037; color: white; border-radius: 10px; padding: 12px 20px; }",
+    'warning': "QLabel { background-color: #FFF3CD; color: #5D4037; border: 1px solid #CD853F; border-radius: 10px; padding: 12px 20px; }",
+}
+
+# (combo label, range key) for the Sales Reports range selector
+REPORT_RANGE_OPTIONS = [
+    ("Last 7 Days", 'week'),
+    ("Last 30 Days", 'month'),
+    ("Last Quarter", 'quarter'),
+    ("Last Year", 'year'),
+    ("Custom Range", 'custom'),
+]
+
+
+class GraphCanvas(FigureCanvas):
+    def __init__(self, title, parent=None, width=5, height=4, dpi=100):
+        self.fig, self.ax = plt.subplots(figsize=(width, height), dpi=dpi)
+        super().__init__(self.fig)
+        self.setParent(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.ax.set_title(title, fontsize=12, color='#6F4E37')
+        self.fig.tight_layout()
+        self.updateGeometry()
+
+    def clear_plot(self, title):
+        self.ax.clear()
+        self.ax.set_title(title, fontsize=12, color='#6F4E37')
+        self.ax.text(0.5, 0.5, "No Data Available", ha='center', va='center', fontsize=12)
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.draw()
+
+    def plot_top_selling_items(self, item_qty):
+        title = "Top 5 Selling Items (Quantity)"
+        if item_qty.empty: return self.clear_plot(title)
+        self.ax.clear()
+        self.ax.set_title(title, fontsize=14, color='#6F4E37')
+        self.ax.bar(item_qty.index, item_qty.values, color='#A0522D')
+        self.ax.set_ylabel('Total Quantity Sold', fontsize=10)
+        self.ax.tick_params(axis='x', rotation=45, labelsize=8)
+        self.fig.tight_layout()
+        self.draw()
+
+    def plot_sales_by_category(self, category_revenue):
+        title = "Revenue Share by Category"
+        if category_revenue.empty: return self.clear_plot(title)
+        self.ax.clear()
+        self.ax.set_title(title, fontsize=14, color='#6F4E37')
+        labels = category_revenue.index
+        values = category_revenue.values
+        colors = ['#6F4E37', '#8B4513', '#A0522D', '#CD853F', '#DEB887', '#D2B48C']
+        self.ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors[:len(labels)])
+        self.ax.axis('equal')
+        self.fig.tight_layout()
+        self.draw()
+
+    def plot_daily_sales(self, revenue_trend, bucket='day'):
+        """Plot revenue per bucket from a date-indexed series sorted by date."""
+        title, date_format, x_label = TREND_BUCKET_LABELS.get(bucket, TREND_BUCKET_LABELS['day'])
+        if revenue_trend.empty: return self.clear_plot(title)
+        self.ax.clear()
+        self.ax.set_title(title, fontsize=14, color='#6F4E37')
+        labels = revenue_trend.index.strftime(date_format).tolist()
+        values = revenue_trend.values
+        self.ax.plot(labels, values, marker='o', color='#8B4513', linewidth=2)
+        self.ax.set_ylabel('Revenue (₱)', fontsize=10)
+        self.ax.set_xlabel(x_label, fontsize=10)
+        self.ax.tick_params(axis='x', rotation=45, labelsize=8)
+        self.ax.grid(axis='y', linestyle='--', alpha=0.7)
+        self.fig.tight_layout()
+        self.draw()
+
+    def plot_hourly_heatmap(self, hourly_orders):
+        """Plot a weekday x hour grid of order counts, trimmed to the hours that had sales."""
+        title = "Orders by Weekday & Hour"
+        # The colorbar adds its own axes, so start from a fresh figure each time
+        self.fig.clear()
+        self.ax = self.fig.add_subplot(111)
+        active_hours = hourly_orders.sum(axis=0).nonzero()[0]
+        if len(active_hours) == 0: return self.clear_plot(title)
+        first_hour, last_hour = active_hours[0], active_hours[-1]
+        self.ax.set_title(title, fontsize=14, color='#6F4E37')
+        image = self.ax.imshow(hourly_orders[:, first_hour:last_hour + 1], aspect='auto', cmap='YlOrBr')
+        self.ax.set_yticks(range(7))
+        self.ax.set_yticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'], fontsize=8)
+        hours = list(range(first_hour, last_hour + 1))
+        self.ax.set_xticks(range(len(hours)))
+        self.ax.set_xticklabels([f"{h:02d}" for h in hours], fontsize=8)
+        self.ax.set_xlabel('Hour of Day', fontsize=10)
+        self.fig.colorbar(image, ax=self.ax, label='Orders')
+        self.fig.tight_layout()
+        self.draw()
+
+
+class MenuTableModel(QAbstractTableModel):
+    """The admin menu table's rows, straight from the MenuItems of `read_menu_items`.
+
+    Refreshing with the same items in the same order only signals the rows whose values
+    changed, so the view repaints those rows instead of rebuilding the whole table.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.rows = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(MENU_TABLE_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return MENU_TABLE_COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = getattr(self.items[index.row()], MENU_TABLE_COLUMNS[index.column()][1])
+        if role == Qt.DisplayRole:
+            return format_amount(value) if index.column() == 3 else str(value)
+        if role == Qt.UserRole:
+            # Raw value, so IDs, prices and stock sort as numbers
+            return value
+        return None
+
+    def item_at(self, row):
+        return self.items[row]
+
+    def set_items(self, items):
+        items = list(items)
+        if [item.id for item in items] != [item.id for item in self.items]:
+            self.beginResetModel()
+            self.items = items
+            self.rows = {item.id: row for row, item in enumerate(items)}
+            self.endResetModel()
+            return
+        for row, item in enumerate(items):
+            if item != self.items[row]:
+                self.update_item(item)
+
+    def update_item(self, item):
+        """Replace one item's row after an edit; returns False if the item is not in the table."""
+        row = self.rows.get(item.id)
+        if row is None:
+            return False
+        self.items[row] = item
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(MENU_TABLE_COLUMNS) - 1))
+        return True
+
+
+class MenuFilterProxyModel(QSortFilterProxyModel):
+    """Case-insensitive filter on the name and category columns of a MenuTableModel."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.query = ""
+        self.setSortRole(Qt.UserRole)
+
+    def set_query(self, text):
+        self.query = (text or "").lower().strip()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.query:
+            return True
+        item = self.sourceModel().item_at(source_row)
+        return self.query in item.name.lower() or self.query in item.category.lower()
+
+
+def create_label(text, font_size=12, bold=False):
+    label = QLabel(text)
+    font = QFont("Inter", font_size)
+    font.setBold(bold)
+    label.setFont(font)
+    label.setStyleSheet("color: #6F4E37;")
+    return label
+
+def create_button(text, style_class="primary"):
+    button = QPushButton(text)
+    button.setFont(QFont("Inter", 11, QFont.Bold))
+    if style_class == "primary":
+        style = """
+            QPushButton {background-color: #A0522D; color: white; border: 1px solid #8B4513; border-radius: 8px; padding: 10px 20px;}
+            QPushButton:hover {background-color: #CD853F;}
+        """
+    elif style_class == "secondary":
+        style = """
+            QPushButton {background-color: #D2B48C; color: #6F4E37; border: 1px solid #6F4E37; border-radius: 8px; padding: 10px 15px;}
+            QPushButton:hover {background-color: #DEB887;}
+        """
+    elif style_class == "danger":
+        style = """
+            QPushButton {background-color: #CC0000; color: white; padding: 10px 15px; border-radius: 8px;}
+            QPushButton:hover {background-color: #FF3333;}
+        """
+    button.setStyleSheet(style)
+    return button
+
+
+def create_input(placeholder, is_password=False):
+    line_edit = QLineEdit()
+    line_edit.setPlaceholderText(placeholder)
+    line_edit.setFont(QFont("Inter", 10))
+    if is_password:
+        line_edit.setEchoMode(QLineEdit.Password)
+    line_edit.setStyleSheet("""
+        QLineEdit {padding: 8px; border: 1px solid #D2B48C; border-radius: 5px; background-color: white; color: #4A2C2A;}
+    """)
+    return line_edit
+
+class LoginDialog(QDialog):
+    login_attempted = pyqtSignal(str, str)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("POS System Login")
+        self.setFixedSize(600, 450)
+        self._setup_style()
+        self._setup_ui()
+
+    def _setup_style(self):
+        self.setStyleSheet("""
+            QDialog {background: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1, stop: 0 #6F4E37, stop: 1 #4A2C2A); border: 2px solid #D2B48C;}
+            QLabel#titleLabel {color: #4A2C2A; font-size: 24pt; font-weight: bold;}
+            QWidget#loginFormContainer {background-color: rgba(255, 255, 255, 0.95); border-radius: 15px; padding: 30px; min-width: 300px; box-shadow: 0 4px 12px rgba(0, 0, 0, 0.4);}
+        """)
+
+    def _setup_ui(self):
+        outer_layout = QVBoxLayout(self)
+        form_container = QWidget()
+        form_container.setObjectName("loginFormContainer")
+        form_layout = QVBoxLayout(form_container)
+        form_layout.setSpacing(15)
+        form_layout.setAlignment(Qt.AlignCenter)
+
+        title_label = create_label("Welcome to CoffeePOS", 18, True)
+        title_label.setAlignment(Qt.AlignCenter)
+        title_label.setObjectName("titleLabel")
+        form_layout.addWidget(title_label)
+
+        subtitle_label = create_label("Sign in to continue", 12, False)
+        subtitle_label.setAlignment(Qt.AlignCenter)
+        form_layout.addWidget(subtitle_label)
+
+        self.username_input = create_input("Username (manager/cashier)")
+        form_layout.addWidget(self.username_input)
+
+        self.password_input = create_input("Password", is_password=True)
+        form_layout.addWidget(self.password_input)
+
+        self.login_button = create_button("Login", "primary")
+        self.login_button.clicked.connect(self._emit_login_signal)
+        form_layout.addWidget(self.login_button)
+
+
+        self.password_input.returnPressed.connect(self._emit_login_signal)
+
+        outer_layout.addStretch(1)
+        outer_layout.addWidget(form_container, alignment=Qt.AlignCenter)
+        outer_layout.addStretch(1)
+
+    def _emit_login_signal(self):
+        username = self.username_input.text()
+        password = self.password_input.text()
+        self.login_attempted.emit(username, password)
+
+    def show_login_error(self, message):
+        QMessageBox.critical(self, "Login Failed", message)
+
+
+
+class ReceiptDetailsDialog(QDialog):
+    """Modal dialog to display receipt details and optionally print, refund or void the receipt."""
+    print_requested = pyqtSignal(str)
+    # Receipt UUID and {item name: qty} to refund, or None to void the whole receipt
+    refund_requested = pyqtSignal(str, object)
+
+    def __init__(self, receipt, parent=None):
+        super().__init__(parent)
+        self.receipt = receipt
+        self.setWindowTitle("Receipt Details")
+        self.setFixedSize(720, 460)
+        layout = QVBoxLayout(self)
+
+        id_label = create_label(f"Receipt ID: {receipt.receipt_uuid}", 12, True)
+        date_label = create_label(f"Sale Date: {receipt.sale_date}", 11, False)
+        created_at_label = create_label(f"Saved At: {receipt.created_at}", 10, False)
+        total_text = f"Total: {format_money(receipt.total)}"
+        if receipt.service_charge:
+            total_text += f"   (service charge {format_money(receipt.service_charge)})"
+        if receipt.tax:
+            total_text += f"   (tax {format_money(receipt.tax)})"
+        if receipt.refunded:
+            total_text += f"\nRefunded: {format_money(receipt.refunded)}"
+        total_label = create_label(total_text, 12, True)
+        fully_refunded = receipt.refunded >= receipt.total
+
+        # One row per line with how many of it to refund
+        items_grid = QGridLayout()
+        self.refund_spins = {}
+        for row, line in enumerate(receipt.items):
+            line_label = QLabel(f"{line.name} x{line.qty} @ {format_money(line.price)}")
+            line_label.setFont(QFont("Inter", 10))
+            spin = QSpinBox()
+            spin.setRange(0, receipt.refundable_qty(line))
+            spin.setEnabled(not fully_refunded)
+            self.refund_spins[line.name] = spin
+            items_grid.addWidget(line_label, row, 0)
+            items_grid.addWidget(spin, row, 1)
+        if not receipt.items:
+            items_grid.addWidget(QLabel("-"), 0, 0)
+
+        btn_row = QHBoxLayout()
+        print_btn = create_button("Print Receipt", "primary")
+        refund_btn = create_button("Refund Selected", "secondary")
+        void_btn = create_button("Void Receipt", "danger")
+        close_btn = create_button("Close", "secondary")
+        refund_btn.setEnabled(not fully_refunded)
+        void_btn.setEnabled(not fully_refunded)
+        print_btn.clicked.connect(lambda: self.print_requested.emit(self.receipt.receipt_uuid))
+        refund_btn.clicked.connect(self._refund_selected)
+        void_btn.clicked.connect(self._confirm_and_void)
+        close_btn.clicked.connect(self.accept)
+        btn_row.addWidget(print_btn)
+        btn_row.addWidget(refund_btn)
+        btn_row.addWidget(void_btn)
+        btn_row.addWidget(close_btn)
+
+        layout.addWidget(id_label)
+        layout.addWidget(date_label)
+        layout.addWidget(created_at_label)
+        layout.addLayout(items_grid)
+        layout.addWidget(total_label)
+        layout.addLayout(btn_row)
+
+    def _refund_selected(self):
+        quantities = {name: spin.value() for name, spin in self.refund_spins.items() if spin.value() > 0}
+        if not quantities:
+            QMessageBox.information(self, 'Refund', "Choose how many of each item to refund.")
+            return
+        self.refund_requested.emit(self.receipt.receipt_uuid, quantities)
+        self.accept()
+
+    def _confirm_and_void(self):
+        reply = QMessageBox.question(self, 'Void Receipt',
+                                     "Refund everything left on this receipt and put the items back in stock?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.refund_requested.emit(self.receipt.receipt_uuid, None)
+            self.accept()
+
+
+class CoffeeShopPOSView(QMainWindow):
+    logout_requested = pyqtSignal()
+    # Prices are emitted in centavos
+    menu_item_added = pyqtSignal(str, int, int, str, int)
+    menu_item_updated = pyqtSignal(int, str, int, int, str, int)
+    menu_item_deleted = pyqtSignal(int)
+    order_item_clicked = pyqtSignal(int)
+    remove_order_item_requested = pyqtSignal(int) 
+    clear_order_requested = pyqtSignal()
+    process_payment_requested = pyqtSignal()
+    eod_action_requested = pyqtSignal()
+    clear_sales_requested = pyqtSignal()
+    retrieve_archived_requested = pyqtSignal()
+    archive_months_requested = pyqtSignal()
+    password_change_requested = pyqtSignal(str, str, str, str)
+    backup_requested = pyqtSignal()
+    restore_backup_requested = pyqtSignal(str)
+    tab_changed = pyqtSignal(str)
+    report_range_changed = pyqtSignal(str, str, str)
+    menu_filter_requested = pyqtSignal(str)
+    menu_search_requested = pyqtSignal(str)
+    menu_search_submitted = pyqtSignal(str)
+    print_receipt_requested = pyqtSignal(str)
+    refund_receipt_requested = pyqtSignal(str, object)
+    charge_settings_saved = pyqtSignal(object)
+    print_settings_saved = pyqtSignal(object)
+    eod_page_requested = pyqtSignal(int)
+
+    def __init__(self, initial_role):
+        super().__init__()
+        self.user_role = initial_role
+        self.charge_settings = ChargeSettings()
+        self.print_settings = PrintSettings()
+        self.setWindowTitle("Coffee Shop POS System")
+        self.setGeometry(100, 100, 1200, 800)
+        self._setup_style()
+        self._setup_ui()
+        self.stored_categories = []
+
+    def _setup_style(self):
+        self.setFont(QFont("Inter", 10))
+        palette = QPalette()
+        palette.setColor(QPalette.Window, QColor('#F5F5DC'))
+        palette.setColor(QPalette.WindowText, QColor('#4A2C2A'))
+        self.setPalette(palette)
+        self.setStyleSheet("""
+            QMainWindow { background-color: #F5F5DC;}
+            QTabWidget::pane { border: 1px solid #D2B48C; background-color: #FAF0E6;}
+            QTabBar::tab { background: #D2B48C; color: #6F4E37; padding: 10px; border: 1px solid #6F4E37; border-bottom: none; border-top-left-radius: 8px; border-top-right-radius: 8px;}
+            QTabBar::tab:selected { background: #FAF0E6; color: #4A2C2A; font-weight: bold;}
+            QGroupBox { border: 1px solid #D2B48C; border-radius: 8px; margin-top: 10px; padding: 10px; }
+            QGroupBox::title { subcontrol-origin: margin; subcontrol-position: top left; padding: 0 5px; color: #6F4E37; font-weight: bold;}
+            QTableWidget { background-color: white; border-radius: 8px; border: 1px solid #D2B48C;}
+        """)
+
+    def _setup_ui(self):
+        header_widget = QWidget()
+        header_layout = QHBoxLayout(header_widget)
+        header_layout.setContentsMargins(10, 10, 10, 10)
+        self.role_label = create_label(f"User Role: {self.user_role}", 12, True)
+        header_layout.addWidget(self.role_label)
+        header_layout.addStretch(1)
+        self.logout_btn = create_button("    🔒     Logout", "secondary")
+        self.logout_btn.clicked.connect(self.logout_requested.emit)
+        header_layout.addWidget(self.logout_btn)
+
+        # Non-modal low stock banner, shown by the controller when a sale crosses a reorder level
+        self.low_stock_banner = QWidget()
+        self.low_stock_banner.setStyleSheet("QWidget { background-color: #FFF3CD; border: 1px solid #CD853F; border-radius: 8px;}")
+        banner_layout = QHBoxLayout(self.low_stock_banner)
+        banner_layout.setContentsMargins(10, 5, 10, 5)
+        self.low_stock_banner_label = create_label("", 11, True)
+        self.low_stock_banner_label.setWordWrap(True)
+        banner_layout.addWidget(self.low_stock_banner_label, 1)
+        dismiss_btn = create_button("Dismiss", "secondary")
+        dismiss_btn.clicked.connect(self.low_stock_banner.hide)
+        banner_layout.addWidget(dismiss_btn)
+        self.low_stock_banner.hide()
+
+        self.tabs = QTabWidget()
+        self.tabs.setFont(QFont("Inter", 12, QFont.Bold))
+        self._create_tabs()
+
+        self.tabs.currentChanged.connect(lambda index: self.tab_changed.emit(self.tabs.tabText(index).strip()))
+
+        central_widget = QWidget()
+        main_vbox = QVBoxLayout(central_widget)
+        main_vbox.addWidget(header_widget)
+        main_vbox.addWidget(self.low_stock_banner)
+        main_vbox.addWidget(self.tabs)
+        self.setCentralWidget(central_widget)
+
+        # Non-modal notifications: a toast over the bottom of the window that hides itself, echoed in
+        # the status bar, so confirmations never need an extra tap to dismiss
+        self.toast = QLabel(self)
+        self.toast.setFont(QFont("Inter", 12, QFont.Bold))
+        self.toast.mousePressEvent = lambda event: self.toast.hide()
+        self.toast.hide()
+        self.toast_timer = QTimer(self)
+        self.toast_timer.setSingleShot(True)
+        self.toast_timer.timeout.connect(self.toast.hide)
+        self.ready_label = create_label("Ready for next order", 10, True)
+        self.statusBar().addPermanentWidget(self.ready_label)
+
+    def _create_tabs(self):
+        self.pos_widget = QWidget()
+        self._setup_pos_tab()
+        self.tabs.addTab(self.pos_widget, "      ☕       Point of Sale")
+
+        self.history_widget = QWidget()
+        self._setup_transaction_history_tab()
+        self.tabs.addTab(self.history_widget, "      🧾       Transaction History")
+
+        if self.user_role == 'Manager':
+            self.admin_widget = QWidget()
+            self._setup_admin_tab()
+            self.tabs.addTab(self.admin_widget, "      ⚙️       Menu Management")
+
+            self.report_widget = QWidget()
+            self._setup_report_tab()
+            self.tabs.addTab(self.report_widget, "      📈       Sales Reports")
+
+            self.eod_widget = QWidget()
+            self._setup_eod_tab()
+            self.tabs.addTab(self.eod_widget, "      💰       End of Day")
+
+            self.settings_widget = QWidget()
+            self._setup_settings_tab()
+            self.tabs.addTab(self.settings_widget, "      🛠️       Settings")
+
+    def _setup_pos_tab(self):
+        main_layout = QHBoxLayout(self.pos_widget)
+        main_layout.setSpacing(20)
+
+        menu_box = QVBoxLayout()
+        
+        header_h = QHBoxLayout()
+        title_label = create_label("      ☕       Today's Menu", 16, True)
+        title_label.setAlignment(Qt.AlignCenter)
+        header_h.addStretch(1)
+        header_h.addWidget(title_label)
+        header_h.addStretch(1)
+        menu_box.addLayout(header_h)
+
+        self.pos_search_input = create_input("🔎 Type an item name or quick code, Enter adds the first match")
+        self.pos_search_input.setClearButtonEnabled(True)
+        self.pos_search_input.textChanged.connect(self.menu_search_requested)
+        self.pos_search_input.returnPressed.connect(
+            lambda: self.menu_search_submitted.emit(self.pos_search_input.text()))
+        menu_box.addWidget(self.pos_search_input)
+
+        self.menu_stack = QStackedWidget()
+        self.category_page = QWidget() 
+        self.item_page = QWidget()     
+
+        
+        self._setup_item_page()
+    
+
+        self.menu_stack.addWidget(self.category_page)
+        self.menu_stack.addWidget(self.item_page)
+        self.menu_stack.setCurrentIndex(0) 
+
+        menu_box.addWidget(self.menu_stack)
+        menu_box.setStretch(2, 1)
+
+        self.order_table = QTableWidget()
+        self.order_table.setColumnCount(4)
+        self.order_table.setHorizontalHeaderLabels(["Item", "Price (₱)", "Qty", "Subtotal (₱)"])
+        self.order_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        
+        self.order_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.order_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.total_label = create_label("TOTAL: ₱0.00", 18, True)
+        self.promotions_label = create_label("", 11, False)
+        self.promotions_label.setWordWrap(True)
+        self.promotions_label.hide()
+        self.charges_label = create_label("", 11, False)
+        self.charges_label.hide()
+
+        btn_layout = QHBoxLayout()
+        clear_btn = create_button("❌ Remove Selected Item", "secondary")
+        clear_btn.clicked.connect(self._handle_remove_order_item)
+        clear_all_btn = create_button("Clear All", "secondary")
+        clear_all_btn.clicked.connect(self.clear_order_requested.emit)
+        checkout_btn = create_button("Process Payment", "primary")
+        checkout_btn.clicked.connect(self.process_payment_requested.emit)
+        btn_layout.addWidget(clear_btn)
+        btn_layout.addWidget(clear_all_btn)
+        btn_layout.addWidget(checkout_btn)
+
+        order_box = QVBoxLayout()
+        order_box.addWidget(create_label("      🛒       Current Order", 16, True))
+        order_box.addWidget(self.order_table)
+        order_box.addWidget(self.promotions_label)
+        order_box.addWidget(self.charges_label)
+        order_box.addWidget(self.total_label)
+        order_box.addLayout(btn_layout)
+
+        main_layout.addLayout(menu_box, 2)
+        main_layout.addLayout(order_box, 1)
+
+    def _setup_item_page(self):
+        """Sets up the layout for displaying item cards and the back button."""
+        layout = QVBoxLayout(self.item_page)
+        
+        
+        self.back_to_categories_btn = create_button("← Back to Categories", "secondary")
+        self.back_to_categories_btn.setFont(QFont("Inter", 12))
+        self.back_to_categories_btn.clicked.connect(self._go_back_to_categories)
+        
+        back_btn_layout = QHBoxLayout()
+        back_btn_layout.addWidget(self.back_to_categories_btn)
+        back_btn_layout.addStretch(1)
+        
+        layout.addLayout(back_btn_layout)
+        
+        
+        self.menu_grid_widget = QWidget()
+        self.menu_grid_layout = QGridLayout(self.menu_grid_widget)
+        self.menu_grid_layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        
+        layout.addWidget(self.menu_grid_widget)
+        layout.setStretch(1, 1) 
+        
+        self.item_page.setLayout(layout)
+
+    
+    def _setup_category_page(self, categories):
+        """Builds the category selection grid with large buttons."""
+        
+        if self.category_page.layout() is not None:
+             
+            QWidget().setLayout(self.category_page.layout())
+        
+        layout = QGridLayout(self.category_page)
+        
+        row, col = 0, 0
+        max_cols = 2
+        
+        for category_name in categories:
+            
+            btn = create_button(category_name, "primary")
+            btn.setFont(QFont("Inter", 20, QFont.Bold)) 
+            btn.setMinimumSize(250, 150) 
+            btn.clicked.connect(lambda _, c=category_name: self.menu_filter_requested.emit(c))
+            
+            layout.addWidget(btn, row, col)
+            col += 1
+            if col >= max_cols:
+                col = 0
+                row += 1
+        
+        layout.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
+        self.category_page.setLayout(layout)
+
+    
+    def clear_menu_search(self):
+        """Empty the search bar without emitting a new search."""
+        self.pos_search_input.blockSignals(True)
+        self.pos_search_input.clear()
+        self.pos_search_input.blockSignals(False)
+
+    def _go_back_to_categories(self):
+        """Switches the view back to category selection (index 0)."""
+        self.clear_menu_search()
+        if self.stored_categories:
+            self._setup_category_page(self.stored_categories)
+        self.menu_stack.setCurrentIndex(0)
+
+
+    def _handle_remove_order_item(self):
+        """Handle removal of selected item from order table."""
+        selected_rows = self.order_table.selectedIndexes()
+        if not selected_rows:
+            QMessageBox.warning(self, "Selection Error", "Please select an item to remove.")
+            return
+        
+        row = selected_rows[0].row()
+        item_name = self.order_table.item(row, 0).text()
+        
+        if hasattr(self, 'current_order_item_ids') and row < len(self.current_order_item_ids):
+            item_id = self.current_order_item_ids[row]
+            self.remove_order_item_requested.emit(item_id)
+
+    def _create_menu_card(self, item_id, name, price, stock, category):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        widget.setStyleSheet(f"""
+            QWidget {{ background-color: #FFFFFF; border: 2px solid #D2B48C; border-radius: 12px; padding: 10px; margin: 5px;}}
+            QWidget:hover {{ border-color: #A0522D;}}
+        """)
+        widget.setProperty('item_id', item_id)
+        widget.mousePressEvent = lambda event: self.order_item_clicked.emit(item_id)
+
+        name_label = create_label(name, 14, True)
+        name_label.setAlignment(Qt.AlignCenter)
+        price_label = create_label(format_money(price), 12, False)
+        price_label.setAlignment(Qt.AlignCenter)
+        stock_label = create_label(f"Code {item_id} · Available: {stock}", 10, False)
+        stock_label.setAlignment(Qt.AlignCenter)
+
+        layout.addWidget(name_label)
+        layout.addWidget(price_label)
+        layout.addWidget(stock_label)
+        layout.setSpacing(5)
+        return widget
+
+    def update_menu_display(self, menu_items, sellable_counts=None):
+        """Rebuild the POS item cards. `sellable_counts` maps item id to how many can still be made."""
+        for i in reversed(range(self.menu_grid_layout.count())):
+            widget = self.menu_grid_layout.itemAt(i).widget()
+            if widget is not None: widget.deleteLater()
+
+        if menu_items:
+            self.menu_stack.setCurrentIndex(1)
+        
+        row, col = 0, 0
+        max_cols = 3
+        for item in menu_items:
+            available = sellable_counts.get(item.id, item.stock) if sellable_counts else item.stock
+            if available <= 0: continue
+            card = self._create_menu_card(item.id, item.name, item.price, available, item.category)
+            self.menu_grid_layout.addWidget(card, row, col)
+            col += 1
+            if col >= max_cols:
+                col = 0
+                row += 1
+
+    def update_pos_filters(self, categories):
+        """
+        Populate the POS category buttons. 
+        This is called initially by the controller on startup and switches to category view.
+        """
+        
+        self.stored_categories = categories
+        
+    
+        self._setup_category_page(categories)
+        
+        
+        self.menu_stack.setCurrentIndex(0)
+
+    def show_low_stock_banner(self, items):
+        """Show the non-modal low stock banner for (name, stock, reorder_level) tuples."""
+        details = ", ".join([f"{name} ({stock} left, reorder at {level})" for name, stock, level in items])
+        self.low_stock_banner_label.setText(f"⚠️ Low stock: {details}")
+        self.low_stock_banner.show()
+
+    def update_order_summary(self, order_data, total, promotions=None, charges=None):
+        """Show the open order. `promotions` lists the (amount, name) discounts applied to it and
+        `charges` is its OrderCharges breakdown (service charge, tax, cash rounding)."""
+        self.order_table.setRowCount(0)
+        
+        self.current_order_item_ids = []
+
+        sorted_keys = sorted(order_data.keys())
+        for i, item_id in enumerate(sorted_keys):
+            line = order_data[item_id]
+            self.current_order_item_ids.append(item_id)  
+            self.order_table.insertRow(i)
+            self.order_table.setItem(i, 0, QTableWidgetItem(line.name))
+            self.order_table.setItem(i, 1, QTableWidgetItem(format_money(line.price)))
+            self.order_table.setItem(i, 2, QTableWidgetItem(str(line.qty)))
+            self.order_table.setItem(i, 3, QTableWidgetItem(format_money(line.subtotal)))
+
+        if promotions:
+            self.promotions_label.setText("\n".join(f"🏷️ {name}: {format_money(-amount)}" for amount, name in promotions))
+            self.promotions_label.show()
+        else:
+            self.promotions_label.hide()
+        charge_lines = []
+        if charges is not None:
+            if charges.service_charge:
+                charge_lines.append(f"Service charge: {format_money(charges.service_charge)}")
+            if charges.tax:
+                included = " (included)" if self.charge_settings.tax_inclusive else ""
+                charge_lines.append(f"Tax{included}: {format_money(charges.tax)}")
+            if charges.rounding_adjustment:
+                charge_lines.append(f"Rounding: {format_money(charges.rounding_adjustment)}")
+        self.charges_label.setText("\n".join(charge_lines))
+        self.charges_label.setVisible(bool(charge_lines))
+        self.total_label.setText(f"TOTAL: {format_money(total)}")
+
+    def _setup_admin_tab(self):
+        main_layout = QHBoxLayout(self.admin_widget)
+
+        form_widget = QGroupBox("Item Details")
+        form_layout = QVBoxLayout(form_widget)
+        self.id_input = QLineEdit();
+        self.id_input.setVisible(False)
+        self.name_input = create_input("Item Name")
+        self.price_input = create_input("Price (e.g., 250.00)")
+        self.stock_input = create_input("Initial Stock (e.g., 100)")
+        self.reorder_input = create_input("Reorder Level (e.g., 10)")
+        self.category_combo = QComboBox()
+        self.category_combo.setEditable(True)
+        self.category_combo.setFont(QFont("Inter", 10))
+        self.category_combo.setStyleSheet("padding: 5px;")
+
+        form_layout.addWidget(create_label("Category:", 11, True))
+        form_layout.addWidget(self.category_combo)
+        form_layout.addWidget(create_label("Name:", 11, True));
+        form_layout.addWidget(self.name_input)
+        form_layout.addWidget(create_label("Price:", 11, True));
+        form_layout.addWidget(self.price_input)
+        form_layout.addWidget(create_label("Stock:", 11, True));
+        form_layout.addWidget(self.stock_input)
+        form_layout.addWidget(create_label("Reorder Level:", 11, True));
+        form_layout.addWidget(self.reorder_input)
+
+        self.add_btn = create_button("      ➕       Add Item", "primary")
+        self.update_btn = create_button("      ✏️       Update Selected Item", "secondary")
+        self.delete_btn = create_button("      ❌       Delete Selected Item", "secondary")
+        self.clear_form_btn = create_button("Clear Form", "secondary")
+
+        self.add_btn.clicked.connect(self._emit_add_item_signal)
+        self.update_btn.clicked.connect(self._emit_update_item_signal)
+        self.delete_btn.clicked.connect(self._emit_delete_item_signal)
+        self.clear_form_btn.clicked.connect(self.clear_crud_form)
+
+        form_layout.addWidget(self.add_btn)
+        form_layout.addWidget(self.update_btn)
+        form_layout.addWidget(self.delete_btn)
+        form_layout.addWidget(self.clear_form_btn)
+        form_layout.addStretch(1)
+
+        self.menu_table_model = MenuTableModel(self)
+        self.menu_proxy_model = MenuFilterProxyModel(self)
+        self.menu_proxy_model.setSourceModel(self.menu_table_model)
+        self.menu_table = QTableView()
+        self.menu_table.setModel(self.menu_proxy_model)
+        self.menu_table.setSortingEnabled(True)
+        self.menu_table.sortByColumn(1, Qt.AscendingOrder)
+        self.menu_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.menu_table.setSelectionBehavior(QTableView.SelectRows)
+        self.menu_table.setSelectionMode(QTableView.SingleSelection)
+        self.menu_table.clicked.connect(self.load_selected_item_to_form)
+
+        # Right side: search + table
+        right_widget = QWidget()
+        right_layout = QVBoxLayout(right_widget)
+        # search input to filter admin menu table, applied once typing pauses
+        self.menu_search_input = create_input("Search menu by name or category")
+        self.menu_search_timer = QTimer(self)
+        self.menu_search_timer.setSingleShot(True)
+        self.menu_search_timer.setInterval(ADMIN_SEARCH_DEBOUNCE_MS)
+        self.menu_search_timer.timeout.connect(lambda: self._filter_admin_menu(self.menu_search_input.text()))
+        self.menu_search_input.textChanged.connect(self.menu_search_timer.start)
+
+        right_layout.addWidget(self.menu_search_input)
+        right_layout.addWidget(self.menu_table)
+
+        main_layout.addWidget(form_widget, 1)
+        main_layout.addWidget(right_widget, 2)
+
+    def _get_form_data(self):
+        name = self.name_input.text().strip()
+        category = self.category_combo.currentText().strip()
+        price_str = self.price_input.text().strip()
+        stock_str = self.stock_input.text().strip()
+        item_id_str = self.id_input.text().strip()
+        reorder_str = self.reorder_input.text().strip()
+
+        try:
+            price = to_centavos(price_str)
+            stock = int(stock_str)
+            item_id = int(item_id_str) if item_id_str else None
+            reorder_level = int(reorder_str) if reorder_str else 10
+        except ValueError:
+            return None, "Price must be a number and Stock and Reorder Level must be integers."
+
+        if not name or not category or price <= 0 or stock < 0 or reorder_level < 0:
+            return None, "Please fill all fields correctly."
+
+        return (item_id, name, price, stock, category, reorder_level), None
+
+    def _emit_add_item_signal(self):
+        data, error = self._get_form_data()
+        if error:
+            QMessageBox.warning(self, "Input Error", error)
+            return
+        _, name, price, stock, category, reorder_level = data
+        self.menu_item_added.emit(name, price, stock, category, reorder_level)
+
+    def _emit_update_item_signal(self):
+        data, error = self._get_form_data()
+        if error:
+            QMessageBox.warning(self, "Input Error", error)
+            return
+        item_id, name, price, stock, category, reorder_level = data
+        if not item_id:
+            QMessageBox.warning(self, "Selection Error", "Please select an item to update.")
+            return
+        self.menu_item_updated.emit(item_id, name, price, stock, category, reorder_level)
+
+    def _emit_delete_item_signal(self):
+        item_id_str = self.id_input.text()
+        if not item_id_str:
+            QMessageBox.warning(self, "Selection Error", "Please select an item to delete.")
+            return
+
+        reply = QMessageBox.question(self, 'Confirm Deletion',
+                                     f"Are you sure you want to delete Item ID {item_id_str}?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.menu_item_deleted.emit(int(item_id_str))
+
+    def _filter_admin_menu(self, text):
+        """Filter the admin menu table rows by name or category, case-insensitive."""
+        self.menu_proxy_model.set_query(text)
+
+    def update_admin_menu_table(self, items):
+        self.menu_table_model.set_items(items)
+
+    def update_category_combo(self, categories):
+        self.category_combo.clear()
+        self.category_combo.addItems(categories + ['New Category...'])
+        self.category_combo.setCurrentIndex(0)
+
+    def clear_crud_form(self):
+        self.id_input.clear()
+        self.name_input.clear()
+        self.price_input.clear()
+        self.stock_input.clear()
+        self.reorder_input.clear()
+        self.category_combo.setCurrentIndex(0)
+
+    def load_selected_item_to_form(self):
+        selected_rows = self.menu_table.selectionModel().selectedRows()
+        if not selected_rows: return
+        item = self.menu_table_model.item_at(self.menu_proxy_model.mapToSource(selected_rows[0]).row())
+        self.id_input.setText(str(item.id))
+        self.name_input.setText(item.name)
+        self.category_combo.setCurrentText(item.category)
+        self.price_input.setText(format_amount(item.price))
+        self.stock_input.setText(str(item.stock))
+        self.reorder_input.setText(str(item.reorder_level))
+
+    def _setup_report_tab(self):
+        main_layout = QVBoxLayout(self.report_widget)
+        self.report_title_label = create_label("      📈       Sales Reports (Last 30 Days)", 16, True)
+        main_layout.addWidget(self.report_title_label)
+
+        range_row = QHBoxLayout()
+        self.report_range_combo = QComboBox()
+        self.report_range_combo.setFont(QFont("Inter", 10))
+        for label, range_key in REPORT_RANGE_OPTIONS:
+            self.report_range_combo.addItem(label, range_key)
+        self.report_range_combo.setCurrentIndex(1)
+        self.report_range_combo.currentIndexChanged.connect(self._on_report_range_selected)
+
+        today = QDate.currentDate()
+        self.report_start_date = QDateEdit(today.addDays(-29))
+        self.report_end_date = QDateEdit(today)
+        for date_edit in (self.report_start_date, self.report_end_date):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("yyyy-MM-dd")
+            date_edit.setEnabled(False)
+        self.apply_range_btn = create_button("Apply", "secondary")
+        self.apply_range_btn.setEnabled(False)
+        self.apply_range_btn.clicked.connect(self._emit_report_range)
+
+        range_row.addWidget(create_label("Range:", 11, True))
+        range_row.addWidget(self.report_range_combo)
+        range_row.addWidget(create_label("From:", 11, False))
+        range_row.addWidget(self.report_start_date)
+        range_row.addWidget(create_label("To:", 11, False))
+        range_row.addWidget(self.report_end_date)
+        range_row.addWidget(self.apply_range_btn)
+        range_row.addStretch(1)
+        main_layout.addLayout(range_row)
+
+        top_row_layout = QHBoxLayout()
+        self.top_items_canvas = GraphCanvas("Top 5 Selling Items (Quantity)")
+        top_row_layout.addWidget(self.top_items_canvas)
+        self.category_sales_canvas = GraphCanvas("Revenue Share by Category")
+        top_row_layout.addWidget(self.category_sales_canvas)
+
+        bottom_row_layout = QHBoxLayout()
+        self.daily_sales_canvas = GraphCanvas("Daily Revenue Trend")
+        bottom_row_layout.addWidget(self.daily_sales_canvas)
+        self.hourly_heatmap_canvas = GraphCanvas("Orders by Weekday & Hour")
+        bottom_row_layout.addWidget(self.hourly_heatmap_canvas)
+
+        main_layout.addLayout(top_row_layout)
+        main_layout.addLayout(bottom_row_layout)
+        main_layout.addStretch(1)
+
+    def _on_report_range_selected(self, index):
+        is_custom = self.report_range_combo.itemData(index) == 'custom'
+        self.report_start_date.setEnabled(is_custom)
+        self.report_end_date.setEnabled(is_custom)
+        self.apply_range_btn.setEnabled(is_custom)
+        if not is_custom:
+            self._emit_report_range()
+
+    def _emit_report_range(self):
+        range_key = self.report_range_combo.currentData()
+        if range_key == 'custom':
+            start = self.report_start_date.date().toString("yyyy-MM-dd")
+            end = self.report_end_date.date().toString("yyyy-MM-dd")
+        else:
+            start = end = ""
+        self.report_range_changed.emit(range_key, start, end)
+
+    def update_report_views(self, report):
+        """Draw the report charts from a reports.ReportData of precomputed aggregates."""
+        bucket = report.bucket
+        range_label = self.report_range_combo.currentText()
+        if self.report_range_combo.currentData() == 'custom':
+            range_label = f"{self.report_start_date.date().toString('yyyy-MM-dd')} to {self.report_end_date.date().toString('yyyy-MM-dd')}"
+        self.report_title_label.setText(f"      📈       Sales Reports ({range_label})")
+        if report.empty:
+            self.top_items_canvas.clear_plot("Top 5 Selling Items (Quantity)")
+            self.category_sales_canvas.clear_plot("Revenue Share by Category")
+            self.daily_sales_canvas.clear_plot(TREND_BUCKET_LABELS.get(bucket, TREND_BUCKET_LABELS['day'])[0])
+        else:
+            self.top_items_canvas.plot_top_selling_items(report.top_items)
+            self.category_sales_canvas.plot_sales_by_category(report.category_revenue)
+            self.daily_sales_canvas.plot_daily_sales(report.revenue_trend, bucket)
+        self.hourly_heatmap_canvas.plot_hourly_heatmap(report.hourly_orders)
+
+    def _setup_transaction_history_tab(self):
+        main_layout = QVBoxLayout(self.history_widget)
+        main_layout.addWidget(create_label("      🧾       Transaction History", 16, True))
+
+        self.history_table = QTableWidget()
+        self.history_table.setColumnCount(5)
+        self.history_table.setHorizontalHeaderLabels(["Receipt ID", "Date & Time", "Items", "Total (₱)", "Saved At"]) 
+        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        
+        self.history_table.cellDoubleClicked.connect(lambda r, c: self._show_receipt_dialog(r))
+        main_layout.addWidget(self.history_table)
+
+        btn_row = QHBoxLayout()
+        refresh_btn = create_button("Refresh History", "secondary")
+        refresh_btn.clicked.connect(lambda: self.tab_changed.emit("Transaction History"))
+        btn_row.addWidget(refresh_btn)
+        main_layout.addLayout(btn_row)
+        main_layout.addStretch(1)
+
+    def update_transaction_history(self, receipts):
+        """`receipts` is an iterable of Receipt records."""
+        try:
+            self.history_receipts = list(receipts)
+            self.history_table.setRowCount(len(self.history_receipts))
+            for row, receipt in enumerate(self.history_receipts):
+                items_str = ", ".join([f"{line.name} x{line.qty}" for line in receipt.items]) or "-"
+
+                self.history_table.setItem(row, 0, QTableWidgetItem(receipt.receipt_uuid))
+                self.history_table.setItem(row, 1, QTableWidgetItem(receipt.sale_date))
+                self.history_table.setItem(row, 2, QTableWidgetItem(items_str))
+                self.history_table.setItem(row, 3, QTableWidgetItem(format_money(receipt.total)))
+                self.history_table.setItem(row, 4, QTableWidgetItem(receipt.created_at))
+        except Exception:
+            pass
+
+    def _show_receipt_dialog(self, row=None):
+        """Open a modal dialog showing receipt details for the selected row."""
+        try:
+            if row is None:
+                row = self.history_table.currentRow()
+            if row < 0:
+                return
+            receipt = None
+            if hasattr(self, 'history_receipts') and row < len(self.history_receipts):
+                receipt = self.history_receipts[row]
+            if receipt is None:
+                QMessageBox.warning(self, "No Data", "Receipt details are not available.")
+                return
+
+            dlg = ReceiptDetailsDialog(receipt, parent=self)
+            dlg.print_requested.connect(self.print_receipt_requested)
+            dlg.refund_requested.connect(self.refund_receipt_requested)
+            dlg.exec_()
+        except Exception:
+            pass
+
+    def _setup_eod_tab(self):
+        main_layout = QVBoxLayout(self.eod_widget)
+        main_layout.setSpacing(15)
+
+        self.simulated_date_display = create_label("", 18, True);
+        self.simulated_date_display.setStyleSheet("color: #8B4513;")
+        main_layout.addWidget(self.simulated_date_display)
+        main_layout.addWidget(create_label("      💰       End of Day Operations & Summary", 18, True))
+
+        summary_group = QGroupBox("Current Day Summary");
+        summary_group.setStyleSheet("QGroupBox {background-color: #EDEAE4; border-radius: 10px; padding: 20px;}")
+        summary_layout = QGridLayout(summary_group)
+        self.eod_date_label = create_label("Report Date: --", 14, True)
+        self.eod_rev_label = create_label("Total Revenue: ₱0.00", 16, True)
+        self.eod_top_items_label = create_label("Top 3 Sellers:\n-", 12, False)
+        self.eod_low_stock_label = create_label("Low Stock Items:\n-", 12, False)
+        self.eod_prep_list_label = create_label("Prep List:\n-", 12, False)
+        summary_layout.addWidget(self.eod_date_label, 0, 0, 1, 3)
+        summary_layout.addWidget(self.eod_rev_label, 1, 0, 1, 3)
+        summary_layout.addWidget(self.eod_top_items_label, 2, 0)
+        summary_layout.addWidget(self.eod_low_stock_label, 2, 1)
+        summary_layout.addWidget(self.eod_prep_list_label, 2, 2)
+        main_layout.addWidget(summary_group)
+
+        eod_btn = create_button("      💾       Save EOD & Start Next Day", "primary")
+        eod_btn.clicked.connect(self.eod_action_requested.emit)
+        main_layout.addWidget(eod_btn)
+
+        retrieve_btn = create_button("      🔁       Retrieve Cleared EOD Records", "secondary")
+        retrieve_btn.clicked.connect(self._confirm_retrieve_archived)
+        main_layout.addWidget(retrieve_btn)
+
+        archive_btn = create_button("      🗄️       Archive Closed Months", "secondary")
+        archive_btn.clicked.connect(self.archive_months_requested.emit)
+        main_layout.addWidget(archive_btn)
+
+        main_layout.addWidget(create_label("      📄       Past End of Day Records", 14, True))
+        self.past_eod_table = QTableWidget()
+        self.past_eod_table.setColumnCount(4)
+        self.past_eod_table.setHorizontalHeaderLabels(["Date", "Revenue (₱)", "Top Items", "Low Stock"])
+        self.past_eod_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        main_layout.addWidget(self.past_eod_table)
+
+        self.eod_page = 0
+        pager = QHBoxLayout()
+        self.eod_newer_btn = create_button("◀ Newer", "secondary")
+        self.eod_newer_btn.clicked.connect(lambda: self.eod_page_requested.emit(self.eod_page - 1))
+        self.eod_older_btn = create_button("Older ▶", "secondary")
+        self.eod_older_btn.clicked.connect(lambda: self.eod_page_requested.emit(self.eod_page + 1))
+        self.eod_page_label = create_label("Page 1 of 1", 10, False)
+        pager.addWidget(self.eod_newer_btn)
+        pager.addStretch(1)
+        pager.addWidget(self.eod_page_label)
+        pager.addStretch(1)
+        pager.addWidget(self.eod_older_btn)
+        main_layout.addLayout(pager)
+
+        main_layout.addWidget(create_label("      ⚠️       Admin Action: Delete ALL Sales Records", 12, True))
+        clear_sales_btn = create_button("      ❌       CLEAR ALL HISTORICAL SALES DATA", "danger")
+        clear_sales_btn.clicked.connect(self._prompt_clear_sales_data)
+        main_layout.addWidget(clear_sales_btn)
+        main_layout.addStretch(1)
+
+    def update_eod_summary_view(self, summary, current_date):
+        current_date_str = current_date.strftime('%Y-%m-%d')
+        self.simulated_date_display.setText(f"Simulated POS Date: {current_date_str}")
+        self.eod_date_label.setText(f"Report Date: {current_date_str}")
+        self.eod_rev_label.setText(f"Total Revenue Today: {format_money(summary.total_revenue)}")
+
+        top_items_text = "Top 3 Sellers Today:\n"
+        if summary.top_items:
+            for name, qty in summary.top_items:
+                top_items_text += f"- {name} ({qty} units)\n"
+        else:
+            top_items_text += "No sales recorded today."
+        self.eod_top_items_label.setText(top_items_text)
+
+        low_stock_text = "Low Stock Items (below reorder level):\n"
+        if summary.low_stock:
+            for name, stock in summary.low_stock:
+                low_stock_text += f"- {name} ({stock} left)\n"
+        else:
+            low_stock_text += "All items are above their reorder level."
+        self.eod_low_stock_label.setText(low_stock_text)
+
+    def update_prep_list_view(self, prep_list, current_date):
+        prep_text = f"Prep List for {current_date.strftime('%a %Y-%m-%d')} (forecast):\n"
+        if prep_list:
+            for item in prep_list:
+                extra = f", prepare {item.to_prepare}" if item.to_prepare else ", in stock"
+                prep_text += f"- {item.name}: ~{item.forecast:.0f} units{extra}\n"
+        else:
+            prep_text += "Not enough sales history to forecast yet."
+        self.eod_prep_list_label.setText(prep_text)
+
+    def _set_past_eod_row(self, row, record):
+        top_items_str = ", ".join([f"{name} ({qty})" for name, qty in record.top_items]) or "None"
+        low_stock_str = ", ".join([f"{name} ({stock})" for name, stock in record.low_stock]) or "None"
+
+        self.past_eod_table.setItem(row, 0, QTableWidgetItem(record.date))
+        self.past_eod_table.setItem(row, 1, QTableWidgetItem(format_money(record.total_revenue)))
+        self.past_eod_table.setItem(row, 2, QTableWidgetItem(top_items_str))
+        self.past_eod_table.setItem(row, 3, QTableWidgetItem(low_stock_str))
+
+    def _update_eod_pager(self, page_count):
+        self.eod_page_count = page_count
+        self.eod_page_label.setText(f"Page {self.eod_page + 1} of {page_count}")
+        self.eod_newer_btn.setEnabled(self.eod_page > 0)
+        self.eod_older_btn.setEnabled(self.eod_page + 1 < page_count)
+
+    def update_past_eod_records(self, records, page=0, page_count=1):
+        """Show one page of past EOD summaries (newest first)."""
+        self.eod_page = page
+        self.past_eod_table.setRowCount(len(records))
+        for row, record in enumerate(records):
+            self._set_past_eod_row(row, record)
+        self._update_eod_pager(page_count)
+
+    def prepend_past_eod_record(self, record, page_count, page_size):
+        """Add a newly saved summary on top of the first page instead of reloading the table."""
+        if self.eod_page == 0:
+            self.past_eod_table.insertRow(0)
+            self._set_past_eod_row(0, record)
+            if self.past_eod_table.rowCount() > page_size:
+                self.past_eod_table.removeRow(page_size)
+        self._update_eod_pager(page_count)
+
+    def _prompt_clear_sales_data(self):
+        reply = QMessageBox.critical(self, 'DANGER! Clear All Data',
+                                     "This action will permanently delete **ALL historical sales records AND ALL saved EOD summaries**. Are you absolutely sure you want to proceed?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.clear_sales_requested.emit()
+
+    def _confirm_retrieve_archived(self):
+        reply = QMessageBox.question(self, 'Retrieve Archived Records',
+                                     "Restore archived End-Of-Day summaries that were previously archived before clearing?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.retrieve_archived_requested.emit()
+
+    def _setup_settings_tab(self):
+        main_layout = QVBoxLayout(self.settings_widget)
+        main_layout.setSpacing(20)
+
+        main_layout.addWidget(create_label("      🛠️       User & System Settings", 16, True))
+
+        password_group = QGroupBox("Change User Password (Manager Only)")
+        password_layout = QVBoxLayout(password_group)
+
+        self.pass_username_combo = QComboBox()
+        self.pass_username_combo.setFont(QFont("Inter", 10))
+
+        self.old_password_input = create_input("Old Password", is_password=True)
+        self.new_password_input = create_input("New Password", is_password=True)
+        self.confirm_password_input = create_input("Confirm New Password", is_password=True)
+
+        change_pass_btn = create_button("Update Password", "primary")
+        change_pass_btn.clicked.connect(self._emit_change_password_signal)
+
+        password_layout.addWidget(create_label("User to change:", 11, True))
+        password_layout.addWidget(self.pass_username_combo)
+        password_layout.addWidget(create_label("Old Password:", 11, True))
+        password_layout.addWidget(self.old_password_input)
+        password_layout.addWidget(create_label("New Password:", 11, True))
+        password_layout.addWidget(self.new_password_input)
+        password_layout.addWidget(create_label("Confirm New Password:", 11, True))
+        password_layout.addWidget(self.confirm_password_input)
+        password_layout.addWidget(change_pass_btn)
+
+        main_layout.addWidget(password_group)
+
+        backup_group = QGroupBox("Database Backups")
+        backup_layout = QVBoxLayout(backup_group)
+        self.backup_combo = QComboBox()
+        self.backup_combo.setFont(QFont("Inter", 10))
+        backup_btn_row = QHBoxLayout()
+        backup_now_btn = create_button("Back Up Now", "primary")
+        backup_now_btn.clicked.connect(self.backup_requested.emit)
+        restore_btn = create_button("Restore Selected Backup", "danger")
+        restore_btn.clicked.connect(self._confirm_restore_backup)
+        backup_btn_row.addWidget(backup_now_btn)
+        backup_btn_row.addWidget(restore_btn)
+        backup_layout.addWidget(create_label("Available backups (newest first):", 11, True))
+        backup_layout.addWidget(self.backup_combo)
+        backup_layout.addLayout(backup_btn_row)
+
+        main_layout.addWidget(backup_group)
+
+        charges_group = QGroupBox("Tax & Service Charge")
+        charges_layout = QGridLayout(charges_group)
+        self.tax_rate_input = create_input("Tax rate % (e.g., 12)")
+        self.tax_mode_combo = QComboBox()
+        self.tax_mode_combo.addItem("Prices include tax", True)
+        self.tax_mode_combo.addItem("Add tax on top", False)
+        self.service_rate_input = create_input("Service charge % (e.g., 10)")
+        self.charge_rounding_combo = QComboBox()
+        self.charge_rounding_combo.addItem("Compute on the order total", 'order')
+        self.charge_rounding_combo.addItem("Compute per line", 'line')
+        self.cash_increment_combo = QComboBox()
+        for label, increment in (("No cash rounding", 1), ("Nearest ₱0.25", 25), ("Nearest ₱1.00", 100)):
+            self.cash_increment_combo.addItem(label, increment)
+        save_charges_btn = create_button("Save Charges", "primary")
+        save_charges_btn.clicked.connect(self._emit_charge_settings)
+        charges_layout.addWidget(create_label("Tax rate (%):", 11, True), 0, 0)
+        charges_layout.addWidget(self.tax_rate_input, 0, 1)
+        charges_layout.addWidget(self.tax_mode_combo, 0, 2)
+        charges_layout.addWidget(create_label("Service charge (%):", 11, True), 1, 0)
+        charges_layout.addWidget(self.service_rate_input, 1, 1)
+        charges_layout.addWidget(self.charge_rounding_combo, 1, 2)
+        charges_layout.addWidget(create_label("Cash rounding:", 11, True), 2, 0)
+        charges_layout.addWidget(self.cash_increment_combo, 2, 1)
+        charges_layout.addWidget(save_charges_btn, 2, 2)
+
+        main_layout.addWidget(charges_group)
+
+        printer_group = QGroupBox("Receipt Printer")
+        printer_layout = QGridLayout(printer_group)
+        self.printer_output_input = create_input("Spool folder or device file (empty = don't print)")
+        self.printer_format_combo = QComboBox()
+        for label, print_format in (("ESC/POS printer", 'escpos'), ("Plain text", 'text'), ("PDF", 'pdf')):
+            self.printer_format_combo.addItem(label, print_format)
+        self.shop_name_input = create_input("Shop name printed on top")
+        self.receipt_footer_input = create_input("Footer line")
+        save_printer_btn = create_button("Save Printer", "primary")
+        save_printer_btn.clicked.connect(self._emit_print_settings)
+        printer_layout.addWidget(create_label("Output:", 11, True), 0, 0)
+        printer_layout.addWidget(self.printer_output_input, 0, 1)
+        printer_layout.addWidget(self.printer_format_combo, 0, 2)
+        printer_layout.addWidget(create_label("Header / footer:", 11, True), 1, 0)
+        printer_layout.addWidget(self.shop_name_input, 1, 1)
+        printer_layout.addWidget(self.receipt_footer_input, 1, 2)
+        printer_layout.addWidget(save_printer_btn, 2, 2)
+
+        main_layout.addWidget(printer_group)
+        main_layout.addStretch(1)
+
+    def update_charge_settings(self, settings):
+        """Remember the ChargeSettings in use and show them in the Settings tab (managers only)."""
+        self.charge_settings = settings
+        if not hasattr(self, 'tax_rate_input'):
+            return
+        self.tax_rate_input.setText(f"{settings.tax_rate:g}")
+        self.tax_mode_combo.setCurrentIndex(self.tax_mode_combo.findData(settings.tax_inclusive))
+        self.service_rate_input.setText(f"{settings.service_rate:g}")
+        self.charge_rounding_combo.setCurrentIndex(self.charge_rounding_combo.findData(settings.rounding))
+        index = self.cash_increment_combo.findData(settings.cash_increment)
+        self.cash_increment_combo.setCurrentIndex(max(index, 0))
+
+    def _emit_charge_settings(self):
+        try:
+            tax_rate = float(self.tax_rate_input.text().strip() or 0)
+            service_rate = float(self.service_rate_input.text().strip() or 0)
+        except ValueError:
+            QMessageBox.warning(self, "Input Error", "Tax and service charge rates must be numbers.")
+            return
+        if not (0 <= tax_rate <= 100 and 0 <= service_rate <= 100):
+            QMessageBox.warning(self, "Input Error", "Rates must be between 0 and 100 percent.")
+            return
+        self.charge_settings_saved.emit(ChargeSettings(tax_rate, self.tax_mode_combo.currentData(), service_rate,
+                                                       self.charge_rounding_combo.currentData(),
+                                                       self.cash_increment_combo.currentData()))
+
+    def update_print_settings(self, settings):
+        """Show the PrintSettings in use in the Settings tab (managers only)."""
+        self.print_settings = settings
+        if not hasattr(self, 'printer_output_input'):
+            return
+        self.printer_output_input.setText(settings.output)
+        self.printer_format_combo.setCurrentIndex(max(self.printer_format_combo.findData(settings.format), 0))
+        self.shop_name_input.setText(settings.shop_name)
+        self.receipt_footer_input.setText(settings.footer)
+
+    def _emit_print_settings(self):
+        print_format = self.printer_format_combo.currentData()
+        if print_format not in PRINT_FORMATS:
+            return
+        self.print_settings_saved.emit(self.print_settings._replace(
+            output=self.printer_output_input.text().strip(), format=print_format,
+            shop_name=self.shop_name_input.text().strip() or self.print_settings.shop_name,
+            footer=self.receipt_footer_input.text().strip()))
+
+    def update_backup_list(self, backup_paths):
+        self.backup_combo.clear()
+        for path in backup_paths:
+            self.backup_combo.addItem(os.path.basename(path), path)
+
+    def _confirm_restore_backup(self):
+        backup_path = self.backup_combo.currentData()
+        if not backup_path:
+            QMessageBox.warning(self, "Selection Error", "Please select a backup to restore.")
+            return
+        reply = QMessageBox.question(self, 'Restore Backup',
+                                     f"Replace the current database with {os.path.basename(backup_path)}? A copy of the current data is saved first.",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.restore_backup_requested.emit(backup_path)
+
+    def update_password_combo(self, usernames):
+        self.pass_username_combo.clear()
+        self.pass_username_combo.addItems(usernames)
+
+    def _emit_change_password_signal(self):
+        username = self.pass_username_combo.currentText().strip()
+        old_pass = self.old_password_input.text().strip()
+        new_pass = self.new_password_input.text().strip()
+        confirm_pass = self.confirm_password_input.text().strip()
+
+        if not all([username, old_pass, new_pass, confirm_pass]):
+            QMessageBox.warning(self, "Input Error", "All password fields must be filled.")
+            return
+
+        if new_pass != confirm_pass:
+            QMessageBox.warning(self, "Input Error", "New password and confirmation do not match.")
+            return
+
+        self.password_change_requested.emit(username, old_pass, new_pass, confirm_pass)
+
+    def clear_password_fields(self):
+        self.old_password_input.clear()
+        self.new_password_input.clear()
+        self.confirm_password_input.clear()
+
+    def show_toast(self, message, level='info'):
+        """Show a short notification that disappears by itself after TOAST_TIMEOUT_MS."""
+        self.toast.setText(message)
+        self.toast.setStyleSheet(TOAST_STYLES.get(level, TOAST_STYLES['info']))
+        self.toast.adjustSize()
+        self.toast.move((self.width() - self.toast.width()) // 2,
+                        self.height() - self.statusBar().height() - self.toast.height() - 20)
+        self.toast.raise_()
+        self.toast.show()
+        self.toast_timer.start(TOAST_TIMEOUT_MS)
+        self.statusBar().showMessage(message, TOAST_TIMEOUT_MS)
+
+    def show_ready_for_next_order(self, total, receipt_uuid, elapsed, average):
+        """Put the POS tab back to its start state after a payment: categories showing, search bar
+        empty and focused. `elapsed` and `average` are tap-to-ready times in seconds."""
+        self.clear_menu_search()
+        self.menu_stack.setCurrentIndex(0)
+        self.pos_search_input.setFocus()
+        self.ready_label.setText(f"Ready for next order · checkout {elapsed * 1000:.0f} ms (avg {average * 1000:.0f} ms)")
+        message = f"Paid {format_money(total)}"
+        if receipt_uuid:
+            message += f" · receipt {receipt_uuid[:8]}"
+        self.show_toast(message, 'success')
+
+    def show_info(self, title, message):
+        QMessageBox.information(self, title, message)
+
+    def show_warning(self, title, message):
+        QMessageBox.warning(self, title, message)
+
+    def show_error(self, title, message):
         QMessageBox.critical(self, title, message)
\ No newline at end of file